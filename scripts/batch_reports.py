@@ -0,0 +1,164 @@
+"""Relatórios PDF em lote de uma pasta de procedimentos, sem interface.
+
+Para cada procedimento (`.json`) ou pacote (`.tfmjob`) da pasta, inclusive
+em subpastas, gera o mesmo relatório de Arquivo → Gerar Relatório PDF:
+vista 3D renderizada fora da tela (Matplotlib Agg), parâmetros, resultados
+calculados e estimativa de custo/tempo com a configuração do app. Os
+relatórios saem em paralelo, um processo por núcleo.
+
+Um manifesto na pasta de saída (`.reports.json`) guarda o hash de cada
+relatório: conteúdo do arquivo, custos/fórmulas da configuração, logo e
+versão do layout. Procedimentos que não mudaram desde a última execução
+são pulados (`--force` gera todos de novo).
+
+Uso:
+  python scripts/batch_reports.py data/procedures                 # saída em data/procedures.reports
+  python scripts/batch_reports.py data/procedures --output relatorios --processes 4
+  python scripts/batch_reports.py data/procedures --force
+"""
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+
+# Sem janela: o Matplotlib dos processos de renderização usa o Agg
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+APP_DIR = PROJECT_ROOT / 'src' / 'app'
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from procedure_library import scan_folder
+from report_pdf import render_procedure_report, report_digest
+from tap_writer import write_text_atomic
+
+DEFAULT_CONFIG = PROJECT_ROOT / 'config' / 'config.json'
+DEFAULT_LOGO = PROJECT_ROOT / 'assets' / 'logo.png'
+MANIFEST_NAME = '.reports.json'
+
+
+def default_output_dir(folder: str) -> str:
+    """Pasta dos relatórios ao lado da pasta de procedimentos: `<pasta>.reports`."""
+    return f"{os.path.abspath(folder).rstrip(os.sep)}.reports"
+
+
+def load_config(path: str | os.PathLike | None = None) -> dict:
+    """Configuração do app (custos, fórmulas, pós); vazia se o arquivo não existir."""
+    try:
+        with open(path or DEFAULT_CONFIG, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def load_manifest(out_dir: str) -> dict:
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def plan_reports(folder: str, out_dir: str, config: dict, logo_path: str | None = None,
+                 manifest: dict | None = None, force: bool = False) -> tuple[list[dict], list[str]]:
+    """(tarefas a gerar, arquivos pulados por não terem mudado) — caminhos relativos à pasta."""
+    manifest = manifest or {}
+    tasks, skipped = [], []
+    for rel in sorted(scan_folder(folder)):
+        path = os.path.join(folder, rel)
+        try:
+            digest = report_digest(path, config, logo_path)
+        except OSError:
+            continue
+        name = os.path.splitext(rel)[0]
+        pdf = name + '.pdf'
+        known = manifest.get(rel) or {}
+        if not force and known.get('hash') == digest and os.path.exists(os.path.join(out_dir, pdf)):
+            skipped.append(rel)
+            continue
+        tasks.append({'rel': rel, 'path': path, 'name': name, 'pdf': pdf, 'hash': digest})
+    return tasks, skipped
+
+
+def _render_task(args):
+    task, config, out_dir, logo_path = args
+    result = render_procedure_report(task['path'], config, out_dir, name=task['name'], logo_path=logo_path)
+    return task, result
+
+
+def run_batch(folder: str, out_dir: str | None = None, config: dict | None = None, logo_path: str | None = None,
+              processes: int | None = None, force: bool = False, progress=None) -> dict:
+    """Gera os relatórios que mudaram; retorna {'generated', 'skipped', 'failed': [{rel, error}], 'elapsed_s'}."""
+    folder = os.path.abspath(folder)
+    out_dir = os.path.abspath(out_dir or default_output_dir(folder))
+    config = load_config() if config is None else config
+    os.makedirs(out_dir, exist_ok=True)
+    t0 = time.perf_counter()
+    manifest = load_manifest(out_dir)
+    tasks, skipped = plan_reports(folder, out_dir, config, logo_path, manifest, force)
+    # Procedimentos removidos da pasta saem do manifesto (os PDFs já gerados ficam)
+    present = set(skipped) | {t['rel'] for t in tasks}
+    manifest = {rel: entry for rel, entry in manifest.items() if rel in present}
+    summary = {'generated': [], 'skipped': skipped, 'failed': [], 'elapsed_s': 0.0}
+    work = [(task, config, out_dir, logo_path) for task in tasks]
+    processes = max(1, min(processes or os.cpu_count() or 1, len(work) or 1))
+    pool = None
+    try:
+        if processes == 1:
+            results = map(_render_task, work)
+        else:
+            pool = multiprocessing.get_context('spawn').Pool(processes)
+            results = pool.imap_unordered(_render_task, work)
+        for done, (task, result) in enumerate(results, start=1):
+            if result['ok']:
+                manifest[task['rel']] = {'hash': task['hash'], 'pdf': task['pdf']}
+                summary['generated'].append(task['rel'])
+            else:
+                manifest.pop(task['rel'], None)
+                summary['failed'].append({'rel': task['rel'], 'error': result['error']})
+            if progress is not None:
+                progress(done, len(work), task, result)
+        if pool is not None:
+            pool.close(); pool.join()
+    finally:
+        if pool is not None:
+            pool.terminate()
+        # Grava o que já foi gerado mesmo se a execução for interrompida
+        write_text_atomic(os.path.join(out_dir, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True))
+    summary['elapsed_s'] = time.perf_counter() - t0
+    return summary
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Relatórios PDF em lote de uma pasta de procedimentos')
+    ap.add_argument('folder', help='Pasta de procedimentos (.json/.tfmjob, inclusive subpastas)')
+    ap.add_argument('--output', default='', help='Pasta dos PDFs (padrão: <pasta>.reports)')
+    ap.add_argument('--config', default=str(DEFAULT_CONFIG), help='config.json com custos e fórmulas')
+    ap.add_argument('--logo', default=str(DEFAULT_LOGO), help='Logo do cabeçalho (vazio: sem logo)')
+    ap.add_argument('--processes', type=int, default=0, help='Processos de renderização (padrão: um por núcleo)')
+    ap.add_argument('--force', action='store_true', help='Gera todos, mesmo os que não mudaram')
+    args = ap.parse_args(argv)
+
+    if not os.path.isdir(args.folder):
+        print(f"[relatórios] Pasta não encontrada: {args.folder}")
+        return 2
+
+    def report(done, total, task, result):
+        status = 'ok' if result['ok'] else f"ERRO: {result['error']}"
+        print(f"[relatórios] {done}/{total} {task['rel']} -> {status}")
+
+    summary = run_batch(args.folder, args.output or None, load_config(args.config), logo_path=args.logo or None,
+                        processes=args.processes or None, force=args.force, progress=report)
+    print(f"[relatórios] {len(summary['generated'])} gerados, {len(summary['skipped'])} sem alteração, "
+          f"{len(summary['failed'])} com erro em {summary['elapsed_s']:.1f} s")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""Benchmark de throughput do GCodeGenerator.
+
+Mede `GCodeGenerator.generate` para os modos espiral, linear, quadrada e
+quadrada contínua, compacto e detalhado, de peças pequenas a muito grandes
+e de 1 a 20 camadas. Para cada caso informa linhas geradas, linhas/segundo
+(melhor de N repetições) e pico de memória (tracemalloc, em execução
+separada para não distorcer o tempo).
+
+Uso:
+  python scripts/bench_generator.py                    # matriz completa
+  python scripts/bench_generator.py --quick            # matriz reduzida
+  python scripts/bench_generator.py --save-baseline    # grava a baseline
+  python scripts/bench_generator.py --compare          # compara com a baseline (código 1 se regredir)
+  python scripts/bench_generator.py --compare --advisory  # só informa as regressões (código 0)
+
+A baseline é da máquina em que foi gravada (linhas/s e memória não se
+comparam entre computadores), então fica no cache do usuário, fora do
+repositório.
+"""
+from __future__ import annotations
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from generator_cases import MODES, SIZES, PROJECT_ROOT, make_params, case_id
+from updater import default_cache_dir
+
+# Por máquina e não versionada: cada computador grava a sua
+DEFAULT_BASELINE = Path(default_cache_dir()) / 'bench_generator_baseline.json'
+
+# Camadas avaliadas por tamanho (peças grandes com muitas camadas ficariam lentas demais)
+LAYERS_BY_SIZE = {
+    'pequena': (1, 5, 20),
+    'media': (1, 5),
+    'grande': (1,),
+    'muito_grande': (1,),
+}
+QUICK_SIZES = ('pequena', 'media')
+# Casos acima deste tempo não são repetidos (o ruído relativo já é pequeno)
+LONG_CASE_S = 0.5
+# Abaixo deste tempo a comparação de velocidade é ruidosa demais para acusar regressão
+MIN_COMPARE_S = 0.05
+
+
+def iter_cases(quick: bool = False):
+    """Gera (id, params) para a matriz de benchmark."""
+    for mode in MODES:
+        for compact in (True, False):
+            for size in (QUICK_SIZES if quick else SIZES):
+                # Espiral é barata: percorre todas as contagens de camada em qualquer tamanho
+                layer_counts = (1, 5, 20) if mode == 'espiral' else LAYERS_BY_SIZE[size]
+                if quick:
+                    layer_counts = tuple(n for n in layer_counts if n <= 5)
+                for layers in layer_counts:
+                    yield case_id(mode, compact, size, layers), make_params(mode, compact, size, layers)
+
+
+def run_case(params: dict, repeats: int = 3, measure_memory: bool = True) -> dict:
+    """Executa um caso e retorna linhas, melhor tempo, linhas/s e pico de memória."""
+    from TFM_GCODE import GCodeGenerator
+    gen = GCodeGenerator()
+    best = None
+    lines = 0
+    for _ in range(max(1, repeats)):
+        p = dict(params)
+        gc.collect()
+        t0 = time.perf_counter()
+        out = gen.generate(p)
+        elapsed = time.perf_counter() - t0
+        lines = len(out) if out else 0
+        del out
+        best = elapsed if best is None else min(best, elapsed)
+        if elapsed > LONG_CASE_S:
+            break
+    result = {
+        'lines': lines,
+        'seconds': best,
+        'lines_per_s': (lines / best) if best and best > 0 else 0.0,
+    }
+    if measure_memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            out = gen.generate(dict(params))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del out
+        result['peak_kib'] = peak / 1024.0
+    return result
+
+
+def compare(results: dict, baseline: dict, speed_tol: float = 0.35, mem_tol: float = 0.25):
+    """Compara resultados com a baseline. Retorna lista de (id, motivo)."""
+    regressions = []
+    base_cases = baseline.get('cases', {})
+    for cid, res in results.items():
+        ref = base_cases.get(cid)
+        if not ref:
+            continue
+        if ref.get('lines') != res.get('lines'):
+            regressions.append((cid, f"linhas {ref.get('lines')} -> {res.get('lines')}"))
+        ref_speed = ref.get('lines_per_s') or 0.0
+        fast_case = max(ref.get('seconds') or 0.0, res.get('seconds') or 0.0) < MIN_COMPARE_S
+        if ref_speed > 0 and not fast_case and res['lines_per_s'] < ref_speed * (1.0 - speed_tol):
+            regressions.append((cid, f"linhas/s {ref_speed:,.0f} -> {res['lines_per_s']:,.0f}"))
+        ref_mem = ref.get('peak_kib')
+        if ref_mem and res.get('peak_kib') and res['peak_kib'] > ref_mem * (1.0 + mem_tol):
+            regressions.append((cid, f"pico {ref_mem:,.0f} KiB -> {res['peak_kib']:,.0f} KiB"))
+    return regressions
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Benchmark do GCodeGenerator')
+    ap.add_argument('--quick', action='store_true', help='Matriz reduzida (peças pequenas/médias, até 5 camadas)')
+    ap.add_argument('--repeats', type=int, default=3, help='Repetições por caso (usa o melhor tempo)')
+    ap.add_argument('--filter', default='', help='Executa apenas casos cujo id contém este texto')
+    ap.add_argument('--no-memory', action='store_true', help='Não mede pico de memória')
+    ap.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Arquivo JSON da baseline')
+    ap.add_argument('--save-baseline', action='store_true', help='Grava os resultados como nova baseline')
+    ap.add_argument('--compare', action='store_true', help='Compara com a baseline e falha em caso de regressão')
+    ap.add_argument('--advisory', action='store_true', help='Com --compare: só informa regressões e baseline ausente, sem falhar')
+    ap.add_argument('--speed-tol', type=float, default=0.35, help='Queda tolerada em linhas/s (fração)')
+    ap.add_argument('--mem-tol', type=float, default=0.25, help='Aumento tolerado no pico de memória (fração)')
+    ap.add_argument('--output', default='', help='Grava os resultados desta execução em JSON')
+    args = ap.parse_args(argv)
+
+    # A instrumentação da UI não deve entrar na medição
+    from instrumentation import perf
+    perf.enabled = False
+
+    results = {}
+    print(f"{'caso':<44} {'linhas':>10} {'tempo(s)':>9} {'linhas/s':>12} {'pico(KiB)':>10}")
+    for cid, params in iter_cases(args.quick):
+        if args.filter and args.filter not in cid:
+            continue
+        res = run_case(params, repeats=args.repeats, measure_memory=not args.no_memory)
+        results[cid] = res
+        peak = f"{res['peak_kib']:>10,.0f}" if 'peak_kib' in res else f"{'-':>10}"
+        print(f"{cid:<44} {res['lines']:>10,} {res['seconds']:>9.4f} {res['lines_per_s']:>12,.0f} {peak}")
+
+    payload = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'cases': results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(payload, indent=2), encoding='utf-8')
+    if args.save_baseline:
+        path = Path(args.baseline)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Preserva casos não executados nesta rodada (ex.: --quick ou --filter)
+        if path.exists():
+            try:
+                old = json.loads(path.read_text(encoding='utf-8')).get('cases', {})
+                payload['cases'] = {**old, **results}
+            except Exception:
+                pass
+        path.write_text(json.dumps(payload, indent=2), encoding='utf-8')
+        print(f"[bench] Baseline gravada em {path}")
+    if args.compare:
+        path = Path(args.baseline)
+        if not path.exists():
+            print(f"[bench] Baseline não encontrada: {path} (grave com --save-baseline)")
+            return 0 if args.advisory else 2
+        baseline = json.loads(path.read_text(encoding='utf-8'))
+        regressions = compare(results, baseline, args.speed_tol, args.mem_tol)
+        if regressions:
+            print("[bench] REGRESSÕES:")
+            for cid, why in regressions:
+                print(f"  {cid}: {why}")
+            return 0 if args.advisory else 1
+        print("[bench] Sem regressões em relação à baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""Benchmark da inicialização do app (código-fonte ou executável).
+
+Para cada execução mede, a partir do lançamento do processo:
+
+* tempo até o splash aparecer;
+* tempo até a janela ficar interativa;
+* tempo até a primeira pré-visualização (3D e G-code).
+
+O app roda no modo de medição (`TFM_STARTUP_TIMING=<json>` e
+`TFM_STARTUP_EXIT=1`). Os marcos são tomados em `after_idle`, depois que o
+Tk desenhou, e gravados com `time.time()`. O app fecha sozinho depois de
+gravar o relatório, e o script subtrai o instante do lançamento. O
+relatório traz também a duração de cada etapa (importação, construção dos
+widgets, criação de cada figura).
+
+Do código-fonte também é tirado o perfil de importação de `TFM_GCODE` com
+`python -X importtime`. O executável não aceita `-X`, então nele só há os
+marcos.
+
+Resultado em JSON: mediana de cada tempo, execuções individuais e
+destaques (importações e etapas de construção acima do limite).
+
+Uso:
+  python scripts/bench_startup.py                          # código-fonte, 3 execuções
+  python scripts/bench_startup.py --runs 5 --output startup.json
+  python scripts/bench_startup.py --exe dist/TFM_GCODE.exe # executável do PyInstaller
+  python scripts/bench_startup.py --imports-only           # só o perfil de importação
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+APP_DIR = PROJECT_ROOT / 'src' / 'app'
+APP_SCRIPT = APP_DIR / 'TFM_GCODE.py'
+
+# Marcos gravados pelo app -> nome da métrica no resultado
+MILESTONES = {
+    'splash': 'time_to_splash_ms',
+    'interativo': 'time_to_interactive_ms',
+    'primeira_previa': 'time_to_first_preview_ms',
+    'previa_gcode': 'time_to_gcode_preview_ms',
+}
+# Acima destes tempos a importação/etapa é destacada
+DEFAULT_IMPORT_FLAG_MS = 50.0
+DEFAULT_STEP_FLAG_MS = 50.0
+DEFAULT_TIMEOUT_S = 120.0
+
+_IMPORTTIME = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|( *)(\S.*)$")
+
+
+def parse_importtime(text: str) -> list[dict]:
+    """Linhas de `-X importtime` -> [{module, self_ms, cumulative_ms, depth}] na ordem do relatório."""
+    entries = []
+    for line in text.splitlines():
+        match = _IMPORTTIME.match(line.rstrip())
+        if not match:
+            continue
+        self_us, cum_us, indent, module = match.groups()
+        entries.append({
+            'module': module.strip(),
+            'self_ms': int(self_us) / 1000.0,
+            'cumulative_ms': int(cum_us) / 1000.0,
+            # Um nível a cada dois espaços (o módulo importado direto pelo -c tem nível 0)
+            'depth': max(0, (len(indent) - 1) // 2),
+        })
+    return entries
+
+
+def import_profile(python: str = sys.executable, module: str = 'TFM_GCODE') -> list[dict]:
+    """Perfil de importação do módulo em um processo novo (sem cache de módulos)."""
+    proc = subprocess.run([python, '-X', 'importtime', '-c', f"import {module}"], cwd=str(APP_DIR),
+                          capture_output=True, text=True, timeout=DEFAULT_TIMEOUT_S)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {module}: {proc.stderr.strip().splitlines()[-1:]}")
+    return parse_importtime(proc.stderr)
+
+
+def heaviest_imports(entries: list[dict], top: int = 10, flag_ms: float = DEFAULT_IMPORT_FLAG_MS) -> list[dict]:
+    """Importações diretas do módulo (nível 1) mais caras, pelo tempo acumulado; `flagged` acima de `flag_ms`."""
+    direct = [e for e in entries if e['depth'] == 1] or entries
+    ranked = sorted(direct, key=lambda e: e['cumulative_ms'], reverse=True)[:top]
+    return [dict(e, flagged=e['cumulative_ms'] >= flag_ms) for e in ranked]
+
+
+def slowest_steps(steps: list[dict], top: int = 10, flag_ms: float = DEFAULT_STEP_FLAG_MS) -> list[dict]:
+    """Etapas da inicialização mais lentas (importação, widgets, figuras); `flagged` acima de `flag_ms`."""
+    ranked = sorted(steps, key=lambda s: s['ms'], reverse=True)[:top]
+    return [dict(s, flagged=s['ms'] >= flag_ms) for s in ranked]
+
+
+def app_command(exe: str | None = None, python: str = sys.executable) -> list[str]:
+    return [exe] if exe else [python, str(APP_SCRIPT)]
+
+
+def run_app(cmd: list[str], timeout: float = DEFAULT_TIMEOUT_S) -> dict:
+    """Executa o app no modo de medição e devolve os tempos desde o lançamento."""
+    with tempfile.TemporaryDirectory() as tmp:
+        report = os.path.join(tmp, 'startup.json')
+        env = dict(os.environ, TFM_STARTUP_TIMING=report, TFM_STARTUP_EXIT='1')
+        launched = time.time()
+        proc = subprocess.run(cmd, cwd=str(PROJECT_ROOT), env=env, capture_output=True, text=True, timeout=timeout)
+        wall_ms = (time.time() - launched) * 1000.0
+        if not os.path.exists(report):
+            tail = (proc.stderr or proc.stdout or '').strip().splitlines()[-3:]
+            raise RuntimeError(f"O app terminou (código {proc.returncode}) sem gravar o relatório: {tail}")
+        with open(report, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    result = {'wall_ms': wall_ms, 'steps': data.get('steps', [])}
+    for label, metric in MILESTONES.items():
+        mark = data.get('marks', {}).get(label)
+        result[metric] = (mark['epoch'] - launched) * 1000.0 if mark else None
+    return result
+
+
+def summarize(runs: list[dict]) -> dict:
+    """Mediana de cada métrica e de cada etapa entre as execuções."""
+    summary = {}
+    for metric in list(MILESTONES.values()) + ['wall_ms']:
+        values = [r[metric] for r in runs if r.get(metric) is not None]
+        summary[metric] = statistics.median(values) if values else None
+    by_step = {}
+    for run in runs:
+        for st in run['steps']:
+            by_step.setdefault(st['step'], []).append(st['ms'])
+    steps = [{'step': name, 'ms': statistics.median(vals)} for name, vals in by_step.items()]
+    return {'metrics': summary, 'steps': steps}
+
+
+def _print_flagged(title: str, rows: list[dict], key: str, value: str):
+    print(title)
+    for row in rows:
+        mark = ' <-- pesado' if row['flagged'] else ''
+        print(f"  {row[key]:<40} {row[value]:>9.1f} ms{mark}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Benchmark da inicialização do TFM_GCODE')
+    ap.add_argument('--exe', default='', help='Executável do PyInstaller (padrão: src/app/TFM_GCODE.py com este Python)')
+    ap.add_argument('--runs', type=int, default=3, help='Execuções do app (usa a mediana)')
+    ap.add_argument('--top', type=int, default=10, help='Quantidade de importações/etapas listadas')
+    ap.add_argument('--import-flag-ms', type=float, default=DEFAULT_IMPORT_FLAG_MS, help='Destaca importações acima deste tempo acumulado')
+    ap.add_argument('--step-flag-ms', type=float, default=DEFAULT_STEP_FLAG_MS, help='Destaca etapas acima deste tempo')
+    ap.add_argument('--imports-only', action='store_true', help='Só o perfil de importação (não abre a janela)')
+    ap.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT_S, help='Tempo máximo de cada execução (s)')
+    ap.add_argument('--output', default='', help='Grava os resultados em JSON')
+    args = ap.parse_args(argv)
+
+    payload = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'target': 'frozen' if args.exe else 'source',
+        'command': app_command(args.exe or None),
+    }
+    if not args.exe:
+        entries = import_profile()
+        total = next((e['cumulative_ms'] for e in reversed(entries) if e['depth'] == 0), None)
+        payload['imports'] = {'total_ms': total, 'heaviest': heaviest_imports(entries, args.top, args.import_flag_ms)}
+        print(f"[bench] Importação de TFM_GCODE: {total:.1f} ms" if total is not None else "[bench] Importação sem perfil")
+        _print_flagged("Importações mais pesadas (acumulado):", payload['imports']['heaviest'], 'module', 'cumulative_ms')
+
+    if not args.imports_only:
+        runs = []
+        for i in range(max(1, args.runs)):
+            run = run_app(payload['command'], timeout=args.timeout)
+            runs.append(run)
+            shown = ', '.join(f"{m.split('time_to_')[1][:-3]}={run[m]:.0f}" for m in MILESTONES.values() if run.get(m) is not None)
+            print(f"[bench] execução {i + 1}: {shown} ms")
+        summary = summarize(runs)
+        payload['runs'] = runs
+        payload['metrics'] = summary['metrics']
+        payload['slowest_steps'] = slowest_steps(summary['steps'], args.top, args.step_flag_ms)
+        print("Mediana desde o lançamento:")
+        for metric, value in summary['metrics'].items():
+            print(f"  {metric:<40} {value:>9.1f} ms" if value is not None else f"  {metric:<40} {'-':>9}")
+        _print_flagged("Etapas mais lentas:", payload['slowest_steps'], 'step', 'ms')
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"[bench] Resultados gravados em {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,13 @@
 @echo off
+REM Saida de referencia do gerador: interrompe o build se o G-code mudou
+python golden_gcode.py
+if errorlevel 1 (
+  echo Saida do gerador diferente da referencia. Revise ou regrave com --update.
+  pause
+  exit /b 1
+)
+REM Benchmark rapido do gerador contra a baseline desta maquina (so informa, nao interrompe)
+python bench_generator.py --quick --compare --advisory
 REM Build sem splash para evitar sobreposição e artefatos de cor
 python -m PyInstaller ^
   TFM_GCODE_nosplash.spec
@@ -0,0 +1,71 @@
+"""Conjuntos de parâmetros padronizados para exercitar o GCodeGenerator.
+
+Usado pelo benchmark (`bench_generator.py`) e pelo harness de saída de
+referência (`golden_gcode.py`), para que ambos percorram os mesmos modos,
+tamanhos de peça e números de camadas.
+"""
+from __future__ import annotations
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+APP_DIR = PROJECT_ROOT / 'src' / 'app'
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+# Modo -> (welding_mode, oscillation_type)
+MODES = {
+    'espiral': ('espiral', None),
+    'linear': ('oscilacao', 'linear'),
+    'quadrada': ('oscilacao', 'quadrada'),
+    'quadrada_continua': ('oscilacao', 'quadrada_continua'),
+}
+
+# Tamanho -> (diâmetro mm, comprimento mm)
+SIZES = {
+    'pequena': (50.0, 60.0),
+    'media': (120.0, 200.0),
+    'grande': (250.0, 500.0),
+    'muito_grande': (400.0, 1000.0),
+}
+
+BASE_PARAMS = {
+    'nome_procedimento': 'BENCH',
+    'afastamento_tocha': 12.0,
+    'espessura_camada': 2.0,
+    'largura_cordao': 8.0,
+    'sobreposicao': 50.0,
+    'velocidade_de_deposicao': 300.0,
+    'velocidade_oscilacao_mm_min': 1200.0,
+    'oscilacao_comprimento': 20.0,
+    'deslocamento_angular_perc': 50.0,
+    'direcao_soldagem': 'esquerda_direita',
+    'sentido_rotacao': 'horaria',
+    'lead_in': 5.0,
+    'lead_out': 5.0,
+    'n_scurve_steps': 6,
+    'torch_retract_on_ignite': True,
+}
+
+
+def make_params(mode: str, compact: bool, size: str, layers: int, **overrides) -> dict:
+    """Monta um dicionário de parâmetros completo para `GCodeGenerator.generate`."""
+    welding_mode, osc_type = MODES[mode]
+    diametro, comprimento = SIZES[size]
+    params = dict(BASE_PARAMS)
+    params.update({
+        'welding_mode': welding_mode,
+        'diametro': diametro,
+        'comprimento_revestir': comprimento,
+        'num_camadas': int(layers),
+        'compact_gcode': bool(compact),
+    })
+    if osc_type:
+        params['oscillation_type'] = osc_type
+    params.update(overrides)
+    return params
+
+
+def case_id(mode: str, compact: bool, size: str, layers: int, suffix: str = '') -> str:
+    cid = f"{mode}-{'compacto' if compact else 'detalhado'}-{size}-{int(layers)}c"
+    return f"{cid}-{suffix}" if suffix else cid
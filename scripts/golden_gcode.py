@@ -0,0 +1,190 @@
+"""Harness de saída de referência (golden) do GCodeGenerator.
+
+Executa uma matriz de parâmetros em `GCodeGenerator.generate`, neutraliza a
+linha de data do cabeçalho e compara hash SHA-256 e número de linhas de cada
+caso com `tests/fixtures/golden_gcode.json`. A comparação usa apenas os
+hashes; o snapshot completo (`golden_gcode_snapshots.xz`) só é lido quando
+há divergência, para apontar a primeira linha diferente.
+
+Uso:
+  python scripts/golden_gcode.py              # verifica (código 1 se divergir)
+  python scripts/golden_gcode.py --update     # regrava hashes e snapshots
+  python scripts/golden_gcode.py --workers 1  # execução sequencial
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import lzma
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from generator_cases import PROJECT_ROOT, make_params, case_id
+
+GOLDEN_PATH = PROJECT_ROOT / 'tests' / 'fixtures' / 'golden_gcode.json'
+SNAPSHOT_PATH = PROJECT_ROOT / 'tests' / 'fixtures' / 'golden_gcode_snapshots.xz'
+DATE_PLACEHOLDER = "(Data: <neutralizada>)"
+_SNAPSHOT_MARK = "#### "
+
+# Variações de sentido aplicadas a cada combinação de modo/tamanho
+_DIRECTIONS = (
+    ('ed-h', {'direcao_soldagem': 'esquerda_direita', 'sentido_rotacao': 'horaria'}),
+    ('de-ah', {'direcao_soldagem': 'direita_esquerda', 'sentido_rotacao': 'antihoraria'}),
+)
+
+
+def iter_golden_cases():
+    """Gera (id, params) da matriz de referência."""
+    for mode in ('espiral', 'linear', 'quadrada', 'quadrada_continua'):
+        for compact in (True, False):
+            for size, layers in (('pequena', 1), ('pequena', 3), ('media', 1)):
+                for suffix, extra in _DIRECTIONS:
+                    yield case_id(mode, compact, size, layers, suffix), make_params(mode, compact, size, layers, **extra)
+    # Casos de borda: sem lead-in/out, outra resolução de S-curve, sem recuo da tocha
+    yield case_id('espiral', False, 'pequena', 2, 'sem-lead'), make_params('espiral', False, 'pequena', 2, lead_in=0.0, lead_out=0.0)
+    yield case_id('linear', False, 'pequena', 2, 'scurve10'), make_params('linear', False, 'pequena', 2, n_scurve_steps=10)
+    yield case_id('quadrada', False, 'pequena', 2, 'sem-recuo'), make_params('quadrada', False, 'pequena', 2, torch_retract_on_ignite=False, lead_in=0.0)
+    yield case_id('quadrada_continua', False, 'pequena', 1, 'gran2'), make_params('quadrada_continua', False, 'pequena', 1, osc_test_gran_x=2.0, osc_test_gran_a=2.0)
+
+
+def normalize_lines(lines):
+    """Converte a saída em lista de str e neutraliza a data do cabeçalho."""
+    out = []
+    for line in (lines or []):
+        line = str(line)
+        if line.startswith("(Data:"):
+            line = DATE_PLACEHOLDER
+        out.append(line)
+    return out
+
+
+def render_case(params: dict):
+    from TFM_GCODE import GCodeGenerator
+    return normalize_lines(GCodeGenerator().generate(dict(params)))
+
+
+def digest_lines(lines):
+    h = hashlib.sha256("\n".join(lines).encode('utf-8')).hexdigest()
+    return h, len(lines)
+
+
+def _hash_case(item):
+    cid, params = item
+    # Processos filhos: instrumentação desligada para não pesar na geração
+    from instrumentation import perf
+    perf.enabled = False
+    sha, count = digest_lines(render_case(params))
+    return cid, {'sha256': sha, 'lines': count}
+
+
+def compute_hashes(cases, workers=None):
+    """Calcula {id: {sha256, lines}} para os casos, em paralelo quando workers != 1."""
+    cases = list(cases)
+    if workers == 1 or len(cases) <= 1:
+        return dict(map(_hash_case, cases))
+    workers = workers or min(len(cases), os.cpu_count() or 1)
+    # Casos grandes primeiro para equilibrar a carga entre processos
+    cases.sort(key=lambda c: -(c[1].get('diametro', 0) * c[1].get('comprimento_revestir', 0) * c[1].get('num_camadas', 1)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(_hash_case, cases))
+
+
+def load_golden(path=GOLDEN_PATH):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding='utf-8')).get('cases', {})
+
+
+def write_snapshots(outputs: dict, path=SNAPSHOT_PATH):
+    with lzma.open(path, 'wt', encoding='utf-8', preset=9) as f:
+        for cid in sorted(outputs):
+            lines = outputs[cid]
+            f.write(f"{_SNAPSHOT_MARK}{cid} {len(lines)}\n")
+            for line in lines:
+                f.write(line + "\n")
+
+
+def load_snapshots(path=SNAPSHOT_PATH, wanted=None):
+    """Lê os snapshots (apenas os ids em `wanted`, se informado)."""
+    path = Path(path)
+    result = {}
+    if not path.exists():
+        return result
+    with lzma.open(path, 'rt', encoding='utf-8') as f:
+        while True:
+            header = f.readline()
+            if not header:
+                break
+            cid, count = header[len(_SNAPSHOT_MARK):].rstrip("\n").rsplit(" ", 1)
+            lines = [f.readline().rstrip("\n") for _ in range(int(count))]
+            if wanted is None or cid in wanted:
+                result[cid] = lines
+    return result
+
+
+def first_difference(expected, actual):
+    """(índice, linha_esperada, linha_obtida) da primeira divergência, ou None."""
+    for i, (a, b) in enumerate(zip(expected, actual)):
+        if a != b:
+            return i, a, b
+    if len(expected) != len(actual):
+        i = min(len(expected), len(actual))
+        return i, (expected[i] if i < len(expected) else None), (actual[i] if i < len(actual) else None)
+    return None
+
+
+def check(workers=None, name_filter='', verbose=True):
+    """Compara a matriz com os hashes gravados. Retorna lista de ids divergentes."""
+    golden = load_golden()
+    cases = [(cid, p) for cid, p in iter_golden_cases() if name_filter in cid]
+    current = compute_hashes(cases, workers)
+    mismatches = [cid for cid, _ in cases if golden.get(cid) != current[cid]]
+    if verbose and mismatches:
+        snapshots = load_snapshots(wanted=set(mismatches))
+        params_by_id = dict(cases)
+        for cid in mismatches:
+            ref = golden.get(cid)
+            if ref is None:
+                print(f"[golden] {cid}: sem referência gravada (use --update)")
+                continue
+            print(f"[golden] {cid}: {ref['lines']} -> {current[cid]['lines']} linhas, hash diferente")
+            if cid in snapshots:
+                diff = first_difference(snapshots[cid], render_case(params_by_id[cid]))
+                if diff:
+                    idx, exp, got = diff
+                    print(f"    linha {idx + 1}:\n      esperado: {exp}\n      obtido:   {got}")
+    return mismatches
+
+
+def update(workers=None):
+    cases = list(iter_golden_cases())
+    hashes = compute_hashes(cases, workers)
+    GOLDEN_PATH.parent.mkdir(parents=True, exist_ok=True)
+    GOLDEN_PATH.write_text(json.dumps({'cases': hashes}, indent=2, sort_keys=True), encoding='utf-8')
+    write_snapshots({cid: render_case(p) for cid, p in cases})
+    return hashes
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Verificação de saída de referência do gerador')
+    ap.add_argument('--update', action='store_true', help='Regrava hashes e snapshots com a saída atual')
+    ap.add_argument('--workers', type=int, default=None, help='Processos paralelos (padrão: nº de CPUs)')
+    ap.add_argument('--filter', default='', help='Verifica apenas casos cujo id contém este texto')
+    args = ap.parse_args(argv)
+    if args.update:
+        hashes = update(args.workers)
+        print(f"[golden] {len(hashes)} casos gravados em {GOLDEN_PATH}")
+        return 0
+    mismatches = check(args.workers, args.filter)
+    if mismatches:
+        print(f"[golden] {len(mismatches)} caso(s) divergente(s).")
+        return 1
+    print("[golden] Todos os casos conferem com a referência.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,9 +2,11 @@
 # TFM G-Code Generator v11.3 - Sem Dependência de Idioma (KeyError Fix)
 # Desenvolvido para TFM Usinagem & Manutenção Industrial LTDA
 
+import time
+# Início da importação do módulo (modo de medição da inicialização)
+_IMPORT_T0 = time.perf_counter()
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk, Toplevel, Text, PanedWindow
-import numpy as np
 import math
 import json
 import os
@@ -15,24 +17,31 @@ import webbrowser
 import subprocess
 import re
 import threading
-import urllib.request
 import hashlib
+import io
 import tempfile
 from pathlib import Path
 
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-
-# --- MÓDULO DE GERAÇÃO DE PDF ---
-try:
-    from reportlab.pdfgen import canvas as pdfcanvas
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.units import mm
-    from reportlab.lib.utils import ImageReader
-    from reportlab.lib import colors
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
+# Matplotlib, NumPy e ReportLab são importados sob demanda: a janela aparece antes deles.
+# Matplotlib entra com a primeira figura (`figure_widgets`), NumPy com o gerador/análise
+# do programa (`toolpath`, `cycle_time`, `limits_check`) e ReportLab no relatório PDF.
+from instrumentation import perf, startup
+from gcode_postprocess import compact_modal, fit_arcs, format_size
+from gcode_emitter import GCodeEmitter, OutputFormat
+from tap_writer import write_tap, write_text_atomic
+from config_store import ConfigStore
+from job_archive import save_job, JobArchive, EXTENSION as JOB_EXTENSION
+from mach3_profile import load_mach3_profile, default_machine
+from process_estimates import estimate_process, evaluate_formulas, format_minutes
+from procedure_library import FIELD_DEFAULTS, ProcedureIndex, procedure_fields, procedure_params, read_procedure
+from updater import download, DownloadCancelled, FeedClient, default_cache_dir as default_update_cache_dir
+from procedure_watcher import ProcedureWatcher, PreviewWarmer, PreviewCache, default_cache_dir, program_key
+from thumbnails import ThumbnailRenderer
+from report_pdf import reportlab_available
+
+# A linha do tempo da inicialização começa na importação deste módulo
+startup.origin = _IMPORT_T0
+startup.record('import:TFM_GCODE', _IMPORT_T0)
 
 # --- FUNÇÃO PARA LOCALIZAR ARQUIVOS NO EXECUTÁVEL ---
 def resource_path(relative_path):
@@ -171,118 +180,34 @@ class SplashScreen(tk.Toplevel):
         except Exception:
             pass
 
-# Toolbar personalizada para ajustar "Home" ao percurso atual
-class CustomToolbar(NavigationToolbar2Tk):
-    def __init__(self, canvas, window, app_ref):
-        self._app_ref = app_ref
-        super().__init__(canvas, window)
-        # Botões rápidos integrados à barra com quebra de linha quando necessário
-        try:
-            # Linha 1 (dentro da toolbar padrão)
-            self._btn_top_r1 = ttk.Button(self, text="Top", style='Toolbutton', command=self._app_ref._view_top)
-            self._btn_side_r1 = ttk.Button(self, text="Side", style='Toolbutton', command=self._app_ref._view_side)
-            self._btn_top_r1.pack(side=tk.LEFT, padx=(6, 0))
-            self._btn_side_r1.pack(side=tk.LEFT, padx=(4, 0))
-
-            # Linha 2 (overflow abaixo da barra)
-            self._row2 = ttk.Frame(window)
-            self._btn_top_r2 = ttk.Button(self._row2, text="Top", style='Toolbutton', command=self._app_ref._view_top)
-            self._btn_side_r2 = ttk.Button(self._row2, text="Side", style='Toolbutton', command=self._app_ref._view_side)
-
-            def _update_toolbar_layout(event=None):
-                try:
-                    container_w = window.winfo_width()
-                    # Largura requerida pelos filhos atuais da barra (linha 1)
-                    total_children_w = 0
-                    for child in self.winfo_children():
-                        try:
-                            total_children_w += child.winfo_reqwidth()
-                        except Exception:
-                            pass
-                    # Margem de segurança
-                    total_children_w += 8
-
-                    if total_children_w > container_w:
-                        # mover os extras para a segunda linha
-                        try:
-                            self._btn_top_r1.pack_forget(); self._btn_side_r1.pack_forget()
-                        except Exception:
-                            pass
-                        try:
-                            if not getattr(self, '_row2_packed', False):
-                                self._row2.pack(side=tk.TOP, fill=tk.X)
-                                self._row2_packed = True
-                            if not getattr(self, '_row2_buttons_packed', False):
-                                self._btn_top_r2.pack(side=tk.LEFT, padx=(6, 0))
-                                self._btn_side_r2.pack(side=tk.LEFT, padx=(4, 0))
-                                self._row2_buttons_packed = True
-                        except Exception:
-                            pass
-                    else:
-                        # manter extras na primeira linha e ocultar a segunda
-                        try:
-                            if not self._btn_top_r1.winfo_ismapped():
-                                self._btn_top_r1.pack(side=tk.LEFT, padx=(6, 0))
-                                self._btn_side_r1.pack(side=tk.LEFT, padx=(4, 0))
-                        except Exception:
-                            pass
-                        try:
-                            if getattr(self, '_row2_buttons_packed', False):
-                                self._btn_top_r2.pack_forget(); self._btn_side_r2.pack_forget()
-                                self._row2_buttons_packed = False
-                            if getattr(self, '_row2_packed', False):
-                                self._row2.pack_forget(); self._row2_packed = False
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
-
-            # Atualiza ao redimensionar
-            try:
-                window.bind("<Configure>", _update_toolbar_layout, add='+')
-                self.bind("<Configure>", _update_toolbar_layout, add='+')
-                # executa uma vez após inicialização
-                try:
-                    window.after(50, _update_toolbar_layout)
-                except Exception:
-                    _update_toolbar_layout()
-            except Exception:
-                pass
-            # Removido: botão Isométrico conforme solicitado
-        except Exception:
-            pass
-
-    def home(self, *args):
-        # Recalcula desenho e aplica vista espelhada (comportamento antigo desejado)
-        try:
-            params = self._app_ref._get_current_params()
-            self._app_ref.desenhar_percurso_3d(params)
-            try:
-                elev, azim = getattr(self._app_ref, '_initial_view', (self._app_ref.ax.elev, self._app_ref.ax.azim))
-                self._app_ref.ax.view_init(elev=elev, azim=azim)
-                self._app_ref.canvas.draw_idle()
-            except Exception:
-                pass
-        except Exception:
-            # Fallback para home padrão caso algo falhe
-            try:
-                super().home(*args)
-            except Exception:
-                pass
-
 # --- REMOVIDO: MÓDULO DE GESTÃO DE IDIOMAS ---
 
 # --- MÓDULO DE GERAÇÃO DE G-CODE ---
 class GCodeGenerator:
+    # Frações S-curve por número de passos (dependem só de n)
+    _scurve_cache = {}
+
+    def __init__(self, output_format=None, machine=None):
+        # Casas decimais por eixo/avanço (formato de saída) e, opcional, a máquina padrão
+        # (`MachineModel`) que limita o avanço quando `generate` não recebe outra
+        self.output_format = output_format or OutputFormat()
+        self.machine = machine
+        self.emitter = GCodeEmitter(self.output_format, machine)
+
+    def _emitter_for(self, machine):
+        """Emissor da chamada: o do gerador ou um próprio para a máquina pedida (o gerador não muda)."""
+        if machine is None or machine is self.machine:
+            return self.emitter
+        return GCodeEmitter(self.output_format, machine)
+
     def _scurve_fractions(self, n_steps: int):
         # Retorna frações [0..1] com perfil S-curve (ease-in-out) usando coseno
         # Inclui apenas pontos de avanço (exclui 0.0), inclui 1.0
         n = max(int(n_steps), 2)
-        fracs = []
-        for i in range(1, n + 1):
-            t = i / n
-            s = 0.5 - 0.5 * math.cos(math.pi * t)  # ease-in-out
-            fracs.append(s)
+        fracs = self._scurve_cache.get(n)
+        if fracs is None:
+            fracs = tuple(0.5 - 0.5 * math.cos(math.pi * (i / n)) for i in range(1, n + 1))  # ease-in-out
+            self._scurve_cache[n] = fracs
         return fracs
     def _normalize_params(self, params: dict):
         # Compatibilidade com presets/testes antigos e novo nome
@@ -298,30 +223,96 @@ class GCodeGenerator:
         if 'velocidade_a_mm_min' not in params and 'velocidade_de_deposicao' in params:
             params['velocidade_a_mm_min'] = params['velocidade_de_deposicao']
 
-    def generate(self, params):
+    # Estatísticas da última compactação modal / ajuste de arcos (None se não aplicados)
+    last_compaction_stats = None
+    last_fitting_stats = None
+
+    @perf.timed('gerador:generate')
+    def generate(self, params, machine=None):
+        """Linhas do programa; `machine` (`MachineModel`) limita o avanço só nesta chamada."""
+        lines = self._generate_program(params, self._emitter_for(machine))
+        self.last_compaction_stats = None
+        self.last_fitting_stats = None
+        if lines and params.get('arc_fitting', False):
+            # Substitui trechos de G01 por hélices (retas em X+A) e arcos G02/G03 dentro da tolerância de corda
+            with perf.timer('gerador:ajuste_arcos'):
+                lines, self.last_fitting_stats = fit_arcs(
+                    lines, chord_tol=float(params.get('arc_chord_tol', 0.01) or 0.01),
+                    radius_offset=params.get('afastamento_tocha', 0.0))
+        if lines and params.get('modal_compaction', False):
+            # Pós-processamento opcional: remove palavras modais redundantes e funde movimentos colineares
+            with perf.timer('gerador:compactacao_modal'):
+                lines, self.last_compaction_stats = compact_modal(lines, tol=float(params.get('modal_compaction_tol', 0.001) or 0.001))
+        return lines
+
+    def generate_iter(self, params, machine=None):
+        """Linhas do programa geradas camada a camada, sem montar a lista inteira (gravação em fluxo).
+
+        O conteúdo é o mesmo de `generate`. Com ajuste de arcos ou compactação
+        modal o pós-processamento precisa do programa inteiro; nesse caso as
+        linhas vêm de `generate`.
+        """
+        if params is None:
+            return
+        if params.get('arc_fitting', False) or params.get('modal_compaction', False):
+            yield from self.generate(params, machine) or []
+            return
+        self._normalize_params(params)
+        builder = self._layer_builder(params)
+        if builder is None:
+            return
+        self.last_compaction_stats = None
+        self.last_fitting_stats = None
+        em = self._emitter_for(machine)
+        yield from self._build_header(params)
+        current_d = params['diametro']
+        for i in range(params['num_camadas']):
+            yield from builder(params, i, current_d, em)
+            current_d += 2 * params['espessura_camada']
+        yield from self._build_footer()
+
+    def _layer_builder(self, params):
+        """Função que gera uma camada no modo dos parâmetros (mesma escolha de `_generate_program`)."""
+        mode = params.get('welding_mode', 'espiral')
+        if mode == 'espiral':
+            return self._build_spiral_segment
+        if mode == 'oscilacao':
+            osc_type = params.get('oscillation_type', 'linear')
+            if osc_type == 'quadrada':
+                return self._build_square_oscillation_segment
+            if osc_type == 'quadrada_continua':
+                return self._build_square_test_oscillation_segment
+            return self._build_linear_oscillation_segment
+        if mode == 'oscilacao_linear':
+            return self._build_linear_oscillation_segment
+        if mode == 'oscilacao_quadrada':
+            return self._build_square_oscillation_segment
+        return None
+
+    def _generate_program(self, params, em=None):
         # Normaliza parâmetros antes de gerar
         if params is not None:
             self._normalize_params(params)
         if params is None: return None
         mode = params.get('welding_mode', 'espiral')
         if mode == 'espiral':
-            return self._generate_spiral(params)
+            return self._generate_spiral(params, em)
         elif mode == 'oscilacao':
             # Método unificado: escolhe entre linear e quadrada via parâmetro
             osc_type = params.get('oscillation_type', 'linear')
             if osc_type == 'quadrada':
-                return self._generate_square_oscillation(params)
+                return self._generate_square_oscillation(params, em)
             elif osc_type == 'quadrada_continua':
                 # A operação "Quadrada Teste" foi renomeada para "Quadrada Contínua"
-                return self._generate_square_test_oscillation(params)
+                return self._generate_square_test_oscillation(params, em)
             else:
-                return self._generate_linear_oscillation(params)
+                return self._generate_linear_oscillation(params, em)
         elif mode == 'oscilacao_linear':
             # Compatibilidade retroativa com presets antigos
-            return self._generate_linear_oscillation(params)
+            return self._generate_linear_oscillation(params, em)
         elif mode == 'oscilacao_quadrada':
             # Compatibilidade retroativa com presets antigos
-            return self._generate_square_oscillation(params)
+            return self._generate_square_oscillation(params, em)
         return None
 
     def _build_header(self, params):
@@ -366,15 +357,17 @@ class GCodeGenerator:
             "%"
         ]
 
-    def _generate_spiral(self, params):
+    def _generate_spiral(self, params, em=None):
         gcode_body = []
         current_d = params['diametro']
         for i in range(params['num_camadas']):
-            gcode_body.extend(self._build_spiral_segment(params, i, current_d))
+            gcode_body.extend(self._build_spiral_segment(params, i, current_d, em))
             current_d += 2 * params['espessura_camada']
         return self._build_header(params) + gcode_body + self._build_footer()
 
-    def _build_spiral_segment(self, params, layer_num, current_d):
+    @perf.timed('gerador:espiral_camada')
+    def _build_spiral_segment(self, params, layer_num, current_d, em=None):
+        em = em or self.emitter
         # Normaliza para chamadas diretas em testes
         self._normalize_params(params)
         afastamento = params['afastamento_tocha']; z_offset = 0.0
@@ -404,59 +397,57 @@ class GCodeGenerator:
         
         compact = bool(params.get('compact_gcode', False))
         n_scurve = int(params.get('n_scurve_steps', 6) or 6)
-        segment_gcode = [f"(--- CAMADA {layer_num + 1} ---)", f"(SENTIDO: {direction})", f"G00 Z{z_seguranca:.3f}", f"G00 X{x_arc_start_calc:.3f} A0", f"G01 F{feed_linear*2:.1f} Z{z_layer:.3f}"]
+        segment_gcode = [f"(--- CAMADA {layer_num + 1} ---)", f"(SENTIDO: {direction})", em.move('G00', Z=z_seguranca), em.move('G00', X=x_arc_start_calc) + " A0", em.move('G01', feed_linear*2, Z=z_layer)]
         # Removido ramp-up de lead-in: rotação inicial com X parado conforme solicitado
         # ---------- VOLTA COMPLETA INICIAL NO DIÂMETRO ----------
         if compact:
-            segment_gcode.append(f"G01 F{feed_angular:.1f} A{(rotation_sign*360.0):.3f}")
+            segment_gcode.append(em.move('G01', feed_angular, A=(rotation_sign*360.0)))
         else:
             # Rotação inicial com rampa S-curve
             target_A_init = rotation_sign * 360.0
-            for f in self._scurve_fractions(n_scurve):
-                a_pos = target_A_init * f
-                segment_gcode.append(f"G01 F{feed_angular:.1f} A{a_pos:.3f}")
+            segment_gcode.extend(em.moves('G01', feed_angular, A=[target_A_init * f for f in self._scurve_fractions(n_scurve)]))
         # ---------- PASSE HELICOIDAL: X e A simultâneos ----------
         # Move de X inicial até X final enquanto rotaciona o A pelo ângulo total do passe
         # Alvo acumulado: rotação do passe (já com sinal) + 1 volta inicial
         if compact:
-            segment_gcode.append(f"G01 F{feed_linear:.1f} X{x_arc_end_calc:.3f} A{(angulo_total_A + rotation_sign*360.0):.3f}")
+            segment_gcode.append(em.move('G01', feed_linear, X=x_arc_end_calc, A=(angulo_total_A + rotation_sign*360.0)))
         else:
             # Passo helicoidal com rampa S-curve em X e A
             start_X = x_arc_start_calc
             end_X = x_arc_end_calc
             start_A = rotation_sign * 360.0
             end_A = angulo_total_A + rotation_sign * 360.0
-            for f in self._scurve_fractions(n_scurve):
-                x_pos = start_X + (end_X - start_X) * f
-                a_pos = start_A + (end_A - start_A) * f
-                segment_gcode.append(f"G01 F{feed_linear:.1f} X{x_pos:.3f} A{a_pos:.3f}")
+            fracs = self._scurve_fractions(n_scurve)
+            segment_gcode.extend(em.moves('G01', feed_linear,
+                                          X=[start_X + (end_X - start_X) * f for f in fracs],
+                                          A=[start_A + (end_A - start_A) * f for f in fracs]))
         # ---------- VOLTA COMPLETA FINAL NO DIÂMETRO ----------
         if compact:
-            segment_gcode.append(f"G01 F{feed_angular:.1f} A{(angulo_total_A + rotation_sign*720.0):.3f}")
+            segment_gcode.append(em.move('G01', feed_angular, A=(angulo_total_A + rotation_sign*720.0)))
         else:
             # Rotação final com rampa S-curve
             start_A2 = angulo_total_A + rotation_sign * 360.0
             end_A2 = angulo_total_A + rotation_sign * 720.0
-            for f in self._scurve_fractions(n_scurve):
-                a_pos = start_A2 + (end_A2 - start_A2) * f
-                segment_gcode.append(f"G01 F{feed_angular:.1f} A{a_pos:.3f}")
+            segment_gcode.extend(em.moves('G01', feed_angular, A=[start_A2 + (end_A2 - start_A2) * f for f in self._scurve_fractions(n_scurve)]))
         # Ramp down no lead-out (se houver)
         if abs(lead_out) > 1e-6:
             back_mid1 = x_arc_end_calc - (x_arc_end_calc - x_arc_start_calc) * 0.3
-            segment_gcode.append(f"G01 F{feed_linear*0.85:.1f} X{back_mid1:.3f}")
+            segment_gcode.append(em.move('G01', feed_linear*0.85, X=back_mid1))
             
-        segment_gcode.extend([f"G00 Z{z_seguranca:.3f}", "M01" if layer_num < params['num_camadas']-1 else ""]) 
+        segment_gcode.extend([em.move('G00', Z=z_seguranca), "M01" if layer_num < params['num_camadas']-1 else ""]) 
         return segment_gcode
 
-    def _generate_linear_oscillation(self, params):
+    def _generate_linear_oscillation(self, params, em=None):
         gcode_body = []
         current_d = params['diametro']
         for i in range(params['num_camadas']):
-            gcode_body.extend(self._build_linear_oscillation_segment(params, i, current_d))
+            gcode_body.extend(self._build_linear_oscillation_segment(params, i, current_d, em))
             current_d += 2 * params['espessura_camada']
         return self._build_header(params) + gcode_body + self._build_footer()
 
-    def _build_linear_oscillation_segment(self, params, layer_num, current_d):
+    @perf.timed('gerador:oscilacao_linear_camada')
+    def _build_linear_oscillation_segment(self, params, layer_num, current_d, em=None):
+        em = em or self.emitter
         # Normaliza para chamadas diretas em testes
         self._normalize_params(params)
         afastamento = params['afastamento_tocha']; z_offset = 0.0
@@ -491,7 +482,7 @@ class GCodeGenerator:
         # Feed X definido pela velocidade da oscilação (mm/min)
         feed_linear = float(params.get('velocidade_oscilacao_mm_min', taxa_de_deposicao) or taxa_de_deposicao)
         
-        segment_gcode = [f"(--- CAMADA {layer_num + 1} ---)", f"(SENTIDO: {direction})", f"G00 Z{z_seguranca:.3f}"]
+        segment_gcode = [f"(--- CAMADA {layer_num + 1} ---)", f"(SENTIDO: {direction})", em.move('G00', Z=z_seguranca)]
         # Stagger angular intercamadas para melhor repartição
         current_A_total = (layer_num * (actual_delta_A_deg * 0.25)) * (1.0 if rotation_dir == 'horaria' else -1.0)
         n_scurve = int(params.get('n_scurve_steps', 6) or 6)
@@ -512,27 +503,26 @@ class GCodeGenerator:
             current_x_end_pos_final_volta = x_osc_volta
             if passo_idx == num_passos_axiais -1: current_x_end_pos_final_volta = x_end_revest
             segment_gcode.append(f"(--- PASSO AXIAL {passo_idx + 1}/{num_passos_axiais} ---)")
-            segment_gcode.append(f"G00 X{current_x_start_pos:.3f} A{current_A_total:.3f}") # Modificado para A contínuo
-            segment_gcode.append(f"G01 F{feed_linear*2:.1f} Z{z_layer:.3f}")
+            segment_gcode.append(em.move('G00', X=current_x_start_pos, A=current_A_total)) # Modificado para A contínuo
+            segment_gcode.append(em.move('G01', feed_linear*2, Z=z_layer))
             if passo_idx == 0:
                  if not compact:
                      pass
                  # ---------- ROTAÇÃO ÚNICA POR PASSE (com rampa S-curve no modo detailed) ----------
                  target_A_total = current_A_total + rotation_sign * actual_delta_A_deg * num_passos_angulares_por_volta * num_passos_axiais
                  if compact:
-                     segment_gcode.append(f"G01 F{feed_angular:.1f} A{target_A_total:.3f}")
+                     segment_gcode.append(em.move('G01', feed_angular, A=target_A_total))
                  else:
-                     for f in self._scurve_fractions(n_scurve):
-                         a_pos = current_A_total + (target_A_total - current_A_total) * f
-                         segment_gcode.append(f"G01 F{feed_angular:.1f} A{a_pos:.3f}")
+                     segment_gcode.extend(em.moves('G01', feed_angular, A=[current_A_total + (target_A_total - current_A_total) * f
+                                                                           for f in self._scurve_fractions(n_scurve)]))
                  # (G94 já ativo no cabeçalho)
                  if abs(lead_in) > 1e-6:
                      # Ramp up no lead-in até a posição inicial de oscilação
                      mid1 = current_x_start_pos + (x_osc_volta - current_x_start_pos) * 0.3
                      mid2 = current_x_start_pos + (x_osc_volta - current_x_start_pos) * 0.7
-                     segment_gcode.append(f"G01 F{feed_linear*0.6:.1f} X{mid1:.3f}")
-                     segment_gcode.append(f"G01 F{feed_linear*0.85:.1f} X{mid2:.3f}")
-                     segment_gcode.append(f"G01 F{feed_linear:.1f} X{x_osc_volta:.3f}")
+                     segment_gcode.append(em.move('G01', feed_linear*0.6, X=mid1))
+                     segment_gcode.append(em.move('G01', feed_linear*0.85, X=mid2))
+                     segment_gcode.append(em.move('G01', feed_linear, X=x_osc_volta))
             
             # Handle final axial step differently to prevent duplication
             if passo_idx == num_passos_axiais - 1:
@@ -540,7 +530,7 @@ class GCodeGenerator:
                 dist_ate_fim = abs(x_end_revest - current_x_start_pos)
                 if dist_ate_fim > 1e-6:
                     segment_gcode.append(f"(Fechamento ate fim do revestimento)")
-                    segment_gcode.append(f"G01 F{feed_linear:.1f} X{x_end_revest:.3f}")
+                    segment_gcode.append(em.move('G01', feed_linear, X=x_end_revest))
                 # Rotação única já foi emitida – não repetir "A"
             else:
                 # Normal oscillation for non-final steps
@@ -552,18 +542,15 @@ class GCodeGenerator:
                     if compact:
                         # Modo compacto: movimento contínuo sem paradas
                         # Ida contínua - uma linha com velocidade constante
-                        segment_gcode.append(f"G01 F{feed_linear:.1f} X{current_x_osc_ida:.3f}")
+                        segment_gcode.append(em.move('G01', feed_linear, X=current_x_osc_ida))
                         # Volta contínua - uma linha com velocidade constante
-                        segment_gcode.append(f"G01 F{feed_linear:.1f} X{current_x_osc_volta:.3f}")
+                        segment_gcode.append(em.move('G01', feed_linear, X=current_x_osc_volta))
                     else:
                         # Perfil S-curve ida
-                        for f in self._scurve_fractions(n_scurve):
-                            x_pos = current_x_osc_volta + (current_x_osc_ida - current_x_osc_volta) * f
-                            segment_gcode.append(f"G01 F{feed_linear:.1f} X{x_pos:.3f}")
+                        fracs = self._scurve_fractions(n_scurve)
+                        segment_gcode.extend(em.moves('G01', feed_linear, X=[current_x_osc_volta + (current_x_osc_ida - current_x_osc_volta) * f for f in fracs]))
                         # Perfil S-curve volta
-                        for f in self._scurve_fractions(n_scurve):
-                            x_pos = current_x_osc_ida + (current_x_osc_volta - current_x_osc_ida) * f
-                            segment_gcode.append(f"G01 F{feed_linear:.1f} X{x_pos:.3f}")
+                        segment_gcode.extend(em.moves('G01', feed_linear, X=[current_x_osc_ida + (current_x_osc_volta - current_x_osc_ida) * f for f in fracs]))
                         
 
                     current_A_total += rotation_sign * actual_delta_A_deg
@@ -572,39 +559,41 @@ class GCodeGenerator:
             if passo_idx < num_passos_axiais - 1:
                  next_x_start_anel = 0.0 + (passo_idx + 1) * actual_passo_axial if direction == 'esquerda_direita' else part_length - (passo_idx + 1) * actual_passo_axial
                  next_x_start_anel = max(0.0, min(part_length, next_x_start_anel))
-                 segment_gcode.append(f"G00 X{next_x_start_anel:.3f}")
+                 segment_gcode.append(em.move('G00', X=next_x_start_anel))
 
             if passo_idx == num_passos_axiais - 1 and abs(lead_out) > 1e-6:
                   segment_gcode.append(f"(Movimento lead-out)")
                   # Ramp down para finalizar
                   back_mid = current_x_end_pos_final_volta - (current_x_end_pos_final_volta - current_x_start_pos) * 0.3
-                  segment_gcode.append(f"G01 F{feed_linear*0.85:.1f} X{back_mid:.3f}")
-                  segment_gcode.append(f"G01 F{feed_linear*0.6:.1f} X{current_x_end_pos_final_volta:.3f}")
+                  segment_gcode.append(em.move('G01', feed_linear*0.85, X=back_mid))
+                  segment_gcode.append(em.move('G01', feed_linear*0.6, X=current_x_end_pos_final_volta))
                   if not compact:
                       pass
 
-        segment_gcode.extend([f"G00 Z{z_seguranca:.3f}", "M01" if layer_num < params['num_camadas']-1 else ""]) 
+        segment_gcode.extend([em.move('G00', Z=z_seguranca), "M01" if layer_num < params['num_camadas']-1 else ""]) 
         return segment_gcode
         
-    def _generate_square_oscillation(self, params):
+    def _generate_square_oscillation(self, params, em=None):
         gcode_body = []
         current_d = params['diametro']
         for i in range(params['num_camadas']):
-            gcode_body.extend(self._build_square_oscillation_segment(params, i, current_d))
+            gcode_body.extend(self._build_square_oscillation_segment(params, i, current_d, em))
             current_d += 2 * params['espessura_camada']
         return self._build_header(params) + gcode_body + self._build_footer()
 
-    def _generate_square_test_oscillation(self, params):
+    def _generate_square_test_oscillation(self, params, em=None):
         # Variante de teste: feeds independentes por eixo e decomposição em "escada"
         self._normalize_params(params)
         gcode_body = []
         current_d = params['diametro']
         for i in range(params['num_camadas']):
-            gcode_body.extend(self._build_square_test_oscillation_segment(params, i, current_d))
+            gcode_body.extend(self._build_square_test_oscillation_segment(params, i, current_d, em))
             current_d += 2 * params['espessura_camada']
         return self._build_header(params) + gcode_body + self._build_footer()
 
-    def _build_square_oscillation_segment(self, params, layer_num, current_d):
+    @perf.timed('gerador:oscilacao_quadrada_camada')
+    def _build_square_oscillation_segment(self, params, layer_num, current_d, em=None):
+        em = em or self.emitter
         # Normaliza para chamadas diretas em testes
         self._normalize_params(params)
         def calc_feed(v, rpm):
@@ -640,7 +629,7 @@ class GCodeGenerator:
         # Feed X definido pela velocidade da oscilação (mm/min)
         feed_linear = float(params.get('velocidade_oscilacao_mm_min', taxa_de_deposicao) or taxa_de_deposicao)
         
-        segment_gcode = [f"(--- CAMADA {layer_num + 1} ---)", f"(SENTIDO: {direction})", f"G00 Z{z_seguranca:.3f}"]
+        segment_gcode = [f"(--- CAMADA {layer_num + 1} ---)", f"(SENTIDO: {direction})", em.move('G00', Z=z_seguranca)]
         # Stagger angular intercamadas
         current_A_total = (layer_num * (actual_delta_A_deg * 0.25)) * (1.0 if rotation_dir == 'horaria' else -1.0)
         n_scurve = int(params.get('n_scurve_steps', 6) or 6)
@@ -661,24 +650,23 @@ class GCodeGenerator:
             current_x_end_pos_final_volta = x_osc_volta
             if passo_idx == num_passos_axiais -1: current_x_end_pos_final_volta = x_end_revest
             segment_gcode.append(f"(--- PASSO AXIAL {passo_idx + 1}/{num_passos_axiais} ---)")
-            segment_gcode.append(f"G00 X{current_x_start_pos:.3f} A{current_A_total:.3f}")
-            segment_gcode.append(f"G01 F{feed_linear*2:.1f} Z{z_layer:.3f}")
+            segment_gcode.append(em.move('G00', X=current_x_start_pos, A=current_A_total))
+            segment_gcode.append(em.move('G01', feed_linear*2, Z=z_layer))
             if passo_idx == 0:
                  # ---------- ROTAÇÃO ÚNICA POR PASSE (S-curve quando detalhado) ----------
                  target_A_total = current_A_total + rotation_sign * actual_delta_A_deg * num_passos_angulares_por_volta * num_passos_axiais
                  if bool(params.get('compact_gcode', False)):
-                     segment_gcode.append(f"G01 F{feed_angular:.1f} A{target_A_total:.3f}")
+                     segment_gcode.append(em.move('G01', feed_angular, A=target_A_total))
                  else:
-                     for f in self._scurve_fractions(n_scurve):
-                         a_pos = current_A_total + (target_A_total - current_A_total) * f
-                         segment_gcode.append(f"G01 F{feed_angular:.1f} A{a_pos:.3f}")
+                     segment_gcode.extend(em.moves('G01', feed_angular, A=[current_A_total + (target_A_total - current_A_total) * f
+                                                                           for f in self._scurve_fractions(n_scurve)]))
                  # (G94 já ativo no cabeçalho)
                  if abs(lead_in) > 1e-6:
                      mid1 = current_x_start_pos + (x_osc_volta - current_x_start_pos) * 0.3
                      mid2 = current_x_start_pos + (x_osc_volta - current_x_start_pos) * 0.7
-                     segment_gcode.append(f"G01 F{feed_linear*0.6:.1f} X{mid1:.3f}")
-                     segment_gcode.append(f"G01 F{feed_linear*0.85:.1f} X{mid2:.3f}")
-                     segment_gcode.append(f"G01 F{feed_linear:.1f} X{x_osc_volta:.3f}")
+                     segment_gcode.append(em.move('G01', feed_linear*0.6, X=mid1))
+                     segment_gcode.append(em.move('G01', feed_linear*0.85, X=mid2))
+                     segment_gcode.append(em.move('G01', feed_linear, X=x_osc_volta))
                      
 
             # Handle final axial step differently to prevent duplication
@@ -686,7 +674,7 @@ class GCodeGenerator:
                 # For final step, do a single pass to end position without oscillation
                 segment_gcode.append(f"(Passo final - posicao de termino)")
                 # Single smooth movement to final position
-                segment_gcode.append(f"G01 F{feed_linear:.1f} X{x_end_revest:.3f}")
+                segment_gcode.append(em.move('G01', feed_linear, X=x_end_revest))
                 # Rotação única já foi emitida – não repetir "A"
             else:
                 # Normal oscillation for non-final steps
@@ -695,29 +683,31 @@ class GCodeGenerator:
                     current_x_osc_volta = x_osc_volta
                     segment_gcode.append(f"(Passo angular {k+1}/{num_passos_angulares_por_volta})")
                     # Perfil S-curve em X
-                    for f in self._scurve_fractions(n_scurve):
-                        x_pos = current_x_osc_volta + (current_x_osc_ida - current_x_osc_volta) * f
-                        segment_gcode.append(f"G01 F{feed_linear:.1f} X{x_pos:.3f}")
+                    segment_gcode.extend(em.moves('G01', feed_linear, X=[current_x_osc_volta + (current_x_osc_ida - current_x_osc_volta) * f
+                                                                         for f in self._scurve_fractions(n_scurve)]))
                     
                     # Rotação única já foi emitida – não repetir "A"
 
             if passo_idx < num_passos_axiais - 1:
                  next_x_start_anel = 0.0 + (passo_idx + 1) * actual_passo_axial if direction == 'esquerda_direita' else part_length - (passo_idx + 1) * actual_passo_axial
                  next_x_start_anel = max(0.0, min(part_length, next_x_start_anel))
-                 segment_gcode.append(f"G00 X{next_x_start_anel:.3f}")
+                 segment_gcode.append(em.move('G00', X=next_x_start_anel))
 
             if passo_idx == num_passos_axiais - 1 and abs(lead_out) > 1e-6:
                   segment_gcode.append(f"(Movimento lead-out)")
                   back_mid = current_x_end_pos_final_volta - (current_x_end_pos_final_volta - current_x_start_pos) * 0.3
-                  segment_gcode.append(f"G01 F{feed_linear*0.85:.1f} X{back_mid:.3f}")
-                  segment_gcode.append(f"G01 F{feed_linear*0.6:.1f} X{current_x_end_pos_final_volta:.3f}")
+                  segment_gcode.append(em.move('G01', feed_linear*0.85, X=back_mid))
+                  segment_gcode.append(em.move('G01', feed_linear*0.6, X=current_x_end_pos_final_volta))
                   
 
-        segment_gcode.extend([f"G00 Z{z_seguranca:.3f}", "M01" if layer_num < params['num_camadas']-1 else ""]) 
+        segment_gcode.extend([em.move('G00', Z=z_seguranca), "M01" if layer_num < params['num_camadas']-1 else ""]) 
         return segment_gcode
 
 
-    def _build_square_test_oscillation_segment(self, params, layer_num, current_d):
+    @perf.timed('gerador:oscilacao_quadrada_continua_camada')
+    def _build_square_test_oscillation_segment(self, params, layer_num, current_d, em=None):
+        import numpy as np
+        em = em or self.emitter
         # Normaliza para chamadas diretas em testes
         self._normalize_params(params)
         afastamento = params['afastamento_tocha']; z_offset = 0.0
@@ -760,7 +750,7 @@ class GCodeGenerator:
         feed_a = rpm_a * 360.0
 
         
-        segment_gcode = [f"(--- CAMADA {layer_num + 1} ---)", f"(SENTIDO: {direction})", f"G00 Z{z_seguranca:.3f}"]
+        segment_gcode = [f"(--- CAMADA {layer_num + 1} ---)", f"(SENTIDO: {direction})", em.move('G00', Z=z_seguranca)]
         # Stagger angular intercamadas
         current_A_total = (layer_num * (actual_delta_A_deg * 0.25)) * (1.0 if rotation_dir == 'horaria' else -1.0)
         current_x_pos = None
@@ -771,12 +761,12 @@ class GCodeGenerator:
             steps_x = math.ceil(abs(dx) / max(gran_x, 1e-6)) if abs(dx) > 1e-9 else 0
             steps_a = math.ceil(abs(da) / max(gran_a, 1e-6)) if abs(da) > 1e-9 else 0
             S = max(steps_x, steps_a, 1)
-            for i in range(1, S + 1):
-                xi = x0 + dx * (i / S)
-                ai = a0 + da * (i / S)
-                # Primeiro X, depois A (ordem pode ser ajustada no futuro)
-                segment_gcode.append(f"G01 F{feed_x:.1f} X{xi:.3f}")
-                segment_gcode.append(f"G01 F{feed_a:.1f} A{ai:.3f}")
+            t = np.arange(1, S + 1) / S
+            # Primeiro X, depois A (ordem pode ser ajustada no futuro)
+            steps = [None] * (2 * S)
+            steps[0::2] = em.moves('G01', feed_x, X=x0 + dx * t)
+            steps[1::2] = em.moves('G01', feed_a, A=a0 + da * t)
+            segment_gcode.extend(steps)
             return x1, a1
 
         for passo_idx in range(num_passos_axiais):
@@ -801,14 +791,14 @@ class GCodeGenerator:
             # Aproxima ao início do anel
             if current_x_pos is None:
                 current_x_pos = current_x_start_pos
-            segment_gcode.append(f"G00 X{current_x_start_pos:.3f} A{current_A_total:.3f}")
-            segment_gcode.append(f"G01 F{feed_x*2:.1f} Z{z_layer:.3f}")
+            segment_gcode.append(em.move('G00', X=current_x_start_pos, A=current_A_total))
+            segment_gcode.append(em.move('G01', feed_x*2, Z=z_layer))
             if passo_idx == 0:
                 if not compact:
                     pass
                 # Lead-in somente X
                 if abs(lead_in) > 1e-6:
-                    segment_gcode.append(f"G01 F{feed_x:.1f} X{x_osc_volta:.3f}")
+                    segment_gcode.append(em.move('G01', feed_x, X=x_osc_volta))
                     if not compact:
                         pass
 
@@ -817,7 +807,7 @@ class GCodeGenerator:
                 segment_gcode.append(f"(Fechamento ate fim do revestimento)")
                 dist_ate_fim = abs(x_end_revest - current_x_start_pos)
                 if dist_ate_fim > 1e-6:
-                    segment_gcode.append(f"G01 F{feed_x:.1f} X{x_end_revest:.3f}")
+                    segment_gcode.append(em.move('G01', feed_x, X=x_end_revest))
             else:
                 # Oscilação por passos angulares com decomposição em escada
                 for k in range(num_passos_angulares_por_volta):
@@ -841,17 +831,17 @@ class GCodeGenerator:
             if passo_idx < num_passos_axiais - 1:
                 next_x_start_anel = 0.0 + (passo_idx + 1) * actual_passo_axial if direction == 'esquerda_direita' else part_length - (passo_idx + 1) * actual_passo_axial
                 next_x_start_anel = max(0.0, min(part_length, next_x_start_anel))
-                segment_gcode.append(f"G00 X{next_x_start_anel:.3f}")
+                segment_gcode.append(em.move('G00', X=next_x_start_anel))
 
             if passo_idx == num_passos_axiais - 1 and abs(lead_out) > 1e-6:
                 segment_gcode.append(f"(Movimento lead-out)")
                 back_mid = current_x_end_pos_final_volta - (current_x_end_pos_final_volta - current_x_start_pos) * 0.3
-                segment_gcode.append(f"G01 F{feed_x*0.85:.1f} X{back_mid:.3f}")
-                segment_gcode.append(f"G01 F{feed_x*0.6:.1f} X{current_x_end_pos_final_volta:.3f}")
+                segment_gcode.append(em.move('G01', feed_x*0.85, X=back_mid))
+                segment_gcode.append(em.move('G01', feed_x*0.6, X=current_x_end_pos_final_volta))
                 if not compact:
                     pass
 
-        segment_gcode.extend([f"G00 Z{z_seguranca:.3f}", "M01" if layer_num < params['num_camadas']-1 else ""]) 
+        segment_gcode.extend([em.move('G00', Z=z_seguranca), "M01" if layer_num < params['num_camadas']-1 else ""]) 
         return segment_gcode
 
 
@@ -960,6 +950,9 @@ class SettingsWindow(Toplevel):
                 ('osc_test_gran_x', 'Granularidade X para Quadrada Contínua (mm)'),
                 ('compact_gcode', 'Modo compacto de G-code (booleano)'),
                 ('torch_retract_on_ignite', 'Recuar tocha ao ligar (booleano)'),
+                ('modal_compaction', 'Compactação modal do G-code (booleano)'),
+                ('arc_fitting', 'Ajuste de arcos/hélices (booleano)'),
+                ('arc_chord_tol', 'Tolerância de corda do ajuste de arcos (mm)'),
                 ('diametro_inicial', 'Diâmetro inicial (mm)'),
                 ('diametro_final', 'Diâmetro final (mm)'),
                 ('tipo_peca', 'Tipo de peça (cilindrico)')
@@ -1500,9 +1493,438 @@ class SettingsWindow(Toplevel):
         except Exception as e:
             self.parent_app.show_notification(f'Erro ao importar: {e}', 'error')
 
+# --- PAINEL DE DESEMPENHO ---
+class PerformancePanel(Toplevel):
+    """Janela com o resumo de tempos por fase coletado pela instrumentação."""
+    REFRESH_MS = 1000
+
+    def __init__(self, parent_app: 'TFM_GCODE'):
+        super().__init__(parent_app.root)
+        self.parent_app = parent_app; self._refresh_job = None
+        self.title('Desempenho'); self.geometry('760x380')
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        container = ttk.Frame(self, padding="10"); container.pack(expand=True, fill='both')
+        cols = ('fase', 'n', 'media', 'p50', 'p95', 'max', 'ultimo', 'hist')
+        headings = {'fase': 'Fase', 'n': 'Amostras', 'media': 'Média (ms)', 'p50': 'p50 (ms)', 'p95': 'p95 (ms)', 'max': 'Máx (ms)', 'ultimo': 'Último (ms)', 'hist': 'Distribuição'}
+        self.tree = ttk.Treeview(container, columns=cols, show='headings', height=12)
+        for c in cols:
+            self.tree.heading(c, text=headings[c])
+            self.tree.column(c, width=200 if c == 'fase' else 80, anchor='w' if c in ('fase', 'hist') else 'e')
+        vsb = ttk.Scrollbar(container, orient='vertical', command=self.tree.yview); self.tree.configure(yscrollcommand=vsb.set)
+        self.tree.grid(row=0, column=0, sticky='nsew'); vsb.grid(row=0, column=1, sticky='ns')
+        container.columnconfigure(0, weight=1); container.rowconfigure(0, weight=1)
+
+        btns = ttk.Frame(self, padding=(10, 0, 10, 10)); btns.pack(fill='x')
+        self.profiling_var = tk.BooleanVar(value=perf.profiling)
+        ttk.Checkbutton(btns, text='Capturar cProfile', variable=self.profiling_var, command=self._toggle_profiling).pack(side='left')
+        ttk.Button(btns, text='Perfil mais lento...', command=self._show_slowest_profile).pack(side='left', padx=5)
+        ttk.Button(btns, text='Fechar', command=self.close).pack(side='right')
+        ttk.Button(btns, text='Limpar', command=self._reset).pack(side='right', padx=5)
+        ttk.Button(btns, text='Exportar CSV...', command=lambda: self._export('csv')).pack(side='right')
+        ttk.Button(btns, text='Exportar JSON...', command=lambda: self._export('json')).pack(side='right', padx=5)
+        self._refresh()
+
+    def _refresh(self):
+        try:
+            summary = perf.summary()
+            self.tree.delete(*self.tree.get_children())
+            for phase in sorted(summary, key=lambda k: -summary[k]['p95_ms']):
+                st = summary[phase]
+                self.tree.insert('', 'end', values=(phase, st['total'], f"{st['mean_ms']:.2f}", f"{st['p50_ms']:.2f}", f"{st['p95_ms']:.2f}", f"{st['max_ms']:.2f}", f"{st['last_ms']:.2f}", perf.sparkline(phase)))
+        except Exception:
+            pass
+        self._refresh_job = self.after(self.REFRESH_MS, self._refresh)
+
+    def _toggle_profiling(self):
+        perf.profiling = bool(self.profiling_var.get())
+
+    def _reset(self):
+        perf.reset(); self._refresh_now()
+
+    def _refresh_now(self):
+        if self._refresh_job:
+            try: self.after_cancel(self._refresh_job)
+            except Exception: pass
+        self._refresh()
+
+    def _export(self, fmt):
+        ext = '.json' if fmt == 'json' else '.csv'
+        filepath = filedialog.asksaveasfilename(parent=self, defaultextension=ext, filetypes=[(fmt.upper(), f"*{ext}")], title='Exportar tempos')
+        if not filepath:
+            return
+        try:
+            if fmt == 'json': perf.export_json(filepath)
+            else: perf.export_csv(filepath)
+            self.parent_app.show_notification(f"Tempos exportados:\n{filepath}", 'success')
+        except Exception as e:
+            self.parent_app.show_notification(f"Erro ao exportar tempos: {e}", 'error')
+
+    def _show_slowest_profile(self):
+        text = perf.profile_text()
+        if not text:
+            self.parent_app.show_notification("Nenhum perfil capturado. Ative 'Capturar cProfile' e altere algum parâmetro.", 'info'); return
+        win = Toplevel(self); win.title('Perfil da atualização mais lenta'); win.geometry('900x500')
+        txt = Text(win, wrap='none', font=('Consolas', 9)); txt.pack(expand=True, fill='both')
+        txt.insert('1.0', text); txt.config(state='disabled')
+        def _save():
+            filepath = filedialog.asksaveasfilename(parent=win, defaultextension='.prof', filetypes=[('pstats', '*.prof')], title='Salvar perfil')
+            if filepath and perf.dump_profile(filepath):
+                self.parent_app.show_notification(f"Perfil salvo:\n{filepath}", 'success')
+        ttk.Button(win, text='Salvar .prof...', command=_save).pack(side='right', padx=10, pady=5)
+
+    def close(self):
+        if self._refresh_job:
+            try: self.after_cancel(self._refresh_job)
+            except Exception: pass
+            self._refresh_job = None
+        self.parent_app._perf_panel = None
+        self.destroy()
+
+class ProcedureLibraryPanel(Toplevel):
+    """Biblioteca de procedimentos: busca e ordenação sobre o índice SQLite da pasta de procedimentos."""
+    SEARCH_DELAY_MS = 200
+    COLUMNS = ('name', 'ordem_servico', 'diametro', 'comprimento', 'powder', 'welding_mode', 'num_camadas', 'time_min', 'total_cost')
+    HEADINGS = {'name': 'Nome', 'ordem_servico': 'OS', 'diametro': 'Ø (mm)', 'comprimento': 'Compr. (mm)', 'powder': 'Pó',
+                'welding_mode': 'Modo', 'num_camadas': 'Camadas', 'time_min': 'Tempo', 'total_cost': 'Custo'}
+    MODES = {'': 'Todos', 'espiral': 'Espiral', 'oscilacao': 'Oscilação'}
+
+    def __init__(self, parent_app: 'TFM_GCODE'):
+        super().__init__(parent_app.root)
+        self.parent_app = parent_app; self._search_job = None; self._rows = {}
+        self._order_by = 'name'; self._descending = False
+        folder = parent_app._procedures_folder(); os.makedirs(folder, exist_ok=True)
+        self.index = ProcedureIndex(folder)
+        self.title('Biblioteca de Procedimentos'); self.geometry('980x480')
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        filters = ttk.Frame(self, padding=(10, 10, 10, 5)); filters.pack(fill='x')
+        self.search_var = tk.StringVar(); self.dmin_var = tk.StringVar(); self.dmax_var = tk.StringVar()
+        self.powder_var = tk.StringVar(value='Todos'); self.mode_var = tk.StringVar(value='Todos')
+        ttk.Label(filters, text='Buscar:').pack(side='left')
+        search = ttk.Entry(filters, textvariable=self.search_var, width=28); search.pack(side='left', padx=(2, 10)); search.focus_set()
+        ttk.Label(filters, text='Ø de').pack(side='left')
+        ttk.Entry(filters, textvariable=self.dmin_var, width=7).pack(side='left', padx=2)
+        ttk.Label(filters, text='a').pack(side='left')
+        ttk.Entry(filters, textvariable=self.dmax_var, width=7).pack(side='left', padx=(2, 10))
+        ttk.Label(filters, text='Pó:').pack(side='left')
+        self.powder_combo = ttk.Combobox(filters, textvariable=self.powder_var, state='readonly', width=18, values=['Todos'])
+        self.powder_combo.pack(side='left', padx=(2, 10))
+        ttk.Label(filters, text='Modo:').pack(side='left')
+        ttk.Combobox(filters, textvariable=self.mode_var, state='readonly', width=10, values=list(self.MODES.values())).pack(side='left', padx=2)
+        for var in (self.search_var, self.dmin_var, self.dmax_var, self.powder_var, self.mode_var):
+            var.trace_add('write', lambda *a: self._schedule_search())
+
+        container = ttk.Frame(self, padding=(10, 0, 10, 5)); container.pack(expand=True, fill='both')
+        self.tree = ttk.Treeview(container, columns=self.COLUMNS, show='headings', height=15)
+        for c in self.COLUMNS:
+            self.tree.heading(c, text=self.HEADINGS[c], command=lambda c=c: self._sort_by(c))
+            self.tree.column(c, width=220 if c == 'name' else 90, anchor='w' if c in ('name', 'ordem_servico', 'powder', 'welding_mode') else 'e')
+        vsb = ttk.Scrollbar(container, orient='vertical', command=self.tree.yview); self.tree.configure(yscrollcommand=vsb.set)
+        self.tree.grid(row=0, column=0, sticky='nsew'); vsb.grid(row=0, column=1, sticky='ns')
+        # Miniatura 3D do item selecionado (do cache ou renderizada em segundo plano)
+        self._thumbnail = None
+        self.thumbnail_label = ttk.Label(container, anchor='n'); self.thumbnail_label.grid(row=0, column=2, sticky='n', padx=(8, 0))
+        container.columnconfigure(0, weight=1); container.rowconfigure(0, weight=1)
+        self.tree.bind('<<TreeviewSelect>>', lambda e: self._show_thumbnail())
+        self.tree.bind('<Double-1>', lambda e: self._load_selected())
+        self.tree.bind('<Return>', lambda e: self._load_selected())
+
+        btns = ttk.Frame(self, padding=(10, 0, 10, 10)); btns.pack(fill='x')
+        self.status_var = tk.StringVar(value='')
+        ttk.Label(btns, textvariable=self.status_var).pack(side='left')
+        ttk.Button(btns, text='Fechar', command=self.close).pack(side='right')
+        ttk.Button(btns, text='Carregar', command=self._load_selected).pack(side='right', padx=5)
+        ttk.Button(btns, text='Atualizar índice', command=self._refresh_index).pack(side='right')
+        # Mostra o que já está no índice e atualiza em segundo plano
+        self._search()
+        self._refresh_index()
+
+    def _schedule_search(self):
+        if self._search_job:
+            try: self.after_cancel(self._search_job)
+            except Exception: pass
+        self._search_job = self.after(self.SEARCH_DELAY_MS, self._search)
+
+    def _sort_by(self, column):
+        self._descending = (not self._descending) if self._order_by == column else False
+        self._order_by = column
+        self._search()
+
+    def _diameter(self, var):
+        try:
+            return float(var.get().replace(',', '.')) if var.get().strip() else None
+        except ValueError:
+            return None
+
+    def _search(self):
+        self._search_job = None
+        try:
+            powder = self.powder_var.get(); mode = self.mode_var.get()
+            rows = self.index.query(text=self.search_var.get(), diameter_min=self._diameter(self.dmin_var), diameter_max=self._diameter(self.dmax_var),
+                                    powder=None if powder == 'Todos' else powder,
+                                    welding_mode=next((k for k, v in self.MODES.items() if v == mode and k), None),
+                                    order_by=self._order_by, descending=self._descending)
+        except Exception as e:
+            self.status_var.set(f"Erro na busca: {e}"); return
+        symbol = self.parent_app.config.get('costs', {}).get('currency_symbol', '$')
+        self.tree.delete(*self.tree.get_children()); self._rows = {}
+        for row in rows:
+            values = (row['name'], row['ordem_servico'] or '',
+                      f"{row['diametro']:.1f}" if row['diametro'] is not None else '',
+                      f"{row['comprimento']:.1f}" if row['comprimento'] is not None else '',
+                      row['powder'] or '', self.MODES.get(row['welding_mode'] or '', row['welding_mode'] or ''),
+                      row['num_camadas'] if row['num_camadas'] is not None else '',
+                      format_minutes(row['time_min']) if row['time_min'] is not None else '',
+                      f"{symbol} {row['total_cost']:.2f}" if row['total_cost'] is not None else ('erro' if row['error'] else ''))
+            self._rows[self.tree.insert('', 'end', values=values)] = row
+        self.status_var.set(f"{len(rows)} procedimento(s) — {self.index.folder}")
+
+    def reload(self):
+        """Relê o índice (já atualizado por outra thread) mantendo filtros e ordenação."""
+        try:
+            self.powder_combo['values'] = ['Todos'] + self.index.powders()
+        except Exception:
+            pass
+        self._search()
+
+    def _show_thumbnail(self):
+        selection = self.tree.selection()
+        row = self._rows.get(selection[0]) if selection else None
+        self._thumbnail = None
+        self.thumbnail_label.configure(image='')
+        if row is None or row['error']:
+            return
+        try:
+            # Parâmetros como a janela os teria (procedimentos antigos convertidos), os mesmos da pré-geração
+            params = procedure_params(read_procedure(row['file'])[0], self.parent_app.config)
+            if params is None:
+                return
+            renderer = self.parent_app._thumbnail_renderer()
+            # Já em cache: mostra na hora; senão chega quando o processo de miniaturas terminar
+            path = renderer.request(params, callback=lambda p, f=row['file']: self._on_thumbnail(f, p))
+        except Exception:
+            return
+        if path is not None:
+            self._set_thumbnail(row['file'], path)
+
+    def _on_thumbnail(self, source, path):
+        # Chamado na thread do pool
+        if path is None:
+            return
+        try:
+            self.parent_app.root.after(0, lambda: self._set_thumbnail(source, path))
+        except Exception:
+            pass
+
+    def _set_thumbnail(self, source, path):
+        if not self.winfo_exists():
+            return
+        selection = self.tree.selection()
+        row = self._rows.get(selection[0]) if selection else None
+        if row is None or row['file'] != source:
+            return
+        try:
+            self._thumbnail = tk.PhotoImage(file=path)
+        except Exception:
+            self._thumbnail = None
+        self.thumbnail_label.configure(image=self._thumbnail or '')
+
+    def _refresh_index(self):
+        if getattr(self, '_refreshing', False):
+            return
+        self._refreshing = True
+        self.status_var.set('Atualizando índice...')
+        config = copy.deepcopy(self.parent_app.config)
+
+        def _worker():
+            try:
+                res = {'stats': self.index.refresh(config), 'powders': self.index.powders()}
+            except Exception as e:
+                res = {'error': str(e)}
+
+            def _apply():
+                self._refreshing = False
+                if not self.winfo_exists():
+                    return
+                if res.get('error'):
+                    self.status_var.set(f"Erro ao atualizar índice: {res['error']}"); return
+                self.powder_combo['values'] = ['Todos'] + res['powders']
+                self._search()
+                st = res['stats']
+                if st['added'] or st['updated'] or st['removed']:
+                    self.parent_app.show_notification(f"Biblioteca atualizada: {st['added']} novo(s), {st['updated']} alterado(s), {st['removed']} removido(s).", 'info')
+
+            try:
+                self.parent_app.root.after(0, _apply)
+            except Exception:
+                pass
+
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def _load_selected(self):
+        selection = self.tree.selection()
+        row = self._rows.get(selection[0]) if selection else None
+        if row is None:
+            return
+        if self.parent_app._load_library_file(row['file']):
+            self.close()
+
+    def close(self):
+        if self._search_job:
+            try: self.after_cancel(self._search_job)
+            except Exception: pass
+            self._search_job = None
+        self.parent_app._library_panel = None
+        self.destroy()
+
+class UpdateDownloadDialog(Toplevel):
+    """Progresso do download do instalador (o download roda numa thread; o .part permite retomar)."""
+    PROGRESS_INTERVAL_S = 0.1
+
+    def __init__(self, parent_app: 'TFM_GCODE', version, url, dest, sha256=None, on_done=None):
+        super().__init__(parent_app.root)
+        self.parent_app = parent_app; self.on_done = on_done
+        self.cancel_event = threading.Event(); self._last_report = 0.0
+        self.title(f'Baixando atualização {version}'); self.resizable(False, False)
+        self.protocol("WM_DELETE_WINDOW", self._cancel)
+        frame = ttk.Frame(self, padding="12"); frame.pack(fill='both', expand=True)
+        self.status_var = tk.StringVar(value='Conectando...')
+        ttk.Label(frame, textvariable=self.status_var, width=48).pack(anchor='w')
+        self.bar = ttk.Progressbar(frame, orient='horizontal', length=360, mode='indeterminate'); self.bar.pack(fill='x', pady=8)
+        self.bar.start(15)
+        ttk.Button(frame, text='Cancelar', command=self._cancel).pack(anchor='e')
+        threading.Thread(target=self._worker, args=(url, dest, sha256), daemon=True).start()
+
+    def _worker(self, url, dest, sha256):
+        try:
+            res = {'result': download(url, dest, sha256=sha256, progress=self._progress, cancel=self.cancel_event)}
+        except DownloadCancelled:
+            res = {'cancelled': True}
+        except Exception as e:
+            res = {'error': str(e)}
+        try:
+            self.parent_app.root.after(0, lambda: self._finish(res))
+        except Exception:
+            pass
+
+    def _progress(self, done, total):
+        # Chamado na thread do download: limita as atualizações enviadas à interface
+        now = time.monotonic()
+        if now - self._last_report < self.PROGRESS_INTERVAL_S and (total is None or done < total):
+            return
+        self._last_report = now
+        try:
+            self.parent_app.root.after(0, lambda: self._show_progress(done, total))
+        except Exception:
+            pass
+
+    def _show_progress(self, done, total):
+        if not self.winfo_exists():
+            return
+        if total:
+            if str(self.bar['mode']) != 'determinate':
+                self.bar.stop(); self.bar.configure(mode='determinate', maximum=total)
+            self.bar['value'] = done
+            self.status_var.set(f"{format_size(done)} de {format_size(total)} ({100.0 * done / total:.0f}%)")
+        else:
+            self.status_var.set(f"{format_size(done)} baixados")
+
+    def _cancel(self):
+        self.cancel_event.set()
+        self.status_var.set('Cancelando...')
+
+    def _finish(self, res):
+        try:
+            self.destroy()
+        except Exception:
+            pass
+        if res.get('cancelled'):
+            self.parent_app.show_notification('Download cancelado. Ele continua de onde parou na próxima atualização.', 'info')
+        elif res.get('error'):
+            self.parent_app.show_notification(f"Falha ao baixar o instalador: {res['error']}", 'error')
+        elif callable(self.on_done):
+            self.on_done(res['result'])
+
+class ReportProgressDialog(Toplevel):
+    """Progresso da geração de relatórios PDF (montados em memória numa thread; ver `report_pdf`)."""
+
+    def __init__(self, parent_app: 'TFM_GCODE', make_jobs, on_done=None):
+        super().__init__(parent_app.root)
+        self.parent_app = parent_app; self.on_done = on_done
+        self.cancel_event = threading.Event()
+        self.title('Gerando relatório PDF'); self.resizable(False, False)
+        self.protocol("WM_DELETE_WINDOW", self._cancel)
+        frame = ttk.Frame(self, padding="12"); frame.pack(fill='both', expand=True)
+        self.status_var = tk.StringVar(value='Preparando...')
+        ttk.Label(frame, textvariable=self.status_var, width=48).pack(anchor='w')
+        self.bar = ttk.Progressbar(frame, orient='horizontal', length=360, mode='indeterminate'); self.bar.pack(fill='x', pady=8)
+        self.bar.start(15)
+        ttk.Button(frame, text='Cancelar', command=self._cancel).pack(anchor='e')
+        threading.Thread(target=self._worker, args=(make_jobs, resource_path('assets/logo.png')), daemon=True).start()
+
+    def _worker(self, make_jobs, logo_path):
+        from report_pdf import generate_reports, logo_reader
+        try:
+            jobs, failed = make_jobs()
+            outcome = generate_reports(jobs, logo_path=logo_path, progress=self._progress, cancel=self.cancel_event)
+            res = {'outcome': failed + outcome,
+                   'logo_invalid': os.path.exists(logo_path) and logo_reader(logo_path) is None,
+                   'cancelled': self.cancel_event.is_set()}
+        except Exception as e:
+            res = {'error': str(e)}
+        try:
+            self.parent_app.root.after(0, lambda: self._finish(res))
+        except Exception:
+            pass
+
+    def _progress(self, done, total, job):
+        # Chamado na thread do relatório (uma vez por relatório)
+        try:
+            self.parent_app.root.after(0, lambda: self._show_progress(done, total, job))
+        except Exception:
+            pass
+
+    def _show_progress(self, done, total, job):
+        if not self.winfo_exists():
+            return
+        if str(self.bar['mode']) != 'determinate':
+            self.bar.stop(); self.bar.configure(mode='determinate', maximum=max(total, 1))
+        self.bar['value'] = done
+        if job is not None and not self.cancel_event.is_set():
+            self.status_var.set(f"{done + 1} de {total}: {os.path.basename(job['dest'])}")
+
+    def _cancel(self):
+        self.cancel_event.set()
+        self.status_var.set('Cancelando...')
+
+    def _finish(self, res):
+        try:
+            self.destroy()
+        except Exception:
+            pass
+        if res.get('error'):
+            self.parent_app.show_notification(f"Erro ao gerar PDF: {res['error']}", 'error'); return
+        if res.get('logo_invalid'):
+            self.parent_app.show_notification("Logo inválido: logo.png. Gerando PDF sem logo.", 'warning')
+        outcome = res['outcome']
+        if res.get('cancelled'):
+            done = sum(1 for r in outcome if r['ok'])
+            self.parent_app.show_notification(f"Geração de relatórios cancelada ({done} de {len(outcome)} gerados).", 'info')
+        elif callable(self.on_done):
+            self.on_done(outcome)
+
 # Versão do aplicativo para controle de atualização
 APP_VERSION = "1.0.4"
 
+# Campo do procedimento -> variável da janela (quando os nomes diferem)
+_FIELD_VARS = {'comprimento_revestir': 'comprimento', 'afastamento_tocha': 'afastamento', 'oscillation_type': 'tipo_oscilacao'}
+# Valor interno -> texto exibido nas listas da janela
+_DISPLAY_CHOICES = {
+    'direcao_soldagem': {'esquerda_direita': 'Esquerda -> Direita', 'direita_esquerda': 'Direita -> Esquerda'},
+    'sentido_rotacao': {'horaria': 'Horária (CW)', 'antihoraria': 'Anti-horária (CCW)'},
+    'oscillation_type': {'linear': 'Linear', 'quadrada': 'Quadrada', 'quadrada_continua': 'Quadrada Contínua'},
+}
+
 # --- CLASSE PRINCIPAL ---
 class TFM_GCODE:
     def __init__(self, root, on_ready=None):
@@ -1511,8 +1933,43 @@ class TFM_GCODE:
         self.gcode_generator = GCodeGenerator()
         self.config = self.load_config()
         self.anim = None
-        self._update_job_id = None
         self._debounce_delay = 300
+        # Agendamento adaptativo: cada fase da atualização guarda seu custo médio (ms)
+        self._phase_jobs = {}
+        self._phase_cost_ms = {}
+        self._immediate_phase_ms = 16
+        self._debounce_min_ms = 60
+        self._debounce_max_ms = 1500
+        self._debounce_factor = 1.5
+        self._gcode_preview_pending = False
+        # Abas do visualizador: versão dos parâmetros já renderizada em cada aba
+        self._param_version = 0
+        self._tab_rendered_version = {}
+        # Abas cuja figura já foi criada (na primeira visita ou no tempo ocioso após a janela aparecer)
+        self._figures_built = set()
+        # Último G-code gerado para pré-visualização/gráficos (chave = parâmetros)
+        self._gcode_cache_lock = threading.Lock()
+        self._gcode_cache_key = None
+        self._gcode_cache_lines = None
+        self._gcode_cache_stats = None
+        self._gcode_cache_fitting = None
+        self._analysis_cache_key = None
+        self._analysis_cache_result = None
+        # Última estimativa em forma fechada (prévia dos resultados e das linhas enquanto o programa é gerado)
+        self._closed_form_estimate = None
+        # Pacote de trabalho aberto: programa/tabela de movimentos lidos do arquivo enquanto os parâmetros não mudam
+        self._job = None
+        self._job_key = None
+        self._job_lines = None
+        # Modelo da máquina (perfil do Mach3), carregado sob demanda
+        self.machine = None
+        # Observador da pasta de procedimentos e cache das pré-visualizações pré-geradas
+        self._procedure_watcher = None
+        self._preview_warmer = None
+        self._preview_cache = None
+        # Miniaturas 3D dos procedimentos (processo criado no primeiro pedido)
+        self._thumbnails = None
+        self._library_panel = None
         self._notification_job_id = None
         self._last_gcode_line_count = 0
         self._gcode_preview_thread_running = False
@@ -1522,9 +1979,12 @@ class TFM_GCODE:
         except Exception:
             pass
         self.root.state('zoomed')
-        self._create_widgets()
-        self._setup_styles()
-        self._update_ui_text() # Agora apenas define os textos
+        # Só o painel de parâmetros e as abas vazias: as figuras vêm depois (ver `_ensure_visualizer_figure`)
+        with startup.step('janela:widgets'):
+            self._create_widgets()
+        with startup.step('janela:estilos'):
+            self._setup_styles()
+            self._update_ui_text() # Agora apenas define os textos
         # Restaura sashes quando a janela já tem dimensões
         try:
             self.root.after(200, self._restore_sash_positions)
@@ -1536,14 +1996,44 @@ class TFM_GCODE:
             self.root.after(2000, lambda: self._check_for_updates(silent=True))
         except Exception:
             pass
+        try:
+            self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+            self.root.after(3000, self._start_procedure_watcher)
+        except Exception:
+            pass
         # Notifica que a UI está pronta para esconder Splash
         try:
-            if callable(on_ready):
-                # Usa after_idle para garantir que primeiros frames já renderizaram
-                self.root.after_idle(on_ready)
+            # Usa after_idle para garantir que primeiros frames já renderizaram
+            self.root.after_idle(lambda: self._on_ui_ready(on_ready))
         except Exception:
             pass
 
+    def _on_ui_ready(self, on_ready=None):
+        startup.mark('interativo')
+        try:
+            if callable(on_ready):
+                on_ready()
+        finally:
+            # Figuras das abas ainda não visitadas são criadas aos poucos, sem segurar a janela
+            self.root.after(500, self._prebuild_visualizer_figures)
+
+    def _mark_startup_when_idle(self, label):
+        """Marca o evento quando o Tk termina de desenhar (after_idle) e confere se a medição acabou."""
+        def _mark():
+            startup.mark(label)
+            self._report_startup()
+        try:
+            self.root.after_idle(_mark)
+        except Exception:
+            _mark()
+
+    def _report_startup(self):
+        """Modo de medição: imprime o relatório quando a primeira pré-visualização (3D e G-code) ficou pronta."""
+        if startup.has('primeira_previa', 'previa_gcode') and startup.report():
+            if os.environ.get('TFM_STARTUP_EXIT'):
+                # Benchmark de inicialização (scripts/bench_startup.py): fecha depois de gravar o relatório
+                self.root.after(0, self._on_close)
+
     def get_default_formulas(self):
         # Template padrão de fórmulas do aplicativo (completo)
         return {
@@ -1597,13 +2087,431 @@ class TFM_GCODE:
         self.notification_frame.grid_remove(); self.notification_label.config(text="")
         if self._notification_job_id: self.root.after_cancel(self._notification_job_id); self._notification_job_id = None
 
+    # Fases do pipeline de atualização, na ordem em que são agendadas
+    UPDATE_PHASES = ('resultados', '3d', 'gcode', 'graficos')
+
+    # Atualizador de cada aba do visualizador (índice -> método)
+    VISUALIZER_TAB_UPDATERS = {
+        0: '_update_3d_tab',
+        1: '_update_temporal_plot',
+        2: '_update_oscillation_plot',
+        3: '_update_statistics_plot',
+        4: '_update_process_plots',
+    }
+
     def trigger_update(self, *args):
-        if self._update_job_id: self.root.after_cancel(self._update_job_id)
-        self._update_job_id = self.root.after(self._debounce_delay, self._perform_update)
+        # Nova versão de parâmetros: todas as abas ficam pendentes
+        self._param_version += 1
+        # Fases baratas rodam de imediato; fases caras aguardam proporcionalmente ao custo recente
+        for phase in self.UPDATE_PHASES:
+            self._schedule_update_phase(phase)
+
+    def _schedule_update_phase(self, phase):
+        job = self._phase_jobs.pop(phase, None)
+        if job:
+            try: self.root.after_cancel(job)
+            except Exception: pass
+        self._phase_jobs[phase] = self.root.after(self._phase_delay(phase), lambda p=phase: self._run_update_phase(p))
+
+    def _phase_delay(self, phase):
+        """Atraso (ms) para a fase: 0 se barata, senão proporcional ao custo médio medido."""
+        cost = self._phase_cost_ms.get(phase)
+        if cost is None:
+            # Ainda sem medição: usa o debounce padrão
+            return self._debounce_delay
+        if cost <= self._immediate_phase_ms:
+            return 0
+        return int(min(self._debounce_max_ms, max(self._debounce_min_ms, cost * self._debounce_factor)))
+
+    def _record_phase_cost(self, phase, elapsed_ms, alpha=0.3):
+        # Média móvel exponencial para não reagir a um único pico
+        perf.record(f"fase:{phase}", elapsed_ms)
+        prev = self._phase_cost_ms.get(phase)
+        self._phase_cost_ms[phase] = elapsed_ms if prev is None else (prev * (1.0 - alpha) + elapsed_ms * alpha)
+
+    def _run_update_phase(self, phase):
+        self._phase_jobs.pop(phase, None)
+        if phase == 'gcode':
+            # Custo (geração + realce) é medido pelo próprio worker
+            self._update_gcode_preview_async(); return
+        t0 = time.perf_counter()
+        did_work = True
+        try:
+            with perf.profile(f"fase:{phase}"):
+                if phase == 'resultados':
+                    self.executar_calculos_e_desenho(desenhar=False)
+                elif phase == '3d':
+                    did_work = self._current_visualizer_tab() == 0 and self._render_visualizer_tab(0)
+                elif phase == 'graficos':
+                    # Apenas a aba visível é recalculada; as demais esperam até serem abertas
+                    current = self._current_visualizer_tab()
+                    did_work = current not in (None, 0) and self._render_visualizer_tab(current)
+        finally:
+            # Só mede quando houve trabalho, para não mascarar o custo real da fase
+            if did_work:
+                self._record_phase_cost(phase, (time.perf_counter() - t0) * 1000.0)
+
+    def _current_visualizer_tab(self):
+        try:
+            return self.visualizer_notebook.index(self.visualizer_notebook.select())
+        except Exception:
+            return None
+
+    def _render_visualizer_tab(self, index, force=False):
+        """Renderiza a aba se estiver desatualizada. Retorna True se houve redesenho."""
+        name = self.VISUALIZER_TAB_UPDATERS.get(index)
+        if name is None:
+            return False
+        # Sem figura ainda: cria agora (a versão renderizada começa vazia)
+        self._ensure_visualizer_figure(index)
+        if not force and self._tab_rendered_version.get(index) == self._param_version:
+            return False
+        version = self._param_version
+        getattr(self, name)()
+        self._tab_rendered_version[index] = version
+        if index == 0 and not startup.has('primeira_previa'):
+            self._mark_startup_when_idle('primeira_previa')
+        return True
+
+    def _update_3d_tab(self):
+        self.desenhar_percurso_3d(self._get_current_params())
+
+    # Construtor da figura de cada aba (índice -> método)
+    VISUALIZER_TAB_BUILDERS = {
+        0: '_build_3d_figure',
+        1: '_build_temporal_figure',
+        2: '_build_oscillation_figure',
+        3: '_build_statistics_figure',
+        4: '_build_process_figure',
+    }
+
+    def _ensure_visualizer_figure(self, index):
+        """Cria a figura da aba na primeira vez que é necessária. Retorna True se criou agora."""
+        built = getattr(self, '_figures_built', None)
+        name = self.VISUALIZER_TAB_BUILDERS.get(index)
+        if built is None or name is None or index in built:
+            return False
+        built.add(index)
+        with startup.step(f"figura:{index}"):
+            if 'figure_widgets' not in sys.modules:
+                with startup.step('import:matplotlib'):
+                    import figure_widgets
+            getattr(self, name)()
+        return True
+
+    def _prebuild_visualizer_figures(self):
+        """Cria, uma por vez no tempo ocioso, as figuras das abas ainda não visitadas."""
+        pending = [i for i in sorted(self.VISUALIZER_TAB_BUILDERS) if i not in self._figures_built]
+        if not pending:
+            return
+        try:
+            self._ensure_visualizer_figure(pending[0])
+        except Exception:
+            pass
+        if len(pending) > 1:
+            try:
+                self.root.after(50, lambda: self.root.after_idle(self._prebuild_visualizer_figures))
+            except Exception:
+                pass
+
+    def _build_3d_figure(self):
+        from figure_widgets import Figure, TimedFigureCanvas, CustomToolbar
+        self.fig = Figure(figsize=(7, 5), dpi=100)
+        self.ax = self.fig.add_subplot(111, projection='3d')
+        self.canvas = TimedFigureCanvas(self.fig, master=self.tab_3d, phase='3d')
+        self.canvas_widget = self.canvas.get_tk_widget()
+        self.canvas_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.toolbar_frame = ttk.Frame(self.tab_3d)
+        self.toolbar_frame.pack(side=tk.TOP, fill=tk.X)
+        self.toolbar = CustomToolbar(self.canvas, self.toolbar_frame, self)
+        self.toolbar.update()
+        # Captura vista inicial para espelhamento do Home
+        try:
+            self._home_view = (self.ax.elev, self.ax.azim)
+        except Exception:
+            self._home_view = (25, 45)
+        # Define posição inicial padrão (não espelhada)
+        try:
+            self._initial_view = (self._home_view[0], self._home_view[1])
+            self.ax.view_init(elev=self._initial_view[0], azim=self._initial_view[1])
+        except Exception:
+            pass
+        # O primeiro desenho vem de `_render_visualizer_tab`, que chamou a criação
+
+    def _build_temporal_figure(self):
+        from figure_widgets import Figure, TimedFigureCanvas
+        self.fig_temporal = Figure(figsize=(7, 4), dpi=100)
+        self.ax_temporal = self.fig_temporal.add_subplot(111)
+        self.canvas_temporal = TimedFigureCanvas(self.fig_temporal, master=self.tab_temporal, phase='temporal')
+        self.canvas_temporal_widget = self.canvas_temporal.get_tk_widget()
+        self.canvas_temporal_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        try:
+            self.ax_temporal.set_title("Análise Temporal (aguardando dados)")
+            self.ax_temporal.set_xlabel("Passo"); self.ax_temporal.set_ylabel("Valor")
+            self.canvas_temporal.draw_idle()
+        except Exception:
+            pass
+
+    def _build_oscillation_figure(self):
+        from figure_widgets import Figure, TimedFigureCanvas
+        self.fig_oscilacao = Figure(figsize=(7, 4), dpi=100)
+        self.ax_oscilacao = self.fig_oscilacao.add_subplot(111)
+        self.canvas_oscilacao = TimedFigureCanvas(self.fig_oscilacao, master=self.tab_oscilacao, phase='oscilacao')
+        self.canvas_oscilacao_widget = self.canvas_oscilacao.get_tk_widget()
+        self.canvas_oscilacao_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        try:
+            self.ax_oscilacao.set_title("Oscilação (aguardando dados)"); self.ax_oscilacao.set_xlabel("Passo"); self.ax_oscilacao.set_ylabel("Posição"); self.canvas_oscilacao.draw_idle()
+        except Exception:
+            pass
+
+    def _build_statistics_figure(self):
+        from figure_widgets import Figure, TimedFigureCanvas
+        # Dois subplots: distância por passo e histograma
+        self.fig_estatisticas = Figure(figsize=(7, 4), dpi=100)
+        self.ax_est_top = self.fig_estatisticas.add_subplot(211)
+        self.ax_est_bottom = self.fig_estatisticas.add_subplot(212)
+        self.canvas_estatisticas = TimedFigureCanvas(self.fig_estatisticas, master=self.tab_estatisticas, phase='estatisticas')
+        self.canvas_estatisticas_widget = self.canvas_estatisticas.get_tk_widget()
+        self.canvas_estatisticas_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        try:
+            self.ax_est_top.set_title("Distância por passo (aguardando dados)")
+            self.ax_est_top.set_xlabel("Passo"); self.ax_est_top.set_ylabel("Distância")
+            self.ax_est_bottom.set_title("Histograma das distâncias")
+            self.ax_est_bottom.set_xlabel("Distância"); self.ax_est_bottom.set_ylabel("Contagem")
+            self.fig_estatisticas.tight_layout()
+            self.canvas_estatisticas.draw_idle()
+        except Exception:
+            pass
+
+    def _build_process_figure(self):
+        from figure_widgets import Figure, TimedFigureCanvas
+        # Custos, consumo e métricas agregadas
+        self.fig_processo = Figure(figsize=(7, 4), dpi=100)
+        self.ax_proc_cost = self.fig_processo.add_subplot(221)
+        self.ax_proc_cons = self.fig_processo.add_subplot(222)
+        self.ax_proc_len = self.fig_processo.add_subplot(223)
+        self.ax_proc_time = self.fig_processo.add_subplot(224)
+        self.canvas_processo = TimedFigureCanvas(self.fig_processo, master=self.tab_processo, phase='processo')
+        self.canvas_processo_widget = self.canvas_processo.get_tk_widget()
+        self.canvas_processo_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        try:
+            self.ax_proc_cost.set_title("Custos — % por categoria")
+            self.ax_proc_cons.set_title("Consumo (pó e gás)")
+            self.ax_proc_len.set_title("Comprimento acumulado por camada")
+            self.ax_proc_time.set_title("Tempo total")
+            self.fig_processo.tight_layout()
+            self.canvas_processo.draw_idle()
+        except Exception:
+            pass
+
+    def _generate_gcode_cached(self, params):
+        """Gera o G-code reaproveitando o último resultado para os mesmos parâmetros."""
+        machine = self._refresh_machine()
+        try:
+            # O perfil da máquina limita o avanço: conteúdo do XML faz parte da chave
+            key = self._program_key(params, machine)
+        except Exception:
+            key = None
+        with self._gcode_cache_lock:
+            if key is not None and key == self._gcode_cache_key:
+                return self._gcode_cache_lines
+        job = getattr(self, '_job', None)
+        if job is not None and key is not None and key == self._job_key:
+            # Programa do pacote aberto: descomprimido só agora, quando a pré-visualização pede
+            gcode_output = list(job.gcode_lines())
+            self._job_lines = gcode_output
+            with self._gcode_cache_lock:
+                self._gcode_cache_key, self._gcode_cache_lines = key, gcode_output
+                self._gcode_cache_stats = None
+                self._gcode_cache_fitting = None
+            return gcode_output
+        cache = getattr(self, '_preview_cache', None)
+        if cache is not None and key is not None:
+            # Programa pré-gerado pelo observador da pasta de procedimentos
+            gcode_output = cache.load_program(key)
+            if gcode_output:
+                with self._gcode_cache_lock:
+                    self._gcode_cache_key, self._gcode_cache_lines = key, gcode_output
+                    self._gcode_cache_stats = None
+                    self._gcode_cache_fitting = None
+                return gcode_output
+        gcode_output = self.gcode_generator.generate(params, machine=machine)
+        with self._gcode_cache_lock:
+            self._gcode_cache_key, self._gcode_cache_lines = key, gcode_output
+            self._gcode_cache_stats = self.gcode_generator.last_compaction_stats
+            self._gcode_cache_fitting = self.gcode_generator.last_fitting_stats
+        return gcode_output
+
+    def _program_key(self, params, machine):
+        """Chave do programa destes parâmetros (a mesma do observador da pasta, `program_key`)."""
+        return program_key(params, machine, self.gcode_generator.output_format, APP_VERSION)
+
+    def _cached_gcode(self, params):
+        """Linhas já geradas para estes parâmetros (pré-visualização), ou None."""
+        try:
+            key = self._program_key(params, self._refresh_machine())
+        except Exception:
+            return None
+        with self._gcode_cache_lock:
+            return self._gcode_cache_lines if key == self._gcode_cache_key else None
+
+    def _mach3_profile_path(self):
+        """XML do perfil do Mach3: configurado, na pasta do Mach3 ou o Mach3Mill.xml do projeto."""
+        integration = self.config.get('integration', {})
+        candidates = [integration.get('mach3_profile_xml')]
+        mach3_path = integration.get('mach3_path')
+        if mach3_path:
+            candidates.append(os.path.join(os.path.dirname(mach3_path), f"{integration.get('mach3_profile', 'PTA')}.xml"))
+        candidates.append(resource_path('Mach3Mill.xml'))
+        candidates.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'Mach3Mill.xml'))
+        return next((p for p in candidates if p and os.path.isfile(p)), None)
+
+    def _refresh_machine(self):
+        """Atualiza `self.machine` com o perfil do Mach3 atual (relido só se o arquivo mudou).
+
+        O gerador é compartilhado entre a thread da pré-visualização e a
+        exportação: a máquina vai em cada chamada de `generate`, não no gerador.
+        """
+        try:
+            path = self._mach3_profile_path()
+            machine = load_mach3_profile(path) if path else default_machine()
+        except Exception:
+            machine = getattr(self, 'machine', None) or default_machine()
+        self.machine = machine
+        return machine
+
+    @perf.timed('gcode:analise')
+    def _analyze_gcode_cached(self, gcode_lines, params=None):
+        """Tempo de ciclo simulado, verificação de limites e estatísticas dos movimentos do G-code.
+
+        Reaproveitados enquanto G-code e perfil não mudam. `params` são os
+        parâmetros do programa (afastamento da tocha para o raio das camadas);
+        sem eles usa os da tela.
+        """
+        try:
+            from toolpath import parse_moves
+            from cycle_time import simulate
+            from limits_check import check_limits
+            from toolpath_stats import toolpath_statistics
+            machine = self._refresh_machine()
+            with self._gcode_cache_lock:
+                key = (self._gcode_cache_key, machine.digest) if gcode_lines is self._gcode_cache_lines else None
+                if key is not None and key == self._analysis_cache_key:
+                    return self._analysis_cache_result
+            table = None
+            if getattr(self, '_job', None) is not None and gcode_lines is self._job_lines:
+                # Tabela de movimentos gravada no pacote (mapeada em memória)
+                table = self._job.move_table()
+            if table is None:
+                table = parse_moves(gcode_lines or [])
+            cycle = simulate(table, machine)
+            cycle.pop('segment_s', None)
+            cycle['profile'] = machine.name
+            params = params if params is not None else (self._get_current_params() or {})
+            stats = toolpath_statistics(table, standoff=params.get('afastamento_tocha', 0.0))
+            result = {'cycle': cycle, 'limits': check_limits(table, machine), 'stats': stats}
+            if key is not None:
+                with self._gcode_cache_lock:
+                    self._analysis_cache_key, self._analysis_cache_result = key, result
+            return result
+        except Exception:
+            return {}
+
+    def _program_stats(self, params):
+        """Estatísticas dos movimentos do programa já gerado e analisado para estes parâmetros, ou None."""
+        if self._cached_gcode(params) is None:
+            return None
+        with self._gcode_cache_lock:
+            key = (self._gcode_cache_key, self.machine.digest)
+            if key == self._analysis_cache_key:
+                return self._analysis_cache_result.get('stats')
+        return None
+
+    def _closed_form_stats(self, params):
+        """Totais do programa sem gerá-lo (`program_estimate`), guardados para a contagem de linhas da prévia."""
+        from program_estimate import estimate_program
+        try:
+            stats = estimate_program(params, self._refresh_machine(), self.gcode_generator.output_format)
+        except Exception:
+            stats = None
+        self._closed_form_estimate = stats
+        return stats
+
+    def _confirm_machine_limits(self, gcode_lines):
+        """Pergunta antes de exportar um programa que excede os limites da máquina (True = prosseguir)."""
+        from limits_check import summarize as summarize_limits
+        report = self._analyze_gcode_cached(gcode_lines).get('limits')
+        message = summarize_limits(report)
+        if not message:
+            return True
+        return messagebox.askyesno("Limites da máquina", message + "\n\nGerar o arquivo mesmo assim?")
+
+    def _confirm_written_limits(self, filepath, machine):
+        """Confere os limites de um programa gravado em fluxo, lendo o arquivo (True = prosseguir).
+
+        Se a verificação falhar o programa não é enviado: sem relatório não
+        há como saber se ele cabe na máquina.
+        """
+        from toolpath import parse_moves
+        from limits_check import check_limits, summarize as summarize_limits
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                report = check_limits(parse_moves(f.read().splitlines()), machine)
+        except Exception as e:
+            self.show_notification(f"Erro ao conferir os limites da máquina: {e}", 'error')
+            return False
+        message = summarize_limits(report)
+        if not message:
+            return True
+        return messagebox.askyesno("Limites da máquina", message + "\n\nAbrir no Mach3 mesmo assim?")
+
+    @staticmethod
+    def _discard_tap(written):
+        """Remove o programa gravado por `write_tap` e o sidecar."""
+        for leftover in (written.get('path'), written.get('sidecar')):
+            if not leftover:
+                continue
+            try:
+                os.remove(leftover)
+            except Exception:
+                pass
+
+    def _show_cycle_time(self, cycle):
+        """Atualiza o resultado 'Tempo de Ciclo (sim.)' e o detalhamento por camada no tooltip."""
+        try:
+            if not cycle:
+                self.resultados['cycle_time'].set("-")
+                return
+            from cycle_time import format_duration
+            self.resultados['cycle_time'].set(format_duration(cycle['total_s']))
+            parts = [f"Perfil: {cycle.get('profile') or '-'}",
+                     f"Avanço: {format_duration(cycle['feed_s'])} | Rápido: {format_duration(cycle['rapid_s'])}"]
+            parts += [f"Camada {layer + 1}: {format_duration(t)}" for layer, t in sorted(cycle['per_layer_s'].items())]
+            if getattr(self, 'cycle_time_tooltip', None) is not None:
+                self.cycle_time_tooltip.text = "\n".join(parts)
+        except Exception:
+            pass
+
+    def _compaction_note(self, stats=None, fitting=None):
+        """Texto com o ganho da compactação modal e do ajuste de arcos (vazio se não aplicados)."""
+        stats = stats if stats is not None else self.gcode_generator.last_compaction_stats
+        fitting = fitting if fitting is not None else self.gcode_generator.last_fitting_stats
+        parts = []
+        if fitting:
+            parts.append(f"Ajuste: {fitting['merged_moves']} segmentos → {fitting['line_moves']} hélices/retas e {fitting['arcs']} arcos")
+        if stats:
+            parts.append(f"Compactado: {format_size(stats['bytes_in'])} → {format_size(stats['bytes_out'])} "
+                         f"({stats['lines_in']} → {stats['lines_out']} linhas)")
+        return "; ".join(parts)
 
     def _perform_update(self):
-        self._update_job_id = None; self.executar_calculos_e_desenho(); self._update_gcode_preview_async()
-        self._update_temporal_plot(); self._update_oscillation_plot(); self._update_statistics_plot(); self._update_process_plots()
+        # Executa todas as fases imediatamente (sem agendamento)
+        for phase in self.UPDATE_PHASES:
+            job = self._phase_jobs.pop(phase, None)
+            if job:
+                try: self.root.after_cancel(job)
+                except Exception: pass
+            self._run_update_phase(phase)
 
     def load_config(self, filepath=None):
         # Resolve caminho padrão conforme estrutura de pastas nova e executável congelado
@@ -1637,7 +2545,9 @@ class TFM_GCODE:
                 "enabled": True,
                 "check_on_start": True,
                 # Em produção, apontar para URL http(s); aqui definimos um padrão seguro
-                "feed_url": "https://thyago0730.github.io/tfm-gcode-python/latest.json"
+                "feed_url": "https://thyago0730.github.io/tfm-gcode-python/latest.json",
+                # Intervalo mínimo entre consultas ao feed na inicialização (horas); a checagem manual ignora
+                "min_check_interval_h": 6.0
             },
             "costs": {
                 "powder_brl_kg": 250.0,
@@ -1667,14 +2577,19 @@ class TFM_GCODE:
             },
             "database": {
                 # Novo padrão: data/procedures
-                "procedures_path": "data/procedures"
+                "procedures_path": "data/procedures",
+                # Observa a pasta (varredura de mtimes) e pré-gera programas/miniaturas em segundo plano
+                "watch_procedures": True,
+                "watch_interval_s": 5.0
             },
             "integration": {
                 "mach3_path": "",
                 "gcode_dir": "C:/Mach3/GCode",
                 "write_autoload_txt": True,
                 "allow_file_association_fallback": False,
-                "mach3_profile": "PTA"
+                "mach3_profile": "PTA",
+                # XML do perfil com a sintonia dos motores (vazio: <perfil>.xml na pasta do Mach3)
+                "mach3_profile_xml": ""
             }
         }
 
@@ -1748,18 +2663,30 @@ class TFM_GCODE:
                         pass
                 return
 
-            # Carrega latest.json (arquivo local ou via HTTP)
-            data = None
-            try:
-                if '://' in feed and feed.lower().startswith(('http://', 'https://')):
-                    with urllib.request.urlopen(feed, timeout=5) as resp:
-                        raw = resp.read().decode('utf-8', errors='replace')
-                        data = json.loads(raw)
-                else:
-                    # caminho local
-                    with open(feed, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-            except Exception:
+            # Feed lido numa thread (cache em disco + requisição condicional): a interface nunca espera a rede
+            client = FeedClient(feed, os.path.join(default_update_cache_dir(), 'update_feed.json'),
+                                min_interval_s=float(upd.get('min_check_interval_h', 6.0)) * 3600.0)
+
+            def _worker():
+                try:
+                    res = client.fetch(force=not silent)
+                except Exception as e:
+                    res = {'data': None, 'status': 'offline', 'error': str(e)}
+                try:
+                    self.root.after(0, lambda: self._handle_update_feed(res, silent))
+                except Exception:
+                    pass
+
+            threading.Thread(target=_worker, daemon=True).start()
+        except Exception:
+            # Não interrompe a aplicação por falha de update
+            pass
+
+    def _handle_update_feed(self, res, silent):
+        """Compara a versão do feed com a do app e oferece a atualização (thread da interface)."""
+        try:
+            data = res.get('data')
+            if not isinstance(data, dict) or (res.get('status') == 'offline' and not silent):
                 if not silent:
                     try:
                         self.show_notification('Falha ao checar atualização.', 'error')
@@ -1795,80 +2722,74 @@ class TFM_GCODE:
                     pass
                 return
 
-            # Baixa instalador para pasta temporária
-            try:
-                tmp_dir = Path(tempfile.gettempdir())
-                fname = 'TFM_GCODE_Setup.exe'
-                dest = tmp_dir / fname
-                with urllib.request.urlopen(installer_url, timeout=30) as resp:
-                    content = resp.read()
-                with open(dest, 'wb') as outf:
-                    outf.write(content)
-                # Valida SHA-256, se fornecido
-                if sha256_expected:
-                    h = hashlib.sha256()
-                    h.update(content)
-                    digest = h.hexdigest()
-                    if digest.lower() != sha256_expected.lower():
-                        try:
-                            self.show_notification('Falha de integridade do instalador (hash).', 'error')
-                        except Exception:
-                            pass
-                        return
-                # Executa instalador e encerra app
-                try:
-                    subprocess.Popen([str(dest)], shell=True)
-                except Exception:
-                    try:
-                        self.show_notification('Não foi possível iniciar o instalador.', 'error')
-                    except Exception:
-                        pass
-                    return
-                try:
-                    self.root.quit()
-                except Exception:
-                    pass
-            except Exception:
-                try:
-                    self.show_notification('Falha ao baixar o instalador.', 'error')
-                except Exception:
-                    pass
+            # Baixa o instalador numa thread, com progresso; um .part de download anterior é retomado
+            dest = Path(tempfile.gettempdir()) / 'TFM_GCODE_Setup.exe'
+            UpdateDownloadDialog(self, remote_version, installer_url, str(dest), sha256=sha256_expected or None,
+                                 on_done=self._run_installer)
         except Exception:
             # Não interrompe a aplicação por falha de update
             pass
 
+    def _run_installer(self, result):
+        """Executa o instalador baixado e encerra o app."""
+        try:
+            subprocess.Popen([str(result['path'])], shell=True)
+        except Exception:
+            try:
+                self.show_notification('Não foi possível iniciar o instalador.', 'error')
+            except Exception:
+                pass
+            return
+        self._flush_config()
+        try:
+            self.root.quit()
+        except Exception:
+            pass
+
     def save_config(self, filepath=None, config_data=None):
-        from pathlib import Path
+        """Agenda a gravação do config.json: em segundo plano, agrupada e atômica (ver `ConfigStore`)."""
         data_to_save = config_data if config_data is not None else self.config
         try:
-            if filepath is None:
-                if getattr(sys, 'frozen', False):
-                    base_dir = Path(sys.executable).resolve().parent
-                    filepath = str(base_dir / 'config.json')
-                else:
-                    base_dir = Path(__file__).resolve().parents[2]
-                    filepath = str(base_dir / 'config' / 'config.json')
-
-            dir_name = os.path.dirname(filepath)
-            if dir_name and not os.path.exists(dir_name):
-                os.makedirs(dir_name)
-
-            # Garantir existência de data/procedures (absoluto)
-            proc_conf = data_to_save.get('database', {}).get('procedures_path', 'data/procedures')
-            proc_path = Path(proc_conf)
-            if not proc_path.is_absolute():
-                if getattr(sys, 'frozen', False):
-                    root_dir = Path(sys.executable).resolve().parent
-                else:
-                    root_dir = Path(__file__).resolve().parents[2]
-                proc_path = root_dir / proc_path
-            os.makedirs(proc_path, exist_ok=True)
-
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data_to_save, f, indent=4)
+            store = self._config_store_for(filepath)
+            # Garantir existência de data/procedures (absoluto); só verifica na primeira vez de cada caminho
+            store.ensure_dir(self._procedures_folder(data_to_save))
+            store.save(data_to_save)
         except Exception as e:
             self.show_notification(f"Não foi possível salvar a configuração: {e}", 'error')
 
+    def _config_store_for(self, filepath=None):
+        """Gravador do config.json; o caminho é o mesmo de onde a configuração foi lida."""
+        from pathlib import Path
+        store = getattr(self, '_config_store', None)
+        if filepath is None:
+            if store is not None:
+                return store
+            if getattr(sys, 'frozen', False):
+                filepath = str(Path(sys.executable).resolve().parent / 'config.json')
+            else:
+                filepath = str(Path(__file__).resolve().parents[2] / 'config' / 'config.json')
+        if store is None or store.path != os.path.abspath(filepath):
+            if store is not None:
+                store.close()
+            store = self._config_store = ConfigStore(filepath, on_error=self._on_config_save_error)
+        return store
+
+    def _on_config_save_error(self, error):
+        # Chamado na thread de gravação
+        try:
+            self.root.after(0, lambda: self.show_notification(f"Não foi possível salvar a configuração: {error}", 'error'))
+        except Exception:
+            pass
+
+    def _flush_config(self):
+        """Grava agora a configuração pendente (ao sair do app)."""
+        store = getattr(self, '_config_store', None)
+        if store is not None:
+            try:
+                store.close()
+            except Exception as e:
+                self.show_notification(f"Não foi possível salvar a configuração: {e}", 'error')
+
     # --- Escala dinâmica de DPI ---
     def _apply_dynamic_scaling(self):
         """Ajusta automaticamente a escala do Tk com base no DPI real.
@@ -1883,61 +2804,12 @@ class TFM_GCODE:
         except Exception:
             pass
 
+    @perf.timed('formulas')
     def _evaluate_formulas_runtime(self, params):
         """Avalia o bloco de fórmulas presente em self.config e retorna um dict.
         Usa o mesmo ambiente seguro do editor, permitindo dependências entre chaves.
         """
-        block = self.config.get('formulas', {}) or {}
-        # Extrair expressões
-        if isinstance(block, dict) and 'expressions' in block and isinstance(block['expressions'], dict):
-            expressions = dict(block['expressions'])
-        elif isinstance(block, dict):
-            expressions = {k: v for k, v in block.items() if isinstance(v, str)}
-        else:
-            return {}
-
-        costs = self.config.get('costs', {})
-        safe_globals = {'__builtins__': {}}
-        safe_locals = {
-            **params,
-            'math': math,
-            'pi': math.pi,
-            'sin': math.sin,
-            'cos': math.cos,
-            'tan': math.tan,
-            'abs': abs,
-            'round': round,
-            'min': min,
-            'max': max,
-            'ceil': math.ceil,
-            'floor': math.floor,
-            'gas_argon_brl_m3': costs.get('gas_argon_brl_m3', 0.0),
-            'labor_brl_hour': costs.get('labor_brl_hour', 0.0),
-            'machine_brl_hour': costs.get('machine_brl_hour', 0.0),
-            'powder_cost_brl_kg': params.get('powder_cost_brl_kg', costs.get('powder_brl_kg', 0.0)),
-        }
-
-        results = {}
-        pending = dict(expressions)
-        for _ in range(6):
-            progressed = False
-            for key in list(pending.keys()):
-                expr = pending[key]
-                try:
-                    val = eval(expr, safe_globals, {**safe_locals, **results})
-                    results[key] = val
-                    del pending[key]
-                    progressed = True
-                except NameError:
-                    continue
-                except Exception:
-                    # Armazena o erro para diagnóstico, mas não interrompe
-                    results[key] = None
-                    del pending[key]
-                    progressed = True
-            if not progressed:
-                break
-        return results
+        return evaluate_formulas(params, self.config)
 
     def refresh_powder_selector(self):
         """Atualiza os valores do combobox de Tipo de Pó com base em self.config.
@@ -2051,6 +2923,11 @@ class TFM_GCODE:
         self.params['compact_gcode'] = tk.BooleanVar(value=False)
         # Controle: recuar tocha ao ligar
         self.params['torch_retract_on_ignite'] = tk.BooleanVar(value=True)
+        # Pós-processamento: compactação modal do G-code
+        self.params['modal_compaction'] = tk.BooleanVar(value=False)
+        # Pós-processamento: ajuste de hélices/arcos com tolerância de corda (mm)
+        self.params['arc_fitting'] = tk.BooleanVar(value=False)
+        self.params['arc_chord_tol'] = tk.StringVar(value="0.01")
         # Removido: controle de rotação por spindle; sempre usar Eixo A
 
         vcmd_float = (self.root.register(self._validate_float), '%P')
@@ -2170,6 +3047,25 @@ class TFM_GCODE:
         )
         self.process_labels['TorchRetract'].grid(row=row_idx, column=0, columnspan=2, sticky="w", padx=8, pady=6); row_idx += 1
 
+        # Compactação modal: remove G/F/eixos repetidos e funde movimentos colineares
+        self.process_labels['ModalCompaction'] = ttk.Checkbutton(
+            self.process_params_frame,
+            text="Compactar G-code (palavras modais)",
+            variable=self.params['modal_compaction']
+        )
+        self.process_labels['ModalCompaction'].grid(row=row_idx, column=0, columnspan=2, sticky="w", padx=8, pady=6); row_idx += 1
+
+        # Ajuste de arcos: troca degraus da S-curve por hélices (G01 X A) e arcos G02/G03
+        self.process_labels['ArcFitting'] = ttk.Checkbutton(
+            self.process_params_frame,
+            text="Ajustar arcos/hélices",
+            variable=self.params['arc_fitting']
+        )
+        self.process_labels['ArcFitting'].grid(row=row_idx, column=0, columnspan=2, sticky="w", padx=8, pady=6); row_idx += 1
+        self.process_labels['ArcChordTol'] = ttk.Label(self.process_params_frame, text="Tolerância de corda (mm):")
+        self.process_labels['ArcChordTol'].grid(row=row_idx, column=0, sticky="w", padx=8, pady=6)
+        ttk.Entry(self.process_params_frame, textvariable=self.params['arc_chord_tol'], validate='key', validatecommand=vcmd_float).grid(row=row_idx, column=1, sticky="ew", padx=8, pady=6); row_idx += 1
+
         self.process_labels['Notes:'] = ttk.Label(self.process_params_frame, text="Notas:"); self.process_labels['Notes:'].grid(row=row_idx, column=0, sticky="nw", padx=8, pady=6)
         self.notes_text = Text(self.process_params_frame, height=3, width=20); self.notes_text.grid(row=row_idx, column=1, sticky="ew", padx=8, pady=6); self.notes_text.bind("<KeyRelease>", self.trigger_update)
         
@@ -2207,14 +3103,16 @@ class TFM_GCODE:
         bottom_results_outer_frame.columnconfigure(0, weight=1); bottom_results_outer_frame.columnconfigure(1, weight=1)
         self.result_frame = ttk.LabelFrame(bottom_results_outer_frame, text="Resultados Calculados", padding="10"); self.result_frame.grid(row=0, column=0, sticky="nsew", padx=(0, 5))
         # Removido: velocidade da placa (rotation_mm_min)
-        self.resultados = { 'rotation_rpm': tk.StringVar(), 'helix_pitch': tk.StringVar(), 'total_rotations': tk.StringVar(), 'total_angle_A': tk.StringVar(), 'estimated_time': tk.StringVar() }; self.result_labels = {}
-        labels_resultados = ["Rotação (RPM):", "Passo Axial (mm):", "Rotações/Passos:", "Ângulo Total/Passo (A):", "Tempo Total (hh:mm):"];
-        keys_resultados = ["rotation_rpm", "helix_pitch", "total_rotations", "total_angle_A", "estimated_time"]
+        self.resultados = { 'rotation_rpm': tk.StringVar(), 'helix_pitch': tk.StringVar(), 'total_rotations': tk.StringVar(), 'total_angle_A': tk.StringVar(), 'estimated_time': tk.StringVar(), 'cycle_time': tk.StringVar() }; self.result_labels = {}
+        labels_resultados = ["Rotação (RPM):", "Passo Axial (mm):", "Rotações/Passos:", "Ângulo Total/Passo (A):", "Tempo Total (hh:mm):", "Tempo de Ciclo (sim.):"];
+        keys_resultados = ["rotation_rpm", "helix_pitch", "total_rotations", "total_angle_A", "estimated_time", "cycle_time"]
         for i, key_text in enumerate(labels_resultados):
             self.result_labels[key_text] = ttk.Label(self.result_frame, text=key_text); self.result_labels[key_text].grid(row=i, column=0, sticky="w", pady=1)
             # --- ALTERADO: Acessa self.resultados com a chave correta de keys_resultados ---
-            ttk.Label(self.result_frame, textvariable=self.resultados[keys_resultados[i]], font=('Courier', 9, 'bold'), foreground='blue').grid(row=i, column=1, sticky="w", padx=5)
+            value_label = ttk.Label(self.result_frame, textvariable=self.resultados[keys_resultados[i]], font=('Courier', 9, 'bold'), foreground='blue'); value_label.grid(row=i, column=1, sticky="w", padx=5)
             # --- FIM ALTERAÇÃO ---
+            if keys_resultados[i] == 'cycle_time':
+                self.cycle_time_tooltip = ToolTip(value_label, "Simulado sobre o G-code com os limites de eixo do perfil do Mach3.")
         
         self.cost_frame = ttk.LabelFrame(bottom_results_outer_frame, text="Estimativa de Custo", padding="10"); self.cost_frame.grid(row=0, column=1, sticky="nsew", padx=(5, 0))
         self.custos = {'consumiveis': tk.StringVar(), 'operacional': tk.StringVar(), 'total': tk.StringVar(), 'po': tk.StringVar(), 'gas': tk.StringVar()}; self.cost_labels = {}
@@ -2258,112 +3156,10 @@ class TFM_GCODE:
             pass
         # Botão seta da coluna direita será criado após o frame do G-code
 
-        # Figura e canvas 3D embutidos na aba 3D
-        self.fig = Figure(figsize=(7, 5), dpi=100)
-        self.ax = self.fig.add_subplot(111, projection='3d')
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.tab_3d)
-        self.canvas_widget = self.canvas.get_tk_widget()
-        self.canvas_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
-        self.toolbar_frame = ttk.Frame(self.tab_3d)
-        self.toolbar_frame.pack(side=tk.TOP, fill=tk.X)
-        self.toolbar = CustomToolbar(self.canvas, self.toolbar_frame, self)
-        self.toolbar.update()
-        # Captura vista inicial para espelhamento do Home
-        try:
-            self._home_view = (self.ax.elev, self.ax.azim)
-        except Exception:
-            self._home_view = (25, 45)
-        # Define posição inicial padrão (não espelhada)
-        try:
-            self._initial_view = (self._home_view[0], self._home_view[1])
-            self.ax.view_init(elev=self._initial_view[0], azim=self._initial_view[1])
-        except Exception:
-            pass
-        # Barra de coordenadas do 3D removida
-        # Desenha imediatamente usando os parâmetros atuais
-        try:
-            initial_params = self._get_current_params()
-            self.desenhar_percurso_3d(initial_params)
-        except Exception:
-            pass
-        # Garante um primeiro desenho para evitar tela vazia
-        try:
-            self.canvas.draw()
-        except Exception:
-            pass
-
-        # Aba Análise Temporal: cria figure/canvas para gráficos
-        self.fig_temporal = Figure(figsize=(7, 4), dpi=100)
-        self.ax_temporal = self.fig_temporal.add_subplot(111)
-        self.canvas_temporal = FigureCanvasTkAgg(self.fig_temporal, master=self.tab_temporal)
-        self.canvas_temporal_widget = self.canvas_temporal.get_tk_widget()
-        self.canvas_temporal_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
-        try:
-            self.ax_temporal.set_title("Análise Temporal (aguardando dados)")
-            self.ax_temporal.set_xlabel("Passo"); self.ax_temporal.set_ylabel("Valor")
-            self.canvas_temporal.draw()
-        except Exception:
-            pass
-        # Aba Oscilação: cria figure/canvas para gráficos
-        self.fig_oscilacao = Figure(figsize=(7, 4), dpi=100)
-        self.ax_oscilacao = self.fig_oscilacao.add_subplot(111)
-        self.canvas_oscilacao = FigureCanvasTkAgg(self.fig_oscilacao, master=self.tab_oscilacao)
-        self.canvas_oscilacao_widget = self.canvas_oscilacao.get_tk_widget()
-        self.canvas_oscilacao_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
-        try:
-            self.ax_oscilacao.set_title("Oscilação (aguardando dados)"); self.ax_oscilacao.set_xlabel("Passo"); self.ax_oscilacao.set_ylabel("Posição"); self.canvas_oscilacao.draw()
-        except Exception:
-            pass
-        # Aba Estatísticas: cria figure/canvas com dois subplots (distância por passo e histograma)
-        self.fig_estatisticas = Figure(figsize=(7, 4), dpi=100)
-        self.ax_est_top = self.fig_estatisticas.add_subplot(211)
-        self.ax_est_bottom = self.fig_estatisticas.add_subplot(212)
-        self.canvas_estatisticas = FigureCanvasTkAgg(self.fig_estatisticas, master=self.tab_estatisticas)
-        self.canvas_estatisticas_widget = self.canvas_estatisticas.get_tk_widget()
-        self.canvas_estatisticas_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
-        try:
-            self.ax_est_top.set_title("Distância por passo (aguardando dados)")
-            self.ax_est_top.set_xlabel("Passo"); self.ax_est_top.set_ylabel("Distância")
-            self.ax_est_bottom.set_title("Histograma das distâncias")
-            self.ax_est_bottom.set_xlabel("Distância"); self.ax_est_bottom.set_ylabel("Contagem")
-            self.fig_estatisticas.tight_layout()
-            self.canvas_estatisticas.draw()
-        except Exception:
-            pass
-
-        # Aba Processo: custos, consumo e métricas agregadas
-        self.fig_processo = Figure(figsize=(7, 4), dpi=100)
-        self.ax_proc_cost = self.fig_processo.add_subplot(221)
-        self.ax_proc_cons = self.fig_processo.add_subplot(222)
-        self.ax_proc_len = self.fig_processo.add_subplot(223)
-        self.ax_proc_time = self.fig_processo.add_subplot(224)
-        self.canvas_processo = FigureCanvasTkAgg(self.fig_processo, master=self.tab_processo)
-        self.canvas_processo_widget = self.canvas_processo.get_tk_widget()
-        self.canvas_processo_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
-        try:
-            self.ax_proc_cost.set_title("Custos — % por categoria")
-            self.ax_proc_cons.set_title("Consumo (pó e gás)")
-            self.ax_proc_len.set_title("Comprimento acumulado por camada")
-            self.ax_proc_time.set_title("Tempo total")
-            self.fig_processo.tight_layout()
-            self.canvas_processo.draw()
-        except Exception:
-            pass
-
-        # Redesenha o 3D ao trocar para a aba correspondente
+        # Ao trocar de aba, recalcula apenas se os parâmetros mudaram desde o último desenho
         def _on_visualizer_tab_changed(event=None):
             try:
-                current_index = self.visualizer_notebook.index(self.visualizer_notebook.select())
-                if current_index == 0:
-                    self.desenhar_percurso_3d(self._get_current_params())
-                elif current_index == 1:
-                    self._update_temporal_plot()
-                elif current_index == 2:
-                    self._update_oscillation_plot()
-                elif current_index == 3:
-                    self._update_statistics_plot()
-                elif current_index == 4:
-                    self._update_process_plots()
+                self._render_visualizer_tab(self.visualizer_notebook.index(self.visualizer_notebook.select()))
             except Exception:
                 pass
         self.visualizer_notebook.bind("<<NotebookTabChanged>>", _on_visualizer_tab_changed)
@@ -2708,14 +3504,18 @@ class TFM_GCODE:
         self.root.title("TFM G-Code Generator")
         self.menubar.add_cascade(label="Arquivo", menu=self.file_menu)
         self.file_menu.add_command(label="Carregar Procedimento...", command=self._load_procedure); self.file_menu.add_command(label="Salvar Procedimento...", command=self._save_procedure)
-        self.file_menu.add_separator(); self.file_menu.add_command(label="Gerar Relatório PDF...", command=self._generate_report, state="normal" if REPORTLAB_AVAILABLE else "disabled")
-        self.file_menu.add_separator(); self.file_menu.add_command(label="Sair", command=self.root.quit)
+        self.file_menu.add_command(label="Abrir Trabalho...", command=self._open_job); self.file_menu.add_command(label="Salvar Trabalho...", command=self._save_job)
+        self.file_menu.add_command(label="Biblioteca de Procedimentos...", command=self._toggle_library_panel)
+        self.file_menu.add_separator(); self.file_menu.add_command(label="Gerar Relatório PDF...", command=self._generate_report, state="normal" if reportlab_available() else "disabled")
+        self.file_menu.add_command(label="Relatórios em Lote...", command=self._generate_batch_reports, state="normal" if reportlab_available() else "disabled")
+        self.file_menu.add_separator(); self.file_menu.add_command(label="Sair", command=self._on_close)
         # Configurações já adicionadas em _create_menu; evitar duplicidade
         # Menu 'Simuladores' removido
         self.menubar.add_cascade(label="Ajuda", menu=self.help_menu); self.help_menu.add_command(label="Sobre", command=self._show_about_dialog)
         try:
             self.help_menu.add_separator()
             self.help_menu.add_command(label="Verificar atualização...", command=lambda: self._check_for_updates(silent=False))
+            self.help_menu.add_command(label="Painel de desempenho", command=self._toggle_performance_panel)
         except Exception:
             pass
         # Nomes das abas, labels, etc., já definidos em _create_widgets
@@ -2728,131 +3528,30 @@ class TFM_GCODE:
 
     # --- REMOVIDO: _change_language ---
 
+    @perf.timed('parametros')
     def _get_current_params(self):
-        data = {}; data['nome_procedimento'] = self.params['nome_procedimento'].get()
-        data['app_title'] = "TFM G-Code Generator" # Texto fixo
-        try:
-            data['diametro'] = float(self.params['diametro'].get()) if self.params['diametro'].get() else 0.0
-            data['comprimento_revestir'] = float(self.params['comprimento'].get()) if self.params['comprimento'].get() else 0.0
-            data['largura_cordao'] = float(self.params['largura_cordao'].get()) if self.params['largura_cordao'].get() else 0.0
-            data['sobreposicao'] = float(self.params['sobreposicao'].get()) if self.params['sobreposicao'].get() else 0.0
-            # Novo nome: velocidade_de_deposicao
-            try:
-                vel_str = self.params['velocidade_de_deposicao'].get()
-            except Exception:
-                vel_str = ''
-            vel = float(vel_str) if vel_str else 0.0
-            data['velocidade_de_deposicao'] = vel
-            # Compatibilidade retroativa: também preencher taxa_de_deposicao
-            data['taxa_de_deposicao'] = vel
-            # Compatibilidade: manter velocidade do eixo A igual à velocidade de deposição por padrão.
-            data['velocidade_a_mm_min'] = vel
-            # Removido: RPM alvo (A). RPM é derivado exclusivamente da taxa de deposição e diâmetro.
-            # Velocidade da oscilação (mm/min) — campo da UI
-            try:
-                vel_osc_str = self.params['velocidade_oscilacao_mm_min'].get()
-            except Exception:
-                vel_osc_str = ''
-            data['velocidade_oscilacao_mm_min'] = float(vel_osc_str) if vel_osc_str else 0.0
-            data['afastamento_tocha'] = float(self.params['afastamento'].get()) if self.params['afastamento'].get() else 0.0
-            data['lead_in'] = float(self.params['lead_in'].get()) if self.params['lead_in'].get() else 0.0
-            data['lead_out'] = float(self.params['lead_out'].get()) if self.params['lead_out'].get() else 0.0
-            direction_map_reverse = {'Esquerda -> Direita': 'esquerda_direita', 'Direita -> Esquerda': 'direita_esquerda'}
-            data['direcao_soldagem'] = direction_map_reverse.get(self.params['direcao_soldagem'].get(), 'esquerda_direita')
-            rotation_map_reverse = {'Horária (CW)': 'horaria', 'Anti-horária (CCW)': 'antihoraria'}
-            data['sentido_rotacao'] = rotation_map_reverse.get(self.params['sentido_rotacao'].get(), 'horaria')
-            # Removido: controle de rotação; sempre eixo A
-            data['corrente_arco'] = float(self.params['corrente_arco'].get()) if self.params['corrente_arco'].get() else 0.0; data['vazao_gas'] = float(self.params['vazao_gas'].get()) if self.params['vazao_gas'].get() else 0.0
-            data['alim_po'] = float(self.params['alim_po'].get()) if self.params['alim_po'].get() else 0.0; data['preaquecimento'] = float(self.params['preaquecimento'].get()) if self.params['preaquecimento'].get() else 0.0
-            data['num_camadas'] = int(self.params['num_camadas'].get()) if self.params['num_camadas'].get() else 1; data['espessura_camada'] = float(self.params['espessura_camada'].get()) if self.params['espessura_camada'].get() else 0.0
-            # Seleção de pó e OS (se presentes na UI)
-            selected_powder_name = None
-            try:
-                if 'powder_name' in self.params:
-                    selected_powder_name = self.params['powder_name'].get() or None
-            except Exception:
-                selected_powder_name = None
-            try:
-                data['ordem_servico'] = self.params['ordem_servico'].get() if 'ordem_servico' in self.params else ""
-            except Exception:
-                data['ordem_servico'] = ""
-
-            # Fator de pó e custo: tentam usar o pó selecionado; caso contrário, o ativo nas Configurações
-            powders = self.config.get('powders', [])
-            active_name = self.config.get('active_powder')
-            target_powder_name = selected_powder_name or active_name
-            data['powder_name'] = target_powder_name
-            powder_factor = None; powder_cost = None
-            for p in powders:
-                if p.get('name') == target_powder_name:
-                    try:
-                        powder_factor = float(p.get('density_factor_g_mm2', 0.0))
-                    except (TypeError, ValueError):
-                        powder_factor = 0.0
-                    try:
-                        powder_cost = float(p.get('cost_brl_kg', self.config.get('costs', {}).get('powder_brl_kg', 0.0)))
-                    except (TypeError, ValueError):
-                        powder_cost = self.config.get('costs', {}).get('powder_brl_kg', 0.0)
-                    break
-            if powder_factor is None:
-                powder_factor = 0.16
-            if powder_cost is None:
-                powder_cost = self.config.get('costs', {}).get('powder_brl_kg', 0.0)
-            data['powder_factor'] = powder_factor
-            data['powder_cost_brl_kg'] = powder_cost
-            # Sinalizador para modo compacto de G-code
-            try:
-                data['compact_gcode'] = bool(self.params['compact_gcode'].get())
-            except Exception:
-                data['compact_gcode'] = False
-            # Recuo da tocha ao ligar
-            try:
-                data['torch_retract_on_ignite'] = bool(self.params['torch_retract_on_ignite'].get())
-            except Exception:
-                data['torch_retract_on_ignite'] = True
-
-            active_tab_index = self.notebook.index(self.notebook.select())
-            if active_tab_index == 0: # Espiral
-                data['welding_mode'] = 'espiral'; data['tipo_peca'] = 'cilindrico'
-                data['diametro_inicial'] = data['diametro']; data['diametro_final'] = data['diametro']
-            elif active_tab_index == 1: # Oscilação (unificada)
-                data['welding_mode'] = 'oscilacao'; data['tipo_peca'] = 'cilindrico'
-                data['diametro_inicial'] = data['diametro']; data['diametro_final'] = data['diametro']
-                data['oscilacao_comprimento'] = float(self.params['oscilacao_comprimento'].get()) if self.params['oscilacao_comprimento'].get() else 0.0
-                data['deslocamento_angular_perc'] = float(self.params['deslocamento_angular_perc'].get()) if self.params['deslocamento_angular_perc'].get() else 0.0
-                # Mapear tipo para valor interno
-                osc_map_reverse = {'Linear': 'linear', 'Quadrada': 'quadrada', 'Quadrada Contínua': 'quadrada_continua'}
-                data['oscillation_type'] = osc_map_reverse.get(self.params['tipo_oscilacao'].get(), 'linear')
-                data['oscilacao_enabled'] = True
-                # Granularidade X para Quadrada Contínua
-                try:
-                    data['osc_test_gran_x'] = float(self.params.get('osc_test_gran_x', tk.StringVar(value='0.5')).get())
-                except Exception:
-                    data['osc_test_gran_x'] = 0.5
-            else: return None
-        except ValueError: return None
-        # Taxa de deposição por massa (g/h) para uso em fórmulas
-        try:
-            taxa_g_h_str = self.params.get('taxa_deposicao_g_h', tk.StringVar(value='700.0')).get()
-        except Exception:
-            taxa_g_h_str = '0.0'
-        try:
-            data['taxa_deposicao_g_h'] = float(taxa_g_h_str) if taxa_g_h_str else 0.0
-        except ValueError:
-            data['taxa_deposicao_g_h'] = 0.0
-        data['notes'] = self.notes_text.get("1.0", tk.END).strip()
-        if data['largura_cordao'] <= 0 or data['velocidade_de_deposicao'] <= 0: return None
-        if data.get('sobreposicao') is not None and (data['sobreposicao'] >= 100 or data['sobreposicao'] < 0): return None
-        if data.get('num_camadas', 1) < 1: return None
-        if data['welding_mode'] in ('oscilacao','oscilacao_linear','oscilacao_quadrada'):
-             if data['oscilacao_comprimento'] <= 0: return None
-             if data['deslocamento_angular_perc'] <= 0 or data['deslocamento_angular_perc'] > 100: return None
-        return data
-
-    def executar_calculos_e_desenho(self):
+        """Parâmetros de geração dos campos da janela (None se inválidos); a conversão é a de `procedure_params`."""
+        active_tab_index = self.notebook.index(self.notebook.select())
+        if active_tab_index not in (0, 1): return None
+        data = {}
+        for key in FIELD_DEFAULTS:
+            if key in ('welding_mode', 'notes'):
+                continue
+            value = self.params[_FIELD_VARS.get(key, key)].get()
+            if key in _DISPLAY_CHOICES:
+                # Texto exibido -> valor interno
+                value = next((k for k, text in _DISPLAY_CHOICES[key].items() if text == value), value)
+            data[key] = value
+        data['powder_name'] = self.params['powder_name'].get()
+        data['welding_mode'] = 'espiral' if active_tab_index == 0 else 'oscilacao' # Espiral / Oscilação (unificada)
+        data['notes'] = self.notes_text.get("1.0", tk.END)
+        return procedure_params(data, self.config)
+
+    def executar_calculos_e_desenho(self, desenhar=True):
         params = self._get_current_params()
         if params is None:
-            self.limpar_resultados(); self.desenhar_percurso_3d()
+            self.limpar_resultados()
+            if desenhar: self.desenhar_percurso_3d()
             if hasattr(self, 'gcode_text'):
                 self.gcode_text.config(state='normal')
                 self.gcode_text.delete('1.0', tk.END)
@@ -2861,247 +3560,51 @@ class TFM_GCODE:
                 self.gcode_text.config(state='disabled')
             return
         try:
-            diameter = params['diametro']; diameter = max(diameter, 1e-6)
-            h = params['comprimento_revestir']
-            C = params['num_camadas'] * params['espessura_camada']; peso = params['powder_factor']
-            lead_in = params.get('lead_in', 0.0); lead_out = params.get('lead_out', 0.0)
-            circunferencia = math.pi * diameter
-            larg_cordao = params['largura_cordao']
-            sobreposicao = params['sobreposicao']
-            taxa_de_deposicao = params['taxa_de_deposicao']
-            tempo_total_horas = 0.0; consumo_po_kg = 0.0
-
-            if params['welding_mode'] == 'espiral':
-                # Comprimento real da hélice por volta e total (não apenas axial)
-                passo = larg_cordao * (1.0 - (sobreposicao / 100.0)); passo = max(passo, 1e-6)
-                total_rotacoes_part = (h / passo) if h > 0 else 0
-                # Ângulo total inclui 1 volta no início e 1 no final
-                angulo_part = total_rotacoes_part * 360.0 + 720.0
-                comprimento_helice_por_volta = math.sqrt((circunferencia ** 2) + (passo ** 2))
-                comprimento_total_helice = total_rotacoes_part * comprimento_helice_por_volta
-                # Tempo: comprimento da hélice + leads + 1 volta inicial + 1 volta final
-                comprimento_total_mov = comprimento_total_helice + (lead_in + lead_out) + (2 * circunferencia)
-                # RPM aproximado considerando componente circumferencial; mantido simples
-                rpm = (taxa_de_deposicao / circunferencia) if circunferencia > 0 and taxa_de_deposicao > 0 else 0
-                # Tempo baseado no comprimento real percorrido
-                tempo_min_arc = (comprimento_total_mov / taxa_de_deposicao) if taxa_de_deposicao > 0 else 0
-                area_camada = circunferencia * h; area_total = area_camada * params['num_camadas']
-                area_leads = circunferencia * (lead_in + lead_out) * params['num_camadas'] if lead_in + lead_out > 0 else 0
-                consumo_po_g = (area_total + area_leads) * peso; consumo_po_kg = consumo_po_g / 1000.0
-                # Atualização de resultados sem velocidade da placa
-                self.resultados['rotation_rpm'].set(f"{rpm:.3f}"); self.resultados['helix_pitch'].set(f"{passo:.3f} (axial)"); self.resultados['total_rotations'].set(f"{total_rotacoes_part:.2f}")
-                self.resultados['total_angle_A'].set(f"{angulo_part:.2f}")
-                total_minutos = tempo_min_arc * params['num_camadas']
-                # Arredonda para cima ao minuto para evitar subestimar
-                minutos_arred = int(math.ceil(total_minutos))
-                hh = minutos_arred // 60; mm = minutos_arred % 60
-                self.resultados['estimated_time'].set(f"{hh:02d}:{mm:02d}")
-                tempo_total_horas = total_minutos / 60.0
-            elif params['welding_mode'] in ('oscilacao', 'oscilacao_linear', 'oscilacao_quadrada'):
-                comp_osc = params['oscilacao_comprimento']; desloc_perc = params['deslocamento_angular_perc']
-                desloc_linear_angular = (desloc_perc / 100.0) * larg_cordao
-                num_passos_angulares_por_volta = math.ceil(circunferencia / desloc_linear_angular) if circunferencia > 0 and desloc_linear_angular > 0 else 1
-                actual_delta_A_deg = 360.0 / num_passos_angulares_por_volta if num_passos_angulares_por_volta > 0 else 360.0
-                # RPM do eixo A: derivado da taxa de deposição e circunferência
-                rpm_a = (taxa_de_deposicao / circunferencia) if circunferencia > 0 and taxa_de_deposicao > 0 else 0
-                feed_angular = rpm_a * 360.0
-
-                tempo_osc_ida_volta = (comp_osc * 2) / taxa_de_deposicao if taxa_de_deposicao > 0 else 0
-                tempo_rotacao_passo = actual_delta_A_deg / feed_angular if feed_angular > 0 else 0
-                # Se for quadrada contínua, rotação ocorre junto ao X; considerar tempo de rotação como 0 adicional
-                if params.get('oscillation_type') == 'quadrada_continua':
-                    tempo_rotacao_passo = 0
-                tempo_por_passo_angular = tempo_osc_ida_volta + tempo_rotacao_passo
-                tempo_por_volta = tempo_por_passo_angular * num_passos_angulares_por_volta
-                passo_sobreposicao = comp_osc * (sobreposicao / 100.0)
-                passo_sobreposicao = max(passo_sobreposicao, 1e-6)
-                num_passos_axiais = math.ceil(h / passo_sobreposicao) if h > 0 else 1
-                tempo_min_total_osc = num_passos_axiais * tempo_por_volta
-
-                tempo_leads = (lead_in + lead_out) / taxa_de_deposicao if taxa_de_deposicao > 0 else 0
-                tempo_min_total = tempo_min_total_osc + tempo_leads
-
-                # Atualização de resultados sem velocidade da placa
-                self.resultados['rotation_rpm'].set(f"{rpm_a:.3f}"); self.resultados['helix_pitch'].set(f"{passo_sobreposicao:.3f} (axial)")
-                self.resultados['total_rotations'].set(f"{num_passos_axiais:.2f} (passos axiais)"); self.resultados['total_angle_A'].set(f"{actual_delta_A_deg:.2f}° (passo)")
-                total_minutos = tempo_min_total * params['num_camadas']
-                # Arredonda para cima ao minuto para evitar subestimar
-                minutos_arred = int(math.ceil(total_minutos))
-                hh = minutos_arred // 60; mm = minutos_arred % 60
-                self.resultados['estimated_time'].set(f"{hh:02d}:{mm:02d}")
-                tempo_total_horas = total_minutos / 60.0
-
-                area_camada = circunferencia * h; area_total = area_camada * params['num_camadas']
-                area_leads = circunferencia * (lead_in + lead_out) * params['num_camadas'] if lead_in + lead_out > 0 else 0
-                consumo_po_g = (area_total + area_leads) * peso; consumo_po_kg = consumo_po_g / 1000.0
-            else:
-                self.limpar_resultados(); self.desenhar_percurso_3d(); return
-
             # Avaliar fórmulas de runtime e permitir override de consumo/custos
             formula_res = {}
             try:
                 formula_res = self._evaluate_formulas_runtime(params)
             except Exception:
                 formula_res = {}
-
-            # Override consumo de pó, se definido em fórmulas
-            pm_kg = formula_res.get('powder_mass_kg')
-            pm_g = formula_res.get('powder_mass_g')
-            if isinstance(pm_kg, (int, float)) and pm_kg >= 0:
-                consumo_po_kg = float(pm_kg)
-            elif isinstance(pm_g, (int, float)) and pm_g >= 0:
-                consumo_po_kg = float(pm_g) / 1000.0
-
-            # Override de tempo por massa (prioriza taxa de deposição da UI)
-            time_min_override = None
-            # 1) Se a UI informar taxa em g/h (>0), usa para calcular tempo
-            taxa_g_h_ui = params.get('taxa_deposicao_g_h', 0.0)
-            taxa_kg_h_calc = None
-            if isinstance(taxa_g_h_ui, (int, float)) and taxa_g_h_ui > 0:
-                taxa_kg_h_calc = float(taxa_g_h_ui) / 1000.0
-            else:
-                # 2) Caso contrário, tenta pelas fórmulas: kg/h ou g/h
-                taxa_kg_h_form = formula_res.get('taxa_deposicao_kg_h')
-                taxa_g_h_form = formula_res.get('taxa_deposicao_g_h')
-                if isinstance(taxa_kg_h_form, (int, float)) and taxa_kg_h_form > 0:
-                    taxa_kg_h_calc = float(taxa_kg_h_form)
-                elif isinstance(taxa_g_h_form, (int, float)) and taxa_g_h_form > 0:
-                    taxa_kg_h_calc = float(taxa_g_h_form) / 1000.0
-            if isinstance(taxa_kg_h_calc, (int, float)) and taxa_kg_h_calc > 0:
-                time_min_override = (consumo_po_kg / max(taxa_kg_h_calc, 1e-6)) * 60.0
-            elif isinstance(formula_res.get('time_min_mass'), (int, float)) and formula_res['time_min_mass'] >= 0:
-                # 3) Se houver tempo por massa explícito nas fórmulas, usa
-                time_min_override = float(formula_res['time_min_mass'])
-            elif isinstance(formula_res.get('time_min'), (int, float)) and formula_res['time_min'] >= 0:
-                # 4) Por último, tempo direto das fórmulas
-                time_min_override = float(formula_res['time_min'])
-
-            if time_min_override is not None:
-                tempo_total_horas = time_min_override / 60.0
-                minutos_arred = int(math.ceil(time_min_override))
-                hh = minutos_arred // 60; mm = minutos_arred % 60
-                self.resultados['estimated_time'].set(f"{hh:02d}:{mm:02d}")
-
-            custo_po = consumo_po_kg * params.get('powder_cost_brl_kg', self.config['costs']['powder_brl_kg'])
-            # Custos de gás/operacionais (com possibilidade de override por fórmula)
-            consumo_gas_m3_hora = params['vazao_gas'] * 60.0 / 1000.0
-            custo_gas = consumo_gas_m3_hora * tempo_total_horas * self.config['costs']['gas_argon_brl_m3']
-            custo_operacional = tempo_total_horas * (self.config['costs']['labor_brl_hour'] + self.config['costs']['machine_brl_hour'])
-            custo_consumiveis = custo_po + custo_gas
-
-            # Overrides diretos se presentes
-            if isinstance(formula_res.get('powder_cost_brl'), (int, float)):
-                custo_po = float(formula_res['powder_cost_brl'])
-                # recalcula consumíveis para refletir custo_po
-                custo_consumiveis = custo_po + custo_gas
-            if isinstance(formula_res.get('gas_cost_brl'), (int, float)):
-                custo_gas = float(formula_res['gas_cost_brl'])
-                custo_consumiveis = custo_po + custo_gas
-            if isinstance(formula_res.get('labor_cost_brl'), (int, float)):
-                # se vier pronto por fórmula, usa
-                labor_cost = float(formula_res['labor_cost_brl'])
-            else:
-                labor_cost = tempo_total_horas * self.config['costs']['labor_brl_hour']
-            if isinstance(formula_res.get('machine_cost_brl'), (int, float)):
-                machine_cost = float(formula_res['machine_cost_brl'])
-            else:
-                machine_cost = tempo_total_horas * self.config['costs']['machine_brl_hour']
-            custo_operacional = labor_cost + machine_cost
-
-            custo_total = custo_consumiveis + custo_operacional
-            if isinstance(formula_res.get('total_cost_brl'), (int, float)):
-                custo_total = float(formula_res['total_cost_brl'])
-            consumo_gas_m3 = consumo_gas_m3_hora * tempo_total_horas
-            symbol = self.config['costs'].get('currency_symbol', '$')
-            self.custos['consumiveis'].set(f"{symbol} {custo_consumiveis:.2f}"); self.custos['operacional'].set(f"{symbol} {custo_operacional:.2f}")
-            self.custos['total'].set(f"{symbol} {custo_total:.2f}"); self.custos['po'].set(f"{consumo_po_kg:.3f} kg"); self.custos['gas'].set(f"{consumo_gas_m3:.3f} m³")
-            self.desenhar_percurso_3d(params)
+            # Com o programa já gerado os valores vêm dos movimentos; enquanto ele é gerado, dos totais em forma fechada
+            estimate = estimate_process(params, self.config, formulas=formula_res, stats=self._program_stats(params) or self._closed_form_stats(params))
+            if estimate is None:
+                self.limpar_resultados()
+                if desenhar: self.desenhar_percurso_3d()
+                return
+            self._show_estimate(estimate)
+            if desenhar: self.desenhar_percurso_3d(params)
         except Exception as e:
             error_msg = f"Erro: {e}"; print(f"Erro inesperado em executar_calculos_e_desenho: {e}")
-            self.limpar_resultados(); self.desenhar_percurso_3d()
+            self.limpar_resultados()
+            if desenhar: self.desenhar_percurso_3d()
             self.show_notification(error_msg, 'error', duration_ms=0)
             if hasattr(self, 'gcode_text'):
                 self.gcode_text.config(state='normal'); self.gcode_text.delete('1.0', tk.END); self.gcode_text.insert('1.0', error_msg); self.gcode_text.config(state='disabled')
         self.initial_load_done = True
 
+    def _show_estimate(self, estimate):
+        """Preenche os resultados calculados e o painel de custos com uma estimativa de `estimate_process`."""
+        for key, text in estimate['results'].items():
+            self.resultados[key].set(text)
+        symbol = self.config['costs'].get('currency_symbol', '$')
+        self.custos['consumiveis'].set(f"{symbol} {estimate['consumables_cost']:.2f}"); self.custos['operacional'].set(f"{symbol} {estimate['operational_cost']:.2f}")
+        self.custos['total'].set(f"{symbol} {estimate['total_cost']:.2f}"); self.custos['po'].set(f"{estimate['powder_kg']:.3f} kg"); self.custos['gas'].set(f"{estimate['gas_m3']:.3f} m³")
+
     def limpar_resultados(self):
         for key in self.resultados: self.resultados[key].set("0.00");
         for key in self.custos: self.custos[key].set("...")
 
+    @perf.timed('grafico:3d')
     def desenhar_percurso_3d(self, params=None):
+        from toolpath_view import draw_toolpath_3d
+        # Figura criada na primeira visita da aba 3D
+        self._ensure_visualizer_figure(0)
         self.ax.clear()
         if params is None:
             self.canvas.draw(); return
-        # Paleta amigável a daltonismo (Set2/Paired)
-        layer_colors = ['#66c2a5', '#fc8d62', '#8da0cb', '#e78ac3', '#a6d854', '#ffd92f', '#e5c494', '#b3b3b3']
-        try:
-            d_base = params['diametro']; length_base = params['comprimento_revestir']; direction = params.get('direcao_soldagem', 'esquerda_direita')
-            mode = params.get('welding_mode', 'espiral')
-            x_base = np.linspace(0, length_base, 30); theta_base = np.linspace(0, 2 * np.pi, 30); xc_base, tc_base = np.meshgrid(x_base, theta_base)
-            r_base_vals = d_base / 2.0 ; yc_base = r_base_vals * np.cos(tc_base); zc_base = r_base_vals * np.sin(tc_base); self.ax.plot_surface(xc_base, yc_base, zc_base, alpha=0.1, color='gray')
-            # Grid leve para percepção espacial
-            try:
-                self.ax.grid(True, alpha=0.2, color="#888")
-            except Exception:
-                pass
-            for i in range(params['num_camadas']):
-                d_layer = params['diametro'] + i * 2 * params['espessura_camada']; length = params['comprimento_revestir']
-                lead_in = params.get('lead_in', 0.0); lead_out = params.get('lead_out', 0.0)
-                r_layer = d_layer / 2.0; passo = params['largura_cordao'] * (1.0 - (params['sobreposicao'] / 100.0)); passo = max(passo, 1e-6)
-                if direction == 'esquerda_direita': x_arc_start_calc = 0.0 - lead_in; x_arc_end_calc = length + lead_out
-                else: x_arc_start_calc = length + lead_out; x_arc_end_calc = 0.0 - lead_in
-                comprimento_total_arc = abs(x_arc_end_calc - x_arc_start_calc)
-                angle_sign = 1.0 if direction == 'esquerda_direita' else -1.0
-                if mode == 'espiral':
-                    total_rotacoes = (comprimento_total_arc / passo)
-                    angulo_total_rad = math.radians(total_rotacoes * 360.0 * angle_sign)
-                    if abs(angulo_total_rad) < 1e-6: continue
-                    num_points = int(50 * abs(total_rotacoes)) + 2;
-                    if num_points < 2: num_points = 2
-                    theta_helice = np.linspace(0, angulo_total_rad, num_points); x_final_helice = np.linspace(x_arc_start_calc, x_arc_end_calc, len(theta_helice))
-                    r_base_helice = np.full_like(x_final_helice, r_layer)
-                    r_helice = r_base_helice; safe_r_helice = np.where(np.abs(r_helice) < 1e-9, 1e-9, r_helice); delta_theta = params['largura_cordao'] / safe_r_helice
-                    t_fita_var = np.linspace(-0.5, 0.5, 3); TH, T_FITA_MULT = np.meshgrid(theta_helice, t_fita_var); XH, _ = np.meshgrid(x_final_helice, t_fita_var)
-                    R_HELICE_MESH, _ = np.meshgrid(r_helice, t_fita_var); Y_solda = R_HELICE_MESH * np.cos(TH + T_FITA_MULT * delta_theta); Z_solda = R_HELICE_MESH * np.sin(TH + T_FITA_MULT * delta_theta)
-                    X_solda = XH; self.ax.plot_surface(X_solda, Y_solda, Z_solda, color=layer_colors[i % len(layer_colors)], alpha=0.9)
-                elif mode in ('oscilacao', 'oscilacao_linear', 'oscilacao_quadrada'):
-                     passo_axial_osc = params['oscilacao_comprimento'] * (params['sobreposicao'] / 100.0); passo_axial_osc = max(passo_axial_osc, 1e-6)
-                     num_passos_axiais = math.ceil(length_base / passo_axial_osc) if length_base > 0 else 1
-                     x_positions = np.linspace(0, length_base, num_passos_axiais + 1) if direction == 'esquerda_direita' else np.linspace(length_base, 0, num_passos_axiais + 1)
-                     theta_ring = np.linspace(0, 2*np.pi, 50)
-                     r_ring = np.full_like(theta_ring, r_layer)
-                     y_ring = r_ring * np.cos(theta_ring)
-                     z_ring = r_ring * np.sin(theta_ring)
-
-                     for k in range(num_passos_axiais):
-                         x_start_band = x_positions[k]
-                         x_end_band = x_positions[k+1]
-                         X_band, T_band = np.meshgrid([x_start_band, x_end_band], theta_ring)
-                         R_band = np.full_like(T_band, r_layer)
-                         Y_band = R_band * np.cos(T_band)
-                         Z_band = R_band * np.sin(T_band)
-                         self.ax.plot_surface(X_band, Y_band, Z_band, color=layer_colors[i % len(layer_colors)], alpha=0.7)
-            d_final_plot = params['diametro'] + params['num_camadas'] * 2 * params['espessura_camada']
-            max_radius_plot = max(d_final_plot/2.0, d_base/2.0); max_radius_plot = max(max_radius_plot, 1e-6)
-            lead_in_val = params.get('lead_in', 0.0); lead_out_val = params.get('lead_out', 0.0); x_min_plot = 0 - lead_in_val; x_max_plot = length_base + lead_out_val
-            x_range = x_max_plot - x_min_plot; x_range = x_range if x_range > 0 else 1; y_range = max_radius_plot * 2; z_range = y_range
-            self.ax.set_xlim(x_min_plot, x_max_plot); self.ax.set_ylim(-max_radius_plot, max_radius_plot); self.ax.set_zlim(-max_radius_plot, max_radius_plot)
-            # Aspect ratio equivalente para evitar distorção
-            try:
-                self.ax.set_aspect('equal', adjustable='box')
-            except Exception:
-                self.ax.set_box_aspect((x_range, y_range, z_range))
-            # Eixos e marcadores
-            try:
-                self.ax.plot([x_min_plot, x_max_plot], [0, 0], [0, 0], color='#111', lw=1)
-                self.ax.plot([0, 0], [-max_radius_plot, max_radius_plot], [0, 0], color='#111', lw=1)
-                self.ax.plot([0, 0], [0, 0], [-max_radius_plot, max_radius_plot], color='#111', lw=1)
-                self.ax.text(x_max_plot, 0, 0, 'X', color='#111')
-                self.ax.text(0, max_radius_plot, 0, 'Y', color='#111')
-                self.ax.text(0, 0, max_radius_plot, 'Z', color='#111')
-            except Exception:
-                pass
-            self.ax.set_xlabel("Eixo X (Comprimento)"); self.ax.set_ylabel("Y"); self.ax.set_zlabel("Eixo Z (Raio)")
+        try:
+            draw_toolpath_3d(self.ax, params)
             # Título removido
             try:
                 self.canvas.draw_idle()
@@ -3148,7 +3651,7 @@ class TFM_GCODE:
                 if hasattr(self, 'gcode_text'): self.gcode_text.config(state='normal'); self.gcode_text.delete('1.0', tk.END); self.gcode_text.insert('1.0', "Por favor, verifique os parâmetros."); self.gcode_text.config(state='disabled')
                 if hasattr(self, 'gcode_line_count_var'): self._last_gcode_line_count = 0; self.gcode_line_count_var.set("Linhas: -")
                 return
-            gcode_output = self.gcode_generator.generate(params)
+            gcode_output = self.gcode_generator.generate(params, machine=self._refresh_machine())
             if gcode_output:
                 if isinstance(gcode_output, (list, tuple)): full_gcode = "\n".join(map(str, gcode_output))
                 else: full_gcode = str(gcode_output)
@@ -3175,30 +3678,48 @@ class TFM_GCODE:
     def _update_gcode_preview_async(self):
         try:
             if hasattr(self, 'gcode_line_count_var'):
-                self.gcode_line_count_var.set("Gerando…")
+                # Linhas previstas pela estimativa em forma fechada (sem ajuste de arcos e compactação modal)
+                quick = getattr(self, '_closed_form_estimate', None)
+                self.gcode_line_count_var.set(f"Gerando… (~{quick['lines']} linhas)" if quick else "Gerando…")
         except Exception:
             pass
         if getattr(self, '_gcode_preview_thread_running', False):
+            # Geração em andamento: refaz ao terminar, com os parâmetros mais recentes
+            self._gcode_preview_pending = True
             return
         self._gcode_preview_thread_running = True
+        self._gcode_preview_pending = False
 
         def _worker():
             res = {}
+            t0 = time.perf_counter()
             try:
                 params = self._get_current_params()
                 if params is None:
                     res = {'error': 'params'}
                 else:
-                    gcode_output = self.gcode_generator.generate(params)
+                    gcode_output = self._generate_gcode_cached(params)
                     if isinstance(gcode_output, (list, tuple)):
                         full_gcode = "\n".join(map(str, gcode_output))
                     else:
                         full_gcode = str(gcode_output) if gcode_output else ""
-                    res = {'text': full_gcode, 'count': len(full_gcode.splitlines()) if full_gcode else 0}
+                    res = {'text': full_gcode, 'count': len(full_gcode.splitlines()) if full_gcode else 0,
+                           'compaction': self._gcode_cache_stats if params.get('modal_compaction') else None,
+                           'fitting': self._gcode_cache_fitting if params.get('arc_fitting') else None,
+                           'analysis': self._analyze_gcode_cached(gcode_output, params)}
+                    stats = res['analysis'].get('stats')
+                    if stats is not None:
+                        # Resultados e custos do programa gerado (substituem a prévia analítica)
+                        try:
+                            res['estimate'] = estimate_process(params, self.config, formulas=self._evaluate_formulas_runtime(params), stats=stats)
+                        except Exception:
+                            res['estimate'] = None
             except Exception as e:
                 res = {'error': str(e)}
+            gen_ms = (time.perf_counter() - t0) * 1000.0
 
             def _apply():
+                t_apply = time.perf_counter()
                 try:
                     if res.get('error'):
                         if hasattr(self, 'gcode_text'):
@@ -3213,9 +3734,22 @@ class TFM_GCODE:
                             self.gcode_text.config(state='disabled')
                         if hasattr(self, 'gcode_line_count_var'):
                             self._last_gcode_line_count = res.get('count', 0)
-                            self.gcode_line_count_var.set(f"Linhas: {self._last_gcode_line_count}")
+                            note = self._compaction_note(res.get('compaction') or {}, res.get('fitting') or {})
+                            limits = (res.get('analysis') or {}).get('limits')
+                            if limits and not limits['ok']:
+                                note = " — ".join(p for p in (note, f"⚠ {len(limits['lines'])} linha(s) fora dos limites da máquina") if p)
+                            self.gcode_line_count_var.set(f"Linhas: {self._last_gcode_line_count}" + (f" — {note}" if note else ""))
+                        self._show_cycle_time((res.get('analysis') or {}).get('cycle'))
+                        if res.get('estimate'):
+                            self._show_estimate(res['estimate'])
                 finally:
                     self._gcode_preview_thread_running = False
+                    self._record_phase_cost('gcode', gen_ms + (time.perf_counter() - t_apply) * 1000.0)
+                    if not startup.has('previa_gcode'):
+                        self._mark_startup_when_idle('previa_gcode')
+                    if self._gcode_preview_pending:
+                        self._gcode_preview_pending = False
+                        self._schedule_update_phase('gcode')
 
             try:
                 self.root.after(0, _apply)
@@ -3245,6 +3779,7 @@ class TFM_GCODE:
         except Exception:
             pass
 
+    @perf.timed('gcode:realce')
     def _apply_gcode_syntax_highlight(self):
         try:
             text = self.gcode_text.get('1.0', tk.END)
@@ -3343,12 +3878,13 @@ class TFM_GCODE:
         except Exception:
             pass
 
+    @perf.timed('grafico:temporal')
     def _update_temporal_plot(self):
         try:
             params = self._get_current_params()
             if params is None:
                 return
-            gcode_output = self.gcode_generator.generate(params)
+            gcode_output = self._generate_gcode_cached(params)
             if not gcode_output:
                 # Limpa gráfico se não houver dados
                 if hasattr(self, 'ax_temporal'):
@@ -3391,12 +3927,13 @@ class TFM_GCODE:
             except Exception:
                 pass
 
+    @perf.timed('grafico:oscilacao')
     def _update_oscillation_plot(self):
         try:
             params = self._get_current_params()
             if params is None:
                 return
-            gcode_output = self.gcode_generator.generate(params)
+            gcode_output = self._generate_gcode_cached(params)
             if not gcode_output:
                 if hasattr(self, 'ax_oscilacao'):
                     self.ax_oscilacao.clear(); self.ax_oscilacao.set_title("Oscilação (sem dados)"); self.ax_oscilacao.set_xlabel("Passo"); self.ax_oscilacao.set_ylabel("Posição")
@@ -3433,12 +3970,13 @@ class TFM_GCODE:
             except Exception:
                 pass
 
+    @perf.timed('grafico:estatisticas')
     def _update_statistics_plot(self):
         try:
             params = self._get_current_params()
             if params is None:
                 return
-            gcode_output = self.gcode_generator.generate(params)
+            gcode_output = self._generate_gcode_cached(params)
             if not gcode_output:
                 if hasattr(self, 'ax_est_top') and hasattr(self, 'ax_est_bottom'):
                     self.ax_est_top.clear(); self.ax_est_bottom.clear()
@@ -3497,6 +4035,7 @@ class TFM_GCODE:
             except Exception:
                 pass
 
+    @perf.timed('grafico:processo')
     def _update_process_plots(self):
         try:
             params = self._get_current_params()
@@ -3618,89 +4157,208 @@ class TFM_GCODE:
                 pass
 
     def _save_procedure(self):
-        from pathlib import Path
-        proc_path_conf = self.config['database']['procedures_path']
-        proc_path = Path(proc_path_conf)
-        if not proc_path.is_absolute():
-            root_dir = Path(sys.executable).resolve().parent if getattr(sys, 'frozen', False) else Path(__file__).resolve().parents[2]
-            proc_path = root_dir / proc_path
+        proc_path = self._procedures_folder()
         filepath = filedialog.asksaveasfilename(initialdir=str(proc_path), title="Salvar Procedimento...", defaultextension=".json", filetypes=[("TFM Procedure Files", "*.json")])
         if not filepath: return
         try:
-            data_to_save = self._get_current_params();
+            data_to_save = self._procedure_data()
             if data_to_save is None: self.show_notification("Por favor, verifique os parâmetros.", 'error'); return
-            data_to_save['welding_mode'] = data_to_save.get('welding_mode', 'espiral')
-            if data_to_save['welding_mode'] == 'espiral':
-                 data_to_save.pop('oscilacao_comprimento', None); data_to_save.pop('deslocamento_angular_perc', None)
-                 data_to_save.pop('oscillation_type', None)
-            elif data_to_save['welding_mode'] == 'oscilacao':
-                 # Garantir que o tipo seja salvo
-                 data_to_save['oscillation_type'] = data_to_save.get('oscillation_type', 'linear')
             with open(filepath, 'w', encoding='utf-8') as f: json.dump(data_to_save, f, indent=4)
             self.show_notification("Procedimento salvo com sucesso!", 'success')
         except Exception as e: self.show_notification(f"Erro: {str(e)}", 'error')
 
+    def _procedure_data(self):
+        """Parâmetros atuais no formato do arquivo de procedimento (None se inválidos)."""
+        data_to_save = self._get_current_params();
+        if data_to_save is None: return None
+        data_to_save['welding_mode'] = data_to_save.get('welding_mode', 'espiral')
+        if data_to_save['welding_mode'] == 'espiral':
+             data_to_save.pop('oscilacao_comprimento', None); data_to_save.pop('deslocamento_angular_perc', None)
+             data_to_save.pop('oscillation_type', None)
+        elif data_to_save['welding_mode'] == 'oscilacao':
+             # Garantir que o tipo seja salvo
+             data_to_save['oscillation_type'] = data_to_save.get('oscillation_type', 'linear')
+        return data_to_save
+
     def _load_procedure(self):
-        from pathlib import Path
-        proc_path_conf = self.config['database']['procedures_path']
-        proc_path = Path(proc_path_conf)
-        if not proc_path.is_absolute():
-            root_dir = Path(sys.executable).resolve().parent if getattr(sys, 'frozen', False) else Path(__file__).resolve().parents[2]
-            proc_path = root_dir / proc_path
+        proc_path = self._procedures_folder()
         filepath = filedialog.askopenfilename(initialdir=str(proc_path), title="Carregar Procedimento...", filetypes=[("TFM Procedure Files", "*.json")])
         if not filepath: return
+        self._load_procedure_file(filepath)
+
+    def _load_procedure_file(self, filepath):
         try:
             with open(filepath, 'r', encoding='utf-8') as f: loaded_data = json.load(f)
-            self.notes_text.delete("1.0", tk.END)
-            loaded_data.setdefault('lead_in', '5.0'); loaded_data.setdefault('lead_out', '5.0');
-            loaded_data.setdefault('direcao_soldagem', 'esquerda_direita'); loaded_data.setdefault('welding_mode', 'espiral')
-            loaded_data.setdefault('oscilacao_comprimento', '10.0'); loaded_data.setdefault('deslocamento_angular_perc', '50.0');
-            loaded_data.setdefault('sentido_rotacao', 'horaria')
-            self._disable_param_traces()
-            for key, value in loaded_data.items():
-                if key in self.params:
-                    if isinstance(self.params[key], tk.BooleanVar):
-                        self.params[key].set(bool(value))
-                    elif key == 'direcao_soldagem':
-                        # Converte valor interno para valor de display
-                        direction_options = {
-                            'esquerda_direita': 'Esquerda -> Direita',
-                            'direita_esquerda': 'Direita -> Esquerda'
-                        }
-                        self.params['direcao_soldagem'].set(direction_options.get(value, 'Esquerda -> Direita'))
-                    elif key == 'sentido_rotacao':
-                        rotation_options = {
-                            'horaria': 'Horária (CW)',
-                            'antihoraria': 'Anti-horária (CCW)'
-                        }
-                        self.params['sentido_rotacao'].set(rotation_options.get(value, 'Horária (CW)'))
-                    elif key == 'oscillation_type':
-                        # Define o valor de display do tipo de oscilação
-                        display_map = {
-                            'linear': 'Linear',
-                            'quadrada': 'Quadrada',
-                            'quadrada_continua': 'Quadrada Contínua'
-                        }
-                        self.params['tipo_oscilacao'].set(display_map.get(value, 'Linear'))
-                    # Removido: controle de rotação via spindle; sempre eixo A
-                    elif key == 'd_inicial':
-                        self.params['diametro'].set(str(value))
-                    elif key == 'diametro':
-                        self.params['diametro'].set(str(value))
-                    elif key != 'd_final':
-                        self.params[key].set(str(value))
-                elif key == 'notes': self.notes_text.insert("1.0", value)
-                elif key == 'welding_mode':
-                     if value in ('oscilacao', 'oscilacao_linear', 'oscilacao_quadrada'):
-                         # Seleciona a aba unificada e ajusta tipo conforme modo antigo
-                         self.notebook.select(self.tab_osc)
-                         if value == 'oscilacao_quadrada': self.params['tipo_oscilacao'].set('Quadrada')
-                         elif value == 'oscilacao_linear': self.params['tipo_oscilacao'].set('Linear')
-                     else:
-                         self.notebook.select(self.tab_espiral)
-            self._enable_param_traces(); self.trigger_update()
+            self._apply_procedure_data(loaded_data)
             self.show_notification("Procedimento carregado com sucesso!", 'success')
+            return True
         except Exception as e: self.show_notification(f"Erro ao carregar: {e}", 'error'); self._enable_param_traces()
+        return False
+
+    def _procedures_folder(self, config=None):
+        """Pasta de procedimentos da configuração (relativa à raiz do projeto ou do executável)."""
+        config = self.config if config is None else config
+        proc_path = Path(config.get('database', {}).get('procedures_path', 'data/procedures'))
+        if not proc_path.is_absolute():
+            root_dir = Path(sys.executable).resolve().parent if getattr(sys, 'frozen', False) else Path(__file__).resolve().parents[2]
+            proc_path = root_dir / proc_path
+        return proc_path
+
+    def _load_library_file(self, filepath):
+        """Carrega um item da biblioteca (procedimento .json ou pacote .tfmjob)."""
+        if str(filepath).lower().endswith(JOB_EXTENSION):
+            return self._open_job_file(filepath)
+        return self._load_procedure_file(filepath)
+
+    def _toggle_library_panel(self):
+        panel = getattr(self, '_library_panel', None)
+        if panel is not None:
+            panel.lift(); panel.focus_set(); return
+        try:
+            self._library_panel = ProcedureLibraryPanel(self)
+        except Exception as e:
+            self._library_panel = None
+            self.show_notification(f"Erro ao abrir biblioteca de procedimentos: {e}", 'error')
+
+    def _start_procedure_watcher(self):
+        """Observa a pasta de procedimentos: mantém o índice da biblioteca e pré-gera programas/miniaturas."""
+        database = self.config.get('database', {})
+        if not database.get('watch_procedures', True) or self._procedure_watcher is not None:
+            return
+        try:
+            folder = self._procedures_folder()
+            if not folder.is_dir():
+                return
+            cache_dir = default_cache_dir(folder)
+            self._preview_cache = PreviewCache(cache_dir)
+            self._preview_warmer = PreviewWarmer(cache_dir, machine_xml=self._mach3_profile_path, config=lambda: copy.deepcopy(self.config))
+            self._procedure_watcher = ProcedureWatcher(
+                ProcedureIndex(folder), lambda: copy.deepcopy(self.config), warm=self._preview_warmer.submit,
+                on_change=lambda res: self.root.after(0, self._on_procedures_changed),
+                interval_s=database.get('watch_interval_s', 5.0)).start()
+        except Exception as e:
+            print(f"Observador de procedimentos desativado: {e}")
+
+    def _thumbnail_renderer(self):
+        """Renderizador de miniaturas, no mesmo cache local da pré-geração (`procedure_watcher.default_cache_dir`)."""
+        if self._thumbnails is None:
+            cache = self._preview_cache
+            self._thumbnails = ThumbnailRenderer(cache.directory if cache is not None else default_cache_dir(self._procedures_folder()))
+        return self._thumbnails
+
+    def _on_procedures_changed(self):
+        panel = getattr(self, '_library_panel', None)
+        if panel is not None:
+            panel.reload()
+
+    def _on_close(self):
+        try:
+            if self._procedure_watcher is not None:
+                self._procedure_watcher.stop()
+            if self._preview_warmer is not None:
+                self._preview_warmer.close()
+            if self._thumbnails is not None:
+                self._thumbnails.close()
+        except Exception:
+            pass
+        self._flush_config()
+        self.root.destroy()
+
+    def _params_digest(self, params):
+        return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _figure_png(self, fig):
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', dpi=100)
+        return buf.getvalue()
+
+    def _save_job(self):
+        """Salva procedimento, G-code, tabela de movimentos e imagens dos gráficos num pacote .tfmjob."""
+        params = self._get_current_params()
+        data_to_save = self._procedure_data()
+        if params is None or data_to_save is None:
+            self.show_notification("Por favor, verifique os parâmetros.", 'error'); return
+        safe = re.sub(r"[^A-Za-z0-9._-]+", "_", params.get('ordem_servico', '') or params.get('nome_procedimento', '') or '').strip('_')
+        filepath = filedialog.asksaveasfilename(defaultextension=JOB_EXTENSION, initialfile=f"{safe or 'trabalho'}{JOB_EXTENSION}",
+                                                filetypes=[("Trabalho TFM", f"*{JOB_EXTENSION}")], title="Salvar Trabalho...")
+        if not filepath: return
+        try:
+            machine = self._refresh_machine()
+            lines = self._generate_gcode_cached(params)
+            if not lines: self.show_notification("Erro ao gerar G-Code.", 'error'); return
+            from toolpath import parse_moves
+            table = self._job.move_table() if self._job is not None and lines is self._job_lines else None
+            if self._job is not None and os.path.normcase(os.path.abspath(filepath)) == os.path.normcase(self._job.path):
+                # Gravando sobre o pacote aberto: tabela para a memória e pacote fechado antes de substituir o arquivo
+                detached = self._job.detach_table()
+                table = detached if table is not None else None
+                self._job, self._job_key, self._job_lines = None, None, None
+            if table is None:
+                table = parse_moves(lines)
+            images = {}
+            for name in ('fig', 'fig_temporal', 'fig_oscilacao', 'fig_estatisticas', 'fig_processo'):
+                fig = getattr(self, name, None)
+                if fig is not None:
+                    try:
+                        images[f"{name}.png"] = self._figure_png(fig)
+                    except Exception:
+                        pass
+            cycle = self._analyze_gcode_cached(lines).get('cycle') or {}
+            summary = {'params_sha256': self._params_digest(params), 'machine': machine.name, 'machine_digest': machine.digest,
+                       'layers': len(table.layers()), 'cycle_time_s': cycle.get('total_s'),
+                       'notes': data_to_save.get('notes', '')}
+            save_job(filepath, data_to_save, lines, table=table, images=images, summary=summary)
+            self.show_notification(f"Trabalho salvo:\n{filepath}", 'success')
+        except Exception as e:
+            self.show_notification(f"Erro ao salvar trabalho: {e}", 'error')
+
+    def _open_job(self):
+        """Abre um pacote .tfmjob: parâmetros na hora; programa e tabela de movimentos sob demanda."""
+        filepath = filedialog.askopenfilename(filetypes=[("Trabalho TFM", f"*{JOB_EXTENSION}")], title="Abrir Trabalho...")
+        if not filepath: return
+        self._open_job_file(filepath)
+
+    def _open_job_file(self, filepath):
+        try:
+            job = JobArchive(filepath)
+        except Exception as e:
+            self.show_notification(f"Erro ao abrir trabalho: {e}", 'error'); return False
+        try:
+            if self._job is not None:
+                self._job.close()
+            self._job, self._job_key, self._job_lines = None, None, None
+            self._apply_procedure_data(dict(job.params))
+            summary = job.manifest.get('summary', {})
+            params = self._get_current_params()
+            machine = self._refresh_machine()
+            # O programa do pacote só substitui a geração se parâmetros e perfil da máquina forem os mesmos
+            if params is not None and summary.get('params_sha256') == self._params_digest(params) and summary.get('machine_digest') == machine.digest:
+                self._job_key = self._program_key(params, machine)
+            self._job = job
+            self.show_notification(f"Trabalho carregado: {job.manifest.get('name') or os.path.basename(filepath)}", 'success')
+            return True
+        except Exception as e:
+            job.close()
+            self._enable_param_traces()
+            self.show_notification(f"Erro ao carregar trabalho: {e}", 'error')
+        return False
+
+    def _apply_procedure_data(self, loaded_data):
+        """Aplica os parâmetros de um procedimento salvo aos campos da interface (ver `procedure_fields`)."""
+        fields = procedure_fields(loaded_data, self.config)
+        self.notes_text.delete("1.0", tk.END)
+        self._disable_param_traces()
+        for key, value in fields.items():
+            if key == 'notes':
+                self.notes_text.insert("1.0", value)
+            elif key == 'welding_mode':
+                self.notebook.select(self.tab_osc if value == 'oscilacao' else self.tab_espiral)
+            elif key in _DISPLAY_CHOICES:
+                self.params[_FIELD_VARS.get(key, key)].set(_DISPLAY_CHOICES[key][value])
+            else:
+                # BooleanVar recebe bool; as demais, o texto do campo
+                self.params[_FIELD_VARS.get(key, key)].set(value if isinstance(value, bool) else str(value))
+        self._enable_param_traces(); self.trigger_update()
 
     def _disable_param_traces(self):
         for var_name, var in self.params.items():
@@ -3720,113 +4378,63 @@ class TFM_GCODE:
         self.notebook.bind("<<NotebookTabChanged>>", self.trigger_update)
 
     def _generate_report(self):
-        if not REPORTLAB_AVAILABLE: self.show_notification("O módulo 'reportlab' não foi encontrado. A geração de PDF está desabilitada.", 'warning'); return
+        if not reportlab_available():
+            self.show_notification("O módulo 'reportlab' não foi encontrado. A geração de PDF está desabilitada.", 'warning'); return
         params = self._get_current_params();
         if params is None: self.show_notification("Por favor, verifique os parâmetros.", 'error'); return
         filepath = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF Files", "*.pdf")])
         if not filepath: return
         try:
             results = {key: var.get() for key, var in self.resultados.items()}; costs = {key: var.get() for key, var in self.custos.items()}
-            img_path = "temp_report_img.png"; self.fig.savefig(img_path, dpi=150, bbox_inches='tight', pad_inches=0.1)
-            c = pdfcanvas.Canvas(filepath, pagesize=A4); width, height = A4; margin = 20 * mm
-            c.setFont("Helvetica-Bold", 18); c.drawString(margin, height - margin, "Relatório de Procedimento PTA")
-            logo_path = resource_path('assets/logo.png')
-            if os.path.exists(logo_path):
-                try:
-                    logo = ImageReader(logo_path)
-                    img_w, img_h = logo.getSize(); aspect = img_h / float(img_w) if img_w > 0 else 1
-                    draw_w = 40 * mm; draw_h = draw_w * aspect
-                    c.drawImage(logo, width - margin - draw_w, height - margin - (draw_h/2), width=draw_w, height=draw_h, preserveAspectRatio=True, mask='auto')
-                except Exception as _logo_err:
-                    # Se o arquivo estiver corrompido ou em formato incompatível, continua sem o logo
-                    self.show_notification(f"Logo inválido: {os.path.basename(logo_path)}. Gerando PDF sem logo.", 'warning')
-            c.setFont("Helvetica", 8); c.drawString(margin, height - margin - 8*mm, f"Data: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"); c.line(margin, height - margin - 10*mm, width - margin, height - margin - 10*mm)
-            img_w_px, img_h_px = ImageReader(img_path).getSize(); aspect = img_h_px / float(img_w_px) if img_w_px > 0 else 1
-            draw_w = width - 2 * margin; draw_h = draw_w * aspect; img_y_start = height - margin - 15*mm
-            if draw_h > img_y_start - 140*mm: draw_h = img_y_start - 140*mm; draw_w = draw_h / aspect if aspect > 0 else 0
-            c.drawImage(img_path, (width - draw_w) / 2, img_y_start - draw_h, width=draw_w, height=draw_h, preserveAspectRatio=True)
-            y_pos = img_y_start - draw_h - 10*mm; col1_x = margin; col2_x = width / 2 + 5 * mm; line_height = 5 * mm
-            
-            def draw_section(title_text, data, x_start, start_y):
-                current_y = start_y; c.setFont("Helvetica-Bold", 11); c.drawString(x_start, current_y, title_text); current_y -= line_height * 1.5; c.setFont("Helvetica", 9)
-                for key_text, value in data.items(): c.drawString(x_start + 5*mm, current_y, f"{key_text}:"); c.drawString(x_start + 55*mm, current_y, str(value)); current_y -= line_height
-                return start_y - current_y
-
-            col1_y = y_pos
-            geom_data = {
-                "Nome Procedimento": params['nome_procedimento'], "Modo de Soldagem": params['welding_mode'],
-                "Diâmetro": f"{params['diametro']:.2f} mm", "Comprimento": f"{params['comprimento_revestir']:.2f} mm"
-            }
-            col1_y -= draw_section("Parâmetros Gerais", geom_data, col1_x, col1_y); col1_y -= line_height
-            layer_data = { "Nº de Camadas": params['num_camadas'], "Espessura / Camada": f"{params['espessura_camada']:.2f} mm" }; col1_y -= draw_section("Parâmetros de Camada", layer_data, col1_x, col1_y)
-            
-            col2_y = y_pos
-            proc_data = {
-                "Corrente Arco": f"{params['corrente_arco']:.1f} A",
-                "Vazão Gás": f"{params['vazao_gas']:.1f} l/min",
-                "Alimentação Pó": f"{params['alim_po']:.1f} %",
-                "Pré-aquecimento": f"{params['preaquecimento']:.1f} °C",
-                "Tipo de Pó": params.get('powder_name', '') or '',
-                "OS": params.get('ordem_servico', '') or ''
-            }
-            col2_y -= draw_section("Parâmetros do Processo", proc_data, col2_x, col2_y); col2_y -= line_height
-            
-            # Resultados sem velocidade da placa
-            results_data = {
-                "Rotação (RPM)": results['rotation_rpm'],
-                "Passo Axial (mm)": results['helix_pitch'],
-                "Rotações/Passos": results['total_rotations'],
-                "Ângulo Total/Passo (A)": results['total_angle_A'],
-                "Tempo Total (hh:mm)": results['estimated_time']
-            }
-            col2_y -= draw_section("Resultados Calculados", results_data, col2_x, col2_y)
-
-            # Rodapé: Notas do procedimento (fixo na parte inferior, texto não sobe)
             try:
                 notes_text_val = self.notes_text.get("1.0", tk.END).strip()
             except Exception:
                 notes_text_val = ""
-            if notes_text_val:
-                # Linha separadora e título
-                c.setFillColor(colors.grey)
-                c.line(margin, margin + 17*mm, width - margin, margin + 17*mm)
-                c.setFillColor(colors.black)
-                c.setFont("Helvetica-Bold", 10)
-                c.drawString(margin, margin + 22*mm, "Notas:")
-                # Texto das notas: renderiza abaixo do título (para baixo), com word-wrap e limite de área
-                c.setFont("Helvetica", 9)
-                max_w = width - 2 * margin
-                line_h = 4.5 * mm
-                # Constrói linhas quebradas por largura
-                words = notes_text_val.split()
-                wrapped_lines = []
-                current = ""
-                for w in words:
-                    candidate = current + (" " if current else "") + w
-                    if c.stringWidth(candidate, "Helvetica", 9) <= max_w:
-                        current = candidate
-                    else:
-                        wrapped_lines.append(current)
-                        current = w
-                if current:
-                    wrapped_lines.append(current)
-                # Área disponível: do y_start para baixo até próximo do rodapé
-                y_curr = margin + 12*mm
-                min_y = margin + 3*mm
-                for i, ln in enumerate(wrapped_lines):
-                    if y_curr - line_h < min_y:
-                        c.drawString(margin, y_curr, "...")
-                        break
-                    c.drawString(margin, y_curr, ln)
-                    y_curr -= line_h
-            
-            c.save(); os.remove(img_path)
+            # A vista 3D é renderizada fora da tela, no mesmo ângulo da aba (se ela já existir)
+            view = (self.ax.elev, self.ax.azim) if 0 in (getattr(self, '_figures_built', None) or ()) else None
+            job = {'dest': filepath, 'params': params, 'results': results, 'costs': costs, 'notes': notes_text_val, 'view': view}
+            ReportProgressDialog(self, lambda: ([job], []), on_done=self._report_done)
+        except Exception as e: self.show_notification(f"Erro ao gerar PDF: {e}", 'error')
+
+    def _generate_batch_reports(self):
+        """Relatórios PDF de vários procedimentos/pacotes da biblioteca, numa pasta de saída."""
+        if not reportlab_available():
+            self.show_notification("O módulo 'reportlab' não foi encontrado. A geração de PDF está desabilitada.", 'warning'); return
+        paths = filedialog.askopenfilenames(initialdir=str(self._procedures_folder()), title="Relatórios em Lote...",
+                                            filetypes=[("Procedimentos e Trabalhos", f"*.json *{JOB_EXTENSION}"), ("All Files", "*.*")])
+        if not paths: return
+        out_dir = filedialog.askdirectory(title="Pasta dos relatórios")
+        if not out_dir: return
+        config = copy.deepcopy(self.config)
+
+        def make_jobs():
+            # Roda na thread do relatório: leitura dos arquivos e cálculo dos resultados
+            from report_pdf import procedure_report_job
+            jobs, failed = [], []
+            for path in paths:
+                try:
+                    jobs.append(procedure_report_job(path, config, out_dir))
+                except Exception as e:
+                    failed.append({'dest': path, 'ok': False, 'error': str(e) or type(e).__name__})
+            return jobs, failed
+        try:
+            ReportProgressDialog(self, make_jobs, on_done=self._report_done)
+        except Exception as e: self.show_notification(f"Erro ao gerar relatórios: {e}", 'error')
+
+    def _report_done(self, outcome):
+        done = [r for r in outcome if r['ok']]; failed = [r for r in outcome if not r['ok']]
+        if failed:
+            first = failed[0]
+            self.show_notification(f"{len(failed)} relatório(s) com erro. {os.path.basename(first['dest'])}: {first['error']}", 'error')
+        elif len(done) > 1:
+            self.show_notification(f"{len(done)} relatórios PDF gerados.", 'success')
+        if len(outcome) == 1 and done:
+            filepath = done[0]['dest']
             if messagebox.askyesno("Sucesso", "Relatório PDF gerado com sucesso. Deseja abri-lo?"):
                 try:
                     if sys.platform == "win32": os.startfile(filepath)
                     else: webbrowser.open(f'file://{os.path.abspath(filepath)}')
                 except Exception: webbrowser.open(f'file://{os.path.abspath(filepath)}')
-        except Exception as e: self.show_notification(f"Erro ao gerar PDF: {e}", 'error')
 
     def _generate_gcode_clicked(self):
         self._save_sash_positions()
@@ -3834,16 +4442,16 @@ class TFM_GCODE:
         if params is None:
             self.show_notification("Por favor, verifique os parâmetros.", 'error')
             return
-        # Removido: checagens de limites de máquina (gera sempre)
         try:
-            full_gcode_list = self.gcode_generator.generate(params)
+            full_gcode_list = self._generate_gcode_cached(params)
             if not full_gcode_list: self.show_notification("Erro ao gerar G-Code.", 'error'); return
-            full_gcode = "\n".join(full_gcode_list)
+            if not self._confirm_machine_limits(full_gcode_list): return
             filepath = filedialog.asksaveasfilename(defaultextension=".tap", filetypes=[("G-Code Files", "*.tap"), ("All Files", "*.*")])
             if not filepath: return
             try:
-                with open(filepath, 'w', encoding='utf-8') as f: f.write(full_gcode)
-                self.show_notification("Arquivo G-Code gerado com sucesso!", 'success')
+                write_tap(filepath, full_gcode_list, sidecar=False)
+                note = self._compaction_note(self._gcode_cache_stats or {}, self._gcode_cache_fitting or {})
+                self.show_notification("Arquivo G-Code gerado com sucesso!" + (f"\n{note}" if note else ""), 'success')
             except Exception as e: self.show_notification(f"Erro ao salvar G-Code: {e}", 'error')
         finally:
             # Restaura as posições dos sashes para evitar pulo da aba
@@ -3856,13 +4464,13 @@ class TFM_GCODE:
         if params is None:
             self.show_notification("Por favor, verifique os parâmetros.", 'error')
             return
-        # Removido: checagens de limites de máquina (baixa sempre)
         try:
-            full_gcode_list = self.gcode_generator.generate(params)
+            full_gcode_list = self._generate_gcode_cached(params)
             if not full_gcode_list:
                 self.show_notification("Erro ao gerar G-Code.", 'error')
                 return
-            full_gcode = "\n".join(full_gcode_list)
+            if not self._confirm_machine_limits(full_gcode_list):
+                return
             # Deixa o usuário escolher a pasta de destino
             initial_dir = self.config.get('integration', {}).get('gcode_dir', os.path.join(os.path.expanduser("~"), "Mach3", "GCode"))
             base_dir = filedialog.askdirectory(title="Escolha a pasta para salvar o G-code", initialdir=initial_dir, mustexist=False)
@@ -3881,14 +4489,24 @@ class TFM_GCODE:
             filename = f"{safe}.tap"
             filepath = os.path.join(base_dir, filename)
             try:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(full_gcode)
-                self.show_notification(f"Arquivo G-Code salvo: {filepath}", 'success')
+                write_tap(filepath, full_gcode_list, sidecar=False)
+                note = self._compaction_note(self._gcode_cache_stats or {}, self._gcode_cache_fitting or {})
+                self.show_notification(f"Arquivo G-Code salvo: {filepath}" + (f"\n{note}" if note else ""), 'success')
             except Exception as e:
                 self.show_notification(f"Erro ao salvar G-Code: {e}", 'error')
         finally:
             self._restore_sash_positions()
 
+    def _toggle_performance_panel(self):
+        panel = getattr(self, '_perf_panel', None)
+        if panel is not None:
+            panel.close(); return
+        try:
+            self._perf_panel = PerformancePanel(self)
+        except Exception as e:
+            self._perf_panel = None
+            self.show_notification(f"Erro ao abrir painel de desempenho: {e}", 'error')
+
     def _show_about_dialog(self):
          try:
              ver = APP_VERSION
@@ -4063,11 +4681,12 @@ class TFM_GCODE:
             self.show_notification("Por favor, verifique os parâmetros.", 'error')
             return
         try:
-            full_gcode_list = self.gcode_generator.generate(params)
-            if not full_gcode_list:
-                self.show_notification("Erro ao gerar G-Code.", 'error')
+            # Programa já gerado na pré-visualização (mesmos parâmetros) ou geração em fluxo, camada a camada
+            cached = self._cached_gcode(params)
+            if cached is not None and not self._confirm_machine_limits(cached):
                 return
-            full_gcode = "\n".join(full_gcode_list)
+            machine = self._refresh_machine()
+            gcode_source = cached if cached is not None else self.gcode_generator.generate_iter(params, machine=machine)
             base_dir = self.config.get('integration', {}).get('gcode_dir', r"C:\\Mach3\\GCode")
             try:
                 os.makedirs(base_dir, exist_ok=True)
@@ -4078,16 +4697,24 @@ class TFM_GCODE:
             filename = f"TFM_{datetime.now().strftime('%Y%m%d_%H%M%S')}.tap"
             filepath = os.path.join(base_dir, filename)
             try:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(full_gcode)
+                # Temporário + fsync + rename: o Mach3 nunca vê o arquivo pela metade
+                written = write_tap(filepath, gcode_source, sidecar=True)
             except Exception as e:
                 self.show_notification(f"Erro ao salvar G-Code para Mach3: {e}", 'error')
                 return
-            # Opcional: escrever arquivo autoload.txt para uso com macropump
+            if not written['lines']:
+                self._discard_tap(written)
+                self.show_notification("Erro ao gerar G-Code.", 'error')
+                return
+            if cached is None and not self._confirm_written_limits(filepath, machine):
+                # Gerado em fluxo: limites conferidos no arquivo gravado; recusado não vai para o Mach3
+                self._discard_tap(written)
+                self.show_notification("Programa não enviado ao Mach3 (limites da máquina).", 'warning')
+                return
+            # Opcional: escrever arquivo autoload.txt para uso com macropump (só após o rename)
             try:
                 if self.config.get('integration', {}).get('write_autoload_txt', False):
-                    with open(os.path.join(base_dir, 'autoload.txt'), 'w', encoding='utf-8') as auto:
-                        auto.write(filepath)
+                    write_text_atomic(os.path.join(base_dir, 'autoload.txt'), filepath)
             except Exception:
                 pass
             # Tenta abrir o Mach3 com o arquivo como argumento
@@ -4110,13 +4737,12 @@ class TFM_GCODE:
                     if self.config.get('integration', {}).get('write_autoload_txt', False):
                         def _rewrite_autoload():
                             try:
-                                with open(os.path.join(base_dir, 'autoload.txt'), 'w', encoding='utf-8') as auto:
-                                    auto.write(filepath)
+                                write_text_atomic(os.path.join(base_dir, 'autoload.txt'), filepath)
                             except Exception:
                                 pass
                         try:
                             # agenda em ~2s para dar tempo ao Mach3 subir o macropump
-                            self.after(2000, _rewrite_autoload)
+                            self.root.after(2000, _rewrite_autoload)
                         except Exception:
                             _rewrite_autoload()
                     # Fallback opcional: abrir arquivo via associação do Windows após o Mach3 subir
@@ -4127,7 +4753,7 @@ class TFM_GCODE:
                             except Exception:
                                 pass
                         try:
-                            self.after(3000, _startfile_later)
+                            self.root.after(3000, _startfile_later)
                         except Exception:
                             _startfile_later()
                     self.show_notification(f"Mach3 iniciado (perfil: {profile or 'padrão'}). Abrindo arquivo:\n{filepath}", 'success')
@@ -4219,6 +4845,13 @@ class TFM_GCODE:
             self.show_notification(f"Erro ao abrir simulações: {e}", 'error', 6000)
 
 if __name__ == "__main__":
+    # Necessário no executável: o processo de pré-geração é iniciado com spawn
+    import multiprocessing
+    multiprocessing.freeze_support()
+    # Modo de medição da inicialização: --startup-timing ou TFM_STARTUP_TIMING=1 (ou =<arquivo.json>)
+    timing = os.environ.get('TFM_STARTUP_TIMING', '')
+    if '--startup-timing' in sys.argv or timing:
+        startup.configure(enabled=True, output=timing if timing not in ('', '1') else None)
     root = tk.Tk()
     is_frozen = getattr(sys, 'frozen', False)
     # Exibe uma Splash leve (Tk) tanto em dev quanto em executável
@@ -4247,6 +4880,7 @@ if __name__ == "__main__":
             splash.update()
         except Exception:
             pass
+        startup.mark('splash')
     except Exception:
         splash = None
     # Fallback: oculta o splash caso algo impeça on_ready
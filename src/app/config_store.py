@@ -0,0 +1,147 @@
+"""Persistência do `config.json` em segundo plano, com gravação atômica.
+
+A interface altera o dicionário de configuração e chama `ConfigStore.save`
+(ex.: a cada posição de divisória capturada, troca de pó ou ajuste). O
+`save` só tira um retrato do conteúdo (JSON em memória, alguns KB) e marca
+a configuração como pendente. Uma thread grava o retrato mais recente no
+máximo a cada `interval_s` segundos, via temporário + rename
+(`tap_writer.write_text_atomic`). Retratos iguais ao último gravado não
+vão para o disco.
+
+`flush` grava na hora o que estiver pendente (usado ao sair do app).
+`ensure_dir` cria uma pasta uma única vez por caminho, para não repetir
+`os.makedirs` a cada gravação.
+"""
+import json
+import os
+import threading
+import time
+
+from tap_writer import write_text_atomic
+
+DEFAULT_INTERVAL_S = 2.0
+
+
+def dumps_config(data):
+    """Conteúdo do `config.json` (mesmo formato de sempre: indentação de 4)."""
+    return json.dumps(data, indent=4)
+
+
+class ConfigStore:
+    """Gravação agrupada e atômica do arquivo de configuração."""
+
+    def __init__(self, path, interval_s=DEFAULT_INTERVAL_S, on_error=None):
+        self.path = os.path.abspath(path)
+        self.interval_s = max(float(interval_s), 0.0)
+        # Chamado na thread de gravação com a exceção (a interface repassa com root.after)
+        self.on_error = on_error
+        self._pending = None
+        self._written = None
+        self._last_write = None
+        self._ensured = set()
+        self._lock = threading.Lock()
+        # Serializa gravações da thread e de `flush`
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._closed = False
+        self._thread = None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._written = f.read()
+        except (OSError, UnicodeDecodeError):
+            pass
+
+    def ensure_dir(self, path):
+        """Cria a pasta (e as intermediárias) na primeira vez que o caminho aparece."""
+        path = os.path.abspath(path)
+        if path in self._ensured:
+            return False
+        os.makedirs(path, exist_ok=True)
+        self._ensured.add(path)
+        return True
+
+    def save(self, data):
+        """Agenda a gravação de `data`; não toca no disco. Retorna False se nada mudou."""
+        text = dumps_config(data)
+        with self._lock:
+            if self._closed:
+                return False
+            if text == (self._pending if self._pending is not None else self._written):
+                return False
+            self._pending = text
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='config-store', daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return True
+
+    def pending(self):
+        with self._lock:
+            return self._pending is not None
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            with self._lock:
+                if self._closed:
+                    return
+                self._wake.clear()
+            while True:
+                # Espera o intervalo desde a última gravação; alterações nesse meio tempo entram juntas
+                delay = self._next_write_delay()
+                if delay > 0:
+                    if self._stop.wait(delay):
+                        return
+                    continue
+                try:
+                    if self._write_pending(respect_interval=True) is not None:
+                        break
+                except Exception as e:
+                    if self.on_error is not None:
+                        try:
+                            self.on_error(e)
+                        except Exception:
+                            pass
+                    break
+
+    def _next_write_delay(self):
+        if self._last_write is None:
+            return 0.0
+        return self._last_write + self.interval_s - time.monotonic()
+
+    def _write_pending(self, respect_interval=False):
+        """Grava o retrato pendente; None se o intervalo mínimo ainda não passou (só com `respect_interval`)."""
+        with self._write_lock:
+            if respect_interval and self._next_write_delay() > 0:
+                return None
+            with self._lock:
+                text, self._pending = self._pending, None
+            if text is None or text == self._written:
+                return False
+            try:
+                self.ensure_dir(os.path.dirname(self.path))
+                write_text_atomic(self.path, text)
+            except BaseException:
+                # Mantém pendente para a próxima tentativa (a não ser que já haja algo mais novo)
+                with self._lock:
+                    if self._pending is None:
+                        self._pending = text
+                raise
+            self._written = text
+            self._last_write = time.monotonic()
+            return True
+
+    def flush(self):
+        """Grava agora o que estiver pendente (na thread de quem chama). Retorna True se gravou."""
+        return self._write_pending()
+
+    def close(self):
+        """Grava o pendente e encerra a thread; `save` posteriores são ignorados."""
+        try:
+            return self.flush()
+        finally:
+            with self._lock:
+                self._closed = True
+            self._stop.set()
+            self._wake.set()
@@ -0,0 +1,141 @@
+"""Simulação cinemática do tempo de ciclo a partir da `MoveTable`.
+
+Modelo do planejador do Mach3, em colunas NumPy:
+
+* avanço F (unidades/min) vale para o comprimento euclidiano de todos os
+  eixos, contando graus como unidade; cada movimento é ainda limitado pela
+  velocidade e aceleração de cada eixo envolvido (limite do eixo dividido
+  pelo cosseno diretor do eixo no movimento);
+* em velocidade constante (CV) a velocidade na junção entre dois movimentos
+  é o menor dos cruzeiros, escalada pelo cosseno do ângulo entre eles; em
+  parada exata (G61), em trocas G00/G01, em barreiras (M0/G04/G53) e acima
+  do ângulo CV do perfil a junção vale zero;
+* o LookAhead limita quantos movimentos à frente o planejador enxerga: em
+  cada junção a máquina precisa conseguir parar dentro dessa janela.
+
+As passagens para frente/para trás do planejador são feitas com somas
+prefixadas de 2·a·L (mínimos acumulados), sem laço por movimento. Cada
+segmento é um trapézio (ou triângulo) de velocidade.
+"""
+import numpy as np
+
+from mach3_profile import default_machine
+from toolpath import MOTION_BARRIER
+
+
+def _axis_arrays(table, machine):
+    vel = np.array([machine.velocity(a) for a in table.axes], dtype=float) / 60.0
+    acc = np.array([machine.acceleration(a) for a in table.axes], dtype=float)
+    return vel, acc
+
+
+def _direction_limited(cos, per_axis):
+    """Menor limite entre os eixos que se movem: limite_eixo / |cosseno do eixo|."""
+    with np.errstate(divide='ignore'):
+        ratio = np.where(cos > 1e-12, per_axis / np.maximum(cos, 1e-12), np.inf)
+    out = ratio.min(axis=1) if ratio.shape[1] else np.full(ratio.shape[0], np.inf)
+    # Arcos fechados (corda zero): limite do eixo mais lento
+    return np.where(np.isfinite(out), out, per_axis.min() if per_axis.size else 1.0)
+
+
+def _segment_times(L, v, a, vs2, ve2):
+    """Tempo de cada segmento com entrada/saída (v²) e cruzeiro/aceleração dados."""
+    vs, ve = np.sqrt(vs2), np.sqrt(ve2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        peak2 = 0.5 * (vs2 + ve2) + a * L
+        d_acc = (v * v - vs2) / (2 * a)
+        d_dec = (v * v - ve2) / (2 * a)
+        trapezoid = (v - vs) / a + (v - ve) / a + (L - d_acc - d_dec) / v
+        triangle = (2 * np.sqrt(peak2) - vs - ve) / a
+    t = np.where(peak2 >= v * v, trapezoid, triangle)
+    return np.where(L > 0, t, 0.0)
+
+
+def simulate(table, machine=None, cv=None, lookahead=None):
+    """Tempo de ciclo simulado da tabela de movimentos.
+
+    `machine` é o `MachineModel` do perfil do Mach3 (padrões se None).
+    `cv`/`lookahead` sobrepõem os valores do perfil. Retorna tempos em
+    segundos: total, por camada, em avanço, em rápido e em espera.
+    """
+    machine = machine or default_machine()
+    cv = machine.cv_mode if cv is None else bool(cv)
+    lookahead = machine.lookahead if lookahead is None else int(lookahead)
+    angle_limit = machine.cv_angle_limit
+
+    result = {'total_s': 0.0, 'per_layer_s': {}, 'feed_s': 0.0, 'rapid_s': 0.0, 'dwell_s': 0.0,
+              'moves': 0, 'stops': 0, 'segment_s': np.zeros(len(table))}
+    if len(table) == 0:
+        return result
+
+    L_all = table.lengths()
+    barrier_all = table.motion == MOTION_BARRIER
+    # Movimentos de comprimento zero (coordenadas repetidas) não afetam o planejador
+    keep = (L_all > 0) | barrier_all
+    idx = np.flatnonzero(keep)
+    L = L_all[idx]
+    motion = table.motion[idx]
+    barrier = barrier_all[idx]
+    delta = (table.end - table.start)[idx]
+    chord = np.sqrt((delta ** 2).sum(axis=1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        unit = np.where(chord[:, None] > 0, delta / chord[:, None], 0.0)
+    cos = np.abs(unit)
+
+    vel, acc = _axis_arrays(table, machine)
+    vlim = _direction_limited(cos, vel)
+    a = _direction_limited(cos, acc)
+    feed = table.feed[idx] / 60.0
+    v = np.where((motion > 0) & (feed > 0), np.minimum(feed, vlim), vlim)
+    v = np.where(barrier, 0.0, v)
+
+    # Junções: n + 1 nós (início e fim do programa param)
+    n = len(idx)
+    cap = np.zeros(n + 1)
+    if n > 1:
+        vmin = np.minimum(v[:-1], v[1:])
+        dot = (unit[:-1] * unit[1:]).sum(axis=1)
+        junction = vmin * vmin * np.clip(dot, 0.0, 1.0) if cv else np.zeros(n - 1)
+        stop = (motion[:-1] != motion[1:]) | barrier[:-1] | barrier[1:]
+        exact = table.exact_stop[idx].astype(bool)
+        stop |= exact[:-1] | exact[1:]
+        if angle_limit is not None and angle_limit > 0:
+            stop |= dot < np.cos(np.radians(angle_limit))
+        cap[1:-1] = np.where(stop, 0.0, junction)
+
+    # v² alcançável: cap_j + 2·a·(distância) em ambas as direções
+    S = np.concatenate(([0.0], np.cumsum(2.0 * a * L)))
+    forward = S + np.minimum.accumulate(cap - S)
+    backward = np.minimum.accumulate((cap + S)[::-1])[::-1] - S
+    window = S[np.minimum(np.arange(n + 1) + max(lookahead, 1), n)] - S
+    w = np.maximum(np.minimum.reduce([cap, forward, backward, window]), 0.0)
+
+    v2 = v * v
+    t = _segment_times(L, v, a, np.minimum(w[:-1], v2), np.minimum(w[1:], v2))
+    dwell = table.dwell_s[idx]
+    t = t + dwell
+
+    seg = result['segment_s']
+    seg[idx] = t
+    layer = table.layer[idx]
+    per_layer = {}
+    valid = layer >= 0
+    if valid.any():
+        sums = np.bincount(layer[valid].astype(np.int64), weights=t[valid])
+        per_layer = {int(k): float(sums[k]) for k in np.unique(layer[valid]).astype(np.int64)}
+    result.update({
+        'total_s': float(t.sum()),
+        'per_layer_s': per_layer,
+        'feed_s': float(t[motion > 0].sum()),
+        'rapid_s': float(t[motion == 0].sum()),
+        'dwell_s': float(dwell.sum()),
+        'moves': int((L > 0).sum()),
+        'stops': int((cap[1:-1] == 0).sum()) if n > 1 else 0,
+    })
+    return result
+
+
+def format_duration(seconds):
+    """hh:mm:ss de um tempo em segundos."""
+    seconds = int(round(max(seconds, 0.0)))
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
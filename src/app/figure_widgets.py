@@ -0,0 +1,122 @@
+"""Canvas e barra de ferramentas do Matplotlib usados no visualizador.
+
+Fica fora de `TFM_GCODE` para que o Matplotlib (a importação mais pesada do
+app) só seja carregado quando a primeira figura é criada, depois que a
+janela já apareceu.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from matplotlib.figure import Figure
+
+from instrumentation import perf
+
+# Canvas que registra o tempo de cada redesenho na instrumentação
+class TimedFigureCanvas(FigureCanvasTkAgg):
+    def __init__(self, figure, master=None, phase='canvas'):
+        self._perf_phase = f"canvas:{phase}"
+        super().__init__(figure, master=master)
+
+    def draw(self):
+        with perf.timer(self._perf_phase):
+            super().draw()
+
+# Toolbar personalizada para ajustar "Home" ao percurso atual
+class CustomToolbar(NavigationToolbar2Tk):
+    def __init__(self, canvas, window, app_ref):
+        self._app_ref = app_ref
+        super().__init__(canvas, window)
+        # Botões rápidos integrados à barra com quebra de linha quando necessário
+        try:
+            # Linha 1 (dentro da toolbar padrão)
+            self._btn_top_r1 = ttk.Button(self, text="Top", style='Toolbutton', command=self._app_ref._view_top)
+            self._btn_side_r1 = ttk.Button(self, text="Side", style='Toolbutton', command=self._app_ref._view_side)
+            self._btn_top_r1.pack(side=tk.LEFT, padx=(6, 0))
+            self._btn_side_r1.pack(side=tk.LEFT, padx=(4, 0))
+
+            # Linha 2 (overflow abaixo da barra)
+            self._row2 = ttk.Frame(window)
+            self._btn_top_r2 = ttk.Button(self._row2, text="Top", style='Toolbutton', command=self._app_ref._view_top)
+            self._btn_side_r2 = ttk.Button(self._row2, text="Side", style='Toolbutton', command=self._app_ref._view_side)
+
+            def _update_toolbar_layout(event=None):
+                try:
+                    container_w = window.winfo_width()
+                    # Largura requerida pelos filhos atuais da barra (linha 1)
+                    total_children_w = 0
+                    for child in self.winfo_children():
+                        try:
+                            total_children_w += child.winfo_reqwidth()
+                        except Exception:
+                            pass
+                    # Margem de segurança
+                    total_children_w += 8
+
+                    if total_children_w > container_w:
+                        # mover os extras para a segunda linha
+                        try:
+                            self._btn_top_r1.pack_forget(); self._btn_side_r1.pack_forget()
+                        except Exception:
+                            pass
+                        try:
+                            if not getattr(self, '_row2_packed', False):
+                                self._row2.pack(side=tk.TOP, fill=tk.X)
+                                self._row2_packed = True
+                            if not getattr(self, '_row2_buttons_packed', False):
+                                self._btn_top_r2.pack(side=tk.LEFT, padx=(6, 0))
+                                self._btn_side_r2.pack(side=tk.LEFT, padx=(4, 0))
+                                self._row2_buttons_packed = True
+                        except Exception:
+                            pass
+                    else:
+                        # manter extras na primeira linha e ocultar a segunda
+                        try:
+                            if not self._btn_top_r1.winfo_ismapped():
+                                self._btn_top_r1.pack(side=tk.LEFT, padx=(6, 0))
+                                self._btn_side_r1.pack(side=tk.LEFT, padx=(4, 0))
+                        except Exception:
+                            pass
+                        try:
+                            if getattr(self, '_row2_buttons_packed', False):
+                                self._btn_top_r2.pack_forget(); self._btn_side_r2.pack_forget()
+                                self._row2_buttons_packed = False
+                            if getattr(self, '_row2_packed', False):
+                                self._row2.pack_forget(); self._row2_packed = False
+                        except Exception:
+                            pass
+                except Exception:
+                    pass
+
+            # Atualiza ao redimensionar
+            try:
+                window.bind("<Configure>", _update_toolbar_layout, add='+')
+                self.bind("<Configure>", _update_toolbar_layout, add='+')
+                # executa uma vez após inicialização
+                try:
+                    window.after(50, _update_toolbar_layout)
+                except Exception:
+                    _update_toolbar_layout()
+            except Exception:
+                pass
+            # Removido: botão Isométrico conforme solicitado
+        except Exception:
+            pass
+
+    def home(self, *args):
+        # Recalcula desenho e aplica vista espelhada (comportamento antigo desejado)
+        try:
+            params = self._app_ref._get_current_params()
+            self._app_ref.desenhar_percurso_3d(params)
+            try:
+                elev, azim = getattr(self._app_ref, '_initial_view', (self._app_ref.ax.elev, self._app_ref.ax.azim))
+                self._app_ref.ax.view_init(elev=elev, azim=azim)
+                self._app_ref.canvas.draw_idle()
+            except Exception:
+                pass
+        except Exception:
+            # Fallback para home padrão caso algo falhe
+            try:
+                super().home(*args)
+            except Exception:
+                pass
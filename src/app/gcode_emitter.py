@@ -0,0 +1,121 @@
+"""Emissão de linhas de G-code com precisão fixa por palavra.
+
+`GCodeEmitter` monta linhas de movimento com as casas decimais do
+`OutputFormat`. Para colunas inteiras de coordenadas (rampas S-curve,
+escadas X/A, calculadas em bloco com NumPy) `moves` aplica um modelo
+pronto a cada ponto: o código de movimento e o avanço são formatados uma
+só vez por bloco e o modelo fica em cache, em vez de uma f-string com
+duas conversões de ponto flutuante por linha.
+
+Duas coisas distintas entram aqui: o `OutputFormat` diz como as palavras
+são escritas (casas decimais), o `mach3_profile.MachineModel` diz o que a
+máquina suporta. Com um `MachineModel` o avanço de cada linha é limitado à
+velocidade máxima dos eixos sintonizados que ela move.
+
+A saída é idêntica byte a byte à de `f"{valor:.3f}"`/`f"{valor:.1f}"`:
+`%` e `format` usam a mesma conversão de ponto flutuante (inclusive o
+arredondamento exato e o `-0.000` de valores negativos muito pequenos).
+"""
+
+
+class OutputFormat:
+    """Formato das palavras do programa: casas decimais por eixo e para o avanço F.
+
+    O padrão corresponde à saída histórica do gerador: 3 casas para os eixos
+    lineares e rotativos e 1 casa para o avanço.
+    """
+    DEFAULT_NAME = "Mach3 X/Z/A"
+    DEFAULT_DECIMALS = {'X': 3, 'Y': 3, 'Z': 3, 'A': 3, 'B': 3, 'C': 3, 'F': 1}
+
+    def __init__(self, name=None, decimals=None):
+        self.name = name or self.DEFAULT_NAME
+        self.decimals = dict(self.DEFAULT_DECIMALS)
+        for letter, places in (decimals or {}).items():
+            places = int(places)
+            if not 0 <= places <= 6:
+                raise ValueError(f"Casas decimais inválidas para {letter}: {places}")
+            self.decimals[str(letter).upper()] = places
+
+    def decimals_for(self, letter):
+        """Casas decimais da palavra (3 para letras não configuradas)."""
+        return self.decimals.get(letter, 3)
+
+    def to_dict(self):
+        return {'name': self.name, 'decimals': dict(self.decimals)}
+
+    @classmethod
+    def from_dict(cls, data):
+        data = data or {}
+        return cls(name=data.get('name'), decimals=data.get('decimals'))
+
+    def __eq__(self, other):
+        return isinstance(other, OutputFormat) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"OutputFormat({self.name!r}, {self.decimals!r})"
+
+
+def _as_list(values):
+    """Converte colunas NumPy/sequências em lista de float do Python."""
+    if hasattr(values, 'tolist'):
+        values = values.tolist()
+    return values if isinstance(values, list) else list(values)
+
+
+class GCodeEmitter:
+    def __init__(self, output_format=None, machine=None):
+        self.output_format = output_format or OutputFormat()
+        self.machine = machine
+        self._formats = {}
+        self._templates = {}
+
+    def _fmt(self, letter):
+        fmt = self._formats.get(letter)
+        if fmt is None:
+            fmt = f"{letter}%.{self.output_format.decimals_for(letter)}f"
+            self._formats[letter] = fmt
+        return fmt
+
+    def word(self, letter, value):
+        """Palavra única, ex.: word('X', 1.5) -> 'X1.500'."""
+        return self._fmt(letter) % value
+
+    def _prefix(self, code, feed):
+        return code if feed is None else f"{code} {self._fmt('F') % feed}"
+
+    def _feed_for(self, feed, letters):
+        return feed if self.machine is None else self.machine.clamp_feed(feed, letters)
+
+    def move(self, code, feed=None, **axes):
+        """Linha de movimento com os eixos na ordem dos argumentos, ex.: move('G01', 600, X=1, A=2)."""
+        parts = [self._prefix(code, self._feed_for(feed, axes))]
+        parts.extend(self._fmt(letter) % value for letter, value in axes.items())
+        return " ".join(parts)
+
+    def format_column(self, letter, values):
+        """Lista de palavras para uma coluna de valores (ex.: ['X0.000', 'X1.250', ...])."""
+        fmt = self._fmt(letter)
+        return [fmt % v for v in _as_list(values)]
+
+    def _template(self, code, feed, letters):
+        key = (code, feed, letters)
+        template = self._templates.get(key)
+        if template is None:
+            template = " ".join([self._prefix(code, feed).replace('%', '%%')] + [self._fmt(letter) for letter in letters])
+            if len(self._templates) > 256:
+                self._templates.clear()
+            self._templates[key] = template
+        return template
+
+    def moves(self, code, feed=None, **columns):
+        """Uma linha por ponto das colunas (mesmo comprimento), com código e avanço fixos."""
+        if not columns:
+            return []
+        letters = tuple(columns)
+        template = self._template(code, self._feed_for(feed, letters), letters)
+        if len(letters) == 1:
+            return [template % v for v in _as_list(columns[letters[0]])]
+        cols = [_as_list(columns[letter]) for letter in letters]
+        if any(len(c) != len(cols[0]) for c in cols):
+            raise ValueError("Colunas de coordenadas com comprimentos diferentes")
+        return [template % row for row in zip(*cols)]
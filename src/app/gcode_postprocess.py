@@ -0,0 +1,460 @@
+"""Pós-processamento de G-code gerado.
+
+`fit_arcs` substitui sequências de G01 por movimentos equivalentes mais
+longos: trechos de passo constante em X+A (hélices, que no espaço das juntas
+são retas) viram um único G01 e trechos circulares no plano ativo viram
+G02/G03, sempre dentro de uma tolerância de corda em mm (o eixo A é
+convertido para comprimento de arco pelo raio da peça).
+
+`compact_modal` remove palavras modais redundantes (G de movimento, F e
+eixos que não mudaram) e funde movimentos G01 colineares consecutivos com o
+mesmo avanço, dentro de uma tolerância. O resultado é equivalente para o
+controlador (Mach3): mesmas posições finais, mesmos avanços e a mesma
+ordem de eventos.
+
+Regras de segurança:
+- Linhas com códigos M, G53, outros G não-modais de movimento, palavras
+  desconhecidas (P, I, J, K, R, S, T...) ou comentários na mesma linha são
+  emitidas sem alteração e funcionam como barreira para a fusão.
+- Comentários isolados, linhas vazias e `%` são mantidos no lugar e também
+  interrompem a fusão (preservam marcadores como `(--- CAMADA n ---)`).
+- Em G91 (incremental) e G93 (tempo inverso) nada é compactado até o
+  retorno a G90/G94.
+"""
+import math
+import re
+
+AXES = ('X', 'Y', 'Z', 'A', 'B', 'C')
+_MOTION = {'G0': 0, 'G00': 0, 'G1': 1, 'G01': 1, 'G2': 2, 'G02': 2, 'G3': 3, 'G03': 3}
+_WORD_RE = re.compile(r"([A-Z])\s*([-+]?(?:\d+\.?\d*|\.\d+))")
+# Limite de pontos intermediários verificados numa mesma fusão
+_MAX_MERGE_POINTS = 256
+
+
+def _parse_words(code):
+    """Lista de (letra, texto) ou None se a linha tiver algo fora do formato palavra-número."""
+    words = []
+    pos = 0
+    code = code.strip()
+    for m in _WORD_RE.finditer(code.upper()):
+        if code[pos:m.start()].strip():
+            return None
+        words.append((m.group(1), m.group(2)))
+        pos = m.end()
+    if code[pos:].strip():
+        return None
+    return words
+
+
+def _point_on_segment(p, a, b, tol):
+    """True se p está a até `tol` do segmento a-b (com projeção dentro do segmento)."""
+    ab = [bi - ai for ai, bi in zip(a, b)]
+    ap = [pi - ai for ai, pi in zip(a, p)]
+    ab2 = sum(v * v for v in ab)
+    if ab2 <= 0.0:
+        return sum(v * v for v in ap) <= tol * tol
+    t = sum(u * v for u, v in zip(ap, ab)) / ab2
+    if t < -1e-12 or t > 1.0 + 1e-12:
+        return False
+    d2 = sum((u - t * v) ** 2 for u, v in zip(ap, ab))
+    return d2 <= tol * tol
+
+
+class _ModalState:
+    __slots__ = ('motion', 'motion_text', 'feed', 'feed_text', 'pos', 'pos_text')
+
+    def __init__(self):
+        self.motion = None; self.motion_text = None
+        self.feed = None; self.feed_text = None
+        self.pos = {}; self.pos_text = {}
+
+    def copy(self):
+        c = _ModalState()
+        c.motion, c.motion_text, c.feed, c.feed_text = self.motion, self.motion_text, self.feed, self.feed_text
+        c.pos = dict(self.pos); c.pos_text = dict(self.pos_text)
+        return c
+
+
+def compact_modal(lines, tol=0.001, merge_collinear=True):
+    """Compacta o programa. Retorna (linhas, estatísticas).
+
+    `tol` é a distância máxima (nas unidades dos eixos) de um ponto
+    intermediário à reta resultante para que movimentos sejam fundidos.
+    """
+    lines = [str(l) for l in (lines or [])]
+    out = []
+    program = _ModalState()   # estado modal segundo o programa original
+    emitted = _ModalState()   # estado modal já comunicado ao controlador
+    passthrough = False       # G91/G93 ativos: não compactar
+    merged = 0
+    pending = None            # movimento G01 aguardando possível fusão
+
+    def flush():
+        nonlocal pending
+        if pending is not None:
+            out.append(pending['text'])
+            pending = None
+
+    def sync_from_words(words):
+        for letter, text in words:
+            if letter == 'G' and ('G' + text) in _MOTION:
+                program.motion = emitted.motion = _MOTION['G' + text]
+                program.motion_text = emitted.motion_text = 'G' + text
+            elif letter == 'F':
+                program.feed = emitted.feed = float(text)
+                program.feed_text = emitted.feed_text = 'F' + text
+            elif letter in AXES:
+                program.pos[letter] = emitted.pos[letter] = float(text)
+                program.pos_text[letter] = emitted.pos_text[letter] = letter + text
+
+    def barrier(line, words=None):
+        flush()
+        letters = {l for l, _ in (words or ())}
+        if letters & set(AXES):
+            # A linha executa movimento com o modal vigente: restaura G/F omitidos em movimentos nulos descartados
+            sync = []
+            if 'G' not in letters and program.motion != emitted.motion and program.motion_text:
+                sync.append(program.motion_text)
+            if 'F' not in letters and program.feed != emitted.feed and program.feed_text:
+                sync.append(program.feed_text)
+            if sync:
+                out.append(" ".join(sync))
+        out.append(line)
+        if words:
+            sync_from_words(words)
+
+    for line in lines:
+        stripped = line.strip()
+        code = stripped.split('(', 1)[0].split(';', 1)[0]
+        has_comment = code.strip() != stripped
+        if not code.strip():
+            # Comentário isolado, linha vazia ou '%'
+            barrier(line)
+            continue
+        words = _parse_words(code)
+        if words is None:
+            barrier(line); continue
+        g_codes = ['G' + t for l, t in words if l == 'G']
+        other_g = [g for g in g_codes if g not in _MOTION]
+        letters = {l for l, _ in words}
+        # Estados que suspendem a compactação
+        was_passthrough = passthrough
+        for g in other_g:
+            num = g[1:].lstrip('0') or '0'
+            if num in ('91', '93'):
+                passthrough = True
+            elif num in ('90', '94'):
+                passthrough = False
+        if passthrough or was_passthrough:
+            # Valores incrementais/tempo inverso não descrevem o estado absoluto
+            barrier(line)
+            program.__init__(); emitted.__init__()
+            continue
+        if (other_g or has_comment or 'M' in letters
+                or not letters <= {'G', 'F', *AXES} or len(g_codes) > 1):
+            # Sem estado confiável após M/G53 etc.: força reemissão completa
+            barrier(line, words)
+            if 'M' in letters or any(g.startswith('G53') for g in other_g):
+                program.__init__(); emitted.__init__()
+            continue
+
+        # Linha de movimento simples: atualiza o estado do programa
+        for letter, text in words:
+            if letter == 'G':
+                program.motion = _MOTION['G' + text]; program.motion_text = 'G' + text
+            elif letter == 'F':
+                program.feed = float(text); program.feed_text = 'F' + text
+            else:
+                program.pos[letter] = float(text); program.pos_text[letter] = letter + text
+        if program.motion in (2, 3) or program.motion is None:
+            # Arcos dependem de I/J/K/R (já barrados) — aqui só sem centro; não mexer
+            barrier(line, words); continue
+
+        moved_axes = [a for a in AXES if a in program.pos and emitted.pos.get(a) != program.pos[a]]
+        if not moved_axes:
+            # Movimento nulo em relação ao já emitido: descarta
+            continue
+
+        can_merge = (merge_collinear and pending is not None and program.motion == 1
+                     and pending['motion'] == 1 and pending['feed'] == program.feed
+                     and set(pending['axes_known']) == set(program.pos))
+        if can_merge:
+            axes_all = sorted(program.pos)
+            start = [pending['start'][a] for a in axes_all]
+            end = [program.pos[a] for a in axes_all]
+            points = pending['points'] + [[pending['end'][a] for a in axes_all]]
+            if len(points) <= _MAX_MERGE_POINTS and all(_point_on_segment(p, start, end, tol) for p in points):
+                # Funde: o pendente passa a terminar no novo ponto
+                merged += 1
+                pending['points'] = points
+                pending['end'] = dict(program.pos)
+                pending['text'] = _format_move(pending['base'], program)
+                emitted.pos = dict(program.pos); emitted.pos_text = dict(program.pos_text)
+                continue
+
+        flush()
+        base = emitted.copy()
+        text = _format_move(base, program)
+        emitted.motion, emitted.motion_text = program.motion, program.motion_text
+        if program.motion != 0:
+            emitted.feed, emitted.feed_text = program.feed, program.feed_text
+        emitted.pos = dict(program.pos); emitted.pos_text = dict(program.pos_text)
+        if program.motion == 1 and merge_collinear and all(a in base.pos for a in program.pos):
+            pending = {
+                'text': text, 'base': base, 'motion': 1, 'feed': program.feed,
+                'start': dict(base.pos), 'end': dict(program.pos), 'points': [],
+                'axes_known': tuple(program.pos),
+            }
+        else:
+            out.append(text)
+    flush()
+
+    bytes_in = len("\n".join(lines).encode('utf-8'))
+    bytes_out = len("\n".join(out).encode('utf-8'))
+    stats = {
+        'lines_in': len(lines), 'lines_out': len(out),
+        'bytes_in': bytes_in, 'bytes_out': bytes_out,
+        'merged_moves': merged,
+    }
+    return out, stats
+
+
+def _format_move(base, program):
+    """Monta a linha com as palavras que diferem do estado `base` já emitido."""
+    words = []
+    if base.motion != program.motion:
+        words.append(program.motion_text)
+    if program.motion != 0 and program.feed is not None and base.feed != program.feed:
+        words.append(program.feed_text)
+    for a in AXES:
+        if a in program.pos and base.pos.get(a) != program.pos[a]:
+            words.append(program.pos_text[a])
+    return " ".join(words)
+
+
+# Plano ativo -> (eixo 1, eixo 2, palavra do centro no eixo 1, no eixo 2)
+_PLANES = {17: ('X', 'Y', 'I', 'J'), 18: ('Z', 'X', 'K', 'I'), 19: ('Y', 'Z', 'J', 'K')}
+
+
+def _a_scale(pos, radius_offset, radius):
+    """Fator grau -> mm de arco para o eixo A, a partir do raio da peça."""
+    r = None
+    if radius_offset is not None and 'Z' in pos:
+        r = pos['Z'] - float(radius_offset)
+    if (r is None or r <= 0) and radius:
+        r = float(radius)
+    if r is None or r <= 0:
+        return 1.0
+    return math.pi * r / 180.0
+
+
+def _line_fits(vecs, i, j, tol):
+    """True se os pontos i..j seguem a reta i-j, dentro da tolerância e sem retroceder."""
+    a, b = vecs[i], vecs[j]
+    ab = [bi - ai for ai, bi in zip(a, b)]
+    for k in range(i + 1, j + 1):
+        step = [q - p for p, q in zip(vecs[k - 1], vecs[k])]
+        if sum(u * v for u, v in zip(step, ab)) <= 0.0:
+            return False
+        if k < j and not _point_on_segment(vecs[k], a, b, tol):
+            return False
+    return True
+
+
+def _circle_through(p1, p2, p3):
+    """Centro (cx, cy) do círculo pelos três pontos 2D, ou None se colineares."""
+    ax, ay = p1; bx, by = p2; cx, cy = p3
+    d = 2.0 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+    if abs(d) < 1e-12:
+        return None
+    a2 = ax * ax + ay * ay; b2 = bx * bx + by * by; c2 = cx * cx + cy * cy
+    ux = (a2 * (by - cy) + b2 * (cy - ay) + c2 * (ay - by)) / d
+    uy = (a2 * (cx - bx) + b2 * (ax - cx) + c2 * (bx - ax)) / d
+    return ux, uy
+
+
+def _arc_fits(pts2d, i, j, tol):
+    """(centro, horário) se os pontos i..j estão sobre um arco dentro da tolerância, senão None."""
+    center = _circle_through(pts2d[i], pts2d[(i + j) // 2], pts2d[j])
+    if center is None:
+        return None
+    cx, cy = center
+    r = math.hypot(pts2d[i][0] - cx, pts2d[i][1] - cy)
+    sign = 0
+    sweep = 0.0
+    for k in range(i, j + 1):
+        if abs(math.hypot(pts2d[k][0] - cx, pts2d[k][1] - cy) - r) > tol:
+            return None
+        if k > i:
+            (x0, y0), (x1, y1) = pts2d[k - 1], pts2d[k]
+            cross = (x0 - cx) * (y1 - cy) - (y0 - cy) * (x1 - cx)
+            s = 1 if cross > 0 else (-1 if cross < 0 else 0)
+            if s == 0 or (sign and s != sign):
+                return None
+            sign = s
+            chord = math.hypot(x1 - x0, y1 - y0)
+            if chord > 2.0 * r:
+                return None
+            # Flecha da corda: distância entre o arco e o segmento original
+            if r - math.sqrt(max(r * r - (chord / 2.0) ** 2, 0.0)) > tol:
+                return None
+            sweep += 2.0 * math.asin(min(1.0, chord / (2.0 * r)))
+    if sweep >= 2.0 * math.pi - 1e-3:
+        return None
+    return center, sign < 0
+
+
+def fit_arcs(lines, chord_tol=0.01, radius_offset=None, radius=None, min_arc_segments=3):
+    """Ajusta retas (hélices X+A) e arcos sobre sequências de G01. Retorna (linhas, estatísticas).
+
+    `radius_offset` é subtraído de Z para obter o raio usado na conversão do
+    eixo A (no gerador, Z = raio + afastamento da tocha); `radius` é usado
+    quando Z não é conhecido.
+    """
+    lines = [str(l) for l in (lines or [])]
+    tol = max(float(chord_tol), 1e-9)
+    out = []
+    state = _ModalState()
+    plane = 17
+    passthrough = False
+    run = None
+    counts = {'lines_replaced': 0, 'line_moves': 0, 'arcs': 0}
+    after_arc = False
+
+    def emit(line, words=None, motion_text=None):
+        """Grava a linha; logo após um arco, linhas que movem sem G explícito recebem o G modal original."""
+        nonlocal after_arc
+        if words is None:
+            words = _parse_words(line.split('(', 1)[0].split(';', 1)[0]) or []
+        letters = {l for l, _ in words}
+        has_motion = any(l == 'G' and ('G' + t) in _MOTION for l, t in words)
+        motion_text = motion_text or state.motion_text
+        if after_arc and not has_motion and letters & set(AXES) and motion_text:
+            line = f"{motion_text} {line.lstrip()}"
+            has_motion = True
+        if has_motion:
+            after_arc = False
+        out.append(line)
+
+    def flush_run():
+        nonlocal run, after_arc
+        if run is None:
+            return
+        pts, texts, src = run['points'], run['texts'], run['lines']
+        axes = run['axes']
+        scale = _a_scale(pts[0], radius_offset, radius)
+        vecs = [[p[a] * scale if a == 'A' else p[a] for a in axes] for p in pts]
+        a1, a2, w1, w2 = _PLANES.get(plane, _PLANES[17])
+        planar = a1 in axes and a2 in axes and all(
+            all(p[a] == pts[0][a] for p in pts) for a in axes if a not in (a1, a2))
+        pts2d = [(p[a1], p[a2]) for p in pts] if planar else None
+        n = len(pts) - 1
+        i = 0
+        while i < n:
+            j = i + 1
+            while j < n and j + 1 - i <= _MAX_MERGE_POINTS and _line_fits(vecs, i, j + 1, tol):
+                j += 1
+            if j - i >= 2:
+                words = [run['motion_text'], run['feed_text']]
+                words += [texts[j][a] for a in AXES if a in axes and pts[j][a] != pts[i][a]]
+                emit(" ".join(words))
+                counts['lines_replaced'] += j - i; counts['line_moves'] += 1
+                i = j
+                continue
+            best = None
+            if planar:
+                k = i + min_arc_segments
+                while k <= n and k - i <= _MAX_MERGE_POINTS:
+                    fit = _arc_fits(pts2d, i, k, tol)
+                    if fit is None:
+                        break
+                    best = (k, fit)
+                    k += 1
+            if best is not None:
+                k, ((cx, cy), clockwise) = best
+                words = ['G02' if clockwise else 'G03', run['feed_text'], texts[k][a1], texts[k][a2]]
+                # Centro incremental em relação ao início (modo IJ incremental, padrão do Mach3)
+                words += [f"{w1}{(cx - pts[i][a1]) + 0.0:.3f}".replace('-0.000', '0.000'),
+                          f"{w2}{(cy - pts[i][a2]) + 0.0:.3f}".replace('-0.000', '0.000')]
+                # Ordem usual: eixos em ordem alfabética antes dos centros
+                axis_words = sorted(words[2:4], key=lambda w: AXES.index(w[0]))
+                center_words = sorted(words[4:], key=lambda w: w[0])
+                out.append(" ".join(words[:2] + axis_words + center_words))
+                after_arc = True
+                counts['lines_replaced'] += k - i; counts['arcs'] += 1
+                i = k
+                continue
+            emit(src[i], motion_text=run['motion_text'])
+            i += 1
+        run = None
+
+    for line in lines:
+        stripped = line.strip()
+        code = stripped.split('(', 1)[0].split(';', 1)[0]
+        words = _parse_words(code) if code.strip() else []
+        if words is None:
+            flush_run(); emit(line, []); continue
+        letters = {l for l, _ in words}
+        g_codes = ['G' + t for l, t in words if l == 'G']
+        other_g = [g for g in g_codes if g not in _MOTION]
+        was_passthrough = passthrough
+        for g in other_g:
+            num = g[1:].lstrip('0') or '0'
+            if num in ('91', '93'):
+                passthrough = True
+            elif num in ('90', '94'):
+                passthrough = False
+            elif num in ('17', '18', '19'):
+                flush_run(); plane = int(num)
+        simple = (code.strip() and not other_g and code.strip() == stripped and 'M' not in letters
+                  and letters <= {'G', 'F', *AXES} and len(g_codes) <= 1)
+        if passthrough or was_passthrough or not simple:
+            flush_run(); emit(line, words)
+            if passthrough or was_passthrough or 'M' in letters or any(g.startswith('G53') for g in other_g):
+                state.__init__()
+            else:
+                for letter, text in words:
+                    if letter == 'G' and ('G' + text) in _MOTION:
+                        state.motion, state.motion_text = _MOTION['G' + text], 'G' + text
+                    elif letter == 'F':
+                        state.feed, state.feed_text = float(text), 'F' + text
+                    elif letter in AXES:
+                        state.pos[letter] = float(text); state.pos_text[letter] = letter + text
+            continue
+
+        start = dict(state.pos)
+        for letter, text in words:
+            if letter == 'G':
+                state.motion, state.motion_text = _MOTION['G' + text], 'G' + text
+            elif letter == 'F':
+                state.feed, state.feed_text = float(text), 'F' + text
+            else:
+                state.pos[letter] = float(text); state.pos_text[letter] = letter + text
+        fittable = (state.motion == 1 and state.feed is not None
+                    and all(a in start for a in state.pos))
+        if not fittable:
+            flush_run(); emit(line, words); continue
+        axes = tuple(a for a in AXES if a in state.pos)
+        if run is not None and run['feed'] == state.feed and run['axes'] == axes:
+            run['points'].append(dict(state.pos)); run['texts'].append(dict(state.pos_text)); run['lines'].append(line)
+        else:
+            flush_run()
+            run = {'feed': state.feed, 'feed_text': state.feed_text, 'motion_text': state.motion_text, 'axes': axes,
+                   'points': [start, dict(state.pos)], 'texts': [None, dict(state.pos_text)], 'lines': [line]}
+    flush_run()
+
+    stats = {
+        'lines_in': len(lines), 'lines_out': len(out),
+        'bytes_in': len("\n".join(lines).encode('utf-8')), 'bytes_out': len("\n".join(out).encode('utf-8')),
+        'merged_moves': counts['lines_replaced'], 'line_moves': counts['line_moves'], 'arcs': counts['arcs'],
+    }
+    return out, stats
+
+
+def format_size(num_bytes):
+    """Tamanho legível (B, KB, MB)."""
+    n = float(num_bytes)
+    for unit in ('B', 'KB', 'MB'):
+        if n < 1024.0 or unit == 'MB':
+            return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+        n /= 1024.0
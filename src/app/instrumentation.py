@@ -0,0 +1,296 @@
+"""Instrumentação de desempenho do pipeline de atualização.
+
+Mantém, por fase (ex.: `gerador:generate`, `grafico:temporal`), uma janela
+deslizante com as últimas durações medidas em milissegundos. A partir dela
+são calculados resumo (média, p50, p95, máximo) e histograma, exibidos no
+painel "Desempenho" e exportáveis em JSON/CSV.
+
+Opcionalmente captura um perfil cProfile de cada fase de atualização e
+guarda os mais recentes, permitindo inspecionar o mais lento.
+
+`StartupTimeline` registra a inicialização: etapas (importações, construção
+da janela e das figuras) com sua duração e marcos (splash, janela
+interativa, primeira pré-visualização) com o instante desde o início.
+"""
+import cProfile
+import csv
+import functools
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class Instrumentation:
+    def __init__(self, window=500, profile_keep=20):
+        self.enabled = True
+        self.profiling = False
+        self._window = int(window)
+        self._samples = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+        self._profiles = deque(maxlen=int(profile_keep))
+        self._profiling_active = False
+
+    # --- Coleta ---
+    def record(self, phase, elapsed_ms):
+        if not self.enabled:
+            return
+        with self._lock:
+            samples = self._samples.get(phase)
+            if samples is None:
+                samples = self._samples[phase] = deque(maxlen=self._window)
+            samples.append(float(elapsed_ms))
+            self._totals[phase] = self._totals.get(phase, 0) + 1
+
+    @contextmanager
+    def timer(self, phase):
+        """Mede o bloco `with` e registra a duração na fase indicada."""
+        if not self.enabled:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, (time.perf_counter() - t0) * 1000.0)
+
+    def timed(self, phase):
+        """Decorador equivalente a `timer`, para métodos inteiros."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                t0 = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(phase, (time.perf_counter() - t0) * 1000.0)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def profile(self, label):
+        """Captura cProfile do bloco quando `profiling` estiver ativo.
+
+        Capturas aninhadas ou em outras threads são ignoradas (o cProfile
+        admite apenas um perfilador ativo).
+        """
+        if not self.profiling or self._profiling_active or threading.current_thread() is not threading.main_thread():
+            yield
+            return
+        self._profiling_active = True
+        prof = cProfile.Profile()
+        t0 = time.perf_counter()
+        try:
+            prof.enable()
+        except ValueError:
+            self._profiling_active = False
+            yield
+            return
+        try:
+            yield
+        finally:
+            prof.disable()
+            self._profiling_active = False
+            elapsed = (time.perf_counter() - t0) * 1000.0
+            with self._lock:
+                self._profiles.append((elapsed, label, time.time(), prof))
+
+    # --- Consulta ---
+    def phases(self):
+        with self._lock:
+            return sorted(self._samples)
+
+    def samples(self, phase):
+        with self._lock:
+            return list(self._samples.get(phase, ()))
+
+    @staticmethod
+    def _percentile(sorted_vals, q):
+        if not sorted_vals:
+            return 0.0
+        k = (len(sorted_vals) - 1) * q
+        lo = int(k); hi = min(lo + 1, len(sorted_vals) - 1)
+        return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+    def summary(self):
+        """Resumo por fase: {fase: {count, total, mean_ms, p50_ms, p95_ms, max_ms, last_ms}}."""
+        with self._lock:
+            snapshot = {k: (list(v), self._totals.get(k, 0)) for k, v in self._samples.items()}
+        out = {}
+        for phase, (vals, total) in snapshot.items():
+            if not vals:
+                continue
+            ordered = sorted(vals)
+            out[phase] = {
+                'count': len(vals),
+                'total': total,
+                'mean_ms': sum(vals) / len(vals),
+                'p50_ms': self._percentile(ordered, 0.50),
+                'p95_ms': self._percentile(ordered, 0.95),
+                'max_ms': ordered[-1],
+                'last_ms': vals[-1],
+            }
+        return out
+
+    def histogram(self, phase, bins=10):
+        """Histograma das amostras da fase: (limites, contagens)."""
+        vals = self.samples(phase)
+        if not vals:
+            return [], []
+        lo, hi = min(vals), max(vals)
+        bins = max(1, int(bins))
+        if hi <= lo:
+            return [lo, hi], [len(vals)]
+        width = (hi - lo) / bins
+        edges = [lo + i * width for i in range(bins + 1)]
+        counts = [0] * bins
+        for v in vals:
+            counts[min(int((v - lo) / width), bins - 1)] += 1
+        return edges, counts
+
+    def sparkline(self, phase, bins=8):
+        """Histograma em caracteres de bloco, para exibição compacta."""
+        _, counts = self.histogram(phase, bins)
+        if not counts:
+            return ""
+        blocks = "▁▂▃▄▅▆▇█"
+        top = max(counts) or 1
+        return "".join(blocks[min(len(blocks) - 1, int(c * (len(blocks) - 1) / top))] for c in counts)
+
+    def slowest_profile(self):
+        """(ms, rótulo, timestamp, cProfile.Profile) da captura mais lenta retida, ou None."""
+        with self._lock:
+            if not self._profiles:
+                return None
+            return max(self._profiles, key=lambda p: p[0])
+
+    def profile_text(self, limit=40, sort='cumulative'):
+        entry = self.slowest_profile()
+        if entry is None:
+            return ""
+        elapsed, label, _, prof = entry
+        buf = io.StringIO()
+        buf.write(f"{label}: {elapsed:.1f} ms\n\n")
+        pstats.Stats(prof, stream=buf).sort_stats(sort).print_stats(limit)
+        return buf.getvalue()
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear(); self._totals.clear(); self._profiles.clear()
+
+    # --- Exportação ---
+    def export_json(self, path):
+        data = {
+            'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'summary': self.summary(),
+            'histograms': {p: dict(zip(('edges', 'counts'), self.histogram(p))) for p in self.phases()},
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def export_csv(self, path):
+        fields = ['phase', 'count', 'total', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms', 'last_ms']
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            w = csv.writer(f)
+            w.writerow(fields)
+            for phase, st in sorted(self.summary().items()):
+                w.writerow([phase] + [f"{st[k]:.3f}" if isinstance(st[k], float) else st[k] for k in fields[1:]])
+
+    def dump_profile(self, path):
+        """Salva a captura mais lenta em formato pstats (.prof)."""
+        entry = self.slowest_profile()
+        if entry is None:
+            return False
+        entry[3].dump_stats(path)
+        return True
+
+
+class StartupTimeline:
+    """Etapas e marcos da inicialização, em ms desde `origin` (perf_counter).
+
+    Sempre coleta (custa só um append); o relatório é impresso/gravado
+    apenas quando `enabled`. `output` é o caminho do JSON (opcional).
+    """
+
+    def __init__(self, origin=None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.enabled = False
+        self.output = None
+        self._steps = []
+        self._marks = {}
+        self._reported = False
+        self._lock = threading.Lock()
+
+    def configure(self, enabled=True, output=None, origin=None):
+        self.enabled = bool(enabled)
+        self.output = output
+        if origin is not None:
+            self.origin = origin
+
+    def _ms(self, t):
+        return (t - self.origin) * 1000.0
+
+    def record(self, label, t0, t1=None):
+        """Registra uma etapa que começou em `t0` (perf_counter) e terminou em `t1` (ou agora)."""
+        t1 = time.perf_counter() if t1 is None else t1
+        with self._lock:
+            self._steps.append({'step': label, 'start_ms': self._ms(t0), 'ms': (t1 - t0) * 1000.0})
+
+    @contextmanager
+    def step(self, label):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(label, t0)
+
+    def mark(self, label):
+        """Marca o instante de um evento; só o primeiro de cada rótulo conta."""
+        with self._lock:
+            if label not in self._marks:
+                self._marks[label] = {'ms': self._ms(time.perf_counter()), 'epoch': time.time()}
+
+    def has(self, *labels):
+        with self._lock:
+            return all(label in self._marks for label in labels)
+
+    def as_dict(self):
+        with self._lock:
+            return {'marks': {k: dict(v) for k, v in self._marks.items()},
+                    'steps': [dict(s) for s in self._steps]}
+
+    def report_text(self):
+        data = self.as_dict()
+        lines = ["Inicialização (ms desde o início):"]
+        for label, mark in sorted(data['marks'].items(), key=lambda kv: kv[1]['ms']):
+            lines.append(f"  {label:<28} {mark['ms']:9.1f}")
+        lines.append("Etapas (duração em ms):")
+        for st in sorted(data['steps'], key=lambda s: s['start_ms']):
+            lines.append(f"  {st['step']:<28} {st['ms']:9.1f}  (início {st['start_ms']:.1f})")
+        return "\n".join(lines)
+
+    def report(self):
+        """Imprime/grava o relatório uma única vez (se habilitado)."""
+        with self._lock:
+            if not self.enabled or self._reported:
+                return False
+            self._reported = True
+        # No executável sem console não há stdout: fica só o JSON
+        if sys.stdout is not None:
+            print(self.report_text(), flush=True)
+        if self.output:
+            with open(self.output, 'w', encoding='utf-8') as f:
+                json.dump(self.as_dict(), f, ensure_ascii=False, indent=2)
+        return True
+
+
+# Instâncias globais usadas pela aplicação
+perf = Instrumentation()
+startup = StartupTimeline()
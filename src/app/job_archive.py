@@ -0,0 +1,181 @@
+"""Pacote de trabalho (.tfmjob): procedimento, programa e tabela de movimentos num só arquivo.
+
+O pacote é um zip com:
+
+* `manifest.json` — formato/versão, resumo (linhas, camadas, tempo de ciclo)
+  e a lista de partes;
+* `procedure.json` — parâmetros do procedimento (o mesmo conteúdo do .json
+  salvo por "Salvar Procedimento");
+* `program.tap` — G-code, comprimido (deflate);
+* `moves/<coluna>.npy` — colunas da `MoveTable`, gravadas sem compressão para
+  poderem ser mapeadas em memória direto do zip (o início de cada movimento é
+  refeito a partir do fim do anterior);
+* `images/*.png` — imagens dos gráficos para o relatório (sem recompressão).
+
+`JobArchive` lê só o diretório do zip, o manifesto e o procedimento ao
+abrir; o programa é descomprimido em fluxo quando a pré-visualização pede
+e a tabela de movimentos é mapeada (`np.memmap`) sob demanda. O NumPy
+também só é importado quando a tabela é gravada ou lida: o módulo entra na
+abertura do app (biblioteca de procedimentos) sem pesar na inicialização.
+"""
+import hashlib
+import io
+import json
+import os
+import struct
+import zipfile
+from datetime import datetime
+
+from tap_writer import atomic_write
+
+FORMAT = 'tfm-job'
+VERSION = 1
+EXTENSION = '.tfmjob'
+# `start` não é gravado: é `end` deslocado de uma linha (começa na origem), como em `toolpath`
+_MOVE_COLUMNS = ('end', 'feed', 'motion', 'layer', 'line', 'exact_stop', 'dwell_s', 'arc_len')
+_BATCH_LINES = 8192
+
+
+def save_job(path, params, gcode_lines, table=None, images=None, summary=None):
+    """Grava o pacote de forma atômica. `gcode_lines` pode ser um iterador; `images` é {nome: bytes PNG}."""
+    images = images or {}
+
+    def body(f):
+        with zipfile.ZipFile(f, 'w', allowZip64=True) as zf:
+            zf.writestr('procedure.json', json.dumps(params, ensure_ascii=False, indent=4, default=str),
+                        compress_type=zipfile.ZIP_DEFLATED)
+            digest = hashlib.sha256()
+            count = size = 0
+            info = zipfile.ZipInfo('program.tap', date_time=datetime.now().timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with zf.open(info, 'w', force_zip64=True) as out:
+                batch = []
+                for line in gcode_lines:
+                    batch.append(line)
+                    if len(batch) >= _BATCH_LINES:
+                        data = (("\n" if count else "") + "\n".join(batch)).encode('utf-8')
+                        count += len(batch); batch = []
+                        digest.update(data); out.write(data); size += len(data)
+                if batch:
+                    data = (("\n" if count else "") + "\n".join(batch)).encode('utf-8')
+                    count += len(batch)
+                    digest.update(data); out.write(data); size += len(data)
+            moves = None
+            if table is not None:
+                import numpy as np
+                for column in _MOVE_COLUMNS:
+                    with zf.open(f"moves/{column}.npy", 'w', force_zip64=True) as out:
+                        np.lib.format.write_array(out, np.ascontiguousarray(getattr(table, column)), allow_pickle=False)
+                moves = {'axes': list(table.axes), 'rows': len(table)}
+            for name, data in images.items():
+                zf.writestr(f"images/{name}", data, compress_type=zipfile.ZIP_STORED)
+            manifest = {
+                'format': FORMAT, 'version': VERSION,
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'name': params.get('nome_procedimento', ''),
+                'gcode': {'lines': count, 'bytes': size, 'sha256': digest.hexdigest()},
+                'moves': moves,
+                'images': sorted(images),
+                'summary': summary or {},
+            }
+            zf.writestr('manifest.json', json.dumps(manifest, ensure_ascii=False, indent=2),
+                        compress_type=zipfile.ZIP_DEFLATED)
+        return manifest
+
+    return atomic_write(path, body)
+
+
+class JobArchive:
+    """Pacote aberto para leitura: metadados imediatos, partes pesadas sob demanda."""
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self._zip = zipfile.ZipFile(self.path, 'r')
+        try:
+            self.manifest = json.loads(self._zip.read('manifest.json').decode('utf-8'))
+            if self.manifest.get('format') != FORMAT:
+                raise ValueError("Arquivo não é um pacote de trabalho TFM")
+            if int(self.manifest.get('version', 0)) > VERSION:
+                raise ValueError(f"Versão do pacote não suportada: {self.manifest.get('version')}")
+            self.params = json.loads(self._zip.read('procedure.json').decode('utf-8'))
+        except Exception:
+            self._zip.close()
+            raise
+        self._table = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._table = None
+        self._zip.close()
+
+    def gcode_lines(self):
+        """Linhas do programa, descomprimidas em fluxo."""
+        with self._zip.open('program.tap') as raw:
+            for line in io.TextIOWrapper(raw, encoding='utf-8', newline=''):
+                yield line[:-1] if line.endswith('\n') else line
+
+    def gcode_text(self):
+        return self._zip.read('program.tap').decode('utf-8')
+
+    def _member_data_offset(self, info):
+        """Posição no arquivo do início dos dados de um membro (cabeçalho local tem tamanho variável)."""
+        with open(self.path, 'rb') as f:
+            f.seek(info.header_offset)
+            header = f.read(30)
+        if header[:4] != b'PK\x03\x04':
+            raise ValueError(f"Cabeçalho local inválido para {info.filename}")
+        name_len, extra_len = struct.unpack('<HH', header[26:30])
+        return info.header_offset + 30 + name_len + extra_len
+
+    def _load_column(self, name):
+        import numpy as np
+        info = self._zip.getinfo(f"moves/{name}.npy")
+        with self._zip.open(info) as f:
+            version = np.lib.format.read_magic(f)
+            read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+            shape, fortran, dtype = read_header(f)
+            header_len = f.tell()
+        if info.compress_type != zipfile.ZIP_STORED or int(np.prod(shape)) == 0:
+            with self._zip.open(info) as f:
+                return np.lib.format.read_array(io.BytesIO(f.read()))
+        offset = self._member_data_offset(info) + header_len
+        return np.memmap(self.path, dtype=dtype, mode='r', offset=offset, shape=shape,
+                         order='F' if fortran else 'C')
+
+    def move_table(self):
+        """`MoveTable` gravada no pacote (colunas mapeadas em memória), ou None se não houver."""
+        if self._table is None and self.manifest.get('moves'):
+            import numpy as np
+            from toolpath import MoveTable
+            columns = {name: self._load_column(name) for name in _MOVE_COLUMNS}
+            end = columns['end']
+            start = np.zeros(end.shape, dtype=end.dtype)
+            if len(end):
+                start[1:] = end[:-1]
+            self._table = MoveTable(self.manifest['moves']['axes'], start=start, **columns)
+        return self._table
+
+    def detach_table(self):
+        """Copia a tabela de movimentos para a memória e fecha o pacote.
+
+        Usado antes de gravar sobre o próprio arquivo: no Windows um arquivo
+        aberto ou mapeado em memória não pode ser substituído (`os.replace`).
+        """
+        import numpy as np
+        from toolpath import MoveTable
+        table = self.move_table()
+        if table is not None:
+            table = MoveTable(table.axes, *(np.array(getattr(table, name)) for name in ('start',) + _MOVE_COLUMNS))
+        self.close()
+        return table
+
+    def image_names(self):
+        return list(self.manifest.get('images', []))
+
+    def read_image(self, name):
+        return self._zip.read(f"images/{name}")
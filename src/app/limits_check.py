@@ -0,0 +1,103 @@
+"""Verificação do programa gerado contra os limites da máquina.
+
+Roda sobre a `MoveTable` (colunas NumPy) numa única passagem, barata o
+bastante para acompanhar cada atualização da pré-visualização:
+
+* curso: posição final de cada movimento fora do envelope do eixo (limites
+  de software do perfil do Mach3, ou um envelope informado);
+* avanço por eixo: componente do F no eixo (F·|Δeixo|/L, em unidades/min;
+  graus/min no A) acima da velocidade máxima do motor;
+* aceleração por eixo: variação da velocidade do eixo entre dois movimentos
+  de avanço consecutivos, dividida pelo tempo médio dos dois segmentos, acima
+  da aceleração do motor. É a aceleração que o caminho exige em velocidade
+  constante; movimentos em parada exata (G61) não entram.
+
+Avanço e aceleração só são conferidos nos eixos com sintonia no perfil
+(`tuned`/`accel_tuned`). Arcos usam a corda. Os números de linha retornados
+começam em 1, como no visualizador de G-code.
+"""
+import numpy as np
+
+from mach3_profile import default_machine
+from toolpath import MOTION_BARRIER
+
+# Folga relativa para arredondamentos da formatação (3 casas / F com 1 casa)
+_TOLERANCE = 1e-6
+_LABELS = {'travel': "curso", 'feed': "avanço", 'accel': "aceleração"}
+
+
+def check_limits(table, machine=None, envelope=None):
+    """Confere curso, avanço e aceleração por eixo; retorna {'ok', 'lines', 'checks'}.
+
+    `envelope` ({eixo: (mín, máx)}) substitui os limites de software do perfil.
+    `checks` mapeia 'travel:X', 'feed:A', 'accel:A'... para as linhas (1-based)
+    em violação; `lines` é a união ordenada.
+    """
+    machine = machine or default_machine()
+    envelope = envelope or {}
+    checks = {}
+    n = len(table)
+    if n == 0:
+        return {'ok': True, 'lines': [], 'checks': checks}
+
+    line_no = table.line
+    moving = table.motion != MOTION_BARRIER
+    any_bad = np.zeros(n, dtype=bool)
+
+    def record(key, bad):
+        if bad.any():
+            any_bad[:] |= bad
+            checks[key] = bad
+
+    for i, axis in enumerate(table.axes):
+        lo, hi = envelope.get(axis, machine.soft_limits(axis))
+        if lo is None and hi is None:
+            continue
+        col = table.end[:, i]
+        bad = np.zeros(n, dtype=bool)
+        if lo is not None:
+            bad |= col < lo - _TOLERANCE
+        if hi is not None:
+            bad |= col > hi + _TOLERANCE
+        record(f"travel:{axis}", bad & moving)
+
+    tuned = [(i, a) for i, a in enumerate(table.axes) if machine.axis(a).get('tuned')]
+    accel_tuned = [(i, a) for i, a in enumerate(table.axes) if machine.axis(a).get('accel_tuned')]
+    if tuned or accel_tuned:
+        delta = table.end - table.start
+        chord = np.sqrt(np.einsum('ij,ij->i', delta, delta))
+        L = np.where(np.isnan(table.arc_len), chord, table.arc_len)
+        feed = table.feed
+        active = (table.motion > 0) & (L > 0) & (feed > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Fator F/corda: velocidade do eixo (unidades/min) = fator·Δeixo
+            scale = np.where(active & (chord > 0), feed / chord, 0.0)
+            # Duração do segmento (s)
+            duration = np.where(active, 60.0 * L / feed, 0.0)
+        for i, axis in tuned:
+            record(f"feed:{axis}", np.abs(scale * delta[:, i]) > machine.velocity(axis) * (1 + _TOLERANCE))
+        if accel_tuned and n > 1:
+            # Pares de movimentos de avanço vizinhos, fora de parada exata
+            free = active & ~table.exact_stop.astype(bool)
+            pair = free[:-1] & free[1:]
+            dt = 0.5 * (duration[:-1] + duration[1:])
+            for i, axis in accel_tuned:
+                speed = scale * delta[:, i]
+                bad = np.zeros(n, dtype=bool)
+                bad[1:] = pair & (np.abs(np.diff(speed)) > 60.0 * machine.acceleration(axis) * dt * (1 + _TOLERANCE))
+                record(f"accel:{axis}", bad)
+
+    return {'ok': not checks, 'lines': (line_no[any_bad].astype(np.int64) + 1).tolist(),
+            'checks': {k: (line_no[v].astype(np.int64) + 1).tolist() for k, v in checks.items()}}
+
+
+def summarize(report, max_lines=8):
+    """Texto curto para notificações/confirmações (vazio se não houver violações)."""
+    if not report or report.get('ok', True):
+        return ""
+    parts = []
+    for key, lines in report['checks'].items():
+        kind, axis = key.split(':', 1)
+        shown = ", ".join(str(l) for l in lines[:max_lines]) + (" …" if len(lines) > max_lines else "")
+        parts.append(f"{_LABELS.get(kind, kind)} {axis}: {len(lines)} linha(s) ({shown})")
+    return "Limites da máquina excedidos — " + "; ".join(parts)
@@ -0,0 +1,194 @@
+"""Modelo da máquina a partir do perfil XML do Mach3.
+
+O perfil (`Mach3Mill.xml` ou `<perfil>.xml` na pasta do Mach3) é um XML de
+uma linha com centenas de preferências. `MachineModel` guarda o que o
+gerador e os estimadores usam: sintonia dos motores (velocidade em
+unidades/min e aceleração em unidades/s²), mapeamento eixo -> motor, limites
+de software (M#Min/M#Max), LookAhead e o modo de velocidade constante.
+Quando a sintonia não está no arquivo, valem os padrões abaixo.
+
+`load_mach3_profile` interpreta cada arquivo uma única vez: o resultado fica
+em cache por caminho e só é refeito quando o conteúdo muda (o mtime/tamanho
+decide se é preciso conferir o hash; arquivo apenas "tocado" não é relido).
+"""
+import hashlib
+import os
+import threading
+import xml.etree.ElementTree as ET
+
+AXIS_NAMES = ('X', 'Y', 'Z', 'A', 'B', 'C')
+# Padrões conservadores quando o perfil não traz a sintonia dos motores
+DEFAULT_VELOCITY = 1000.0      # unidades/min
+DEFAULT_ACCELERATION = 100.0   # unidades/s²
+DEFAULT_LOOKAHEAD = 20
+
+_VELOCITY_TAGS = ('Velocity', 'Vel', 'MaxVel')
+_ACCEL_TAGS = ('Acceleration', 'Accel', 'Acc')
+_STEPS_TAGS = ('Steps', 'StepsPer', 'StepsPerUnit')
+_CV_TAGS = ('ConstantVelocity', 'CVMode', 'CV')
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class MachineModel:
+    """Limites e ajustes de trajetória da máquina (um perfil do Mach3 ou os padrões)."""
+
+    def __init__(self, axes, name='padrão', path=None, lookahead=DEFAULT_LOOKAHEAD, cv_mode=True,
+                 cv_angle_limit=None, rapid_feed=DEFAULT_VELOCITY, soft_limits_enabled=False, digest=None):
+        self.axes = axes
+        self.name = name
+        self.path = path
+        self.lookahead = int(lookahead)
+        self.cv_mode = bool(cv_mode)
+        self.cv_angle_limit = cv_angle_limit
+        self.rapid_feed = rapid_feed
+        self.soft_limits_enabled = bool(soft_limits_enabled)
+        self.digest = digest
+
+    @classmethod
+    def default(cls):
+        """Máquina sem perfil: velocidade/aceleração padrão em todos os eixos, sem limites de software."""
+        axes = {name: {'motor': i, 'velocity': DEFAULT_VELOCITY, 'acceleration': DEFAULT_ACCELERATION,
+                       'steps_per_unit': None, 'angular': name in ('A', 'B', 'C'), 'tuned': False, 'accel_tuned': False,
+                       'soft_min': None, 'soft_max': None}
+                for i, name in enumerate(AXIS_NAMES)}
+        return cls(axes)
+
+    def axis(self, letter):
+        return self.axes.get(letter, {})
+
+    def velocity(self, letter):
+        """Velocidade máxima do eixo (unidades/min)."""
+        return self.axis(letter).get('velocity', DEFAULT_VELOCITY)
+
+    def acceleration(self, letter):
+        """Aceleração máxima do eixo (unidades/s²)."""
+        return self.axis(letter).get('acceleration', DEFAULT_ACCELERATION)
+
+    def max_feed(self, letters):
+        """Maior F que todos os eixos do movimento suportam, ou None se nenhum tem sintonia no perfil.
+
+        Só eixos com sintonia lida do perfil limitam o avanço: os padrões
+        servem à estimativa de tempo, não para alterar o programa gerado.
+        """
+        limits = [self.velocity(l) for l in letters if self.axis(l).get('tuned')]
+        return min(limits) if limits else None
+
+    def clamp_feed(self, feed, letters):
+        limit = self.max_feed(letters)
+        return feed if limit is None or feed is None or feed <= limit else limit
+
+    def soft_limits(self, letter):
+        """(mínimo, máximo) do eixo quando os limites de software estão ativos; senão (None, None)."""
+        if not self.soft_limits_enabled:
+            return None, None
+        axis = self.axis(letter)
+        return axis.get('soft_min'), axis.get('soft_max')
+
+    def to_dict(self):
+        return {'name': self.name, 'path': self.path, 'lookahead': self.lookahead, 'cv_mode': self.cv_mode,
+                'cv_angle_limit': self.cv_angle_limit, 'rapid_feed': self.rapid_feed,
+                'soft_limits_enabled': self.soft_limits_enabled, 'axes': {k: dict(v) for k, v in self.axes.items()}}
+
+    def __repr__(self):
+        return f"MachineModel({self.name!r}, lookahead={self.lookahead}, cv={self.cv_mode})"
+
+
+def _number(text, default=None):
+    try:
+        return float(str(text).strip())
+    except (TypeError, ValueError):
+        return default
+
+
+def _motor_value(prefs, motors, index, tags):
+    """Valor da sintonia do motor: <MotorN><Tag> ou <MotorNTag>."""
+    nested = motors.get(index, {})
+    for tag in tags:
+        value = _number(nested.get(tag))
+        if value is None:
+            value = _number(prefs.get(f"Motor{index}{tag}"))
+        if value is not None:
+            return value
+    return None
+
+
+def _parse_root(root, path=None, digest=None):
+    pref_node = root.find('Preferences')
+    if pref_node is None:
+        pref_node = root
+    prefs = {}
+    motors = {}
+    for child in pref_node:
+        if len(child):
+            if child.tag.startswith('Motor') and child.tag[5:].isdigit():
+                motors[int(child.tag[5:])] = {g.tag: g.text for g in child}
+            continue
+        prefs[child.tag] = child.text
+
+    rapid = _number(prefs.get('RapidFeed'), DEFAULT_VELOCITY) or DEFAULT_VELOCITY
+    axes = {}
+    for i, name in enumerate(AXIS_NAMES):
+        motor = int(_number(prefs.get(f"AxisToMotor{i}"), i))
+        velocity = _motor_value(prefs, motors, motor, _VELOCITY_TAGS)
+        accel = _motor_value(prefs, motors, motor, _ACCEL_TAGS)
+        axes[name] = {
+            'motor': motor,
+            'velocity': velocity if velocity and velocity > 0 else rapid,
+            'acceleration': accel if accel and accel > 0 else DEFAULT_ACCELERATION,
+            'steps_per_unit': _motor_value(prefs, motors, motor, _STEPS_TAGS),
+            'angular': name in ('A', 'B', 'C') and _number(prefs.get(f"{name}Angular"), 1) != 0,
+            'tuned': bool(velocity and velocity > 0),
+            'accel_tuned': bool(accel and accel > 0),
+            # Limites de software do Mach3 são por eixo (M0 = X, M1 = Y, ...)
+            'soft_min': _number(prefs.get(f"M{i}Min")),
+            'soft_max': _number(prefs.get(f"M{i}Max")),
+        }
+
+    cv_value = next((prefs[t] for t in _CV_TAGS if t in prefs), None)
+    use_angle = _number(prefs.get('CVUseAngle'), 0) != 0
+    return MachineModel(
+        axes,
+        name=prefs.get('Profile') or (os.path.splitext(os.path.basename(path))[0] if path else 'padrão'),
+        path=path,
+        lookahead=int(_number(prefs.get('LookAhead'), DEFAULT_LOOKAHEAD) or DEFAULT_LOOKAHEAD),
+        cv_mode=True if cv_value is None else _number(cv_value, 1) != 0,
+        cv_angle_limit=_number(prefs.get('CVDegrees'), None) if use_angle else None,
+        rapid_feed=rapid,
+        soft_limits_enabled=_number(prefs.get('SoftLimit'), 0) != 0,
+        digest=digest,
+    )
+
+
+def parse_mach3_profile(path):
+    """Lê o XML do perfil e devolve o `MachineModel` (sem cache)."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return _parse_root(ET.fromstring(data), os.path.abspath(path), hashlib.sha1(data).hexdigest())
+
+
+def load_mach3_profile(path):
+    """`MachineModel` do perfil, em cache por caminho e conteúdo do arquivo."""
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        hit = _cache.get(path)
+    if hit and hit[0] == stamp:
+        return hit[2]
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()
+    if hit and hit[1] == digest:
+        model = hit[2]
+    else:
+        model = _parse_root(ET.fromstring(data), path, digest)
+    with _cache_lock:
+        _cache[path] = (stamp, digest, model)
+    return model
+
+
+def default_machine():
+    """Modelo padrão (sem perfil do Mach3 disponível)."""
+    return MachineModel.default()
@@ -0,0 +1,393 @@
+"""Índice da biblioteca de procedimentos (SQLite local do usuário, um por pasta).
+
+Cada `.json` (Salvar Procedimento) e `.tfmjob` (Salvar Trabalho) da pasta,
+inclusive em subpastas, vira uma linha com os parâmetros de busca (nome, OS,
+diâmetro, comprimento, pó, modo, camadas) e o tempo/custo calculados por
+`process_estimates` sobre os totais do programa em forma fechada
+(`program_estimate`), os mesmos da janela e dos relatórios. `refresh` é incremental: compara mtime e tamanho com o
+que está no índice e só abre os arquivos novos ou alterados; os removidos
+saem do índice. Se os custos ou as fórmulas da configuração (ou a versão do
+estimador) mudarem, tudo é recalculado uma vez.
+
+As consultas (texto, faixa de diâmetro, pó, modo, ordenação) rodam só no
+SQLite, sem abrir nenhum procedimento. Cada operação usa a sua conexão, de
+modo que a atualização pode rodar numa thread enquanto a janela consulta.
+
+A pasta de procedimentos costuma ser compartilhada na rede por vários
+engenheiros, e o SQLite em modo WAL (memória compartilhada de um só
+computador) não funciona em sistemas de arquivos de rede. Por isso o índice
+não fica na pasta: cada usuário tem o seu, no cache local, identificado pelo
+caminho da pasta.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+from job_archive import EXTENSION as JOB_EXTENSION, JobArchive
+from process_estimates import estimate_process
+
+SCHEMA_VERSION = 2
+EXTENSIONS = ('.json', JOB_EXTENSION)
+# Colunas aceitas em `order_by` (nome na consulta -> coluna)
+SORT_COLUMNS = {
+    'name': 'name COLLATE NOCASE', 'ordem_servico': 'ordem_servico COLLATE NOCASE', 'diametro': 'diametro',
+    'comprimento': 'comprimento', 'powder': 'powder COLLATE NOCASE', 'welding_mode': 'welding_mode',
+    'num_camadas': 'num_camadas', 'time_min': 'time_min', 'cycle_time_s': 'cycle_time_s',
+    'total_cost': 'total_cost', 'mtime': 'mtime_ns', 'path': 'path',
+}
+_FIELDS = ('kind', 'name', 'ordem_servico', 'diametro', 'comprimento', 'powder', 'welding_mode', 'oscillation_type',
+           'num_camadas', 'time_min', 'cycle_time_s', 'powder_kg', 'total_cost', 'notes', 'error')
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS procedures (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    kind TEXT, name TEXT, ordem_servico TEXT,
+    diametro REAL, comprimento REAL, powder TEXT, welding_mode TEXT, oscillation_type TEXT,
+    num_camadas INTEGER, time_min REAL, cycle_time_s REAL, powder_kg REAL, total_cost REAL,
+    notes TEXT, error TEXT, indexed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_proc_diametro ON procedures (diametro);
+CREATE INDEX IF NOT EXISTS idx_proc_powder ON procedures (powder);
+CREATE INDEX IF NOT EXISTS idx_proc_os ON procedures (ordem_servico);
+CREATE INDEX IF NOT EXISTS idx_proc_name ON procedures (name COLLATE NOCASE);
+"""
+
+
+def local_folder_name(folder):
+    """Nome da pasta no cache local do usuário: `<nome>-<hash do caminho>` (pastas homônimas não se misturam)."""
+    folder = os.path.abspath(folder).rstrip(os.sep)
+    key = hashlib.sha1(os.path.normcase(folder).encode('utf-8')).hexdigest()[:16]
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", os.path.basename(folder)) or 'procedimentos'
+    return f"{name}-{key}"
+
+
+def default_index_path(folder):
+    """Índice da pasta no cache local do usuário: `<cache>/library/<nome>-<hash do caminho>.index.sqlite`."""
+    from updater import default_cache_dir
+    return os.path.join(default_cache_dir(), 'library', f"{local_folder_name(folder)}.index.sqlite")
+
+
+def config_digest(config):
+    """Hash do que muda tempo/custo calculados: custos e fórmulas da configuração e a versão do estimador."""
+    from program_estimate import ESTIMATOR_VERSION
+    relevant = {'costs': config.get('costs', {}), 'formulas': config.get('formulas', {}), 'estimator': ESTIMATOR_VERSION}
+    return hashlib.sha1(json.dumps(relevant, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def read_procedure(path):
+    """(parâmetros, extras) de um arquivo da biblioteca; extras traz o tempo de ciclo simulado dos pacotes."""
+    if path.lower().endswith(JOB_EXTENSION):
+        with JobArchive(path) as job:
+            summary = job.manifest.get('summary', {}) or {}
+            return dict(job.params), {'kind': 'job', 'cycle_time_s': _number(summary.get('cycle_time_s'))}
+    with open(path, 'r', encoding='utf-8') as f:
+        params = json.load(f)
+    if not isinstance(params, dict):
+        raise ValueError("Arquivo não contém um procedimento")
+    return params, {'kind': 'procedure', 'cycle_time_s': None}
+
+
+# Valor inicial de cada campo da janela, usado quando o arquivo não traz o campo
+FIELD_DEFAULTS = {
+    'nome_procedimento': 'Novo Procedimento', 'diametro': 50.0, 'comprimento_revestir': 200.0,
+    'largura_cordao': 8.0, 'sobreposicao': 40.0, 'velocidade_de_deposicao': 120.0,
+    'velocidade_oscilacao_mm_min': 1000.0, 'afastamento_tocha': 12.0, 'lead_in': 5.0, 'lead_out': 5.0,
+    'direcao_soldagem': 'esquerda_direita', 'sentido_rotacao': 'horaria', 'corrente_arco': 180.0,
+    'vazao_gas': 15.0, 'alim_po': 50.0, 'preaquecimento': 100.0, 'num_camadas': 1, 'espessura_camada': 1.5,
+    'ordem_servico': '', 'compact_gcode': False, 'torch_retract_on_ignite': True, 'modal_compaction': False,
+    'arc_fitting': False, 'arc_chord_tol': 0.01, 'welding_mode': 'espiral', 'oscilacao_comprimento': 10.0,
+    'deslocamento_angular_perc': 50.0, 'oscillation_type': 'linear', 'osc_test_gran_x': 0.5,
+    'taxa_deposicao_g_h': 700.0, 'notes': '',
+}
+# Nomes antigos dos campos -> nome atual (o atual prevalece se o arquivo tiver os dois)
+_LEGACY_FIELDS = {'d_inicial': 'diametro', 'taxa_de_deposicao': 'velocidade_de_deposicao'}
+# Modos de oscilação antigos -> tipo da oscilação unificada
+_LEGACY_MODES = {'oscilacao_linear': 'linear', 'oscilacao_quadrada': 'quadrada'}
+# Valores aceitos nas listas da janela (o primeiro é o padrão)
+_CHOICES = {
+    'direcao_soldagem': ('esquerda_direita', 'direita_esquerda'),
+    'sentido_rotacao': ('horaria', 'antihoraria'),
+    'oscillation_type': ('linear', 'quadrada', 'quadrada_continua'),
+}
+_TEXT_FIELDS = ('nome_procedimento', 'ordem_servico', 'notes', 'powder_name')
+_BOOL_FIELDS = ('compact_gcode', 'torch_retract_on_ignite', 'modal_compaction', 'arc_fitting')
+_FLOAT_FIELDS = ('diametro', 'comprimento_revestir', 'largura_cordao', 'sobreposicao', 'velocidade_de_deposicao',
+                 'velocidade_oscilacao_mm_min', 'afastamento_tocha', 'lead_in', 'lead_out', 'corrente_arco',
+                 'vazao_gas', 'alim_po', 'preaquecimento', 'espessura_camada')
+
+
+def procedure_fields(data, config):
+    """Campos da janela para um procedimento salvo: nomes e modos antigos convertidos, ausentes com o valor inicial.
+
+    Os números ficam como vieram (texto nos procedimentos antigos); quem converte é `procedure_params`.
+    """
+    fields = dict(FIELD_DEFAULTS, powder_name=config.get('active_powder') or '')
+    for old, new in _LEGACY_FIELDS.items():
+        if data.get(old) is not None and data.get(new) is None:
+            fields[new] = data[old]
+    fields.update({key: data[key] for key in fields if data.get(key) is not None})
+    mode = fields['welding_mode']
+    if mode in _LEGACY_MODES:
+        fields['welding_mode'], fields['oscillation_type'] = 'oscilacao', _LEGACY_MODES[mode]
+    elif mode != 'oscilacao':
+        fields['welding_mode'] = 'espiral'
+    for key, choices in _CHOICES.items():
+        if fields[key] not in choices:
+            fields[key] = choices[0]
+    for key in _TEXT_FIELDS:
+        fields[key] = str(fields[key])
+    for key in _BOOL_FIELDS:
+        fields[key] = bool(fields[key])
+    return fields
+
+
+def procedure_params(data, config):
+    """Parâmetros de geração a partir dos campos da janela ou de um arquivo salvo (None se inválidos).
+
+    A janela (`_get_current_params`) e a pré-geração passam por aqui, de modo
+    que um procedimento aberto chega à mesma chave do programa pré-gerado.
+    """
+    fields = procedure_fields(data, config)
+
+    def number(key, kind=float, empty=0.0):
+        text = str(fields[key])
+        return kind(text) if text else empty
+
+    params = {'nome_procedimento': fields['nome_procedimento'], 'app_title': "TFM G-Code Generator"}
+    try:
+        for key in _FLOAT_FIELDS:
+            params[key] = number(key)
+        params['num_camadas'] = number('num_camadas', int, 1)
+        if fields['welding_mode'] == 'oscilacao':
+            params['oscilacao_comprimento'] = number('oscilacao_comprimento')
+            params['deslocamento_angular_perc'] = number('deslocamento_angular_perc')
+    except ValueError:
+        return None
+    # Compatibilidade: taxa_de_deposicao (nome antigo) e velocidade do eixo A iguais à velocidade de deposição
+    params['taxa_de_deposicao'] = params['velocidade_a_mm_min'] = params['velocidade_de_deposicao']
+    params['direcao_soldagem'] = fields['direcao_soldagem']
+    params['sentido_rotacao'] = fields['sentido_rotacao']
+    params['ordem_servico'] = fields['ordem_servico']
+
+    # Fator de pó e custo: do pó do procedimento; sem ele, do ativo nas Configurações
+    costs = config.get('costs', {})
+    params['powder_name'] = fields['powder_name'] or config.get('active_powder')
+    powder_factor = None; powder_cost = None
+    for p in config.get('powders', []):
+        if p.get('name') == params['powder_name']:
+            try:
+                powder_factor = float(p.get('density_factor_g_mm2', 0.0))
+            except (TypeError, ValueError):
+                powder_factor = 0.0
+            try:
+                powder_cost = float(p.get('cost_brl_kg', costs.get('powder_brl_kg', 0.0)))
+            except (TypeError, ValueError):
+                powder_cost = costs.get('powder_brl_kg', 0.0)
+            break
+    params['powder_factor'] = 0.16 if powder_factor is None else powder_factor
+    params['powder_cost_brl_kg'] = costs.get('powder_brl_kg', 0.0) if powder_cost is None else powder_cost
+
+    for key in _BOOL_FIELDS:
+        params[key] = fields[key]
+    try:
+        params['arc_chord_tol'] = number('arc_chord_tol', empty=0.01)
+    except ValueError:
+        params['arc_chord_tol'] = 0.01
+    params['welding_mode'] = fields['welding_mode']; params['tipo_peca'] = 'cilindrico'
+    if fields['welding_mode'] == 'espiral':
+        params['diametro_inicial'] = params['diametro_final'] = params['diametro']
+    else:
+        params['oscillation_type'] = fields['oscillation_type']
+        params['oscilacao_enabled'] = True
+        # Granularidade X da Quadrada Contínua (vazia ou inválida: 0.5)
+        try:
+            params['osc_test_gran_x'] = float(str(fields['osc_test_gran_x']))
+        except ValueError:
+            params['osc_test_gran_x'] = 0.5
+    # Taxa de deposição por massa (g/h) para uso em fórmulas
+    try:
+        params['taxa_deposicao_g_h'] = number('taxa_deposicao_g_h')
+    except ValueError:
+        params['taxa_deposicao_g_h'] = 0.0
+    params['notes'] = fields['notes'].strip()
+
+    if params['largura_cordao'] <= 0 or params['velocidade_de_deposicao'] <= 0: return None
+    if params['sobreposicao'] >= 100 or params['sobreposicao'] < 0: return None
+    if params['num_camadas'] < 1: return None
+    if params['welding_mode'] == 'oscilacao':
+        if params['oscilacao_comprimento'] <= 0: return None
+        if params['deslocamento_angular_perc'] <= 0 or params['deslocamento_angular_perc'] > 100: return None
+    return params
+
+
+def describe_procedure(path, config):
+    """Linha do índice para um arquivo (erros de leitura/cálculo ficam em 'error')."""
+    row = dict.fromkeys(_FIELDS)
+    row['name'] = os.path.splitext(os.path.basename(path))[0]
+    try:
+        params, extras = read_procedure(path)
+    except Exception as e:
+        row['kind'] = 'job' if path.lower().endswith(JOB_EXTENSION) else 'procedure'
+        row['error'] = str(e) or type(e).__name__
+        return row
+    row.update(extras)
+    row['name'] = str(params.get('nome_procedimento') or row['name'])
+    row['ordem_servico'] = str(params.get('ordem_servico') or '')
+    row['diametro'] = _number(params.get('diametro'))
+    row['comprimento'] = _number(params.get('comprimento_revestir'))
+    row['powder'] = params.get('powder_name') or ''
+    row['welding_mode'] = params.get('welding_mode', 'espiral')
+    row['oscillation_type'] = params.get('oscillation_type')
+    camadas = _number(params.get('num_camadas'))
+    row['num_camadas'] = int(camadas) if camadas is not None else None
+    row['notes'] = params.get('notes') or ''
+    try:
+        # Mesmos totais da janela e dos relatórios: programa em forma fechada, sem gerar o G-code
+        from program_estimate import estimate_program
+        from toolpath_view import normalize_params
+        normalized = normalize_params(params)
+        estimate = estimate_process(normalized, config, stats=estimate_program(normalized))
+    except Exception as e:
+        estimate = None
+        row['error'] = f"Cálculo: {e}"
+    if estimate is not None:
+        row['time_min'] = estimate['time_min']
+        row['powder_kg'] = estimate['powder_kg']
+        row['total_cost'] = estimate['total_cost']
+    return row
+
+
+def scan_folder(folder):
+    """{caminho relativo: (mtime_ns, tamanho)} dos procedimentos/pacotes da pasta e subpastas (ocultos ficam de fora)."""
+    folder = os.path.abspath(folder)
+    found = {}
+    stack = [folder]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = list(os.scandir(current))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith('.'):
+                        stack.append(entry.path)
+                elif entry.name.lower().endswith(EXTENSIONS) and not entry.name.startswith('.'):
+                    st = entry.stat()
+                    found[os.path.relpath(entry.path, folder)] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+    return found
+
+
+class ProcedureIndex:
+    """Índice SQLite de uma pasta de procedimentos."""
+
+    def __init__(self, folder, db_path=None):
+        self.folder = os.path.abspath(folder)
+        self.db_path = db_path or default_index_path(self.folder)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                conn.executescript("DROP TABLE IF EXISTS procedures; DROP TABLE IF EXISTS meta;")
+            conn.executescript(_SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")
+        return closing(conn)
+
+    def scan(self):
+        """{caminho relativo: (mtime_ns, tamanho)} dos arquivos da pasta."""
+        return scan_folder(self.folder)
+
+    def refresh(self, config):
+        """Atualiza o índice e retorna {'scanned', 'added', 'updated', 'removed', 'unchanged', 'errors'}."""
+        stats = {'scanned': 0, 'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0, 'errors': 0}
+        found = self.scan() if os.path.isdir(self.folder) else {}
+        stats['scanned'] = len(found)
+        digest = config_digest(config)
+        with self._connect() as conn:
+            known = {r['path']: (r['mtime_ns'], r['size']) for r in conn.execute("SELECT path, mtime_ns, size FROM procedures")}
+            stored = conn.execute("SELECT value FROM meta WHERE key = 'config_digest'").fetchone()
+            # Custos/fórmulas diferentes: tempos e custos gravados não valem mais
+            stale_config = stored is None or stored['value'] != digest
+            now = datetime.now().isoformat(timespec='seconds')
+            rows = []
+            for rel, stamp in found.items():
+                if not stale_config and known.get(rel) == stamp:
+                    stats['unchanged'] += 1
+                    continue
+                row = describe_procedure(os.path.join(self.folder, rel), config)
+                stats['errors'] += row['error'] is not None
+                stats['updated' if rel in known else 'added'] += 1
+                rows.append((rel, stamp[0], stamp[1], *(row[k] for k in _FIELDS), now))
+            removed = [(rel,) for rel in known if rel not in found]
+            stats['removed'] = len(removed)
+            with conn:
+                if rows:
+                    placeholders = ", ".join("?" * (len(_FIELDS) + 4))
+                    conn.executemany(f"INSERT OR REPLACE INTO procedures (path, mtime_ns, size, {', '.join(_FIELDS)}, indexed_at) "
+                                     f"VALUES ({placeholders})", rows)
+                if removed:
+                    conn.executemany("DELETE FROM procedures WHERE path = ?", removed)
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('config_digest', ?)", (digest,))
+        return stats
+
+    def query(self, text=None, diameter_min=None, diameter_max=None, powder=None, welding_mode=None,
+              order_by='name', descending=False, limit=1000):
+        """Procedimentos do índice filtrados e ordenados (lista de dicts com 'path' absoluto em 'file')."""
+        where, args = [], []
+        if text:
+            like = f"%{text.strip()}%"
+            where.append("(name LIKE ? OR ordem_servico LIKE ? OR notes LIKE ? OR path LIKE ?)")
+            args += [like] * 4
+        if diameter_min is not None:
+            where.append("diametro >= ?"); args.append(float(diameter_min))
+        if diameter_max is not None:
+            where.append("diametro <= ?"); args.append(float(diameter_max))
+        if powder:
+            where.append("powder = ?"); args.append(powder)
+        if welding_mode:
+            where.append("welding_mode = ?"); args.append(welding_mode)
+        order = SORT_COLUMNS.get(order_by, SORT_COLUMNS['name'])
+        sql = "SELECT * FROM procedures"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        # Valores ausentes sempre no fim, em qualquer sentido
+        sql += f" ORDER BY ({order.split()[0]} IS NULL), {order} {'DESC' if descending else 'ASC'}, path"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._connect() as conn:
+            rows = [dict(r) for r in conn.execute(sql, args)]
+        for row in rows:
+            row['file'] = os.path.join(self.folder, row['path'])
+        return rows
+
+    def powders(self):
+        """Pós presentes no índice (para o filtro)."""
+        with self._connect() as conn:
+            return [r[0] for r in conn.execute(
+                "SELECT DISTINCT powder FROM procedures WHERE powder <> '' ORDER BY powder COLLATE NOCASE")]
+
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM procedures").fetchone()[0]
+
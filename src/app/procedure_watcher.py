@@ -0,0 +1,278 @@
+"""Observador da pasta de procedimentos e pré-geração das pré-visualizações.
+
+`ProcedureWatcher` roda numa thread e, a cada intervalo, tira um retrato
+(mtime/tamanho) da pasta com `ProcedureIndex.scan` — só `os.scandir`, sem
+dependências nativas. Quando algo muda, atualiza o índice da biblioteca e
+manda os procedimentos novos/alterados para o `PreviewWarmer`.
+
+`PreviewWarmer` gera o G-code e a miniatura de cada procedimento num
+processo separado com prioridade baixa (a interface não disputa o GIL nem a
+CPU com ele) e grava o resultado no `PreviewCache`. Como o índice da
+biblioteca, o cache é do usuário e fica no disco local
+(`<cache>/previews/<nome>-<hash do caminho>`), não ao lado da pasta
+compartilhada: programas que vão para a máquina não passam por gravações
+interrompidas na rede nem pela limpeza de outras estações.
+
+* `<hash>.tap` — programa, com a chave de `program_key` (a mesma do cache
+  de G-code da interface: parâmetros, hash do perfil do Mach3, formato de
+  saída e versão do aplicativo); ao abrir o procedimento a pré-visualização
+  usa o arquivo em vez de gerar de novo;
+* `<hash>.png` — miniatura 3D do procedimento, com a chave dos parâmetros
+  de geometria (`thumbnails.thumbnail_key`): procedimentos com a mesma peça
+  e o mesmo percurso compartilham a miniatura.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+from procedure_library import local_folder_name, procedure_params, read_procedure
+from tap_writer import atomic_write, write_tap
+
+DEFAULT_INTERVAL_S = 5.0
+# Na primeira varredura só são pré-gerados os procedimentos recentes
+DEFAULT_WARM_RECENT_S = 24 * 3600.0
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+_BELOW_NORMAL_PRIORITY_CLASS = 0x4000
+
+
+def default_cache_dir(folder):
+    """Cache da pasta de procedimentos no disco local do usuário: `<cache>/previews/<nome>-<hash do caminho>`."""
+    from updater import default_cache_dir as user_cache_dir
+    return os.path.join(user_cache_dir(), 'previews', local_folder_name(folder))
+
+
+def program_key(params, machine, output_format, version):
+    """Chave do programa gerado: cache de G-code da interface, pacote aberto e `PreviewCache`.
+
+    Além dos parâmetros entra tudo o que muda o texto do programa: o hash do
+    perfil do Mach3 (`machine`, limita o avanço), as casas decimais do
+    `output_format` e a versão do aplicativo. O cache fica na pasta
+    compartilhada: um programa gravado por outra versão não é reaproveitado.
+    """
+    return json.dumps([params, machine.digest, output_format.to_dict(), version], sort_keys=True, default=str)
+
+
+class PreviewCache:
+    """Programas e miniaturas pré-gerados, em disco, com limite de tamanho (os mais antigos saem)."""
+
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_BYTES):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def program_path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode('utf-8')).hexdigest()[:40] + '.tap')
+
+    def thumbnail_path(self, key):
+        return os.path.join(self.directory, key + '.png')
+
+    def load_program(self, key):
+        """Linhas do programa em cache, ou None."""
+        path = self.program_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                text = f.read()
+        except OSError:
+            return None
+        try:
+            # Uso recente: o arquivo fica no fim da fila de remoção
+            os.utime(path)
+        except OSError:
+            pass
+        return text.split('\n') if text else []
+
+    def store_program(self, key, lines):
+        return write_tap(self.program_path(key), lines, sidecar=False)
+
+    def load_thumbnail(self, key):
+        """Caminho da miniatura em cache (marcada como usada), ou None."""
+        path = self.thumbnail_path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def store_thumbnail(self, key, png):
+        path = self.thumbnail_path(key)
+        atomic_write(path, lambda f: f.write(png))
+        return path
+
+    def prune(self):
+        """Remove os arquivos usados há mais tempo até o cache caber em `max_bytes`."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith('.'):
+                st = entry.stat()
+                entries.append((st.st_mtime_ns, st.st_size, entry.path))
+        total = sum(e[1] for e in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size; removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+def warm_procedure(path, cache_dir, machine_xml=None, config=None):
+    """Gera programa e miniatura de um procedimento no cache (roda no processo do `PreviewWarmer`).
+
+    Programa e miniatura saem dos parâmetros que a janela teria ao abrir o
+    arquivo (`procedure_params`, com o pó e os custos de `config`), para cair
+    nas mesmas chaves.
+    """
+    from mach3_profile import default_machine, load_mach3_profile
+    from thumbnails import ensure_thumbnail
+    from TFM_GCODE import APP_VERSION, GCodeGenerator
+
+    result = {'path': path, 'generated': False, 'thumbnail': None}
+    params = procedure_params(read_procedure(path)[0], config or {})
+    if params is None:
+        return result
+    machine = load_mach3_profile(machine_xml) if machine_xml else default_machine()
+    generator = GCodeGenerator()
+    cache = PreviewCache(cache_dir)
+    key = program_key(params, machine, generator.output_format, APP_VERSION)
+    lines = cache.load_program(key)
+    if lines is None:
+        lines = generator.generate(dict(params), machine=machine)
+        if not lines:
+            return result
+        cache.store_program(key, lines)
+        result['generated'] = True
+    result['thumbnail'] = ensure_thumbnail(params, cache_dir)
+    cache.prune()
+    return result
+
+
+def _lower_priority():
+    """Inicializador do processo de pré-geração: prioridade abaixo do normal."""
+    try:
+        if os.name == 'nt':
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), _BELOW_NORMAL_PRIORITY_CLASS)
+        else:
+            os.nice(10)
+    except Exception:
+        pass
+
+
+class PreviewWarmer:
+    """Fila de pré-geração num processo separado de baixa prioridade (criado na primeira tarefa)."""
+
+    def __init__(self, cache_dir, machine_xml=None, config=None, processes=1, on_done=None):
+        self.cache_dir = cache_dir
+        # Caminho do perfil do Mach3 ou função que o retorna na hora de enviar
+        self.machine_xml = machine_xml
+        # Configuração (pós e custos dos parâmetros) ou função que a retorna
+        self.config = config
+        self.processes = processes
+        self.on_done = on_done
+        self._pool = None
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def submit(self, path):
+        with self._lock:
+            if path in self._pending:
+                return False
+            if self._pool is None:
+                ctx = multiprocessing.get_context('spawn')
+                self._pool = ctx.Pool(self.processes, initializer=_lower_priority)
+            self._pending.add(path)
+            machine_xml = self.machine_xml() if callable(self.machine_xml) else self.machine_xml
+            config = self.config() if callable(self.config) else self.config
+            self._pool.apply_async(warm_procedure, (path, self.cache_dir, machine_xml, config),
+                                   callback=lambda res, p=path: self._finish(p, res),
+                                   error_callback=lambda exc, p=path: self._finish(p, None))
+        return True
+
+    def _finish(self, path, result):
+        with self._lock:
+            self._pending.discard(path)
+        if self.on_done is not None:
+            try:
+                self.on_done(path, result)
+            except Exception:
+                pass
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def close(self):
+        """Encerra o processo de pré-geração sem esperar a tarefa em andamento."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._pending.clear()
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+
+class ProcedureWatcher:
+    """Varredura periódica da pasta: atualiza o índice e pré-gera o que mudou."""
+
+    def __init__(self, index, config, warm=None, on_change=None, interval_s=DEFAULT_INTERVAL_S,
+                 warm_recent_s=DEFAULT_WARM_RECENT_S):
+        self.index = index
+        # Configuração (custos/fórmulas do índice) ou função que a retorna
+        self.config = config
+        self.warm = warm
+        self.on_change = on_change
+        self.interval_s = max(float(interval_s), 0.5)
+        self.warm_recent_s = warm_recent_s
+        self._snapshot = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def poll_once(self):
+        """Uma varredura; retorna {'changed', 'removed', 'stats'} (stats None se nada mudou)."""
+        snapshot = self.index.scan() if os.path.isdir(self.index.folder) else {}
+        first = self._snapshot is None
+        previous = self._snapshot or {}
+        changed = sorted(rel for rel, stamp in snapshot.items() if previous.get(rel) != stamp)
+        removed = sorted(rel for rel in previous if rel not in snapshot)
+        self._snapshot = snapshot
+        result = {'changed': changed, 'removed': removed, 'stats': None}
+        if not changed and not removed:
+            return result
+        config = self.config() if callable(self.config) else self.config
+        result['stats'] = self.index.refresh(config)
+        if self.warm is not None:
+            horizon = (time.time() - self.warm_recent_s) * 1e9 if first else None
+            for rel in changed:
+                if not rel.lower().endswith('.json'):
+                    continue
+                if horizon is not None and snapshot[rel][0] < horizon:
+                    continue
+                self.warm(os.path.join(self.index.folder, rel))
+        if self.on_change is not None:
+            self.on_change(result)
+        return result
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception:
+                pass
+            self._stop.wait(self.interval_s)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='procedure-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,258 @@
+"""Estimativa analítica do processo: tempo, consumo de pó/gás e custos.
+
+É o cálculo do painel de resultados, sem interface: depende só dos
+parâmetros do procedimento (o dict de `_get_current_params`, igual ao
+gravado em "Salvar Procedimento") e da configuração (custos e bloco de
+fórmulas).
+
+Quando o programa já foi gerado, a janela passa as estatísticas dos
+movimentos (`toolpath_stats`) e o painel mostra os valores do próprio
+programa; enquanto ele é gerado, passa os mesmos totais em forma fechada
+(`program_estimate`), que também alimentam a biblioteca de procedimentos e
+os relatórios em lote. Sem nenhum dos dois vale a conta analítica.
+"""
+import math
+
+OSCILLATION_MODES = ('oscilacao', 'oscilacao_linear', 'oscilacao_quadrada')
+
+
+def _num(value, default=0.0):
+    """Número de um parâmetro (procedimentos antigos podem ter strings)."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def evaluate_formulas(params, config):
+    """Avalia o bloco de fórmulas da configuração e retorna um dict.
+    Usa o mesmo ambiente seguro do editor, permitindo dependências entre chaves.
+    """
+    block = config.get('formulas', {}) or {}
+    # Extrair expressões
+    if isinstance(block, dict) and 'expressions' in block and isinstance(block['expressions'], dict):
+        expressions = dict(block['expressions'])
+    elif isinstance(block, dict):
+        expressions = {k: v for k, v in block.items() if isinstance(v, str)}
+    else:
+        return {}
+
+    costs = config.get('costs', {})
+    safe_globals = {'__builtins__': {}}
+    safe_locals = {
+        **params,
+        'math': math,
+        'pi': math.pi,
+        'sin': math.sin,
+        'cos': math.cos,
+        'tan': math.tan,
+        'abs': abs,
+        'round': round,
+        'min': min,
+        'max': max,
+        'ceil': math.ceil,
+        'floor': math.floor,
+        'gas_argon_brl_m3': costs.get('gas_argon_brl_m3', 0.0),
+        'labor_brl_hour': costs.get('labor_brl_hour', 0.0),
+        'machine_brl_hour': costs.get('machine_brl_hour', 0.0),
+        'powder_cost_brl_kg': params.get('powder_cost_brl_kg', costs.get('powder_brl_kg', 0.0)),
+    }
+
+    results = {}
+    pending = dict(expressions)
+    for _ in range(6):
+        progressed = False
+        for key in list(pending.keys()):
+            expr = pending[key]
+            try:
+                val = eval(expr, safe_globals, {**safe_locals, **results})
+                results[key] = val
+                del pending[key]
+                progressed = True
+            except NameError:
+                continue
+            except Exception:
+                # Armazena o erro para diagnóstico, mas não interrompe
+                results[key] = None
+                del pending[key]
+                progressed = True
+        if not progressed:
+            break
+    return results
+
+
+def format_minutes(minutes):
+    """hh:mm arredondado para cima ao minuto (evita subestimar)."""
+    minutos_arred = int(math.ceil(minutes))
+    return f"{minutos_arred // 60:02d}:{minutos_arred % 60:02d}"
+
+
+def results_from_stats(stats, mode):
+    """Textos do painel de resultados a partir das estatísticas do programa (por camada, como na conta analítica)."""
+    layers = max(int(stats.get('layers') or 0), 1)
+    per_layer = stats.get('rotations_per_layer') or {}
+    angle_layer = 360.0 * sum(per_layer.values()) / layers
+    results = {'rotation_rpm': f"{stats['rpm']:.3f}", 'helix_pitch': f"{stats['axial_pitch']:.3f} (axial)"}
+    if mode == 'espiral':
+        results['total_rotations'] = f"{stats['helix_rotations'] / layers:.2f}"
+        results['total_angle_A'] = f"{angle_layer:.2f}"
+    else:
+        results['total_rotations'] = f"{stats['axial_passes'] / layers:.2f} (passos axiais)"
+        results['total_angle_A'] = f"{angle_layer:.2f}° (camada)"
+    return results
+
+
+def estimate_process(params, config, formulas=None, stats=None):
+    """Tempo, consumo e custos do procedimento; None se o modo de soldagem não for conhecido.
+
+    Retorna {'results': textos do painel (rotation_rpm, helix_pitch,
+    total_rotations, total_angle_A, estimated_time), 'time_min', 'powder_kg',
+    'gas_m3', 'consumables_cost', 'operational_cost', 'total_cost'}.
+    `formulas` permite passar o resultado de `evaluate_formulas` já calculado.
+    Com `stats` (`toolpath_stats.toolpath_statistics` do programa gerado), os
+    textos, o tempo e a área revestida vêm do programa e não da conta
+    analítica abaixo, que fica para quando ainda não há programa.
+    """
+    costs = config.get('costs', {})
+    diameter = max(_num(params.get('diametro')), 1e-6)
+    h = _num(params.get('comprimento_revestir'))
+    num_camadas = int(_num(params.get('num_camadas'), 1))
+    peso = _num(params.get('powder_factor'), 0.16)
+    lead_in = _num(params.get('lead_in', 0.0)); lead_out = _num(params.get('lead_out', 0.0))
+    circunferencia = math.pi * diameter
+    larg_cordao = _num(params.get('largura_cordao'))
+    sobreposicao = _num(params.get('sobreposicao'))
+    taxa_de_deposicao = _num(params.get('taxa_de_deposicao', params.get('velocidade_de_deposicao')))
+    mode = params.get('welding_mode', 'espiral')
+    results = {}
+
+    if mode != 'espiral' and mode not in OSCILLATION_MODES:
+        return None
+    if stats is not None:
+        results = results_from_stats(stats, mode)
+        total_minutos = stats['feed_time_min']
+    elif mode == 'espiral':
+        # Comprimento real da hélice por volta e total (não apenas axial)
+        passo = larg_cordao * (1.0 - (sobreposicao / 100.0)); passo = max(passo, 1e-6)
+        total_rotacoes_part = (h / passo) if h > 0 else 0
+        # Ângulo total inclui 1 volta no início e 1 no final
+        angulo_part = total_rotacoes_part * 360.0 + 720.0
+        comprimento_helice_por_volta = math.sqrt((circunferencia ** 2) + (passo ** 2))
+        comprimento_total_helice = total_rotacoes_part * comprimento_helice_por_volta
+        # Tempo: comprimento da hélice + leads + 1 volta inicial + 1 volta final
+        comprimento_total_mov = comprimento_total_helice + (lead_in + lead_out) + (2 * circunferencia)
+        # RPM aproximado considerando componente circumferencial; mantido simples
+        rpm = (taxa_de_deposicao / circunferencia) if circunferencia > 0 and taxa_de_deposicao > 0 else 0
+        # Tempo baseado no comprimento real percorrido
+        tempo_min_arc = (comprimento_total_mov / taxa_de_deposicao) if taxa_de_deposicao > 0 else 0
+        results['rotation_rpm'] = f"{rpm:.3f}"; results['helix_pitch'] = f"{passo:.3f} (axial)"
+        results['total_rotations'] = f"{total_rotacoes_part:.2f}"; results['total_angle_A'] = f"{angulo_part:.2f}"
+        total_minutos = tempo_min_arc * num_camadas
+    elif mode in OSCILLATION_MODES:
+        comp_osc = _num(params.get('oscilacao_comprimento')); desloc_perc = _num(params.get('deslocamento_angular_perc'))
+        desloc_linear_angular = (desloc_perc / 100.0) * larg_cordao
+        num_passos_angulares_por_volta = math.ceil(circunferencia / desloc_linear_angular) if circunferencia > 0 and desloc_linear_angular > 0 else 1
+        actual_delta_A_deg = 360.0 / num_passos_angulares_por_volta if num_passos_angulares_por_volta > 0 else 360.0
+        # RPM do eixo A: derivado da taxa de deposição e circunferência
+        rpm_a = (taxa_de_deposicao / circunferencia) if circunferencia > 0 and taxa_de_deposicao > 0 else 0
+        feed_angular = rpm_a * 360.0
+
+        tempo_osc_ida_volta = (comp_osc * 2) / taxa_de_deposicao if taxa_de_deposicao > 0 else 0
+        # Também na quadrada contínua a rotação é um degrau sequencial entre os passos em X
+        tempo_rotacao_passo = actual_delta_A_deg / feed_angular if feed_angular > 0 else 0
+        tempo_por_passo_angular = tempo_osc_ida_volta + tempo_rotacao_passo
+        tempo_por_volta = tempo_por_passo_angular * num_passos_angulares_por_volta
+        passo_sobreposicao = comp_osc * (sobreposicao / 100.0)
+        passo_sobreposicao = max(passo_sobreposicao, 1e-6)
+        num_passos_axiais = math.ceil(h / passo_sobreposicao) if h > 0 else 1
+        tempo_min_total_osc = num_passos_axiais * tempo_por_volta
+
+        tempo_leads = (lead_in + lead_out) / taxa_de_deposicao if taxa_de_deposicao > 0 else 0
+        tempo_min_total = tempo_min_total_osc + tempo_leads
+
+        results['rotation_rpm'] = f"{rpm_a:.3f}"; results['helix_pitch'] = f"{passo_sobreposicao:.3f} (axial)"
+        results['total_rotations'] = f"{num_passos_axiais:.2f} (passos axiais)"; results['total_angle_A'] = f"{actual_delta_A_deg:.2f}° (passo)"
+        total_minutos = tempo_min_total * num_camadas
+
+    if stats is not None:
+        consumo_po_kg = stats['deposition_area_mm2'] * peso / 1000.0
+    else:
+        area_camada = circunferencia * h; area_total = area_camada * num_camadas
+        area_leads = circunferencia * (lead_in + lead_out) * num_camadas if lead_in + lead_out > 0 else 0
+        consumo_po_kg = (area_total + area_leads) * peso / 1000.0
+
+    # Avaliar fórmulas de runtime e permitir override de consumo/custos
+    formula_res = formulas
+    if formula_res is None:
+        try:
+            formula_res = evaluate_formulas(params, config)
+        except Exception:
+            formula_res = {}
+
+    # Override consumo de pó, se definido em fórmulas
+    pm_kg = formula_res.get('powder_mass_kg')
+    pm_g = formula_res.get('powder_mass_g')
+    if isinstance(pm_kg, (int, float)) and pm_kg >= 0:
+        consumo_po_kg = float(pm_kg)
+    elif isinstance(pm_g, (int, float)) and pm_g >= 0:
+        consumo_po_kg = float(pm_g) / 1000.0
+
+    # Override de tempo por massa (prioriza taxa de deposição da UI)
+    # 1) Se a UI informar taxa em g/h (>0), usa para calcular tempo
+    taxa_g_h_ui = params.get('taxa_deposicao_g_h', 0.0)
+    taxa_kg_h_calc = None
+    if isinstance(taxa_g_h_ui, (int, float)) and taxa_g_h_ui > 0:
+        taxa_kg_h_calc = float(taxa_g_h_ui) / 1000.0
+    else:
+        # 2) Caso contrário, tenta pelas fórmulas: kg/h ou g/h
+        taxa_kg_h_form = formula_res.get('taxa_deposicao_kg_h')
+        taxa_g_h_form = formula_res.get('taxa_deposicao_g_h')
+        if isinstance(taxa_kg_h_form, (int, float)) and taxa_kg_h_form > 0:
+            taxa_kg_h_calc = float(taxa_kg_h_form)
+        elif isinstance(taxa_g_h_form, (int, float)) and taxa_g_h_form > 0:
+            taxa_kg_h_calc = float(taxa_g_h_form) / 1000.0
+    if isinstance(taxa_kg_h_calc, (int, float)) and taxa_kg_h_calc > 0:
+        total_minutos = (consumo_po_kg / max(taxa_kg_h_calc, 1e-6)) * 60.0
+    elif isinstance(formula_res.get('time_min_mass'), (int, float)) and formula_res['time_min_mass'] >= 0:
+        # 3) Se houver tempo por massa explícito nas fórmulas, usa
+        total_minutos = float(formula_res['time_min_mass'])
+    elif isinstance(formula_res.get('time_min'), (int, float)) and formula_res['time_min'] >= 0:
+        # 4) Por último, tempo direto das fórmulas
+        total_minutos = float(formula_res['time_min'])
+    results['estimated_time'] = format_minutes(total_minutos)
+    tempo_total_horas = total_minutos / 60.0
+
+    custo_po = consumo_po_kg * _num(params.get('powder_cost_brl_kg', costs.get('powder_brl_kg', 0.0)))
+    # Custos de gás/operacionais (com possibilidade de override por fórmula)
+    consumo_gas_m3_hora = _num(params.get('vazao_gas')) * 60.0 / 1000.0
+    custo_gas = consumo_gas_m3_hora * tempo_total_horas * costs.get('gas_argon_brl_m3', 0.0)
+
+    # Overrides diretos se presentes
+    if isinstance(formula_res.get('powder_cost_brl'), (int, float)):
+        custo_po = float(formula_res['powder_cost_brl'])
+    if isinstance(formula_res.get('gas_cost_brl'), (int, float)):
+        custo_gas = float(formula_res['gas_cost_brl'])
+    custo_consumiveis = custo_po + custo_gas
+    if isinstance(formula_res.get('labor_cost_brl'), (int, float)):
+        # se vier pronto por fórmula, usa
+        labor_cost = float(formula_res['labor_cost_brl'])
+    else:
+        labor_cost = tempo_total_horas * costs.get('labor_brl_hour', 0.0)
+    if isinstance(formula_res.get('machine_cost_brl'), (int, float)):
+        machine_cost = float(formula_res['machine_cost_brl'])
+    else:
+        machine_cost = tempo_total_horas * costs.get('machine_brl_hour', 0.0)
+    custo_operacional = labor_cost + machine_cost
+
+    custo_total = custo_consumiveis + custo_operacional
+    if isinstance(formula_res.get('total_cost_brl'), (int, float)):
+        custo_total = float(formula_res['total_cost_brl'])
+    return {
+        'results': results,
+        'time_min': total_minutos,
+        'powder_kg': consumo_po_kg,
+        'gas_m3': consumo_gas_m3_hora * tempo_total_horas,
+        'consumables_cost': custo_consumiveis,
+        'operational_cost': custo_operacional,
+        'total_cost': custo_total,
+    }
@@ -0,0 +1,438 @@
+"""Totais do programa em forma fechada, sem gerar as linhas.
+
+Para orçamentos de peças grandes basta saber tempo, pó e custo; gerar o
+programa detalhado (milhões de linhas na quadrada contínua) só para somar
+os movimentos é desperdício. `estimate_program` percorre a mesma geometria
+dos construtores de camada do `GCodeGenerator` (espiral, oscilação linear,
+quadrada e quadrada contínua) somando os movimentos por grupo: as voltas
+e os cursos de oscilação repetidos entram multiplicados pelo número de
+passos angulares, e as somas sobre os passos axiais (que não dependem da
+camada) são feitas uma vez só. O custo cresce com o número de camadas e de
+passos axiais, não com o de linhas.
+
+O resultado tem as mesmas chaves de `toolpath_stats.toolpath_statistics`
+(menos `moves`) e mais `lines`, o número de linhas do programa; assim
+`process_estimates.estimate_process(stats=...)` aceita qualquer um dos
+dois. Os totais conferem com os do programa gerado a menos do
+arredondamento das coordenadas (3 casas) e do avanço (1 casa).
+
+Ajuste de arcos e compactação modal reescrevem o programa depois da
+geração: mudam o número de linhas (não os comprimentos) e não são
+considerados aqui.
+"""
+import math
+
+import numpy as np
+
+from toolpath_stats import EPS
+
+# Muda quando as contas mudam: entra no hash do índice da biblioteca e dos relatórios em lote
+ESTIMATOR_VERSION = 1
+OSCILLATION_BUILDERS = {'linear': 'linear', 'quadrada': 'quadrada', 'quadrada_continua': 'quadrada_continua'}
+# Linhas fixas do cabeçalho (sem recuo da tocha e sem o bloco de oscilação) e do rodapé de `GCodeGenerator`
+HEADER_LINES = 20
+OSCILLATION_HEADER_LINES = 3
+FOOTER_LINES = 8
+
+
+def _num(value, default=0.0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _scurve_first(n_steps):
+    """Primeira fração da rampa S-curve do gerador (`_scurve_fractions`)."""
+    n = max(int(n_steps), 2)
+    return 0.5 - 0.5 * math.cos(math.pi / n), n
+
+
+def _builder(params):
+    """Construtor de camada do gerador para os parâmetros (mesma escolha de `GCodeGenerator._layer_builder`)."""
+    mode = params.get('welding_mode', 'espiral')
+    if mode == 'espiral':
+        return 'espiral'
+    if mode == 'oscilacao':
+        return OSCILLATION_BUILDERS.get(params.get('oscillation_type', 'linear'), 'linear')
+    if mode == 'oscilacao_linear':
+        return 'linear'
+    if mode == 'oscilacao_quadrada':
+        return 'quadrada'
+    return None
+
+
+class _Totals:
+    """Somas dos movimentos na ordem do programa, com a posição atual para medir os deslocamentos."""
+
+    def __init__(self, machine=None, output_format=None):
+        self.machine = machine
+        self.feed_decimals = output_format.decimals_for('F') if output_format is not None else 1
+        self.pos = {'X': 0.0, 'Z': 0.0, 'A': 0.0}
+        self.lines = 0
+        self.feed_travel = dict.fromkeys(('X', 'Y', 'Z', 'A'), 0.0)
+        self.rapid_travel = dict.fromkeys(('X', 'Y', 'Z', 'A'), 0.0)
+        self.feed_length = self.rapid_length = self.feed_time = 0.0
+        self.deposition_length = self.deposition_time = self.area = 0.0
+        self.turn_deg = self.turn_time = self.helix_deg = self.helix_x = 0.0
+        self.layer_deg = {}
+        self.layer = -1
+        self.radius = 0.0
+
+    def feed_value(self, feed, letters):
+        """Avanço como sai no programa: limitado pelo perfil da máquina e arredondado como na palavra F."""
+        if self.machine is not None:
+            feed = self.machine.clamp_feed(feed, letters)
+        return float(f"{feed:.{self.feed_decimals}f}")
+
+    def begin_layer(self, index, radius):
+        self.layer = index
+        self.radius = radius
+        self.layer_deg.setdefault(index, 0.0)
+
+    def rapid(self, lines=1, **target):
+        """G00 até o alvo (eixos omitidos ficam parados)."""
+        delta = {axis: abs(value - self.pos[axis]) for axis, value in target.items()}
+        for axis, value in target.items():
+            self.rapid_travel[axis] += delta[axis]
+            self.pos[axis] = value
+        self.rapid_length += math.sqrt(sum(d * d for d in delta.values()))
+        self.lines += lines
+
+    def rapid_group(self, lines=0, **travel):
+        """Vários G00 de um eixo só: percurso total por eixo (a posição final é acertada por quem chama)."""
+        for axis, value in travel.items():
+            self.rapid_travel[axis] += value
+            self.rapid_length += value
+        self.lines += lines
+
+    def _account(self, feed, dx, dz, da, length, surface):
+        self.feed_travel['X'] += dx; self.feed_travel['Z'] += dz; self.feed_travel['A'] += da
+        self.feed_length += length
+        t = length / feed if feed > 0 else 0.0
+        self.feed_time += t
+        self.layer_deg[self.layer] += da
+        if da > EPS:
+            self.turn_deg += da; self.turn_time += t
+        if dz <= EPS and length > 0:
+            self.deposition_length += surface
+            self.deposition_time += t
+
+    def feed(self, feed, letters, lines=1, **target):
+        """G01 até o alvo; `lines` > 1 quando o gerador divide o movimento em trechos da rampa S-curve."""
+        feed = self.feed_value(feed, letters)
+        dx = abs(target.get('X', self.pos['X']) - self.pos['X'])
+        dz = abs(target.get('Z', self.pos['Z']) - self.pos['Z'])
+        da = abs(target.get('A', self.pos['A']) - self.pos['A'])
+        self.pos.update(target)
+        surface = math.hypot(dx, self.radius * math.radians(da))
+        self._account(feed, dx, dz, da, math.sqrt(dx * dx + dz * dz + da * da), surface)
+        if dx > EPS and da > EPS:
+            self.helix_deg += da; self.helix_x += dx
+        self.lines += lines
+
+    def feed_group(self, feed, letters, lines=0, X=0.0, A=0.0):
+        """Vários G01 de um eixo só (cursos de oscilação, degraus de A): percurso total por eixo."""
+        feed = self.feed_value(feed, letters)
+        surface = X + self.radius * math.radians(A)
+        self._account(feed, X, 0.0, A, X + A, surface)
+        self.lines += lines
+
+
+class _AxialSteps:
+    """Posições X dos passos axiais da oscilação (as mesmas contas do gerador, em vetores)."""
+
+    def __init__(self, params):
+        h = _num(params.get('comprimento_revestir'))
+        osc = _num(params.get('oscilacao_comprimento'))
+        lead_in = _num(params.get('lead_in', 0.0)); lead_out = _num(params.get('lead_out', 0.0))
+        self.lead_in, self.lead_out = lead_in, lead_out
+        pitch = max(osc * (_num(params.get('sobreposicao')) / 100.0), 1e-6)
+        self.count = math.ceil(h / pitch) if h > 0 else 1
+        j = np.arange(self.count, dtype=float)
+        if params.get('direcao_soldagem', 'esquerda_direita') == 'esquerda_direita':
+            self.x_start, self.x_end = 0.0 - lead_in, h + lead_out
+            anel = 0.0 + j * pitch; ida = anel + osc
+        else:
+            self.x_start, self.x_end = h + lead_out, 0.0 - lead_in
+            anel = h - j * pitch; ida = anel - osc
+        self.ida = np.maximum(0.0, np.minimum(h, ida))
+        self.volta = np.maximum(0.0, np.minimum(h, anel))
+        self.start = self.volta.copy()
+        self.start[0] = self.x_start
+        # Cursos dos passos com oscilação (todos menos o último)
+        self.stroke = np.abs(self.ida[:-1] - self.volta[:-1])
+        self.last_start = float(self.start[-1])
+
+
+def _oscillation_layer_setup(params, index, diameter):
+    """Grandezas da camada comuns aos três construtores de oscilação (None se o passo angular for inválido)."""
+    circ = math.pi * diameter
+    desloc = (_num(params.get('deslocamento_angular_perc')) / 100.0) * _num(params.get('largura_cordao'))
+    if circ <= 0 or desloc <= 0:
+        return None
+    k = math.ceil(circ / desloc)
+    delta_a = 360.0 / k
+    sign = 1.0 if params.get('sentido_rotacao', 'horaria') == 'horaria' else -1.0
+    return k, delta_a, sign, (index * (delta_a * 0.25)) * sign
+
+
+def _lead_out(t, steps, feed):
+    if abs(steps.lead_out) > 1e-6:
+        back_mid = steps.x_end - (steps.x_end - steps.last_start) * 0.3
+        t.lines += 1
+        t.feed(feed * 0.85, ('X',), X=back_mid)
+        t.feed(feed * 0.6, ('X',), X=steps.x_end)
+
+
+def _spiral_layer(t, params, index, diameter, taxa, compact, n):
+    afastamento = _num(params.get('afastamento_tocha'))
+    z_layer = diameter / 2.0 + afastamento; z_seg = z_layer + 30.0
+    h = _num(params.get('comprimento_revestir'))
+    lead_in = _num(params.get('lead_in', 0.0)); lead_out = _num(params.get('lead_out', 0.0))
+    if params.get('direcao_soldagem', 'esquerda_direita') == 'esquerda_direita':
+        x_start, x_end = 0.0 - lead_in, h + lead_out
+    else:
+        x_start, x_end = h + lead_out, 0.0 - lead_in
+    passo = max(_num(params.get('largura_cordao')) * (1.0 - _num(params.get('sobreposicao')) / 100.0), 1e-6)
+    sign = 1.0 if params.get('sentido_rotacao', 'horaria') == 'horaria' else -1.0
+    angle = abs(x_end - x_start) / passo * 360.0 * sign
+    circ = math.pi * diameter
+    rpm = (taxa / circ) if circ > 0 and taxa > 0 else 0.0
+    feed_linear = (taxa / rpm) if rpm > 0 else taxa
+    feed_angular = rpm * 360.0
+    pieces = 1 if compact else n
+
+    t.begin_layer(index, diameter / 2.0)
+    t.lines += 2
+    t.rapid(Z=z_seg)
+    t.rapid(X=x_start, A=0.0)
+    t.feed(feed_linear * 2, ('Z',), Z=z_layer)
+    t.feed(feed_angular, ('A',), lines=pieces, A=sign * 360.0)
+    t.feed(feed_linear, ('X', 'A'), lines=pieces, X=x_end, A=angle + sign * 360.0)
+    t.feed(feed_angular, ('A',), lines=pieces, A=angle + sign * 720.0)
+    if abs(lead_out) > 1e-6:
+        t.feed(feed_linear * 0.85, ('X',), X=x_end - (x_end - x_start) * 0.3)
+    t.rapid(lines=2, Z=z_seg)
+    return {'passes': 1, 'span': abs(x_end - x_start)}
+
+
+def _linear_or_square_layer(t, params, index, diameter, taxa, compact, n, steps, square):
+    setup = _oscillation_layer_setup(params, index, diameter)
+    if setup is None:
+        t.lines += 1
+        return None
+    k, delta_a, sign, a0 = setup
+    afastamento = _num(params.get('afastamento_tocha'))
+    z_layer = diameter / 2.0 + afastamento; z_seg = z_layer + 30.0
+    circ = math.pi * diameter
+    rpm = (taxa / circ) if circ > 0 and taxa > 0 else 0
+    feed_angular = rpm * 360.0
+    feed_linear = float(params.get('velocidade_oscilacao_mm_min', taxa) or taxa)
+    first, n = _scurve_first(n)
+    count = steps.count
+
+    t.begin_layer(index, diameter / 2.0)
+    t.lines += 2
+    t.rapid(Z=z_seg)
+    # Passo 0: posiciona, mergulha, rotação única de todos os passos e rampa do lead-in
+    t.lines += 1
+    t.rapid(X=steps.x_start, A=a0)
+    t.feed(feed_linear * 2, ('Z',), Z=z_layer)
+    a_rotated = a0 + sign * delta_a * k * count
+    t.feed(feed_angular, ('A',), lines=1 if compact else n, A=a_rotated)
+    volta0 = float(steps.volta[0])
+    if abs(steps.lead_in) > 1e-6:
+        x = steps.x_start
+        t.feed(feed_linear * 0.6, ('X',), X=x + (volta0 - x) * 0.3)
+        t.feed(feed_linear * 0.85, ('X',), X=x + (volta0 - x) * 0.7)
+        t.feed(feed_linear, ('X',), X=volta0)
+    xs = [steps.x_start]
+    passes = 1
+    if count > 1:
+        stroke = steps.stroke
+        ida0 = float(steps.ida[0])
+        delta0 = ida0 - volta0
+        # O primeiro curso parte da posição real (pode não ser a volta do passo 0)
+        first_piece = abs(volta0 + delta0 * (first if (square or not compact) else 1.0) - t.pos['X'])
+        first_nominal = abs(delta0) * (first if (square or not compact) else 1.0)
+        if square:
+            # Só a ida em S-curve: cada curso depois do primeiro volta da ida até o primeiro ponto da rampa
+            x_strokes = stroke.sum() + (k - 1) * 2.0 * (1.0 - first) * stroke.sum()
+            lines = (count - 1) * k * (1 + n)
+            end_x = steps.ida[:-1]
+        else:
+            x_strokes = 2.0 * k * stroke.sum()
+            lines = (count - 1) * k * (1 + (2 if compact else 2 * n))
+            end_x = steps.volta[:-1]
+        t.feed_group(feed_linear, ('X',), lines=lines, X=float(x_strokes + first_piece - first_nominal))
+        # Reposicionamento entre passos: G00 X até a volta seguinte e G00 X A com o A do passo
+        # (na linear o A acompanha os passos angulares; na quadrada fica no A inicial da camada)
+        rapid_x = np.abs(steps.volta[1:] - end_x).sum()
+        a_last = a0 if square else a0 + sign * delta_a * k * (count - 1)
+        if square:
+            rapid_a = abs(a_rotated - a0)
+        else:
+            rapid_a = abs(a_rotated - (a0 + sign * delta_a * k)) + (count - 2) * delta_a * k
+        t.rapid_group(lines=2 * (count - 1), X=float(rapid_x), A=float(rapid_a))
+        # Mergulho dos passos seguintes: a tocha já está na altura da camada
+        t.lines += 2 * (count - 1)
+        t.pos.update(X=steps.last_start, A=a_last)
+        passes += count - 2
+        xs.extend(float(x) for x in steps.volta[1:-1])
+    # Último passo: fechamento até o fim do revestimento
+    pos_before = t.pos['X']
+    if square:
+        t.lines += 1
+        t.feed(feed_linear, ('X',), X=steps.x_end)
+    elif abs(steps.x_end - steps.last_start) > 1e-6:
+        t.lines += 1
+        t.feed(feed_linear, ('X',), X=steps.x_end)
+    _lead_out(t, steps, feed_linear)
+    if count > 1 and (abs(t.pos['X'] - pos_before) > 0 or abs(steps.lead_out) > 1e-6):
+        passes += 1
+        xs.append(steps.last_start)
+    t.rapid(lines=2, Z=z_seg)
+    span = [steps.x_start, t.pos['X'], pos_before]
+    if count > 1:
+        span += [float(steps.ida[:-1].min()), float(steps.ida[:-1].max()), float(steps.volta[:-1].min()), float(steps.volta[:-1].max())]
+    return {'passes': passes, 'span': max(span) - min(span), 'starts': xs}
+
+
+def _square_continuous_layer(t, params, index, diameter, taxa, steps, prepared):
+    setup = _oscillation_layer_setup(params, index, diameter)
+    if setup is None:
+        t.lines += 1
+        return None
+    k, delta_a, sign, a0 = setup
+    afastamento = _num(params.get('afastamento_tocha'))
+    z_layer = diameter / 2.0 + afastamento; z_seg = z_layer + 30.0
+    circ = math.pi * diameter
+    rpm = (taxa / circ) if circ > 0 and taxa > 0 else 0.0
+    feed_x = float(params.get('velocidade_oscilacao_mm_min', taxa) or taxa)
+    feed_a = rpm * 360.0
+    gran_x, gran_a = prepared['gran_x'], prepared['gran_a']
+    half = delta_a / 2.0
+    steps_a = math.ceil(half / gran_a) if half > 1e-9 else 0
+    count = steps.count
+
+    t.begin_layer(index, diameter / 2.0)
+    t.lines += 2
+    t.rapid(Z=z_seg)
+    t.lines += 1
+    t.rapid(X=steps.x_start, A=a0)
+    t.feed(feed_x * 2, ('Z',), Z=z_layer)
+    if abs(steps.lead_in) > 1e-6:
+        t.feed(feed_x, ('X',), X=float(steps.volta[0]))
+    xs = [steps.x_start]
+    passes = 1
+    if count > 1:
+        # Cada curso vira S degraus X/A: S = maior entre os degraus de X e os de meio passo angular
+        floor = max(steps_a, 1)
+        sorted_x, cum_x = prepared['sorted_steps_x'], prepared['cum_steps_x']
+        below = int(np.searchsorted(sorted_x, floor))
+        sum_s = floor * below + float(cum_x[-1] - cum_x[below])
+        s_first = int(max(prepared['steps_x'][0], floor))
+        dx0 = float(steps.ida[0]) - steps.x_start
+        s0 = int(max(prepared['steps_x_first'], steps_a, 1))
+        # Linhas: comentário por passo angular + 2 por degrau (X e A), ida e volta
+        lines = (count - 1) * k + 2 * (2 * k * sum_s - s_first + s0)
+        # Primeira ida do passo 0 sai de x_start (a posição real pode ser a volta, depois do lead-in)
+        first_piece = abs(steps.x_start + dx0 / s0 - t.pos['X']) + abs(dx0) * (s0 - 1) / s0
+        stroke0 = float(steps.stroke[0])
+        x_strokes = 2.0 * k * float(steps.stroke.sum()) - stroke0 + first_piece
+        t.feed_group(feed_x, ('X',), lines=0, X=x_strokes)
+        t.feed_group(feed_a, ('A',), lines=lines, A=(count - 1) * k * delta_a)
+        rapid_x = float(np.abs(np.diff(steps.volta)).sum())
+        t.rapid_group(lines=2 * (count - 1), X=rapid_x)
+        t.lines += 2 * (count - 1)
+        t.pos.update(X=steps.last_start, A=a0 + sign * delta_a * k * (count - 1))
+        passes += count - 2
+        xs.extend(float(x) for x in steps.volta[1:-1])
+    t.lines += 1
+    pos_before = t.pos['X']
+    if abs(steps.x_end - steps.last_start) > 1e-6:
+        t.feed(feed_x, ('X',), X=steps.x_end)
+    _lead_out(t, steps, feed_x)
+    if count > 1 and (abs(t.pos['X'] - pos_before) > 0 or abs(steps.lead_out) > 1e-6):
+        passes += 1
+        xs.append(steps.last_start)
+    t.rapid(lines=2, Z=z_seg)
+    span = [steps.x_start, t.pos['X'], pos_before]
+    if count > 1:
+        span += [float(steps.ida[:-1].min()), float(steps.ida[:-1].max()), float(steps.volta[:-1].min()), float(steps.volta[:-1].max())]
+    return {'passes': passes, 'span': max(span) - min(span), 'starts': xs}
+
+
+def _prepare_square_continuous(params, steps):
+    """Degraus de X por curso (independem da camada), ordenados para somar max(degraus X, degraus A) por busca binária."""
+    gran_x = max(float(params.get('osc_test_gran_x', 1.0)), 1e-6)
+    gran_a = max(float(params.get('osc_test_gran_a', 1.0)), 1e-6)
+    stroke = steps.stroke
+    steps_x = np.where(stroke > 1e-9, np.ceil(stroke / gran_x), 0.0)
+    dx0 = abs(float(steps.ida[0]) - steps.x_start) if steps.count > 1 else 0.0
+    sorted_x = np.sort(steps_x)
+    return {'gran_x': gran_x, 'gran_a': gran_a, 'steps_x': steps_x, 'sorted_steps_x': sorted_x,
+            'cum_steps_x': np.concatenate(([0.0], np.cumsum(sorted_x))),
+            'steps_x_first': math.ceil(dx0 / gran_x) if dx0 > 1e-9 else 0}
+
+
+def estimate_program(params, machine=None, output_format=None):
+    """Totais do programa que o `GCodeGenerator` geraria para os parâmetros, sem gerá-lo.
+
+    `machine` (`MachineModel` do perfil do Mach3) limita o avanço como no
+    gerador; `output_format` (`gcode_emitter.OutputFormat`) dá as casas da
+    palavra F. Retorna o dict de `toolpath_statistics` (menos `moves`) com
+    `lines`, ou None se o modo de soldagem não for conhecido.
+    """
+    builder = _builder(params)
+    if builder is None:
+        return None
+    layers = int(_num(params.get('num_camadas'), 1))
+    diameter = _num(params.get('diametro'))
+    thickness = _num(params.get('espessura_camada'))
+    taxa = _num(params.get('taxa_de_deposicao', params.get('velocidade_de_deposicao', params.get('velocidade_soldagem'))))
+    compact = bool(params.get('compact_gcode', False))
+    n = max(int(params.get('n_scurve_steps', 6) or 6), 2)
+
+    t = _Totals(machine, output_format)
+    oscillation = params.get('welding_mode', 'espiral') in ('oscilacao', 'oscilacao_linear', 'oscilacao_quadrada')
+    t.lines = HEADER_LINES + (1 if bool(params.get('torch_retract_on_ignite', True)) else 0) + (OSCILLATION_HEADER_LINES if oscillation else 0)
+    steps = _AxialSteps(params) if builder != 'espiral' else None
+    prepared = _prepare_square_continuous(params, steps) if builder == 'quadrada_continua' else None
+    passes = 0
+    starts = None
+    valid_layers = 0
+    for i in range(layers):
+        if builder == 'espiral':
+            layer = _spiral_layer(t, params, i, diameter, taxa, compact, n)
+        elif builder == 'quadrada_continua':
+            layer = _square_continuous_layer(t, params, i, diameter, taxa, steps, prepared)
+        else:
+            layer = _linear_or_square_layer(t, params, i, diameter, taxa, compact, n, steps, builder == 'quadrada')
+        if layer is not None:
+            valid_layers += 1
+            passes += layer['passes']
+            t.area += 2.0 * math.pi * t.radius * layer['span']
+            if starts is None:
+                starts = layer.get('starts')
+        diameter += 2 * thickness
+    t.lines += FOOTER_LINES
+
+    helix_rotations = t.helix_deg / 360.0
+    pitch = 0.0
+    if starts is not None and len(starts) > 1:
+        pitch = float(np.median(np.abs(np.diff(starts))))
+    if pitch == 0.0 and helix_rotations > 0:
+        pitch = t.helix_x / helix_rotations
+    return {
+        'lines': int(round(t.lines)), 'layers': valid_layers,
+        'feed_travel': t.feed_travel, 'rapid_travel': t.rapid_travel,
+        'feed_length': t.feed_length, 'rapid_length': t.rapid_length, 'feed_time_min': t.feed_time,
+        'deposition_length': t.deposition_length, 'deposition_time_min': t.deposition_time,
+        'deposition_area_mm2': t.area,
+        'rotations': t.feed_travel['A'] / 360.0, 'helix_rotations': helix_rotations,
+        'rotations_per_layer': {k: v / 360.0 for k, v in t.layer_deg.items()},
+        'axial_passes': passes, 'rpm': t.turn_deg / 360.0 / t.turn_time if t.turn_time > 0 else 0.0,
+        'axial_pitch': pitch,
+    }
@@ -0,0 +1,274 @@
+"""Relatório PDF do procedimento, montado em memória.
+
+A vista 3D chega como PNG em bytes: a figura da aba, salva num `BytesIO`,
+ou `toolpath_view.render_toolpath_png` fora da tela. O PDF é montado num
+`BytesIO` e gravado de forma atômica no destino. Nada passa pela pasta de
+trabalho.
+
+Não depende de Tk, então `generate_reports` pode rodar numa thread da
+interface (um ou vários relatórios, com progresso e cancelamento) ou num
+processo de geração em lote. O logo é lido uma única vez por arquivo
+(`logo_reader`) e reaproveitado entre os relatórios.
+
+O ReportLab só é importado quando um relatório é montado.
+"""
+import hashlib
+import io
+import os
+import threading
+from datetime import datetime
+
+from tap_writer import atomic_write
+
+LOGO_WIDTH_MM = 40
+# Muda quando o layout do relatório muda (invalida os hashes da geração em lote)
+LAYOUT_VERSION = 3
+_logo_cache = {}
+_logo_lock = threading.Lock()
+
+
+def reportlab_available():
+    """Indica se o ReportLab está instalado, sem importá-lo."""
+    import importlib.util
+    try:
+        return importlib.util.find_spec('reportlab') is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def logo_reader(path):
+    """`ImageReader` do logo, lido uma vez por arquivo (caminho + mtime); None se faltar ou for inválido."""
+    from reportlab.lib.utils import ImageReader
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    key = (os.path.abspath(path), st.st_mtime_ns)
+    with _logo_lock:
+        if key in _logo_cache:
+            return _logo_cache[key]
+    try:
+        with open(path, 'rb') as f:
+            reader = ImageReader(io.BytesIO(f.read()))
+        reader.getSize()
+    except Exception:
+        # Arquivo corrompido ou formato incompatível: o relatório sai sem logo
+        reader = None
+    with _logo_lock:
+        _logo_cache[key] = reader
+    return reader
+
+
+def _num(params, key):
+    try:
+        return float(params.get(key) or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def cost_texts(estimate, symbol='$'):
+    """Textos do painel "Estimativa de Custo" a partir de `estimate_process` (chaves de `TFM_GCODE.custos`)."""
+    return {'consumiveis': f"{symbol} {estimate['consumables_cost']:.2f}", 'operacional': f"{symbol} {estimate['operational_cost']:.2f}",
+            'total': f"{symbol} {estimate['total_cost']:.2f}", 'po': f"{estimate['powder_kg']:.3f} kg", 'gas': f"{estimate['gas_m3']:.3f} m³"}
+
+
+def report_sections(params, results, costs=None):
+    """Seções (título, {rótulo: valor}) das duas colunas do relatório; custos (ver `cost_texts`) na esquerda, se houver."""
+    left = [
+        ("Parâmetros Gerais", {
+            "Nome Procedimento": params.get('nome_procedimento', '') or '', "Modo de Soldagem": params.get('welding_mode', ''),
+            "Diâmetro": f"{_num(params, 'diametro'):.2f} mm", "Comprimento": f"{_num(params, 'comprimento_revestir'):.2f} mm",
+        }),
+        ("Parâmetros de Camada", {
+            "Nº de Camadas": params.get('num_camadas', ''), "Espessura / Camada": f"{_num(params, 'espessura_camada'):.2f} mm",
+        }),
+    ]
+    if costs:
+        left.append(("Estimativa de Custo", {
+            "Custo Consumíveis": costs.get('consumiveis', '-'), "Custo Operacional": costs.get('operacional', '-'),
+            "Custo Total": costs.get('total', '-'), "Consumo Pó": costs.get('po', '-'), "Consumo Gás": costs.get('gas', '-'),
+        }))
+    right = [
+        ("Parâmetros do Processo", {
+            "Corrente Arco": f"{_num(params, 'corrente_arco'):.1f} A",
+            "Vazão Gás": f"{_num(params, 'vazao_gas'):.1f} l/min",
+            "Alimentação Pó": f"{_num(params, 'alim_po'):.1f} %",
+            "Pré-aquecimento": f"{_num(params, 'preaquecimento'):.1f} °C",
+            "Tipo de Pó": params.get('powder_name', '') or '',
+            "OS": params.get('ordem_servico', '') or '',
+        }),
+        # Resultados sem velocidade da placa
+        ("Resultados Calculados", {
+            "Rotação (RPM)": results.get('rotation_rpm', '-'),
+            "Passo Axial (mm)": results.get('helix_pitch', '-'),
+            "Rotações/Passos": results.get('total_rotations', '-'),
+            "Ângulo Total/Passo (A)": results.get('total_angle_A', '-'),
+            "Tempo Total (hh:mm)": results.get('estimated_time', '-'),
+            "Tempo de Ciclo (sim.)": results.get('cycle_time') or '-',
+        }),
+    ]
+    return left, right
+
+
+def build_report_pdf(params, results, image_png, notes='', logo=None, generated_at=None, costs=None):
+    """PDF do relatório em bytes. `image_png`: vista 3D; `logo`: `ImageReader` (ver `logo_reader`) ou None."""
+    from reportlab.pdfgen import canvas as pdfcanvas
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.lib.utils import ImageReader
+    from reportlab.lib import colors
+
+    buf = io.BytesIO()
+    c = pdfcanvas.Canvas(buf, pagesize=A4); width, height = A4; margin = 20 * mm
+    c.setFont("Helvetica-Bold", 18); c.drawString(margin, height - margin, "Relatório de Procedimento PTA")
+    if logo is not None:
+        img_w, img_h = logo.getSize(); aspect = img_h / float(img_w) if img_w > 0 else 1
+        draw_w = LOGO_WIDTH_MM * mm; draw_h = draw_w * aspect
+        c.drawImage(logo, width - margin - draw_w, height - margin - (draw_h / 2), width=draw_w, height=draw_h, preserveAspectRatio=True, mask='auto')
+    stamp = (generated_at or datetime.now()).strftime('%d/%m/%Y %H:%M:%S')
+    c.setFont("Helvetica", 8); c.drawString(margin, height - margin - 8*mm, f"Data: {stamp}"); c.line(margin, height - margin - 10*mm, width - margin, height - margin - 10*mm)
+
+    image = ImageReader(io.BytesIO(image_png))
+    img_w_px, img_h_px = image.getSize(); aspect = img_h_px / float(img_w_px) if img_w_px > 0 else 1
+    draw_w = width - 2 * margin; draw_h = draw_w * aspect; img_y_start = height - margin - 15*mm
+    if draw_h > img_y_start - 140*mm: draw_h = img_y_start - 140*mm; draw_w = draw_h / aspect if aspect > 0 else 0
+    c.drawImage(image, (width - draw_w) / 2, img_y_start - draw_h, width=draw_w, height=draw_h, preserveAspectRatio=True)
+    y_pos = img_y_start - draw_h - 10*mm; line_height = 5 * mm
+
+    def draw_section(title_text, data, x_start, start_y):
+        current_y = start_y; c.setFont("Helvetica-Bold", 11); c.drawString(x_start, current_y, title_text); current_y -= line_height * 1.5; c.setFont("Helvetica", 9)
+        for key_text, value in data.items(): c.drawString(x_start + 5*mm, current_y, f"{key_text}:"); c.drawString(x_start + 55*mm, current_y, str(value)); current_y -= line_height
+        return start_y - current_y
+
+    for sections, x_start in zip(report_sections(params, results, costs), (margin, width / 2 + 5 * mm)):
+        col_y = y_pos
+        for title_text, data in sections:
+            col_y -= draw_section(title_text, data, x_start, col_y); col_y -= line_height
+
+    # Rodapé: notas do procedimento (fixo na parte inferior, texto não sobe)
+    notes = (notes or '').strip()
+    if notes:
+        c.setFillColor(colors.grey)
+        c.line(margin, margin + 17*mm, width - margin, margin + 17*mm)
+        c.setFillColor(colors.black)
+        c.setFont("Helvetica-Bold", 10)
+        c.drawString(margin, margin + 22*mm, "Notas:")
+        # Texto com quebra de linha pela largura, até o limite da área
+        c.setFont("Helvetica", 9)
+        max_w = width - 2 * margin
+        line_h = 4.5 * mm
+        wrapped_lines = []
+        current = ""
+        for w in notes.split():
+            candidate = current + (" " if current else "") + w
+            if c.stringWidth(candidate, "Helvetica", 9) <= max_w:
+                current = candidate
+            else:
+                wrapped_lines.append(current)
+                current = w
+        if current:
+            wrapped_lines.append(current)
+        y_curr = margin + 12*mm
+        min_y = margin + 3*mm
+        for ln in wrapped_lines:
+            if y_curr - line_h < min_y:
+                c.drawString(margin, y_curr, "...")
+                break
+            c.drawString(margin, y_curr, ln)
+            y_curr -= line_h
+    c.save()
+    return buf.getvalue()
+
+
+def write_report(path, pdf):
+    """Grava o PDF de forma atômica (temporário na mesma pasta + rename)."""
+    atomic_write(path, lambda f: f.write(pdf))
+    return path
+
+
+def procedure_report_job(path, config, out_dir, name=None):
+    """Job de `generate_reports` para um procedimento (.json) ou pacote (.tfmjob) da biblioteca.
+
+    O PDF vai para `<out_dir>/<name>.pdf` (padrão: nome do arquivo).
+    """
+    from procedure_library import read_procedure
+    from process_estimates import estimate_process
+    from program_estimate import estimate_program
+    from cycle_time import format_duration
+    from toolpath_view import normalize_params
+
+    params, extras = read_procedure(path)
+    params = normalize_params(params)
+    # Totais do programa em forma fechada: o lote não gera o G-code de cada procedimento
+    estimate = estimate_process(params, config, stats=estimate_program(params))
+    results = dict(estimate['results']) if estimate else {}
+    costs = cost_texts(estimate, config.get('costs', {}).get('currency_symbol', '$')) if estimate else None
+    if extras.get('cycle_time_s') is not None:
+        results['cycle_time'] = format_duration(extras['cycle_time_s'])
+    name = name or os.path.splitext(os.path.basename(path))[0]
+    return {'dest': os.path.join(out_dir, f"{name}.pdf"), 'params': params, 'results': results, 'costs': costs,
+            'notes': str(params.get('notes') or ''), 'source': path}
+
+
+def report_digest(path, config, logo_path=None):
+    """Hash do que define o relatório: conteúdo do arquivo, custos/fórmulas da configuração, logo e layout."""
+    from procedure_library import config_digest
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    h.update(f"|{config_digest(config)}|{LAYOUT_VERSION}".encode('utf-8'))
+    if logo_path:
+        try:
+            st = os.stat(logo_path)
+            h.update(f"|{st.st_size}|{st.st_mtime_ns}".encode('utf-8'))
+        except OSError:
+            pass
+    return h.hexdigest()
+
+
+def render_procedure_report(path, config, out_dir, name=None, logo_path=None):
+    """Relatório de um arquivo da biblioteca, do começo ao fim (tarefa de um processo da geração em lote)."""
+    try:
+        job = procedure_report_job(path, config, out_dir, name=name)
+    except Exception as e:
+        return {'source': path, 'dest': None, 'ok': False, 'error': f"Leitura: {e}"}
+    os.makedirs(os.path.dirname(job['dest']), exist_ok=True)
+    result = generate_reports([job], logo_path=logo_path)[0]
+    result['source'] = path
+    return result
+
+
+def generate_reports(jobs, logo_path=None, progress=None, cancel=None):
+    """Gera os relatórios em sequência; retorna [{'dest', 'ok', 'error'}] na ordem dos jobs.
+
+    Cada job é {'dest', 'params', 'results', 'costs'?, 'notes'?, 'image_png'?, 'view'?}
+    (ver `procedure_report_job` para montar a partir de um arquivo).
+    Sem `image_png`, a vista 3D é renderizada fora da tela (com `view` =
+    (elevação, azimute), se houver). `progress(feitos, total, job)` é chamado
+    antes de cada relatório e ao final. `cancel` é um `threading.Event`: os
+    jobs que faltam saem com error='cancelado'.
+    """
+    from toolpath_view import render_toolpath_png
+
+    logo = logo_reader(logo_path) if logo_path else None
+    generated_at = datetime.now()
+    out = []
+    total = len(jobs)
+    for i, job in enumerate(jobs):
+        if cancel is not None and cancel.is_set():
+            out.append({'dest': job['dest'], 'ok': False, 'error': 'cancelado'})
+            continue
+        if progress is not None:
+            progress(i, total, job)
+        try:
+            image = job.get('image_png') or render_toolpath_png(job['params'], view=job.get('view'))
+            pdf = build_report_pdf(job['params'], job.get('results') or {}, image, notes=job.get('notes', ''),
+                                   logo=logo, generated_at=generated_at, costs=job.get('costs'))
+            write_report(job['dest'], pdf)
+            out.append({'dest': job['dest'], 'ok': True, 'error': None})
+        except Exception as e:
+            out.append({'dest': job['dest'], 'ok': False, 'error': str(e) or type(e).__name__})
+    if progress is not None:
+        progress(total, total, None)
+    return out
@@ -0,0 +1,116 @@
+"""Gravação atômica de programas G-code (.tap) para entrega ao Mach3.
+
+O Mach3 pode abrir um arquivo ainda incompleto quando ele é gravado
+diretamente no destino (principalmente em pastas de rede). `write_tap`
+grava as linhas num arquivo temporário na mesma pasta, com buffer grande e
+em blocos, faz `fsync` e só então renomeia para o nome final
+(`os.replace`, atômico no mesmo volume). As linhas podem vir de um
+iterador, então programas de centenas de MB não precisam ficar inteiros
+na memória.
+
+Opcionalmente grava ao lado um `<arquivo>.json` com SHA-256, número de
+linhas e bytes (`verify_tap` confere o arquivo contra ele).
+"""
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+
+BUFFER_SIZE = 1 << 20
+# Linhas unidas por bloco antes de codificar/gravar
+_BATCH_LINES = 8192
+
+
+def sidecar_path(path):
+    return f"{path}.json"
+
+
+def _fsync_dir(directory):
+    """Garante a entrada de diretório após o rename (sem efeito no Windows)."""
+    if os.name == 'nt':
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, write_body, buffer_size=BUFFER_SIZE):
+    """Executa write_body(arquivo) num temporário da mesma pasta e renomeia para `path`."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".part")
+    try:
+        with open(fd, 'wb', buffering=buffer_size) as f:
+            result = write_body(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    _fsync_dir(directory)
+    return result
+
+
+def write_text_atomic(path, text, encoding='utf-8'):
+    """Grava um texto curto (ex.: autoload.txt) de forma atômica."""
+    atomic_write(path, lambda f: f.write(text.encode(encoding)))
+
+
+def write_tap(path, lines, sidecar=True, encoding='utf-8', buffer_size=BUFFER_SIZE):
+    """Grava as linhas (lista ou iterador) unidas por '\\n', de forma atômica.
+
+    O conteúdo é idêntico a `"\\n".join(lines)`. Retorna {'path', 'lines',
+    'bytes', 'sha256', 'sidecar'}; o sidecar só é gravado depois que o
+    programa já está no nome final.
+    """
+    def body(f):
+        digest = hashlib.sha256()
+        count = 0
+        size = 0
+        batch = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) >= _BATCH_LINES:
+                data = (("\n" if count else "") + "\n".join(batch)).encode(encoding)
+                count += len(batch); batch = []
+                digest.update(data); f.write(data); size += len(data)
+        if batch:
+            data = (("\n" if count else "") + "\n".join(batch)).encode(encoding)
+            count += len(batch)
+            digest.update(data); f.write(data); size += len(data)
+        return {'lines': count, 'bytes': size, 'sha256': digest.hexdigest()}
+
+    info = atomic_write(path, body, buffer_size)
+    info['path'] = os.path.abspath(path)
+    info['sidecar'] = None
+    if sidecar:
+        meta = {'file': os.path.basename(path), 'sha256': info['sha256'], 'lines': info['lines'],
+                'bytes': info['bytes'], 'created': datetime.now().isoformat(timespec='seconds')}
+        info['sidecar'] = sidecar_path(info['path'])
+        write_text_atomic(info['sidecar'], json.dumps(meta, ensure_ascii=False, indent=2))
+    return info
+
+
+def verify_tap(path, buffer_size=BUFFER_SIZE):
+    """True se o arquivo confere com o SHA-256 e o tamanho do sidecar; None se não houver sidecar."""
+    try:
+        with open(sidecar_path(path), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(buffer_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest() == meta.get('sha256') and os.path.getsize(path) == meta.get('bytes')
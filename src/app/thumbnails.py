@@ -0,0 +1,113 @@
+"""Miniaturas 3D dos procedimentos, renderizadas fora da tela e guardadas em cache.
+
+A miniatura é a mesma geometria da aba 3D (`toolpath_view`), só que
+pequena e sem eixos. Ela fica no `PreviewCache` (cache local da pasta) com a
+chave dos parâmetros que mudam o desenho (`thumbnail_key`): corrente, gás,
+pó, nome etc. não entram, então procedimentos com a mesma peça e o mesmo
+percurso compartilham a miniatura, e salvar de novo sem mudar a geometria
+não gera outra.
+
+`ThumbnailRenderer` renderiza as que faltam num processo separado de
+prioridade baixa (o mesmo esquema do `PreviewWarmer`). A janela pede a
+miniatura e recebe o arquivo na hora, se já existir, ou num callback
+quando ficar pronta.
+"""
+import hashlib
+import json
+import multiprocessing
+import threading
+
+from procedure_watcher import PreviewCache, _lower_priority
+
+# Muda quando o desenho da miniatura muda (invalida as antigas)
+THUMBNAIL_VERSION = 1
+# Parâmetros usados por `toolpath_view.draw_toolpath_3d`
+GEOMETRY_KEYS = ('diametro', 'comprimento_revestir', 'num_camadas', 'espessura_camada', 'largura_cordao', 'sobreposicao',
+                 'lead_in', 'lead_out', 'direcao_soldagem', 'welding_mode', 'oscilacao_comprimento')
+
+
+def thumbnail_key(params):
+    """Chave da miniatura: hash dos parâmetros de geometria (números como texto ou inteiro dão a mesma chave)."""
+    from toolpath_view import normalize_params
+    params = normalize_params(params)
+    geometry = {}
+    for key in GEOMETRY_KEYS:
+        value = params.get(key)
+        geometry[key] = float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+    stamp = json.dumps([THUMBNAIL_VERSION, geometry], sort_keys=True, default=str)
+    return 'thumb-' + hashlib.sha1(stamp.encode('utf-8')).hexdigest()
+
+
+def ensure_thumbnail(params, cache_dir):
+    """Caminho da miniatura no cache, renderizando se ainda não existir (roda no processo do `ThumbnailRenderer`)."""
+    from toolpath_view import normalize_params, render_toolpath_thumbnail
+
+    cache = PreviewCache(cache_dir)
+    key = thumbnail_key(params)
+    path = cache.load_thumbnail(key)
+    if path is None:
+        path = cache.store_thumbnail(key, render_toolpath_thumbnail(normalize_params(params)))
+    return path
+
+
+class ThumbnailRenderer:
+    """Fila de miniaturas num processo separado de baixa prioridade (criado no primeiro pedido)."""
+
+    def __init__(self, cache_dir, processes=1):
+        self.cache = PreviewCache(cache_dir)
+        self.processes = processes
+        self._pool = None
+        # Chave -> callbacks à espera da miniatura
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def cached(self, params):
+        """Caminho da miniatura se já estiver no cache, senão None (não renderiza)."""
+        return self.cache.load_thumbnail(thumbnail_key(params))
+
+    def request(self, params, callback=None):
+        """Caminho da miniatura, se já existir; senão agenda a renderização e retorna None.
+
+        `callback(caminho)` é chamado na thread do pool quando a miniatura
+        fica pronta (caminho None se falhar).
+        """
+        key = thumbnail_key(params)
+        path = self.cache.load_thumbnail(key)
+        if path is not None:
+            return path
+        with self._lock:
+            waiting = self._pending.get(key)
+            if waiting is not None:
+                if callback is not None:
+                    waiting.append(callback)
+                return None
+            self._pending[key] = [callback] if callback is not None else []
+            if self._pool is None:
+                ctx = multiprocessing.get_context('spawn')
+                self._pool = ctx.Pool(self.processes, initializer=_lower_priority)
+            self._pool.apply_async(ensure_thumbnail, (dict(params), self.cache.directory),
+                                   callback=lambda res, k=key: self._finish(k, res),
+                                   error_callback=lambda exc, k=key: self._finish(k, None))
+        return None
+
+    def _finish(self, key, path):
+        with self._lock:
+            callbacks = self._pending.pop(key, [])
+        for callback in callbacks:
+            try:
+                callback(path)
+            except Exception:
+                pass
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def close(self):
+        """Encerra o processo de renderização sem esperar o que estiver em andamento."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._pending.clear()
+        if pool is not None:
+            pool.terminate()
+            pool.join()
@@ -0,0 +1,401 @@
+"""Tabela de movimentos de um programa G-code.
+
+`parse_moves` interpreta o programa (estado modal de G, F, G61/G64, plano e
+posição) numa única passagem e devolve uma `MoveTable` com colunas NumPy:
+posições de início/fim por eixo, avanço, tipo de movimento, camada e linha
+de origem. Os estimadores (tempo de ciclo, limites) trabalham sobre essas
+colunas de forma vetorizada em vez de reinterpretar o texto.
+
+Linhas que não movem mas interrompem o movimento contínuo (M0/M1/M30,
+G04, G53) entram como movimentos de comprimento zero com `motion == -1`;
+no caso de G04 o tempo de espera fica em `dwell_s`. Movimentos G53 (em
+coordenadas de máquina) não alteram a posição de peça acompanhada.
+"""
+import math
+import re
+from array import array
+
+import numpy as np
+
+AXES = ('X', 'Y', 'Z', 'A', 'B', 'C')
+MOTION_BARRIER = -1
+_WORD_RE = re.compile(r"([A-Z])\s*([-+]?(?:\d+\.?\d*|\.\d+))")
+_LAYER_RE = re.compile(r"\(---\s*CAMADA\s+(\d+)")
+_STOP_CODES = {'0', '1', '2', '30'}
+# Campos por registro: 6 eixos + avanço, tipo, camada, linha, parada exata, espera
+_REC = len(AXES) + 6
+# Plano ativo -> (eixo 1, eixo 2, letra do centro no eixo 1, no eixo 2, eixo perpendicular)
+_PLANES = {17: ('X', 'Y', 'I', 'J', 'Z'), 18: ('Z', 'X', 'K', 'I', 'Y'), 19: ('Y', 'Z', 'J', 'K', 'X')}
+
+
+class MoveTable:
+    """Colunas de movimentos: `start`/`end` (n, eixos), `feed`, `motion`, `layer`, `line`, `exact_stop`, `dwell_s`, `arc_len`."""
+
+    def __init__(self, axes, start, end, feed, motion, layer, line, exact_stop, dwell_s, arc_len):
+        self.axes = tuple(axes)
+        self.start = start
+        self.end = end
+        self.feed = feed
+        self.motion = motion
+        self.layer = layer
+        self.line = line
+        self.exact_stop = exact_stop
+        self.dwell_s = dwell_s
+        self.arc_len = arc_len
+
+    def __len__(self):
+        return int(self.motion.shape[0])
+
+    def column(self, axis, which='end'):
+        """Coluna de um eixo (zeros se o eixo não aparece no programa)."""
+        data = self.end if which == 'end' else self.start
+        if axis not in self.axes:
+            return np.zeros(len(self))
+        return data[:, self.axes.index(axis)]
+
+    def lengths(self):
+        """Comprimento de cada movimento nas unidades do programa (graus contam como unidade, como no Mach3)."""
+        if len(self) == 0:
+            return np.zeros(0)
+        chord = np.sqrt(((self.end - self.start) ** 2).sum(axis=1))
+        return np.where(np.isnan(self.arc_len), chord, self.arc_len)
+
+    def layers(self):
+        """Índices de camada presentes (ordenados, sem o -1 de cabeçalho/rodapé)."""
+        values = np.unique(self.layer)
+        return [int(v) for v in values if v >= 0]
+
+
+def _words(code):
+    """(letra, valor) da linha; usa split rápido e recorre à regex para palavras coladas."""
+    out = []
+    for tok in code.split():
+        try:
+            out.append((tok[0], float(tok[1:])))
+        except (ValueError, IndexError):
+            out.extend((l, float(v)) for l, v in _WORD_RE.findall(tok))
+    return out
+
+
+def _arc_length(start, end, centre_words, plane, clockwise):
+    a1, a2, w1, w2, ax3 = _PLANES[plane]
+    s1, s2 = start.get(a1, 0.0), start.get(a2, 0.0)
+    e1, e2 = end.get(a1, 0.0), end.get(a2, 0.0)
+    c1, c2 = s1 + centre_words.get(w1, 0.0), s2 + centre_words.get(w2, 0.0)
+    r = math.hypot(s1 - c1, s2 - c2)
+    t0 = math.atan2(s2 - c2, s1 - c1); t1 = math.atan2(e2 - c2, e1 - c1)
+    sweep = (t0 - t1) if clockwise else (t1 - t0)
+    if sweep <= 1e-12:
+        sweep += 2.0 * math.pi
+    planar = r * sweep
+    helical = end.get(ax3, 0.0) - start.get(ax3, 0.0)
+    return math.hypot(planar, helical)
+
+
+def parse_moves(lines, exact_stop=False):
+    """Interpreta o programa e devolve a `MoveTable` (modo incremental G91 é respeitado).
+
+    `exact_stop` é o modo inicial (G61) quando o programa não define G61/G64.
+    Programas no formato do gerador (palavras letra+número, comentários entre
+    parênteses, sem G91/G02/G03) são lidos em blocos diretamente sobre os
+    bytes com NumPy; os demais passam pelo interpretador linha a linha.
+    """
+    lines = lines if isinstance(lines, list) else list(lines)
+    table = _parse_vectorized(lines, exact_stop)
+    if table is None:
+        table = _parse_lines(lines, exact_stop)
+    return table
+
+
+def _build_table(rec_end, attrs, seen, arc_len):
+    """Monta a MoveTable a partir das posições finais (n, 6) e atributos (n, 6)."""
+    n = rec_end.shape[0]
+    keep = [i for i, s in enumerate(seen) if s]
+    end = np.ascontiguousarray(rec_end[:, keep])
+    start = np.empty_like(end)
+    if n:
+        start[0] = 0.0
+        start[1:] = end[:-1]
+    return MoveTable(
+        tuple(AXES[i] for i in keep), start, end,
+        attrs[:, 0].copy(), attrs[:, 1].astype(np.int8), attrs[:, 2].astype(np.int32),
+        attrs[:, 3].astype(np.int32), attrs[:, 4].astype(bool), attrs[:, 5].copy(), arc_len,
+    )
+
+
+def _parse_lines(lines, exact_stop=False):
+    axis_index = {a: i for i, a in enumerate(AXES)}
+    pos = [0.0] * len(AXES)
+    seen = [False] * len(AXES)
+    motion = None
+    feed = 0.0
+    incremental = False
+    stop_mode = 1 if exact_stop else 0
+    plane = 17
+    layer = -1
+    nan = float('nan')
+    # Uma linha de registro por movimento: posição final de cada eixo + atributos
+    rec = array('d')
+    arcs = {}
+
+    for index, raw in enumerate(lines):
+        line = raw if raw.__class__ is str else str(raw)
+        if not line:
+            continue
+        first = line[0]
+        if first == '(' or first == '%' or first == ' ':
+            line = line.strip()
+            if not line or line[0] == '%':
+                continue
+            if line[0] == '(':
+                if line.startswith('(---'):
+                    m = _LAYER_RE.match(line)
+                    if m:
+                        layer = int(m.group(1)) - 1
+                continue
+        if '(' in line or ';' in line:
+            line = line.split('(', 1)[0].split(';', 1)[0]
+        targets = None
+        centre = None
+        barrier = False
+        dwell = 0.0
+        is_dwell = False
+        for letter, value in _words(line.upper()):
+            i = axis_index.get(letter)
+            if i is not None:
+                if targets is None:
+                    targets = {}
+                targets[i] = value
+            elif letter == 'G':
+                g = round(value, 1)
+                if g in (0, 1, 2, 3):
+                    motion = int(g)
+                elif g == 90:
+                    incremental = False
+                elif g == 91:
+                    incremental = True
+                elif g == 61:
+                    stop_mode = 1
+                elif g == 64:
+                    stop_mode = 0
+                elif g in (17, 18, 19):
+                    plane = int(g)
+                elif g == 53:
+                    barrier = True
+                elif g == 4:
+                    is_dwell = barrier = True
+            elif letter == 'F':
+                feed = value
+            elif letter == 'M':
+                if f"{value:g}" in _STOP_CODES:
+                    barrier = True
+            elif letter in ('I', 'J', 'K'):
+                if centre is None:
+                    centre = {}
+                centre[letter] = value
+            elif letter == 'P' and is_dwell:
+                dwell = value
+        if barrier:
+            rec.extend(pos); rec.extend((feed, MOTION_BARRIER, layer, index, stop_mode, dwell))
+            continue
+        if targets is None or motion is None:
+            continue
+        prev = pos[:] if motion in (2, 3) else None
+        for i, v in targets.items():
+            seen[i] = True
+            pos[i] = pos[i] + v if incremental else v
+        if prev is not None:
+            arcs[len(rec) // _REC] = _arc_length(dict(zip(AXES, prev)), dict(zip(AXES, pos)), centre or {}, plane, motion == 2)
+        rec.extend(pos); rec.extend((feed, motion, layer, index, stop_mode, 0.0))
+
+    table = np.frombuffer(rec, dtype=np.float64).reshape(-1, _REC) if len(rec) else np.zeros((0, _REC))
+    arc_len = np.full(table.shape[0], nan)
+    for i, length in arcs.items():
+        arc_len[i] = length
+    k = len(AXES)
+    return _build_table(table[:, :k], table[:, k:], seen, arc_len)
+
+
+# --- Leitura vetorizada (formato do gerador) ---
+_CHUNK_LINES = 65536
+# Classes de byte: espaço, letra, dígito, ponto, sinal -, sinal +, quebra de linha, parênteses, inválido
+_C_SP, _C_LETTER, _C_DIGIT, _C_DOT, _C_MINUS, _C_PLUS, _C_NL, _C_OPEN, _C_CLOSE, _C_BAD = range(10)
+_CLASS = np.full(256, _C_BAD, dtype=np.uint8)
+_CLASS[[32, 9, 13, ord('%')]] = _C_SP
+_CLASS[ord('A'):ord('Z') + 1] = _C_LETTER
+_CLASS[ord('a'):ord('z') + 1] = _C_LETTER
+_CLASS[ord('0'):ord('9') + 1] = _C_DIGIT
+_CLASS[ord('.')] = _C_DOT
+_CLASS[ord('-')] = _C_MINUS
+_CLASS[ord('+')] = _C_PLUS
+_CLASS[10] = _C_NL
+_CLASS[ord('(')] = _C_OPEN
+_CLASS[ord(')')] = _C_CLOSE
+_UPPER = np.arange(256, dtype=np.uint8)
+_UPPER[ord('a'):ord('z') + 1] -= 32
+_AXIS_CODES = np.array([ord(a) for a in AXES], dtype=np.uint8)
+_POW10 = 10.0 ** np.arange(16)
+
+
+def _ffill(values, initial):
+    """Propaga o último valor definido (não-NaN); antes do primeiro usa `initial`."""
+    if values.size == 0:
+        return values
+    idx = np.where(np.isnan(values), 0, np.arange(values.size))
+    np.maximum.accumulate(idx, out=idx)
+    out = values[idx]
+    out[np.isnan(out)] = initial
+    return out
+
+
+def _parse_vectorized(lines, exact_stop):
+    """MoveTable lida em blocos de linhas, ou None se o programa exigir o interpretador completo."""
+    state = {'motion': np.nan, 'feed': 0.0, 'stop': 1.0 if exact_stop else 0.0, 'layer': -1.0,
+             'pos': np.zeros(len(AXES)), 'seen': np.zeros(len(AXES), dtype=bool)}
+    ends, attrs = [], []
+    for first in range(0, len(lines), _CHUNK_LINES):
+        part = _parse_chunk(lines[first:first + _CHUNK_LINES], first, state)
+        if part is None:
+            return None
+        ends.append(part[0]); attrs.append(part[1])
+    if ends:
+        rec_end = np.concatenate(ends); rec_attrs = np.concatenate(attrs)
+    else:
+        rec_end = np.zeros((0, len(AXES))); rec_attrs = np.zeros((0, 6))
+    return _build_table(rec_end, rec_attrs, state['seen'].tolist(), np.full(rec_end.shape[0], np.nan))
+
+
+def _parse_chunk(lines, first_line, state):
+    try:
+        text = "\n".join(lines)
+    except TypeError:
+        text = "\n".join(map(str, lines))
+    n_lines = len(lines)
+    if ';' in text:
+        return None
+    b = np.frombuffer(text.encode('ascii', 'replace'), dtype=np.uint8)
+    cls = _CLASS[b]
+    is_nl = cls == _C_NL
+    nl_pos = np.flatnonzero(is_nl)
+
+    # Comentários entre parênteses: pares abre/fecha na mesma linha, sem aninhamento
+    o_pos = np.flatnonzero(cls == _C_OPEN); c_pos = np.flatnonzero(cls == _C_CLOSE)
+    if o_pos.size or c_pos.size:
+        if o_pos.size != c_pos.size or (o_pos > c_pos).any() or (c_pos[:-1] > o_pos[1:]).any():
+            return None
+        line_cum = np.cumsum(is_nl, dtype=np.int32)
+        if (line_cum[o_pos] != line_cum[c_pos]).any():
+            return None
+        marks = np.zeros(b.size + 1, dtype=np.int8)
+        marks[o_pos] = 1
+        marks[c_pos + 1] = -1
+        cls[np.cumsum(marks[:-1], dtype=np.int8).view(bool)] = _C_SP
+    if (cls == _C_BAD).any():
+        return None
+
+    is_letter = cls == _C_LETTER
+    letter_pos = np.flatnonzero(is_letter)
+    num_pos = np.flatnonzero((cls >= _C_DIGIT) & (cls <= _C_PLUS))
+    n_tok = letter_pos.size
+    # Cada número vem colado a uma letra ou a outro caractere do número; toda letra é seguida de número
+    if num_pos.size:
+        before = cls[num_pos - 1]
+        if num_pos[0] == 0 or not ((before >= _C_LETTER) & (before <= _C_PLUS)).all():
+            return None
+    after = cls[np.minimum(letter_pos + 1, b.size - 1)]
+    if n_tok and (letter_pos[-1] == b.size - 1 or not ((after >= _C_DIGIT) & (after <= _C_PLUS)).all()):
+        return None
+
+    num_cls = cls[num_pos]
+    num_tok = np.cumsum(is_letter, dtype=np.int32)[num_pos] - 1
+    # Sinal só como primeiro caractere do número
+    sign_sel = (num_cls == _C_MINUS) | (num_cls == _C_PLUS)
+    if sign_sel.any() and (num_pos[sign_sel] != letter_pos[num_tok[sign_sel]] + 1).any():
+        return None
+    negative = np.zeros(n_tok, dtype=bool)
+    negative[num_tok[num_cls == _C_MINUS]] = True
+    dot_sel = num_cls == _C_DOT
+    dot_tok = num_tok[dot_sel]
+    if dot_tok.size and (np.diff(dot_tok) == 0).any():
+        return None
+    dot_at = np.full(n_tok, np.iinfo(np.int64).max, dtype=np.int64)
+    dot_at[dot_tok] = num_pos[dot_sel]
+    digit_sel = num_cls == _C_DIGIT
+    digit_pos = num_pos[digit_sel]
+    digit_tok = num_tok[digit_sel]
+    n_digits = np.bincount(digit_tok, minlength=n_tok)
+    if n_tok and (n_digits.min() == 0 or n_digits.max() > 15):
+        return None
+    # Mantissa inteira (exata até 15 dígitos) dividida por 10^casas: mesmo valor que float(texto)
+    is_digit = np.zeros(b.size, dtype=np.int32)
+    is_digit[digit_pos] = 1
+    first_digit = np.cumsum(is_digit, dtype=np.int32)[letter_pos]
+    # Expoente de cada dígito = dígitos que ainda faltam no token
+    exponent = (first_digit + n_digits - 1)[digit_tok] - np.arange(digit_pos.size, dtype=np.int32)
+    mantissa = np.bincount(digit_tok, weights=(b[digit_pos] - 48) * _POW10[exponent], minlength=n_tok)
+    decimals = np.bincount(digit_tok[digit_pos > dot_at[digit_tok]], minlength=n_tok)
+    values = mantissa / _POW10[decimals]
+    values[negative] = -values[negative]
+    letters = _UPPER[b[letter_pos]]
+    tok_line = np.cumsum(is_nl, dtype=np.int32)[letter_pos]
+
+    def per_line(mask, vals=None):
+        out = np.full(n_lines, np.nan)
+        out[tok_line[mask]] = values[mask] if vals is None else vals
+        return out
+
+    is_g = letters == ord('G')
+    g = np.round(values, 1)
+    if (is_g & np.isin(g, (2.0, 3.0, 91.0))).any():
+        return None
+    motion_tok = is_g & np.isin(g, (0.0, 1.0))
+    motion = _ffill(per_line(motion_tok), state['motion'])
+    stop_tok = is_g & np.isin(g, (61.0, 64.0))
+    stop = _ffill(per_line(stop_tok, (g[stop_tok] == 61.0).astype(float)), state['stop'])
+    feed = _ffill(per_line(letters == ord('F')), state['feed'])
+    dwell_line = np.zeros(n_lines, dtype=bool)
+    dwell_line[tok_line[is_g & (g == 4.0)]] = True
+    barrier = dwell_line.copy()
+    barrier[tok_line[is_g & (g == 53.0)]] = True
+    barrier[tok_line[(letters == ord('M')) & np.isin(values, (0.0, 1.0, 2.0, 30.0))]] = True
+    dwell = np.zeros(n_lines)
+    p_tok = (letters == ord('P')) & dwell_line[tok_line]
+    dwell[tok_line[p_tok]] = values[p_tok]
+
+    axis_tok = np.isin(letters, _AXIS_CODES)
+    has_axis = np.zeros(n_lines, dtype=bool)
+    has_axis[tok_line[axis_tok]] = True
+    is_move = has_axis & ~barrier & ~np.isnan(motion)
+    record = is_move | barrier
+    rec_lines = np.flatnonzero(record)
+
+    # Camadas: comentários "(--- CAMADA n ---)" no início da linha
+    layer_vals = np.full(n_lines, np.nan)
+    for m in _LAYER_RE.finditer(text):
+        if m.start() == 0 or text[m.start() - 1] == '\n':
+            layer_vals[np.searchsorted(nl_pos, m.start())] = int(m.group(1)) - 1
+    layer = _ffill(layer_vals, state['layer'])
+
+    pos_end = np.empty((rec_lines.size, len(AXES)))
+    move_tok = axis_tok & is_move[tok_line]
+    for i, code in enumerate(_AXIS_CODES):
+        mask = move_tok & (letters == code)
+        col = per_line(mask)
+        if mask.any():
+            state['seen'][i] = True
+        # Só linhas de movimento definem posição; barreiras mantêm a anterior
+        filled = _ffill(col, state['pos'][i])
+        pos_end[:, i] = filled[rec_lines]
+        if n_lines:
+            state['pos'][i] = filled[-1]
+    attrs = np.column_stack([
+        feed[rec_lines],
+        np.where(barrier[rec_lines], float(MOTION_BARRIER), motion[rec_lines]),
+        layer[rec_lines],
+        rec_lines + first_line,
+        stop[rec_lines],
+        dwell[rec_lines],
+    ]) if rec_lines.size else np.zeros((0, 6))
+    if n_lines:
+        state['motion'] = motion[-1]; state['feed'] = feed[-1]; state['stop'] = stop[-1]; state['layer'] = layer[-1]
+    return pos_end, attrs
@@ -0,0 +1,130 @@
+"""Estatísticas do percurso calculadas sobre a tabela de movimentos.
+
+Os resultados do painel (rotação, passo axial, rotações, ângulo de A,
+tempo) e a área revestida usada no consumo de pó vêm do programa gerado,
+não de uma segunda conta da geometria: rampas S-curve, lead-in/out, voltas
+inicial e final, pré-rotação e mergulhos entram exatamente como o gerador
+os escreveu. Tudo é feito em colunas NumPy sobre a `MoveTable`
+(`toolpath.parse_moves`), numa passagem.
+
+Convenções (as do Mach3, como em `cycle_time`):
+
+* o avanço F vale para o comprimento com graus contados como unidade, então
+  o tempo nominal de um movimento é comprimento / F (sem acelerações; o
+  tempo com a cinemática da máquina é o `cycle_time.simulate`);
+* deposição são os movimentos de avanço dentro das camadas sem variação de
+  Z (mergulhos e recuos ficam de fora); o comprimento na superfície usa o
+  raio da camada, Z − afastamento da tocha;
+* passe axial é cada trecho de deposição entre reposicionamentos em rápido
+  (G00) dentro de uma camada: um por camada na espiral, um por passo axial
+  na oscilação.
+"""
+import numpy as np
+
+# Variações menores que isso são tratadas como eixo parado
+EPS = 1e-9
+
+
+def _empty_stats(axes=()):
+    return {
+        'layers': 0, 'moves': 0,
+        'feed_travel': {a: 0.0 for a in axes}, 'rapid_travel': {a: 0.0 for a in axes},
+        'feed_length': 0.0, 'rapid_length': 0.0, 'feed_time_min': 0.0,
+        'deposition_length': 0.0, 'deposition_time_min': 0.0, 'deposition_area_mm2': 0.0,
+        'rotations': 0.0, 'helix_rotations': 0.0, 'rotations_per_layer': {},
+        'axial_passes': 0, 'rpm': 0.0, 'axial_pitch': 0.0,
+    }
+
+
+def _per_layer_sum(layer, weights):
+    """{camada: soma} para índices de camada >= 0."""
+    if layer.size == 0:
+        return {}
+    sums = np.bincount(layer.astype(np.int64), weights=weights)
+    return {int(k): float(sums[k]) for k in np.unique(layer).astype(np.int64)}
+
+
+def toolpath_statistics(table, standoff=0.0):
+    """Comprimentos, rotações, tempo e área revestida do programa.
+
+    `standoff` é o afastamento da tocha (Z da camada menos o raio da peça).
+    Retorna um dict com, entre outros: percurso por eixo em avanço e em
+    rápido (`feed_travel`/`rapid_travel`), tempo nominal em avanço
+    (`feed_time_min`), comprimento e área de deposição na superfície,
+    rotações de A em avanço (total, nas hélices X+A e por camada), RPM
+    médio com A girando, passes axiais e passo axial.
+    """
+    axes = tuple(table.axes)
+    stats = _empty_stats(axes)
+    layers = table.layers()
+    stats['layers'] = len(layers)
+    if len(table) == 0:
+        return stats
+
+    delta = table.end - table.start
+    L = table.lengths()
+    motion = table.motion
+    feed_mask = motion > 0
+    rapid_mask = motion == 0
+    absd = np.abs(delta)
+    stats['moves'] = int(((L > 0) & (motion >= 0)).sum())
+    stats['feed_travel'] = {a: float(absd[feed_mask, i].sum()) for i, a in enumerate(axes)}
+    stats['rapid_travel'] = {a: float(absd[rapid_mask, i].sum()) for i, a in enumerate(axes)}
+    stats['feed_length'] = float(L[feed_mask].sum())
+    stats['rapid_length'] = float(L[rapid_mask].sum())
+
+    feed = table.feed
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_min = np.where(feed_mask & (feed > 0), L / np.where(feed > 0, feed, 1.0), 0.0)
+    stats['feed_time_min'] = float(t_min.sum())
+
+    zeros = np.zeros(len(table))
+    dx = absd[:, axes.index('X')] if 'X' in axes else zeros
+    da = absd[:, axes.index('A')] if 'A' in axes else zeros
+    dz = delta[:, axes.index('Z')] if 'Z' in axes else zeros
+    z_end = table.column('Z')
+    layer = table.layer
+    in_layer = layer >= 0
+
+    # Deposição: avanço na altura da camada
+    deposit = feed_mask & in_layer & (np.abs(dz) <= EPS) & (L > 0)
+    radius = np.maximum(z_end - float(standoff or 0.0), 0.0)
+    surface = np.sqrt(dx * dx + (radius * np.radians(da)) ** 2)
+    stats['deposition_length'] = float(surface[deposit].sum())
+    stats['deposition_time_min'] = float(t_min[deposit].sum())
+
+    turning = feed_mask & (da > EPS)
+    helical = turning & (dx > EPS)
+    stats['rotations'] = float(da[feed_mask].sum() / 360.0)
+    stats['helix_rotations'] = float(da[helical].sum() / 360.0)
+    stats['rotations_per_layer'] = _per_layer_sum(layer[feed_mask & in_layer], da[feed_mask & in_layer] / 360.0)
+    turn_time = float(t_min[turning].sum())
+    stats['rpm'] = float(da[turning].sum() / 360.0 / turn_time) if turn_time > 0 else 0.0
+
+    # Passes axiais: trechos de deposição separados por reposicionamento em rápido.
+    # Passo: espaçamento mediano do início dos passes na camada, ou X por volta nas hélices
+    events = np.flatnonzero((deposit | (rapid_mask & (L > 0))) & in_layer)
+    first = events[deposit[events] & np.r_[True, ~deposit[events][:-1]]]
+    stats['axial_passes'] = int(first.size)
+    pitch = 0.0
+    if first.size > 1:
+        same = layer[first][1:] == layer[first][:-1]
+        if same.any():
+            x_start = table.column('X', 'start')[first]
+            pitch = float(np.median(np.abs(np.diff(x_start))[same]))
+    if pitch == 0.0 and stats['helix_rotations'] > 0:
+        pitch = float(dx[helical].sum() / stats['helix_rotations'])
+    stats['axial_pitch'] = pitch
+
+    # Área revestida: faixa axial depositada em cada camada × perímetro no raio da camada
+    idx = np.flatnonzero(deposit)
+    if idx.size:
+        x0 = table.column('X', 'start')[idx]; x1 = table.column('X')[idx]
+        lay = layer[idx]
+        # A camada só cresce ao longo do programa: blocos contíguos por camada
+        starts = np.flatnonzero(np.r_[True, lay[1:] != lay[:-1]])
+        x_min = np.minimum.reduceat(np.minimum(x0, x1), starts)
+        x_max = np.maximum.reduceat(np.maximum(x0, x1), starts)
+        r_layer = np.maximum.reduceat(radius[idx], starts)
+        stats['deposition_area_mm2'] = float((2.0 * np.pi * r_layer * (x_max - x_min)).sum())
+    return stats
@@ -0,0 +1,143 @@
+"""Vista 3D do percurso de soldagem, sem dependência de Tk.
+
+`draw_toolpath_3d` desenha a peça e as camadas num `Axes3D` qualquer: o da
+aba 3D da interface ou o de uma figura fora da tela. `render_toolpath_png`
+usa uma figura Agg fora da tela para o relatório PDF e para a geração em
+lote, em qualquer thread ou processo; `render_toolpath_thumbnail`, a
+miniatura dos procedimentos (ver `thumbnails`).
+"""
+import io
+import math
+
+import numpy as np
+
+# Tamanho da figura da aba 3D (polegadas)
+FIGURE_SIZE = (7, 5)
+# Miniatura (pixels)
+THUMBNAIL_SIZE = (240, 160)
+
+
+def normalize_params(params):
+    """Parâmetros de arquivo prontos para desenhar: números gravados como texto (procedimentos antigos) convertidos."""
+    out = dict(params)
+    for key, value in params.items():
+        if isinstance(value, str):
+            try:
+                out[key] = float(value)
+            except ValueError:
+                pass
+    try:
+        out['num_camadas'] = int(float(out.get('num_camadas') or 1))
+    except (TypeError, ValueError):
+        out['num_camadas'] = 1
+    out.setdefault('lead_in', 5.0); out.setdefault('lead_out', 5.0)
+    out.setdefault('welding_mode', 'espiral')
+    return out
+
+
+def draw_toolpath_3d(ax, params, annotate=True):
+    """Desenha cilindro base e cordões de cada camada (hélice no espiral, faixas na oscilação).
+
+    Sem `annotate`, fica só a geometria (sem eixos, rótulos e grade), para miniaturas.
+    """
+    # Paleta amigável a daltonismo (Set2/Paired)
+    layer_colors = ['#66c2a5', '#fc8d62', '#8da0cb', '#e78ac3', '#a6d854', '#ffd92f', '#e5c494', '#b3b3b3']
+    d_base = params['diametro']; length_base = params['comprimento_revestir']; direction = params.get('direcao_soldagem', 'esquerda_direita')
+    mode = params.get('welding_mode', 'espiral')
+    x_base = np.linspace(0, length_base, 30); theta_base = np.linspace(0, 2 * np.pi, 30); xc_base, tc_base = np.meshgrid(x_base, theta_base)
+    r_base_vals = d_base / 2.0 ; yc_base = r_base_vals * np.cos(tc_base); zc_base = r_base_vals * np.sin(tc_base); ax.plot_surface(xc_base, yc_base, zc_base, alpha=0.1, color='gray')
+    # Grid leve para percepção espacial
+    try:
+        ax.grid(True, alpha=0.2, color="#888") if annotate else ax.set_axis_off()
+    except Exception:
+        pass
+    for i in range(params['num_camadas']):
+        d_layer = params['diametro'] + i * 2 * params['espessura_camada']; length = params['comprimento_revestir']
+        lead_in = params.get('lead_in', 0.0); lead_out = params.get('lead_out', 0.0)
+        r_layer = d_layer / 2.0; passo = params['largura_cordao'] * (1.0 - (params['sobreposicao'] / 100.0)); passo = max(passo, 1e-6)
+        if direction == 'esquerda_direita': x_arc_start_calc = 0.0 - lead_in; x_arc_end_calc = length + lead_out
+        else: x_arc_start_calc = length + lead_out; x_arc_end_calc = 0.0 - lead_in
+        comprimento_total_arc = abs(x_arc_end_calc - x_arc_start_calc)
+        angle_sign = 1.0 if direction == 'esquerda_direita' else -1.0
+        if mode == 'espiral':
+            total_rotacoes = (comprimento_total_arc / passo)
+            angulo_total_rad = math.radians(total_rotacoes * 360.0 * angle_sign)
+            if abs(angulo_total_rad) < 1e-6: continue
+            num_points = int(50 * abs(total_rotacoes)) + 2;
+            if num_points < 2: num_points = 2
+            theta_helice = np.linspace(0, angulo_total_rad, num_points); x_final_helice = np.linspace(x_arc_start_calc, x_arc_end_calc, len(theta_helice))
+            r_base_helice = np.full_like(x_final_helice, r_layer)
+            r_helice = r_base_helice; safe_r_helice = np.where(np.abs(r_helice) < 1e-9, 1e-9, r_helice); delta_theta = params['largura_cordao'] / safe_r_helice
+            t_fita_var = np.linspace(-0.5, 0.5, 3); TH, T_FITA_MULT = np.meshgrid(theta_helice, t_fita_var); XH, _ = np.meshgrid(x_final_helice, t_fita_var)
+            R_HELICE_MESH, _ = np.meshgrid(r_helice, t_fita_var); Y_solda = R_HELICE_MESH * np.cos(TH + T_FITA_MULT * delta_theta); Z_solda = R_HELICE_MESH * np.sin(TH + T_FITA_MULT * delta_theta)
+            X_solda = XH; ax.plot_surface(X_solda, Y_solda, Z_solda, color=layer_colors[i % len(layer_colors)], alpha=0.9)
+        elif mode in ('oscilacao', 'oscilacao_linear', 'oscilacao_quadrada'):
+             passo_axial_osc = params['oscilacao_comprimento'] * (params['sobreposicao'] / 100.0); passo_axial_osc = max(passo_axial_osc, 1e-6)
+             num_passos_axiais = math.ceil(length_base / passo_axial_osc) if length_base > 0 else 1
+             x_positions = np.linspace(0, length_base, num_passos_axiais + 1) if direction == 'esquerda_direita' else np.linspace(length_base, 0, num_passos_axiais + 1)
+             theta_ring = np.linspace(0, 2*np.pi, 50)
+             r_ring = np.full_like(theta_ring, r_layer)
+             y_ring = r_ring * np.cos(theta_ring)
+             z_ring = r_ring * np.sin(theta_ring)
+
+             for k in range(num_passos_axiais):
+                 x_start_band = x_positions[k]
+                 x_end_band = x_positions[k+1]
+                 X_band, T_band = np.meshgrid([x_start_band, x_end_band], theta_ring)
+                 R_band = np.full_like(T_band, r_layer)
+                 Y_band = R_band * np.cos(T_band)
+                 Z_band = R_band * np.sin(T_band)
+                 ax.plot_surface(X_band, Y_band, Z_band, color=layer_colors[i % len(layer_colors)], alpha=0.7)
+    d_final_plot = params['diametro'] + params['num_camadas'] * 2 * params['espessura_camada']
+    max_radius_plot = max(d_final_plot/2.0, d_base/2.0); max_radius_plot = max(max_radius_plot, 1e-6)
+    lead_in_val = params.get('lead_in', 0.0); lead_out_val = params.get('lead_out', 0.0); x_min_plot = 0 - lead_in_val; x_max_plot = length_base + lead_out_val
+    x_range = x_max_plot - x_min_plot; x_range = x_range if x_range > 0 else 1; y_range = max_radius_plot * 2; z_range = y_range
+    ax.set_xlim(x_min_plot, x_max_plot); ax.set_ylim(-max_radius_plot, max_radius_plot); ax.set_zlim(-max_radius_plot, max_radius_plot)
+    # Aspect ratio equivalente para evitar distorção
+    try:
+        ax.set_aspect('equal', adjustable='box')
+    except Exception:
+        ax.set_box_aspect((x_range, y_range, z_range))
+    if not annotate:
+        return
+    # Eixos e marcadores
+    try:
+        ax.plot([x_min_plot, x_max_plot], [0, 0], [0, 0], color='#111', lw=1)
+        ax.plot([0, 0], [-max_radius_plot, max_radius_plot], [0, 0], color='#111', lw=1)
+        ax.plot([0, 0], [0, 0], [-max_radius_plot, max_radius_plot], color='#111', lw=1)
+        ax.text(x_max_plot, 0, 0, 'X', color='#111')
+        ax.text(0, max_radius_plot, 0, 'Y', color='#111')
+        ax.text(0, 0, max_radius_plot, 'Z', color='#111')
+    except Exception:
+        pass
+    ax.set_xlabel("Eixo X (Comprimento)"); ax.set_ylabel("Y"); ax.set_zlabel("Eixo Z (Raio)")
+
+
+def render_toolpath_png(params, dpi=150, figsize=FIGURE_SIZE, view=None):
+    """PNG da vista 3D (como a aba 3D, recortado nas bordas). `view` = (elevação, azimute) opcional."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize, dpi=100)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111, projection='3d')
+    draw_toolpath_3d(ax, params)
+    if view is not None:
+        ax.view_init(elev=view[0], azim=view[1])
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=dpi, bbox_inches='tight', pad_inches=0.1)
+    return buf.getvalue()
+
+
+def render_toolpath_thumbnail(params, size=THUMBNAIL_SIZE, dpi=80):
+    """Miniatura PNG da vista 3D (só a geometria, fundo branco, `size` em pixels)."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(size[0] / dpi, size[1] / dpi), dpi=dpi, facecolor='white')
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes([0.0, 0.0, 1.0, 1.0], projection='3d')
+    draw_toolpath_3d(ax, params, annotate=False)
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=dpi)
+    return buf.getvalue()
@@ -0,0 +1,239 @@
+"""Atualização do app: feed `latest.json` com cache e download do instalador.
+
+`FeedClient` consulta o feed com requisições condicionais (ETag /
+If-Modified-Since) e um intervalo mínimo entre checagens, guardando a
+última resposta em disco.
+
+O download do instalador é em blocos, retomável e com SHA-256 incremental.
+
+`download` grava em `<destino>.part` enquanto atualiza o hash, bloco a
+bloco, e informa o progresso por callback. Se a conexão cair, o `.part`
+fica no disco. Na próxima chamada o download continua com `Range` a
+partir do tamanho já gravado. O `If-Range` usa o ETag/Last-Modified da
+primeira resposta, guardado em `<destino>.part.json`: se o arquivo mudou
+no servidor, a resposta vem inteira (200) e o download recomeça do zero.
+Só depois de conferir o SHA-256 o `.part` é renomeado para o destino.
+
+Não depende de Tk: a interface chama `FeedClient.fetch` e `download` numa
+thread e repassa o resultado/progresso para a janela com `root.after`.
+"""
+import hashlib
+import http.client
+import json
+import os
+import re
+import time
+import urllib.error
+import urllib.request
+
+from tap_writer import write_text_atomic
+
+CHUNK_SIZE = 256 * 1024
+_CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+
+class DownloadError(Exception):
+    """Falha no download (HTTP, conexão interrompida ou hash diferente do esperado)."""
+
+
+class DownloadCancelled(DownloadError):
+    """Download interrompido pelo usuário; o arquivo parcial é mantido para retomar."""
+
+
+def partial_path(dest):
+    return f"{dest}.part"
+
+
+def _meta_path(dest):
+    return f"{dest}.part.json"
+
+
+def _read_meta(dest, url):
+    try:
+        with open(_meta_path(dest), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('url') == url else None
+
+
+def _write_meta(dest, meta):
+    with open(_meta_path(dest), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+
+def _discard_partial(dest):
+    for path in (partial_path(dest), _meta_path(dest)):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _hash_file(path, digest, chunk_size):
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+
+
+def download(url, dest, sha256=None, progress=None, cancel=None, chunk_size=CHUNK_SIZE, timeout=30):
+    """Baixa `url` para `dest`; retorna {'path', 'bytes', 'sha256', 'resumed'}.
+
+    `progress(baixado, total)` é chamado a cada bloco (total None se o
+    servidor não informar). `cancel` é um `threading.Event`: quando ligado, o
+    download para e levanta `DownloadCancelled`.
+    """
+    part = partial_path(dest)
+    meta = _read_meta(dest, url)
+    offset = os.path.getsize(part) if meta and os.path.exists(part) else 0
+    if not offset:
+        _discard_partial(dest)
+
+    headers = {'User-Agent': 'TFM-GCODE-Updater'}
+    if offset:
+        headers['Range'] = f"bytes={offset}-"
+        validator = meta.get('etag') or meta.get('last_modified')
+        if validator:
+            headers['If-Range'] = validator
+    try:
+        resp = urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout)
+    except urllib.error.HTTPError as e:
+        if e.code == 416 and offset:
+            # O .part já tem o arquivo inteiro: só falta conferir o hash (se não conferir, é descartado)
+            e.close()
+            return _finish(dest, part, sha256, offset, chunk_size, resumed=True)
+        raise DownloadError(f"HTTP {e.code} ao baixar {url}") from e
+    except (urllib.error.URLError, OSError) as e:
+        raise DownloadError(f"Falha de conexão: {e}") from e
+
+    with resp:
+        digest = hashlib.sha256()
+        total = None
+        resumed = False
+        if offset and resp.status == 206:
+            match = _CONTENT_RANGE.match(resp.headers.get('Content-Range', ''))
+            if match and int(match.group(1)) == offset:
+                resumed = True
+                total = int(match.group(3)) if match.group(3) != '*' else None
+        if resumed:
+            _hash_file(part, digest, chunk_size)
+            mode = 'ab'
+        else:
+            # Servidor ignorou o Range ou o arquivo mudou: começa do zero
+            offset = 0
+            length = resp.headers.get('Content-Length')
+            total = int(length) if length and length.isdigit() else None
+            _write_meta(dest, {'url': url, 'etag': resp.headers.get('ETag'),
+                               'last_modified': resp.headers.get('Last-Modified'), 'total': total})
+            mode = 'wb'
+        done = offset
+        with open(part, mode) as out:
+            if progress is not None:
+                progress(done, total)
+            while True:
+                if cancel is not None and cancel.is_set():
+                    raise DownloadCancelled("Download cancelado")
+                try:
+                    chunk = resp.read(chunk_size)
+                except (OSError, ValueError, http.client.HTTPException) as e:
+                    raise DownloadError(f"Conexão interrompida após {done} bytes: {e}") from e
+                if not chunk:
+                    break
+                out.write(chunk)
+                digest.update(chunk)
+                done += len(chunk)
+                if progress is not None:
+                    progress(done, total)
+            out.flush()
+            os.fsync(out.fileno())
+    if total is not None and done < total:
+        raise DownloadError(f"Download incompleto: {done} de {total} bytes")
+    return _finish(dest, part, sha256, done, chunk_size, resumed, digest)
+
+
+def _finish(dest, part, sha256, size, chunk_size, resumed, digest=None):
+    if digest is None:
+        digest = hashlib.sha256()
+        _hash_file(part, digest, chunk_size)
+    value = digest.hexdigest()
+    if sha256 and value.lower() != sha256.strip().lower():
+        _discard_partial(dest)
+        raise DownloadError("Falha de integridade do instalador (hash).")
+    os.replace(part, dest)
+    _discard_partial(dest)
+    return {'path': dest, 'bytes': size, 'sha256': value, 'resumed': resumed}
+
+
+def default_cache_dir():
+    """Pasta de cache do usuário (LOCALAPPDATA no Windows, ~/.cache nos demais)."""
+    base = os.environ.get('LOCALAPPDATA') if os.name == 'nt' else os.environ.get('XDG_CACHE_HOME')
+    if not base:
+        base = os.path.join(os.path.expanduser('~'), 'AppData', 'Local') if os.name == 'nt' else os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'TFM_GCODE')
+
+
+class FeedClient:
+    """Leitura do `latest.json` com cache em disco e requisições condicionais.
+
+    O último feed, o ETag e o Last-Modified ficam em `cache_path`. Dentro de
+    `min_interval_s` desde a última checagem bem-sucedida a resposta vem do
+    cache, sem rede. Depois disso a requisição leva `If-None-Match` e
+    `If-Modified-Since`, e um 304 só renova a data da checagem. Sem rede, o
+    último feed em cache é devolvido com status 'offline'. Feeds locais
+    (caminho de arquivo) são lidos direto.
+    """
+
+    def __init__(self, url, cache_path, min_interval_s=6 * 3600, timeout=5):
+        self.url = url
+        self.cache_path = cache_path
+        self.min_interval_s = min_interval_s
+        self.timeout = timeout
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return cache if cache.get('url') == self.url else {}
+
+    def _save_cache(self, cache):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+            write_text_atomic(self.cache_path, json.dumps(cache, ensure_ascii=False, indent=2))
+        except OSError:
+            pass
+
+    def fetch(self, force=False, now=None):
+        """Retorna {'data', 'status', 'checked_at'}; status: 'cached', 'not_modified', 'updated' ou 'offline'."""
+        now = time.time() if now is None else now
+        if not self.url.lower().startswith(('http://', 'https://')):
+            with open(self.url, 'r', encoding='utf-8') as f:
+                return {'data': json.load(f), 'status': 'updated', 'checked_at': now}
+        cache = self._load_cache()
+        checked_at = cache.get('checked_at') or 0
+        if not force and cache.get('data') is not None and 0 <= now - checked_at < self.min_interval_s:
+            return {'data': cache['data'], 'status': 'cached', 'checked_at': checked_at}
+
+        headers = {'User-Agent': 'TFM-GCODE-Updater', 'Accept': 'application/json'}
+        if cache.get('data') is not None:
+            if cache.get('etag'):
+                headers['If-None-Match'] = cache['etag']
+            if cache.get('last_modified'):
+                headers['If-Modified-Since'] = cache['last_modified']
+        try:
+            with urllib.request.urlopen(urllib.request.Request(self.url, headers=headers), timeout=self.timeout) as resp:
+                data = json.loads(resp.read().decode('utf-8', errors='replace'))
+                cache = {'url': self.url, 'etag': resp.headers.get('ETag'),
+                         'last_modified': resp.headers.get('Last-Modified'), 'data': data, 'checked_at': now}
+            status = 'updated'
+        except urllib.error.HTTPError as e:
+            e.close()
+            if e.code != 304 or cache.get('data') is None:
+                return {'data': cache.get('data'), 'status': 'offline', 'checked_at': checked_at, 'error': f"HTTP {e.code}"}
+            cache['checked_at'] = now
+            status = 'not_modified'
+        except (urllib.error.URLError, OSError, ValueError, http.client.HTTPException) as e:
+            return {'data': cache.get('data'), 'status': 'offline', 'checked_at': checked_at, 'error': str(e)}
+        self._save_cache(cache)
+        return {'data': cache['data'], 'status': status, 'checked_at': now}
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# Testa a política de atraso adaptativo por fase do trigger_update
+
+import sys, os
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+from TFM_GCODE import TFM_GCODE
+
+
+def _make_app():
+    """Instância sem UI, apenas com o estado usado pelo agendamento."""
+    app = TFM_GCODE.__new__(TFM_GCODE)
+    app._debounce_delay = 300
+    app._phase_cost_ms = {}
+    app._immediate_phase_ms = 16
+    app._debounce_min_ms = 60
+    app._debounce_max_ms = 1500
+    app._debounce_factor = 1.5
+    return app
+
+
+def test_phase_delay_policy():
+    app = _make_app()
+    # Sem medição: debounce padrão
+    assert app._phase_delay('gcode') == 300
+    # Fase barata: imediata
+    app._record_phase_cost('resultados', 2.0)
+    assert app._phase_delay('resultados') == 0
+    # Fase cara: proporcional ao custo, limitada ao máximo
+    app._record_phase_cost('graficos', 100.0)
+    assert app._phase_delay('graficos') == 150
+    app._record_phase_cost('3d', 5000.0)
+    assert app._phase_delay('3d') == 1500
+    # Fase logo acima do limiar respeita o mínimo
+    app._record_phase_cost('gcode', 20.0)
+    assert app._phase_delay('gcode') == 60
+
+
+def test_phase_cost_is_smoothed():
+    app = _make_app()
+    app._record_phase_cost('gcode', 100.0)
+    app._record_phase_cost('gcode', 1000.0)
+    # Um pico isolado não domina a média
+    assert 300.0 < app._phase_cost_ms['gcode'] < 400.0
+
+
+if __name__ == "__main__":
+    test_phase_delay_policy()
+    test_phase_cost_is_smoothed()
+    print("OK")
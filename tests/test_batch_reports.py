@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# Testa os relatórios PDF em lote: hash do conteúdo, procedimentos sem alteração pulados e geração em processos
+
+import sys, os, json
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+
+import pytest
+from generator_cases import make_params
+from batch_reports import plan_reports, run_batch, MANIFEST_NAME
+
+CONFIG = {'costs': {'powder_brl_kg': 100.0, 'gas_argon_brl_m3': 20.0, 'labor_brl_hour': 50.0, 'machine_brl_hour': 30.0,
+                    'currency_symbol': 'R$'}}
+
+
+def _write_procedures(folder):
+    (folder / 'sub').mkdir(parents=True)
+    for rel, mode in (('eixo.json', 'espiral'), ('sub/rolo.json', 'quadrada')):
+        (folder / rel).write_text(json.dumps(make_params(mode, True, 'pequena', 2)), encoding='utf-8')
+
+
+def test_plan_reports_uses_content_hash(tmp_path):
+    folder = tmp_path / 'procedures'; out = tmp_path / 'out'
+    _write_procedures(folder); out.mkdir()
+    tasks, skipped = plan_reports(str(folder), str(out), CONFIG)
+    assert [t['rel'] for t in tasks] == ['eixo.json', os.path.join('sub', 'rolo.json')] and skipped == []
+    manifest = {t['rel']: {'hash': t['hash'], 'pdf': t['pdf']} for t in tasks}
+    (out / 'eixo.pdf').write_bytes(b'%PDF')
+    # Só o que tem PDF e o mesmo hash é pulado; tocar o arquivo sem mudar o conteúdo não conta
+    os.utime(folder / 'eixo.json')
+    tasks, skipped = plan_reports(str(folder), str(out), CONFIG, manifest=manifest)
+    assert skipped == ['eixo.json'] and [t['rel'] for t in tasks] == [os.path.join('sub', 'rolo.json')]
+    # Custos diferentes mudam o relatório
+    config = {'costs': dict(CONFIG['costs'], labor_brl_hour=60.0)}
+    tasks, skipped = plan_reports(str(folder), str(out), config, manifest=manifest)
+    assert skipped == [] and len(tasks) == 2
+    tasks, skipped = plan_reports(str(folder), str(out), CONFIG, manifest=manifest, force=True)
+    assert skipped == [] and len(tasks) == 2
+
+
+def test_run_batch_in_processes_and_skip_unchanged(tmp_path):
+    pytest.importorskip('reportlab')
+    folder = tmp_path / 'procedures'; out = tmp_path / 'out'
+    _write_procedures(folder)
+    summary = run_batch(str(folder), str(out), CONFIG, processes=2)
+    assert summary['failed'] == [] and sorted(summary['generated']) == ['eixo.json', os.path.join('sub', 'rolo.json')]
+    assert (out / 'eixo.pdf').read_bytes().startswith(b'%PDF') and (out / 'sub' / 'rolo.pdf').exists()
+    assert set(json.loads((out / MANIFEST_NAME).read_text(encoding='utf-8'))) == {'eixo.json', os.path.join('sub', 'rolo.json')}
+
+    params = make_params('linear', True, 'pequena', 1)
+    (folder / 'eixo.json').write_text(json.dumps(params), encoding='utf-8')
+    (folder / 'quebrado.json').write_text('{', encoding='utf-8')
+    summary = run_batch(str(folder), str(out), CONFIG, processes=1)
+    assert summary['generated'] == ['eixo.json'] and summary['skipped'] == [os.path.join('sub', 'rolo.json')]
+    assert [f['rel'] for f in summary['failed']] == ['quebrado.json']
+    # O que falhou não entra no manifesto e é tentado de novo
+    assert 'quebrado.json' not in json.loads((out / MANIFEST_NAME).read_text(encoding='utf-8'))
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    for test in (test_plan_reports_uses_content_hash, test_run_batch_in_processes_and_skip_unchanged):
+        with tempfile.TemporaryDirectory() as d:
+            test(pathlib.Path(d))
+    print("OK")
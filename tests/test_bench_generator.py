@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# Smoke test do benchmark do gerador: executa um caso pequeno e a comparação com baseline
+
+import sys, os, json
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+from bench_generator import iter_cases, run_case, compare, main, DEFAULT_BASELINE
+
+
+def test_quick_matrix_covers_all_modes():
+    ids = [cid for cid, _ in iter_cases(quick=True)]
+    for mode in ('espiral', 'linear', 'quadrada', 'quadrada_continua'):
+        assert any(cid.startswith(mode + '-compacto') for cid in ids)
+        assert any(cid.startswith(mode + '-detalhado') for cid in ids)
+    # Matriz completa inclui peça muito grande e 20 camadas
+    full = [cid for cid, _ in iter_cases(quick=False)]
+    assert any('muito_grande' in cid for cid in full)
+    assert any(cid.endswith('-20c') for cid in full)
+
+
+def test_run_case_and_compare():
+    params = dict(iter_cases(quick=True))['linear-compacto-pequena-1c']
+    res = run_case(params, repeats=1)
+    assert res['lines'] > 0 and res['lines_per_s'] > 0 and res['peak_kib'] > 0
+    # Tempo fixo acima do limiar de ruído para que a comparação de velocidade valha
+    res['seconds'] = 1.0
+    baseline = {'cases': {'x': dict(res)}}
+    assert compare({'x': res}, baseline) == []
+    slower = dict(res, lines_per_s=res['lines_per_s'] * 0.5)
+    assert compare({'x': slower}, baseline)
+    changed = dict(res, lines=res['lines'] + 1)
+    assert compare({'x': changed}, baseline)
+
+
+def test_baseline_is_per_machine_and_advisory(tmp_path):
+    # Baseline fora do repositório: linhas/s de uma máquina não valem em outra
+    assert not str(DEFAULT_BASELINE).startswith(PROJECT_ROOT)
+    args = ['--quick', '--filter', 'linear-compacto-pequena-1c', '--repeats', '1', '--no-memory', '--compare']
+    missing = str(tmp_path / 'sem_baseline.json')
+    assert main(args + ['--baseline', missing]) == 2
+    assert main(args + ['--baseline', missing, '--advisory']) == 0
+    # Regressão (aqui, número de linhas diferente) só falha sem --advisory
+    baseline = tmp_path / 'baseline.json'
+    main(['--quick', '--filter', 'linear-compacto-pequena-1c', '--repeats', '1', '--no-memory', '--save-baseline', '--baseline', str(baseline)])
+    data = json.loads(baseline.read_text(encoding='utf-8'))
+    data['cases']['linear-compacto-pequena-1c']['lines'] += 1
+    baseline.write_text(json.dumps(data), encoding='utf-8')
+    assert main(args + ['--baseline', str(baseline)]) == 1
+    assert main(args + ['--baseline', str(baseline), '--advisory']) == 0
+
+
+if __name__ == "__main__":
+    test_quick_matrix_covers_all_modes()
+    test_run_case_and_compare()
+    import tempfile, pathlib
+    with tempfile.TemporaryDirectory() as d:
+        test_baseline_is_per_machine_and_advisory(pathlib.Path(d))
+    print("OK")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# Testa o benchmark de inicialização: leitura do -X importtime, destaques e tempos desde o lançamento
+
+import sys, os, time
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+
+import pytest
+from bench_startup import parse_importtime, heaviest_imports, slowest_steps, run_app, summarize
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _io
+import time:      3000 |       9000 |   tkinter
+import time:     60000 |      70000 |   matplotlib.figure
+import time:      5000 |      90000 | TFM_GCODE
+"""
+
+# App falso: grava o relatório como o modo de medição do TFM_GCODE faria
+FAKE_APP = """
+import json, os, time
+now = time.time()
+marks = {'splash': {'ms': 10.0, 'epoch': now}, 'interativo': {'ms': 30.0, 'epoch': now + 0.02},
+         'primeira_previa': {'ms': 80.0, 'epoch': now + 0.07}}
+steps = [{'step': 'janela:widgets', 'start_ms': 12.0, 'ms': 15.0}, {'step': 'figura:0', 'start_ms': 40.0, 'ms': 60.0}]
+with open(os.environ['TFM_STARTUP_TIMING'], 'w') as f:
+    json.dump({'marks': marks, 'steps': steps}, f)
+assert os.environ['TFM_STARTUP_EXIT'] == '1'
+"""
+
+
+def test_parse_importtime_and_flag_heaviest():
+    entries = parse_importtime(IMPORTTIME)
+    assert [e['module'] for e in entries] == ['_io', 'tkinter', 'matplotlib.figure', 'TFM_GCODE']
+    assert [e['depth'] for e in entries] == [2, 1, 1, 0]
+    assert entries[2]['self_ms'] == 60.0 and entries[3]['cumulative_ms'] == 90.0
+    heavy = heaviest_imports(entries, top=5, flag_ms=50.0)
+    assert [(e['module'], e['flagged']) for e in heavy] == [('matplotlib.figure', True), ('tkinter', False)]
+
+
+def test_run_app_reads_milestones_since_launch(tmp_path):
+    script = tmp_path / 'fake_app.py'
+    script.write_text(FAKE_APP, encoding='utf-8')
+    t0 = time.time()
+    run = run_app([sys.executable, str(script)], timeout=60)
+    elapsed_ms = (time.time() - t0) * 1000.0
+    assert 0 < run['time_to_splash_ms'] <= run['time_to_interactive_ms'] <= run['time_to_first_preview_ms']
+    assert run['time_to_first_preview_ms'] - run['time_to_splash_ms'] == pytest.approx(70.0, abs=0.01)
+    assert run['time_to_gcode_preview_ms'] is None and run['wall_ms'] <= elapsed_ms
+
+    summary = summarize([run, dict(run, time_to_splash_ms=run['time_to_splash_ms'] + 2.0)])
+    assert summary['metrics']['time_to_splash_ms'] == pytest.approx(run['time_to_splash_ms'] + 1.0)
+    slow = slowest_steps(summary['steps'], flag_ms=50.0)
+    assert [(s['step'], s['flagged']) for s in slow] == [('figura:0', True), ('janela:widgets', False)]
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_parse_importtime_and_flag_heaviest()
+    with tempfile.TemporaryDirectory() as d:
+        test_run_app_reads_milestones_since_launch(pathlib.Path(d))
+    print("OK")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# Testa a gravação agrupada e atômica do config.json em segundo plano
+
+import sys, os, json, time
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+from config_store import ConfigStore, dumps_config
+
+
+def _wait(predicate, timeout=5.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_saves_are_batched_and_written_in_background(tmp_path):
+    path = tmp_path / 'config' / 'config.json'
+    store = ConfigStore(str(path), interval_s=0.3)
+    config = {'ui': {'sashes': {'main': None}}}
+    assert store.save(config)
+    # Igual ao pendente: nada a fazer
+    assert not store.save(config)
+    assert _wait(lambda: path.exists())
+    assert json.loads(path.read_text(encoding='utf-8')) == config
+    first_write = os.stat(path).st_mtime_ns
+
+    # Várias alterações dentro do intervalo viram uma única gravação com o último estado
+    for x in range(20):
+        config['ui']['sashes']['main'] = {'x': x, 'y': 0}
+        store.save(config)
+    assert path.read_text(encoding='utf-8') != dumps_config(config)
+    assert _wait(lambda: not store.pending())
+    assert path.read_text(encoding='utf-8') == dumps_config(config)
+    assert os.stat(path).st_mtime_ns >= first_write
+    # Sem temporários esquecidos na pasta
+    assert os.listdir(path.parent) == ['config.json']
+    store.close()
+
+
+def test_unchanged_config_is_not_rewritten_and_flush_on_close(tmp_path):
+    path = tmp_path / 'config.json'
+    config = {'costs': {'labor_brl_hour': 40.0}}
+    path.write_text(dumps_config(config), encoding='utf-8')
+    store = ConfigStore(str(path), interval_s=60.0)
+    # Conteúdo igual ao do disco (ex.: config recém-carregado): não grava
+    assert not store.save(config)
+
+    store.save({'costs': {'labor_brl_hour': 45.0}})
+    store.flush()
+    config['costs']['labor_brl_hour'] = 50.0
+    store.save(config)
+    # Dentro do intervalo a thread ainda espera; ao fechar, o pendente é gravado na hora
+    time.sleep(0.05)
+    assert json.loads(path.read_text(encoding='utf-8'))['costs']['labor_brl_hour'] == 45.0
+    assert store.close() is True
+    assert json.loads(path.read_text(encoding='utf-8'))['costs']['labor_brl_hour'] == 50.0
+    assert not store.save({'depois': True})
+
+
+def test_ensure_dir_checks_each_path_once(tmp_path):
+    store = ConfigStore(str(tmp_path / 'config.json'))
+    target = tmp_path / 'data' / 'procedures'
+    assert store.ensure_dir(str(target)) and target.is_dir()
+    target.rmdir()
+    # Já verificado: não repete o makedirs
+    assert not store.ensure_dir(str(target)) and not target.exists()
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    for test in (test_saves_are_batched_and_written_in_background,
+                 test_unchanged_config_is_not_rewritten_and_flush_on_close, test_ensure_dir_checks_each_path_once):
+        with tempfile.TemporaryDirectory() as d:
+            test(pathlib.Path(d))
+    print("OK")
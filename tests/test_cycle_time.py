@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# Testa a tabela de movimentos (leitura vetorizada x linha a linha), o simulador de tempo de ciclo e o perfil do Mach3
+
+import sys, os, math, shutil
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+import numpy as np
+import toolpath
+from toolpath import parse_moves, MOTION_BARRIER
+from cycle_time import simulate
+from mach3_profile import load_mach3_profile, MachineModel
+from TFM_GCODE import GCodeGenerator
+from generator_cases import make_params
+
+
+def _limits(velocity=600.0, accel=10.0, lookahead=20):
+    machine = MachineModel.default()
+    for axis in machine.axes.values():
+        axis['velocity'], axis['acceleration'] = velocity, accel
+    machine.lookahead = lookahead
+    return machine
+
+
+def test_vectorized_parse_matches_line_parser():
+    for mode in ('linear', 'quadrada', 'quadrada_continua'):
+        lines = GCodeGenerator().generate(make_params(mode, False, 'pequena', 2))
+        fast = toolpath._parse_vectorized(lines, False)
+        slow = toolpath._parse_lines(lines, False)
+        assert fast is not None and fast.axes == slow.axes
+        for name in ('start', 'end', 'feed', 'motion', 'layer', 'line', 'exact_stop', 'dwell_s'):
+            assert np.array_equal(getattr(fast, name), getattr(slow, name)), (mode, name)
+        assert fast.layers() == [0, 1]
+    # G91/G02 ficam com o interpretador linha a linha
+    assert toolpath._parse_vectorized(["G91", "G01 X1 F100"], False) is None
+    table = parse_moves(["G01 F100 X1", "G91", "G01 X1", "G90 M0", "G18 G02 X0 Z0 I-1 K0"])
+    assert table.column('X').tolist()[:2] == [1.0, 2.0]
+    assert table.motion[2] == MOTION_BARRIER
+    # Meia volta de raio 1 no plano XZ, de X2 a X0
+    assert math.isclose(table.lengths()[-1], math.pi, rel_tol=1e-9)
+
+
+def test_exact_stop_trapezoid_matches_hand_calculation():
+    # 100 mm a 600 mm/min (10 mm/s) com a = 10 mm/s²: 1 s acelerando e 1 s freando (5 mm cada), 9 s em cruzeiro
+    table = parse_moves(["G61", "G01 F600 X100"])
+    assert math.isclose(simulate(table, _limits())['total_s'], 11.0, rel_tol=1e-9)
+    # Curto demais para atingir o cruzeiro: perfil triangular, t = 2·sqrt(L/a)
+    table = parse_moves(["G01 F600 X2"])
+    assert math.isclose(simulate(table, _limits())['total_s'], 2 * math.sqrt(0.2), rel_tol=1e-9)
+    # Limite do eixo prevalece sobre o F programado
+    table = parse_moves(["G61", "G01 F6000 X100"])
+    assert math.isclose(simulate(table, _limits())['total_s'], 11.0, rel_tol=1e-9)
+
+
+def test_constant_velocity_and_lookahead():
+    lines = ["G01 F600 X%d" % i for i in range(1, 51)]
+    cv = simulate(parse_moves(lines), _limits())['total_s']
+    stop = simulate(parse_moves(lines), _limits(), cv=False)['total_s']
+    # Em CV os 50 mm colineares viram um único trapézio: rampas de 1 s (5 mm cada) + 4 s de cruzeiro
+    assert math.isclose(cv, 6.0, rel_tol=1e-9)
+    assert stop > cv
+    # Janela de 1 movimento: precisa conseguir parar ao fim de cada 1 mm
+    short = simulate(parse_moves(lines), _limits(lookahead=1))['total_s']
+    assert cv < short < stop
+
+
+def test_per_layer_sum_and_profile_cache(tmp_path):
+    lines = GCodeGenerator().generate(make_params('quadrada', False, 'pequena', 2))
+    src = os.path.join(PROJECT_ROOT, 'Mach3Mill.xml')
+    machine = load_mach3_profile(src)
+    assert machine.lookahead == 20 and machine.axis('A')['angular']
+    assert load_mach3_profile(src) is machine
+    result = simulate(parse_moves(lines), machine)
+    assert sorted(result['per_layer_s']) == [0, 1]
+    header = result['total_s'] - sum(result['per_layer_s'].values())
+    assert result['total_s'] > 0 and header >= -1e-6
+    # Sintonia do motor no perfil e releitura quando o arquivo muda
+    path = tmp_path / 'PTA.xml'
+    shutil.copy(src, path)
+    first = load_mach3_profile(str(path))
+    text = path.read_text(encoding='utf-8').replace('<LookAhead>20</LookAhead>', '<LookAhead>5</LookAhead><Motor0><Velocity>3000</Velocity><Acceleration>250</Acceleration></Motor0>')
+    path.write_text(text, encoding='utf-8')
+    os.utime(path, ns=(os.stat(path).st_mtime_ns + 10**9,) * 2)
+    second = load_mach3_profile(str(path))
+    assert second is not first and second.lookahead == 5
+    assert second.velocity('X') == 3000.0 and second.acceleration('X') == 250.0
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_vectorized_parse_matches_line_parser()
+    test_exact_stop_trapezoid_matches_hand_calculation()
+    test_constant_velocity_and_lookahead()
+    test_per_layer_sum_and_profile_cache(pathlib.Path(tempfile.mkdtemp()))
+    print("OK")
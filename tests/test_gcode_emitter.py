@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# Testa o emissor de G-code: saída idêntica às f-strings .3f/.1f e precisão vinda do formato de saída
+
+import sys, os, re, random
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+import numpy as np
+from gcode_emitter import GCodeEmitter, OutputFormat
+from TFM_GCODE import GCodeGenerator
+from generator_cases import make_params
+
+
+def test_bulk_format_is_byte_identical():
+    rng = random.Random(1234)
+    values = [rng.uniform(-5000, 5000) for _ in range(5000)]
+    # Casos de borda: zero negativo, empates de arredondamento e valores grandes
+    values += [0.0, -0.0, -0.0004, 0.0005, 0.0015, 2.675, -2.675, 1e9 + 0.0005, 0.1 + 0.2, -1e-12]
+    em = GCodeEmitter()
+    feed = 687.45
+    assert em.moves('G01', feed, X=values) == [f"G01 F{feed:.1f} X{v:.3f}" for v in values]
+    arr = np.array(values)
+    assert em.moves('G01', feed, X=arr, A=arr * 3.7) == [f"G01 F{feed:.1f} X{x:.3f} A{a:.3f}" for x, a in zip(values, (arr * 3.7).tolist())]
+    assert em.format_column('Z', arr) == [f"Z{v:.3f}" for v in values]
+    assert em.move('G00', X=-0.0001, A=12.3456) == "G00 X-0.000 A12.346"
+    assert em.move('G01', 1200, Z=5) == "G01 F1200.0 Z5.000"
+    assert em.moves('G01', 100, X=[]) == []
+
+
+def test_output_format_precision():
+    fmt = OutputFormat(decimals={'A': 4, 'f': 0})
+    em = GCodeEmitter(fmt)
+    assert em.move('G01', 99.6, X=1, A=1.23456) == "G01 F100 X1.000 A1.2346"
+    assert OutputFormat.from_dict(fmt.to_dict()) == fmt
+    try:
+        OutputFormat(decimals={'X': 9})
+        assert False, "precisão inválida aceita"
+    except ValueError:
+        pass
+    # O gerador usa o formato em todas as palavras de eixo
+    lines = GCodeGenerator(fmt).generate(make_params('linear', False, 'pequena', 1))
+    a_words = [w for line in lines if not line.startswith('(') for w in re.findall(r"\bA-?\d+\.\d+", line)]
+    assert a_words and all(len(w.split('.')[1]) == 4 for w in a_words)
+
+
+if __name__ == "__main__":
+    test_bulk_format_is_byte_identical()
+    test_output_format_precision()
+    print("OK")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# Testa o pós-processamento do G-code (compactação modal e ajuste de arcos): equivalência de estado e redução de tamanho
+
+import sys, os, re, math
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+from TFM_GCODE import GCodeGenerator
+from gcode_postprocess import compact_modal, fit_arcs
+from generator_cases import make_params
+
+WORD = re.compile(r"([A-Z])([-+]?\d*\.?\d+)")
+
+
+def _checkpoints(lines):
+    """Interpreta o programa (modal) e devolve o estado em cada linha que não é movimento simples.
+
+    Em comentários/M-codes compara só a posição; o modal G/F importa apenas para linhas que movem.
+    """
+    state = {'G': None, 'F': None}
+    pos = {}
+    points = []
+    for line in lines:
+        code = line.split('(', 1)[0].strip()
+        words = WORD.findall(code.upper())
+        letters = {l for l, _ in words}
+        for l, v in words:
+            if l == 'G' and v.lstrip('0') in ('', '1', '2', '3'):
+                state['G'] = int(float(v))
+            elif l == 'F':
+                state['F'] = float(v)
+            elif l in 'XYZABC':
+                pos[l] = float(v)
+        if not code or not letters <= set('GFXYZABC') or any(l == 'G' and v.lstrip('0') not in ('', '1') for l, v in words):
+            moves = bool(letters & set('XYZABC'))
+            points.append((line if not code or 'M' in letters else code, dict(pos),
+                           state['G'] if moves else None, state['F'] if moves else None))
+    points.append(('fim', dict(pos), state['G'], state['F']))
+    return points
+
+
+def test_compaction_preserves_state_at_every_barrier():
+    gen = GCodeGenerator()
+    for mode in ('espiral', 'linear', 'quadrada', 'quadrada_continua'):
+        for compact in (True, False):
+            original = gen.generate(make_params(mode, compact, 'pequena', 2))
+            compacted, stats = compact_modal(original)
+            assert stats['lines_out'] <= stats['lines_in'] and stats['bytes_out'] < stats['bytes_in'], (mode, compact)
+            # Comentários, M-codes e G0/G53 aparecem com o mesmo estado de posição/avanço
+            assert _checkpoints(compacted) == _checkpoints(original), (mode, compact)
+
+
+def test_collinear_merge_and_modal_words():
+    lines = ["G90", "G01 F100.0 X0.000", "G01 F100.0 X1.000", "G01 F100.0 X2.000", "G01 F100.0 X1.000",
+             "G01 F200.0 X3.000", "G01 F200.0 X3.000 A0", "(marca)", "G01 F200.0 X4.000 A1.000"]
+    out, stats = compact_modal(lines)
+    # X0->X1->X2 fundidos; X2->X1 inverte direção (não funde); F muda em X3
+    assert out == ["G90", "G01 F100.0 X0.000", "X2.000", "X1.000", "F200.0 X3.000", "A0", "(marca)", "X4.000 A1.000"]
+    assert stats['merged_moves'] == 1
+
+
+def test_tolerance_and_barriers():
+    # Ponto fora da reta além da tolerância não é fundido
+    lines = ["G01 F100 X0 Z0", "G01 F100 X1 Z0.01", "G01 F100 X2 Z0"]
+    assert len(compact_modal(lines, tol=0.001)[0]) == 3
+    assert compact_modal(lines, tol=0.05)[0] == ["G01 F100 X0 Z0", "X2"]
+    # G91 suspende a compactação até G90
+    inc = ["G91", "G01 F100 X1", "G01 F100 X1", "G90", "G01 F100 X5", "G01 F100 X5"]
+    assert compact_modal(inc)[0] == ["G91", "G01 F100 X1", "G01 F100 X1", "G90", "G01 F100 X5"]
+    # Palavras desconhecidas (dwell) passam intactas
+    assert compact_modal(["G04 P0.5"])[0] == ["G04 P0.5"]
+
+
+def test_generator_flag():
+    gen = GCodeGenerator()
+    params = make_params('linear', False, 'pequena', 1, modal_compaction=True)
+    out = gen.generate(params)
+    stats = gen.last_compaction_stats
+    assert stats and stats['lines_out'] == len(out) and stats['lines_out'] < stats['lines_in']
+    gen.generate(make_params('linear', False, 'pequena', 1))
+    assert gen.last_compaction_stats is None
+
+
+def test_arc_fitting_xz_arc_and_modal_after_arc():
+    # Quarto de círculo de raio 10 no plano ZX (G18), centro em X0 Z0, de X+ para Z+ (horário em Z-X)
+    pts = [(10 * math.cos(math.radians(t)), 10 * math.sin(math.radians(t))) for t in range(0, 91, 5)]
+    lines = ["G18", "G01 F300.0 X10.000 Z0.000"]
+    lines += [f"G01 F300.0 X{x:.3f} Z{z:.3f}" for x, z in pts[1:]]
+    lines += ["X5.000", "M30"]
+    out, stats = fit_arcs(lines, chord_tol=0.01)
+    assert stats['arcs'] == 1 and stats['merged_moves'] == len(pts) - 1
+    arc = out[2]
+    assert arc.startswith('G02') and 'X0.000' in arc and 'Z10.000' in arc
+    assert 'I-10.000' in arc and 'K0.000' in arc
+    # Linha sem G após o arco recebe o G01 original para não herdar o G02/G03
+    assert out[3] == "G01 X5.000" and out[-1] == "M30"
+    # Tolerância apertada demais: os G01 ficam como estavam
+    assert fit_arcs(lines, chord_tol=1e-5)[0] == lines
+
+
+def test_helix_merge_uses_radius_for_a():
+    # Hélice: X e A com passo constante; desvio de 0.1° em A vale ~0.087 mm com raio 50 e 0.1 "mm" sem raio
+    lines = ["G01 F500.0 X0.000 Z52.000 A0.000"]
+    lines += [f"G01 F500.0 X{i * 10:.3f} A{i + (0.1 if i == 2 else 0):.3f}" for i in range(1, 5)]
+    out, stats = fit_arcs(lines, chord_tol=0.095, radius_offset=2.0)
+    assert out == ["G01 F500.0 X0.000 Z52.000 A0.000", "G01 F500.0 X40.000 A4.000"]
+    assert stats['line_moves'] == 1 and stats['merged_moves'] == 4
+    assert len(fit_arcs(lines, chord_tol=0.095)[0]) > 2
+    # Retrocesso sobre a mesma reta não é fundido
+    back = ["G01 F100 X0", "G01 F100 X2", "G01 F100 X1", "G01 F100 X3"]
+    assert fit_arcs(back)[0] == back
+
+
+def test_arc_fitting_preserves_state_and_generator_flag():
+    gen = GCodeGenerator()
+    for mode in ('espiral', 'linear', 'quadrada', 'quadrada_continua'):
+        original = gen.generate(make_params(mode, False, 'pequena', 2))
+        fitted, stats = fit_arcs(original, chord_tol=0.01, radius_offset=5.0)
+        assert stats['lines_out'] <= stats['lines_in'], mode
+        assert _checkpoints(fitted) == _checkpoints(original), mode
+    params = make_params('linear', False, 'pequena', 1, arc_fitting=True, modal_compaction=True)
+    out = gen.generate(params)
+    assert gen.last_fitting_stats['merged_moves'] > 0
+    assert gen.last_compaction_stats['lines_in'] == gen.last_fitting_stats['lines_out'] == len(out) + (
+        gen.last_compaction_stats['lines_in'] - gen.last_compaction_stats['lines_out'])
+
+
+if __name__ == "__main__":
+    test_compaction_preserves_state_at_every_barrier()
+    test_collinear_merge_and_modal_words()
+    test_tolerance_and_barriers()
+    test_generator_flag()
+    test_arc_fitting_xz_arc_and_modal_after_arc()
+    test_helix_merge_uses_radius_for_a()
+    test_arc_fitting_preserves_state_and_generator_flag()
+    print("OK")
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# Verifica a saída do gerador contra os hashes de referência (tests/fixtures/golden_gcode.json)
+
+import sys, os
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+import golden_gcode
+from golden_gcode import check, first_difference, load_snapshots, write_snapshots, normalize_lines, load_golden, iter_golden_cases
+
+
+def test_generator_matches_golden():
+    assert set(load_golden()) == {cid for cid, _ in iter_golden_cases()}
+    assert check(verbose=True) == []
+
+
+def test_date_line_is_neutralized():
+    lines = normalize_lines(["%", "(Data: 01/01/2025 10:00:00)", "G21"])
+    assert lines[1] == golden_gcode.DATE_PLACEHOLDER
+
+
+def test_first_difference_and_snapshots(tmp_path):
+    assert first_difference(["a", "b"], ["a", "b"]) is None
+    assert first_difference(["a", "b", "c"], ["a", "x", "c"]) == (1, "b", "x")
+    assert first_difference(["a"], ["a", "b"]) == (1, None, "b")
+    path = tmp_path / 'snap.xz'
+    write_snapshots({'c1': ["G00 X1", "", "M30"], 'c2': ["%"]}, path)
+    assert load_snapshots(path) == {'c1': ["G00 X1", "", "M30"], 'c2': ["%"]}
+    assert load_snapshots(path, wanted={'c2'}) == {'c2': ["%"]}
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_generator_matches_golden()
+    test_date_line_is_neutralized()
+    with tempfile.TemporaryDirectory() as d:
+        test_first_difference_and_snapshots(pathlib.Path(d))
+    print("OK")
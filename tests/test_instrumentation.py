@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# Testa a instrumentação de tempos por fase (resumo, histograma, exportação e cProfile) e da inicialização
+
+import sys, os, csv, json, time, subprocess
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+from instrumentation import Instrumentation, StartupTimeline
+
+
+def test_summary_and_histogram():
+    inst = Instrumentation(window=5)
+    for ms in (1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0):
+        inst.record('fase', ms)
+    st = inst.summary()['fase']
+    # Janela deslizante mantém apenas as 5 últimas amostras
+    assert st['count'] == 5 and st['total'] == 7
+    assert st['p50_ms'] == 5.0 and st['max_ms'] == 7.0 and st['last_ms'] == 7.0
+    edges, counts = inst.histogram('fase', bins=4)
+    assert len(edges) == 5 and sum(counts) == 5
+    assert len(inst.sparkline('fase', bins=4)) == 4
+
+
+def test_timer_decorator_and_disable():
+    inst = Instrumentation()
+
+    @inst.timed('dec')
+    def work(x):
+        return x * 2
+
+    assert work(3) == 6
+    with inst.timer('bloco'):
+        time.sleep(0.001)
+    assert inst.summary()['bloco']['max_ms'] >= 1.0
+    inst.enabled = False
+    work(1)
+    assert inst.summary()['dec']['count'] == 1
+
+
+def test_export_and_profile(tmp_path):
+    inst = Instrumentation()
+    inst.record('a', 1.5); inst.record('b', 2.5)
+    inst.export_json(tmp_path / 'perf.json')
+    data = json.loads((tmp_path / 'perf.json').read_text(encoding='utf-8'))
+    assert set(data['summary']) == {'a', 'b'}
+    inst.export_csv(tmp_path / 'perf.csv')
+    with open(tmp_path / 'perf.csv', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert rows[0][0] == 'phase' and len(rows) == 3
+
+    # Sem captura ativa não há perfil
+    with inst.profile('x'):
+        sum(range(1000))
+    assert inst.slowest_profile() is None
+    inst.profiling = True
+    with inst.profile('rapida'):
+        sum(range(10))
+    with inst.profile('lenta'):
+        time.sleep(0.01)
+    assert inst.slowest_profile()[1] == 'lenta'
+    assert 'lenta' in inst.profile_text()
+    assert inst.dump_profile(str(tmp_path / 'lenta.prof'))
+
+
+def test_startup_timeline_reports_once(tmp_path, capsys):
+    timeline = StartupTimeline(origin=time.perf_counter())
+    with timeline.step('janela'):
+        time.sleep(0.001)
+    timeline.mark('interativo'); timeline.mark('interativo')
+    assert timeline.has('interativo') and not timeline.has('interativo', 'primeira_previa')
+    # Desabilitado: coleta, mas não imprime
+    assert timeline.report() is False
+    timeline.configure(enabled=True, output=str(tmp_path / 'startup.json'))
+    assert timeline.report() is True and timeline.report() is False
+    assert 'interativo' in capsys.readouterr().out
+    data = json.loads((tmp_path / 'startup.json').read_text(encoding='utf-8'))
+    assert list(data['marks']) == ['interativo'] and data['steps'][0]['ms'] >= 1.0
+
+
+def test_app_import_defers_heavy_modules():
+    # Matplotlib, NumPy e ReportLab ficam para depois da janela aparecer
+    code = ("import sys; import TFM_GCODE; "
+            "print(','.join(m for m in ('matplotlib', 'numpy', 'reportlab') if m in sys.modules))")
+    out = subprocess.run([sys.executable, '-c', code], cwd=os.path.join(PROJECT_ROOT, 'src', 'app'),
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip() == ''
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_summary_and_histogram()
+    test_timer_decorator_and_disable()
+    with tempfile.TemporaryDirectory() as d:
+        test_export_and_profile(pathlib.Path(d))
+    test_app_import_defers_heavy_modules()
+    print("OK")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# Testa o pacote de trabalho .tfmjob: ida e volta do programa/procedimento e tabela de movimentos mapeada em memória
+
+import sys, os, json, zipfile
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+import numpy as np
+from job_archive import save_job, JobArchive
+from toolpath import parse_moves
+import TFM_GCODE
+from TFM_GCODE import GCodeGenerator, TFM_GCODE as App
+from mach3_profile import MachineModel
+from generator_cases import make_params
+
+
+def test_roundtrip_with_memmapped_moves(tmp_path):
+    params = make_params('quadrada', False, 'pequena', 2)
+    lines = GCodeGenerator().generate(dict(params))
+    table = parse_moves(lines)
+    path = str(tmp_path / 'os123.tfmjob')
+    manifest = save_job(path, params, iter(lines), table=table, images={'fig.png': b'\x89PNG\r\n'}, summary={'cycle_time_s': 12.5})
+    assert manifest['gcode']['lines'] == len(lines)
+    with JobArchive(path) as job:
+        assert job.params == json.loads(json.dumps(params, default=str))
+        assert job.manifest['summary'] == {'cycle_time_s': 12.5}
+        assert list(job.gcode_lines()) == lines and job.gcode_text() == "\n".join(lines)
+        moves = job.move_table()
+        assert isinstance(moves.end, np.memmap) and moves.axes == table.axes
+        for name in ('start', 'end', 'feed', 'motion', 'layer', 'line', 'exact_stop', 'dwell_s'):
+            assert np.array_equal(np.asarray(getattr(moves, name)), getattr(table, name)), name
+        assert np.array_equal(np.asarray(moves.arc_len), table.arc_len, equal_nan=True)
+        assert job.image_names() == ['fig.png'] and job.read_image('fig.png') == b'\x89PNG\r\n'
+    # Programa comprimido; colunas sem compressão (mapeáveis)
+    with zipfile.ZipFile(path) as zf:
+        assert zf.getinfo('program.tap').compress_type == zipfile.ZIP_DEFLATED
+        assert zf.getinfo('moves/end.npy').compress_type == zipfile.ZIP_STORED
+
+
+def test_job_without_moves_and_invalid_file(tmp_path):
+    path = str(tmp_path / 'sem_tabela.tfmjob')
+    save_job(path, {'nome_procedimento': 'Teste'}, ["G00 X0", "M30"])
+    with JobArchive(path) as job:
+        assert job.move_table() is None and job.manifest['name'] == 'Teste'
+    other = tmp_path / 'outro.zip'
+    with zipfile.ZipFile(other, 'w') as zf:
+        zf.writestr('manifest.json', json.dumps({'format': 'outro'}))
+    try:
+        JobArchive(str(other))
+        assert False, "pacote inválido aceito"
+    except ValueError:
+        pass
+
+
+def test_save_over_open_job(tmp_path, monkeypatch):
+    # "Salvar Trabalho" no arquivo do pacote aberto: tabela copiada para a memória e pacote fechado antes de substituir
+    params = make_params('linear', True, 'pequena', 1)
+    lines = GCodeGenerator().generate(dict(params))
+    table = parse_moves(lines)
+    path = str(tmp_path / 'os7.tfmjob')
+    save_job(path, params, lines, table=table)
+    app = App.__new__(App)
+    app._job = job = JobArchive(path)
+    app._job_key, app._job_lines = 'chave', list(job.gcode_lines())
+    assert isinstance(job.move_table().end, np.memmap)
+    notes = []
+    app.show_notification = lambda msg, kind='info', **k: notes.append((kind, msg))
+    app._get_current_params = lambda: dict(params)
+    app._procedure_data = lambda: dict(params)
+    app._refresh_machine = MachineModel.default
+    app._generate_gcode_cached = lambda p: app._job_lines
+    app._analyze_gcode_cached = lambda l: {}
+    app._params_digest = lambda p: 'x'
+    monkeypatch.setattr(TFM_GCODE.filedialog, 'asksaveasfilename', lambda **k: path)
+    app._save_job()
+    assert notes and notes[-1][0] == 'success', notes
+    assert app._job is None and job._zip.fp is None
+    with JobArchive(path) as saved:
+        assert list(saved.gcode_lines()) == lines
+        assert np.array_equal(np.asarray(saved.move_table().end), table.end)
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
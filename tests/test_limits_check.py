@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# Testa a verificação vetorizada de curso, avanço e aceleração por eixo contra o modelo da máquina
+
+import sys, os
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+from toolpath import parse_moves
+from limits_check import check_limits, summarize
+from mach3_profile import MachineModel
+import TFM_GCODE
+from TFM_GCODE import GCodeGenerator, TFM_GCODE as App
+from generator_cases import make_params
+
+
+def _machine():
+    machine = MachineModel.default()
+    machine.soft_limits_enabled = True
+    for axis in machine.axes.values():
+        axis['soft_min'], axis['soft_max'] = -100.0, 100.0
+    machine.axes['A'].update(tuned=True, velocity=500.0, soft_min=None, soft_max=None)
+    machine.axes['X'].update(accel_tuned=True, acceleration=50.0)
+    return machine
+
+
+def test_travel_and_axis_feed():
+    program = ["G01 F600 X10", "G01 X150", "G01 X10 A100", "M0", "G53 G0 Z0", "G01 F1200 A300", "G00 Z-101"]
+    report = check_limits(parse_moves(program), _machine())
+    assert not report['ok']
+    # Linha 2: X fora do curso; linha 6: A a 1200 graus/min; linha 7: Z abaixo do mínimo (G53 não conta)
+    assert report['checks'] == {'travel:X': [2], 'travel:Z': [7], 'feed:A': [6]}
+    assert report['lines'] == [2, 6, 7]
+    assert "curso X: 1 linha(s) (2)" in summarize(report)
+    # Envelope informado substitui os limites do perfil
+    assert check_limits(parse_moves(program), _machine(), envelope={'X': (None, 200.0), 'Z': (-200.0, 0.0)})['checks'] == {'feed:A': [6]}
+
+
+def test_axis_acceleration_only_in_constant_velocity():
+    # Reversão de X a 6000 mm/min em segmentos de 1 mm: 200 mm/s em 10 ms
+    program = ["G01 F6000 X1", "G01 X0", "G01 X1"]
+    assert check_limits(parse_moves(program), _machine())['checks'] == {'accel:X': [2, 3]}
+    assert check_limits(parse_moves(["G61"] + program), _machine())['ok']
+    # Segmentos longos e lentos: variação dentro da aceleração
+    assert check_limits(parse_moves(["G01 F60 X100", "G01 X0"]), _machine())['ok']
+
+
+def test_generated_program_within_default_machine():
+    lines = GCodeGenerator().generate(make_params('quadrada_continua', False, 'pequena', 2))
+    report = check_limits(parse_moves(lines))
+    assert report == {'ok': True, 'lines': [], 'checks': {}} and summarize(report) == ""
+
+
+def test_streamed_mach3_program_is_checked_before_launch(tmp_path, monkeypatch):
+    # Sem programa na pré-visualização: gravado em fluxo, conferido no arquivo e removido se recusado
+    machine = _machine()
+    machine.axes['X'].update(soft_min=-10.0, soft_max=10.0)
+    app = App.__new__(App)
+    app.config = {'integration': {'gcode_dir': str(tmp_path), 'mach3_path': str(tmp_path / 'Mach3.exe')}}
+    app.gcode_generator = GCodeGenerator()
+    notes, launched, asked = [], [], []
+    app.show_notification = lambda msg, *a, **k: notes.append(msg)
+    app._save_sash_positions = lambda: None
+    app._ensure_mach3_macros = lambda: None
+    app._get_current_params = lambda: make_params('linear', True, 'pequena', 1)
+    app._cached_gcode = lambda params: None
+    app._refresh_machine = lambda: machine
+    (tmp_path / 'Mach3.exe').write_text('')
+    monkeypatch.setattr(TFM_GCODE.subprocess, 'Popen', lambda args, **k: launched.append(args))
+    monkeypatch.setattr(TFM_GCODE.messagebox, 'askyesno', lambda title, msg: asked.append(msg) or False)
+    app._open_in_mach3_clicked()
+    assert asked and "curso X" in asked[0]
+    assert not launched and sorted(os.listdir(tmp_path)) == ['Mach3.exe']
+    # Dentro dos limites: abre sem perguntar
+    app._refresh_machine = lambda: MachineModel.default()
+    asked.clear()
+    app._open_in_mach3_clicked()
+    assert not asked and len(launched) == 1 and launched[0][-1].endswith('.tap')
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# Testa o modelo da máquina lido do perfil do Mach3: cache por conteúdo, limites de software e limitação do avanço no gerador
+
+import sys, os, re, shutil
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+import mach3_profile
+from mach3_profile import load_mach3_profile, MachineModel
+from TFM_GCODE import GCodeGenerator
+from generator_cases import make_params
+
+SRC = os.path.join(PROJECT_ROOT, 'Mach3Mill.xml')
+
+
+def _tuned_copy(tmp_path, extra, replace=('<SoftLimit>0</SoftLimit>', '<SoftLimit>1</SoftLimit>')):
+    path = tmp_path / 'PTA.xml'
+    text = open(SRC, encoding='utf-8').read().replace(replace[0], replace[1])
+    path.write_text(text.replace('<LookAhead>', extra + '<LookAhead>'), encoding='utf-8')
+    return str(path)
+
+
+def test_checked_in_profile_has_no_motor_tuning():
+    machine = load_mach3_profile(SRC)
+    assert machine.name == 'Mach3Mill' and machine.cv_mode and machine.cv_angle_limit is None
+    assert machine.axis('X')['motor'] == 0 and machine.axis('A')['motor'] == 3
+    # Sem sintonia: velocidade = RapidFeed, não limita o avanço; limites de software desligados
+    assert machine.velocity('A') == 1000.0 and machine.max_feed('XA') is None
+    assert machine.soft_limits('X') == (None, None)
+
+
+def test_profile_cache_is_keyed_by_content(tmp_path, monkeypatch):
+    path = _tuned_copy(tmp_path, '<Motor3><Velocity>500</Velocity></Motor3>')
+    first = load_mach3_profile(path)
+    assert first.soft_limits('X') == (-100.0, 100.0)
+    calls = []
+    original = mach3_profile._parse_root
+    monkeypatch.setattr(mach3_profile, '_parse_root', lambda *a, **k: calls.append(1) or original(*a, **k))
+    # Arquivo apenas "tocado": hash igual, sem nova interpretação do XML
+    os.utime(path, ns=(os.stat(path).st_mtime_ns + 10**9,) * 2)
+    assert load_mach3_profile(path) is first and not calls
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(' ')
+    assert load_mach3_profile(path) is not first and len(calls) == 1
+
+
+def test_generator_clamps_feed_to_tuned_axes(tmp_path):
+    params = make_params('linear', False, 'pequena', 1)
+    plain = GCodeGenerator().generate(params)
+    machine = load_mach3_profile(_tuned_copy(tmp_path, '<Motor3><Velocity>500</Velocity></Motor3>'))
+    clamped = GCodeGenerator(machine=machine).generate(params)
+    assert len(plain) == len(clamped)
+    for before, after in zip(plain, clamped):
+        if ' A' in after and 'F' in after:
+            assert float(re.search(r"F([\d.]+)", after).group(1)) <= 500.0
+            assert float(re.search(r"F([\d.]+)", before).group(1)) >= float(re.search(r"F([\d.]+)", after).group(1))
+        else:
+            assert before == after
+    assert any(b != a for b, a in zip(plain, clamped))
+    # Modelo padrão (sem sintonia) não altera o programa
+    assert GCodeGenerator(machine=MachineModel.default()).generate(params) == plain
+    # Máquina por chamada: o gerador compartilhado não guarda a máquina da chamada anterior
+    body = lambda lines: [line for line in lines if not line.startswith('(Data:')]
+    shared = GCodeGenerator()
+    assert body(shared.generate(params, machine=machine)) == body(clamped)
+    assert body(shared.generate(params)) == body(plain) and shared.machine is None
+    assert body(shared.generate_iter(dict(params), machine=machine)) == body(clamped)
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
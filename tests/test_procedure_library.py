@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# Testa o índice da biblioteca de procedimentos: atualização incremental, buscas/ordenação e tempo/custo calculados
+
+import sys, os, json, math
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+import pytest
+import program_estimate
+from procedure_library import ProcedureIndex, default_index_path
+from process_estimates import estimate_process
+from program_estimate import estimate_program
+from toolpath import parse_moves
+from toolpath_stats import toolpath_statistics
+from TFM_GCODE import GCodeGenerator
+
+CONFIG = {'costs': {'powder_brl_kg': 100.0, 'gas_argon_brl_m3': 20.0, 'labor_brl_hour': 50.0, 'machine_brl_hour': 30.0}}
+
+
+def _procedure(name, os_number, diametro, powder, mode='espiral', **extra):
+    data = {'nome_procedimento': name, 'ordem_servico': os_number, 'diametro': diametro, 'comprimento_revestir': 50.0,
+            'largura_cordao': 8.0, 'sobreposicao': 50.0, 'velocidade_de_deposicao': 300.0, 'taxa_de_deposicao': 300.0,
+            'lead_in': 5.0, 'lead_out': 5.0, 'num_camadas': 2, 'afastamento_tocha': 12.0, 'espessura_camada': 2.0, 'vazao_gas': 12.0,
+            'powder_name': powder, 'powder_factor': 0.16, 'powder_cost_brl_kg': 100.0, 'taxa_deposicao_g_h': 0.0,
+            'welding_mode': mode, 'notes': ''}
+    if mode == 'oscilacao':
+        data.update({'oscilacao_comprimento': 20.0, 'deslocamento_angular_perc': 50.0, 'oscillation_type': 'linear'})
+    data.update(extra)
+    return data
+
+
+def _write(folder, filename, data, mtime_ns=None):
+    path = folder / filename
+    path.write_text(json.dumps(data), encoding='utf-8')
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    # Cache do usuário dentro da pasta temporária (o índice não fica na pasta de procedimentos)
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    monkeypatch.setenv('LOCALAPPDATA', str(tmp_path / 'cache'))
+    folder = tmp_path / 'procedures'
+    (folder / 'clientes').mkdir(parents=True)
+    _write(folder, 'eixo.json', _procedure('Eixo bomba', 'OS-100', 80.0, 'Stellite 6'))
+    _write(folder, 'clientes/rolo.json', _procedure('Rolo laminador', 'OS-205', 250.0, 'Inconel 625', mode='oscilacao'))
+    _write(folder, 'pino.json', _procedure('Pino guia', 'OS-101', 40.0, 'Stellite 6'))
+    _write(folder, 'quebrado.json', ['não', 'é', 'procedimento'])
+    return folder, ProcedureIndex(str(folder))
+
+
+def test_refresh_is_incremental(library):
+    folder, index = library
+    assert index.db_path == default_index_path(str(folder)) and os.path.exists(index.db_path)
+    # Índice local, fora da pasta compartilhada; pastas diferentes não dividem o índice
+    assert index.db_path.startswith(str(folder.parent / 'cache')) and not os.path.exists(f"{folder}.index.sqlite")
+    assert default_index_path(str(folder / 'clientes')) != index.db_path
+    assert index.refresh(CONFIG) == {'scanned': 4, 'added': 4, 'updated': 0, 'removed': 0, 'unchanged': 0, 'errors': 1}
+    assert index.refresh(CONFIG)['unchanged'] == 4
+
+    _write(folder, 'pino.json', _procedure('Pino guia', 'OS-101', 42.0, 'Stellite 6'), mtime_ns=2_000_000_000 * 10**9)
+    (folder / 'eixo.json').unlink()
+    stats = index.refresh(CONFIG)
+    assert (stats['added'], stats['updated'], stats['removed'], stats['unchanged']) == (0, 1, 1, 2)
+    assert [r['diametro'] for r in index.query(text='pino')] == [42.0]
+
+    # Custos diferentes: tudo é recalculado uma vez
+    changed = {'costs': dict(CONFIG['costs'], labor_brl_hour=80.0)}
+    assert index.refresh(changed)['updated'] == 3
+    assert index.refresh(changed)['unchanged'] == 3
+
+
+def test_queries_filter_and_sort(library):
+    folder, index = library
+    index.refresh(CONFIG)
+    assert [r['name'] for r in index.query(order_by='diametro')][:3] == ['Pino guia', 'Eixo bomba', 'Rolo laminador']
+    assert [r['name'] for r in index.query(order_by='diametro', descending=True)][:3] == ['Rolo laminador', 'Eixo bomba', 'Pino guia']
+    assert {r['name'] for r in index.query(powder='Stellite 6')} == {'Eixo bomba', 'Pino guia'}
+    assert [r['name'] for r in index.query(diameter_min=50, diameter_max=300)] == ['Eixo bomba', 'Rolo laminador']
+    assert [r['ordem_servico'] for r in index.query(text='os-20')] == ['OS-205']
+    assert [r['name'] for r in index.query(welding_mode='oscilacao')] == ['Rolo laminador']
+    rolo = index.query(text='rolo')[0]
+    assert rolo['file'] == os.path.join(str(folder), 'clientes', 'rolo.json')
+    assert index.powders() == ['Inconel 625', 'Stellite 6']
+    broken = index.query(text='quebrado')[0]
+    assert broken['error'] and broken['time_min'] is None
+    # Coluna de ordenação desconhecida cai no nome (não vai para o SQL)
+    assert index.query(order_by='name; DROP TABLE procedures')[0]['name'] == 'Eixo bomba'
+
+
+def test_analytic_estimate_without_program():
+    # Sem programa (nem em forma fechada) vale a conta analítica
+    estimate = estimate_process(_procedure('Eixo bomba', 'OS-100', 80.0, 'Stellite 6'), CONFIG)
+    circ = math.pi * 80.0
+    expected_min = 2 * (12.5 * math.hypot(circ, 4.0) + 10.0 + 2 * circ) / 300.0
+    assert estimate['time_min'] == pytest.approx(expected_min)
+    assert estimate['results']['estimated_time'] == f"{math.ceil(expected_min) // 60:02d}:{math.ceil(expected_min) % 60:02d}"
+    hours = expected_min / 60.0
+    powder_kg = (circ * 50.0 * 2 + circ * 10.0 * 2) * 0.16 / 1000.0
+    expected_cost = powder_kg * 100.0 + 12.0 * 0.06 * hours * 20.0 + hours * 80.0
+    assert estimate['total_cost'] == pytest.approx(expected_cost) and estimate['powder_kg'] == pytest.approx(powder_kg)
+
+
+def test_index_uses_program_totals(library):
+    # Tempo e custo da biblioteca são os do programa (os mesmos da janela e dos relatórios)
+    folder, index = library
+    index.refresh(CONFIG)
+    for text, params in (('Eixo', _procedure('Eixo bomba', 'OS-100', 80.0, 'Stellite 6')),
+                         ('Rolo', _procedure('Rolo laminador', 'OS-205', 250.0, 'Inconel 625', mode='oscilacao'))):
+        row = index.query(text=text)[0]
+        estimate = estimate_process(params, CONFIG, stats=estimate_program(params))
+        assert row['time_min'] == pytest.approx(estimate['time_min']) and row['total_cost'] == pytest.approx(estimate['total_cost'])
+        assert row['powder_kg'] == pytest.approx(estimate['powder_kg'])
+        generated = toolpath_statistics(parse_moves(GCodeGenerator().generate(dict(params))), params['afastamento_tocha'])
+        assert row['time_min'] == pytest.approx(generated['feed_time_min'], rel=2e-3)
+
+
+def test_estimator_version_recomputes_index(library, monkeypatch):
+    folder, index = library
+    index.refresh(CONFIG)
+    assert index.refresh(CONFIG)['unchanged'] == 4
+    monkeypatch.setattr(program_estimate, 'ESTIMATOR_VERSION', program_estimate.ESTIMATOR_VERSION + 1)
+    assert index.refresh(CONFIG)['updated'] == 4
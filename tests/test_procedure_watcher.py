@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# Testa o observador da pasta de procedimentos e a pré-geração de programas/miniaturas no cache
+
+import sys, os, json, time, threading
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+from procedure_library import ProcedureIndex, procedure_params
+from procedure_watcher import (ProcedureWatcher, PreviewCache, PreviewWarmer, default_cache_dir,
+                               program_key, warm_procedure)
+from mach3_profile import default_machine
+from TFM_GCODE import APP_VERSION, GCodeGenerator, TFM_GCODE as App
+from gcode_emitter import OutputFormat
+from generator_cases import make_params
+
+CONFIG = {'costs': {'powder_brl_kg': 100.0, 'gas_argon_brl_m3': 20.0, 'labor_brl_hour': 50.0, 'machine_brl_hour': 30.0}}
+
+
+def _local_cache(monkeypatch, tmp_path):
+    # Cache do usuário dentro do tmp_path (herdado também pelo processo do PreviewWarmer)
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'user-cache'))
+    monkeypatch.setenv('LOCALAPPDATA', str(tmp_path / 'user-cache'))
+
+
+def _write(path, params, mtime_ns=None):
+    path.write_text(json.dumps(params), encoding='utf-8')
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_poll_detects_changes_and_warms_new_files(tmp_path):
+    folder = tmp_path / 'procedures'; folder.mkdir()
+    old_ns = int((time.time() - 7 * 86400) * 1e9)
+    _write(folder / 'antigo.json', make_params('espiral', True, 'pequena', 1), mtime_ns=old_ns)
+    _write(folder / 'recente.json', make_params('espiral', True, 'pequena', 1))
+    warmed, changes = [], []
+    watcher = ProcedureWatcher(ProcedureIndex(str(folder), db_path=str(tmp_path / 'index.sqlite')), lambda: CONFIG, warm=warmed.append, on_change=changes.append)
+
+    first = watcher.poll_once()
+    assert first['changed'] == ['antigo.json', 'recente.json'] and first['stats']['added'] == 2
+    # Na primeira varredura só os recentes são pré-gerados
+    assert warmed == [str(folder / 'recente.json')]
+    assert watcher.poll_once() == {'changed': [], 'removed': [], 'stats': None}
+
+    _write(folder / 'novo.json', make_params('linear', True, 'pequena', 1), mtime_ns=old_ns)
+    (folder / 'recente.json').unlink()
+    res = watcher.poll_once()
+    assert res['changed'] == ['novo.json'] and res['removed'] == ['recente.json']
+    assert (res['stats']['added'], res['stats']['removed']) == (1, 1)
+    # Depois da primeira varredura, todo arquivo novo é pré-gerado (mesmo com mtime antigo)
+    assert warmed[-1] == str(folder / 'novo.json') and len(changes) == 2
+
+
+def test_warm_procedure_fills_program_and_thumbnail(monkeypatch, tmp_path):
+    _local_cache(monkeypatch, tmp_path)
+    folder = tmp_path / 'procedures'; folder.mkdir()
+    params = make_params('quadrada', False, 'pequena', 2)
+    _write(folder / 'os1.json', params)
+    cache_dir = default_cache_dir(str(folder))
+    # Cache no disco local do usuário, fora da pasta (compartilhada) de procedimentos
+    assert cache_dir.startswith(str(tmp_path / 'user-cache')) and os.path.basename(cache_dir).startswith('procedures-')
+    assert default_cache_dir(str(tmp_path / 'outra' / 'procedures')) != cache_dir
+
+    res = warm_procedure(str(folder / 'os1.json'), cache_dir, config=CONFIG)
+    assert res['generated'] and os.path.exists(res['thumbnail'])
+    with open(res['thumbnail'], 'rb') as f:
+        assert f.read(8) == b'\x89PNG\r\n\x1a\n'
+    # Mesma chave da interface: parâmetros da janela para o arquivo, perfil, formato de saída e versão do aplicativo
+    cache = PreviewCache(cache_dir)
+    saved = procedure_params(json.loads((folder / 'os1.json').read_text()), CONFIG)
+    key = program_key(saved, default_machine(), OutputFormat(), APP_VERSION)
+    # A linha de data do cabeçalho muda de um segundo para o outro
+    strip_date = lambda lines: [l for l in lines if not l.startswith('(Data:')]
+    assert strip_date(cache.load_program(key)) == strip_date(GCodeGenerator().generate(dict(saved)))
+    assert warm_procedure(str(folder / 'os1.json'), cache_dir, config=CONFIG)['generated'] is False
+    # Programa de outra versão do aplicativo ou com outras casas decimais não é servido
+    assert cache.load_program(program_key(saved, default_machine(), OutputFormat(), APP_VERSION + '-antiga')) is None
+    assert cache.load_program(program_key(saved, default_machine(), OutputFormat(decimals={'A': 4}), APP_VERSION)) is None
+
+
+class _Var:
+    """Variável de campo sem Tk (StringVar/BooleanVar)."""
+
+    def __init__(self, value=''):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class _Notebook:
+    def __init__(self, tabs):
+        self.tabs, self.current = tabs, tabs[0]
+
+    def select(self, tab=None):
+        if tab is not None:
+            self.current = tab
+        return self.current
+
+    def index(self, tab):
+        return self.tabs.index(tab)
+
+
+class _Notes(_Var):
+    def delete(self, *args):
+        self.value = ''
+
+    def insert(self, index, text):
+        self.value = text + self.value
+
+    def get(self, *args):
+        return self.value + '\n'
+
+
+def _window(config):
+    """Janela sem Tk: só os campos lidos por `_apply_procedure_data` e `_get_current_params`."""
+    app = App.__new__(App)
+    app.config = config
+    app.gcode_generator = GCodeGenerator()
+    app.params = {key: _Var(True) for key in ('compact_gcode', 'torch_retract_on_ignite', 'modal_compaction', 'arc_fitting')}
+    for key in ('nome_procedimento', 'diametro', 'comprimento', 'largura_cordao', 'sobreposicao', 'velocidade_de_deposicao',
+                'velocidade_oscilacao_mm_min', 'afastamento', 'lead_in', 'lead_out', 'direcao_soldagem', 'sentido_rotacao',
+                'corrente_arco', 'vazao_gas', 'alim_po', 'preaquecimento', 'num_camadas', 'espessura_camada',
+                'ordem_servico', 'arc_chord_tol', 'oscilacao_comprimento', 'deslocamento_angular_perc', 'tipo_oscilacao',
+                'osc_test_gran_x', 'taxa_deposicao_g_h', 'powder_name'):
+        app.params[key] = _Var('999')
+    app.tab_espiral, app.tab_osc = 'espiral', 'oscilacao'
+    app.notebook = _Notebook([app.tab_espiral, app.tab_osc])
+    app.notes_text = _Notes()
+    app._disable_param_traces = app._enable_param_traces = app.trigger_update = lambda: None
+    return app
+
+
+def test_legacy_procedure_is_served_from_cache(monkeypatch, tmp_path):
+    _local_cache(monkeypatch, tmp_path)
+    folder = tmp_path / 'procedures'; folder.mkdir()
+    # Procedimento antigo: modo oscilacao_linear, números como texto, sem os campos novos
+    legacy = {'nome_procedimento': 'Eixo antigo', 'welding_mode': 'oscilacao_linear', 'd_inicial': '60', 'comprimento_revestir': '40',
+              'largura_cordao': '8', 'sobreposicao': '30', 'taxa_de_deposicao': '150', 'afastamento_tocha': '10',
+              'num_camadas': '2', 'espessura_camada': '1.2', 'oscilacao_comprimento': '12', 'deslocamento_angular_perc': '40',
+              'notes': 'Revestimento de 2019 '}
+    _write(folder / 'antigo.json', legacy)
+    config = dict(CONFIG, active_powder='Stellite 6', powders=[{'name': 'Stellite 6', 'density_factor_g_mm2': 0.2, 'cost_brl_kg': 300.0}])
+    cache_dir = default_cache_dir(str(folder))
+    assert warm_procedure(str(folder / 'antigo.json'), cache_dir, config=config)['generated']
+
+    # Abrir o arquivo na janela (com campos de outro procedimento) dá a chave do programa pré-gerado
+    app = _window(config)
+    app._apply_procedure_data(json.loads((folder / 'antigo.json').read_text()))
+    params = app._get_current_params()
+    assert params['welding_mode'] == 'oscilacao' and params['oscillation_type'] == 'linear'
+    assert params['diametro'] == 60.0 and params['velocidade_de_deposicao'] == 150.0 and params['lead_in'] == 5.0
+    assert params['powder_factor'] == 0.2 and params['modal_compaction'] is False and params['notes'] == 'Revestimento de 2019'
+    assert params == procedure_params(legacy, config)
+    assert PreviewCache(cache_dir).load_program(app._program_key(params, default_machine())) is not None
+
+
+def test_cache_prune_drops_least_recently_used(tmp_path):
+    cache = PreviewCache(str(tmp_path / 'cache'), max_bytes=2500)
+    for i, key in enumerate(('a', 'b', 'c')):
+        cache.store_program(key, ['X' * 999])
+        os.utime(cache.program_path(key), ns=(i * 10**9, i * 10**9))
+    cache.load_program('a')
+    assert cache.prune() == 1
+    assert cache.load_program('b') is None and cache.load_program('a') is not None and cache.load_program('c') is not None
+
+
+def test_warmer_runs_in_background_process(monkeypatch, tmp_path):
+    _local_cache(monkeypatch, tmp_path)
+    folder = tmp_path / 'procedures'; folder.mkdir()
+    _write(folder / 'os2.json', make_params('espiral', True, 'pequena', 1))
+    done = threading.Event(); results = []
+    warmer = PreviewWarmer(default_cache_dir(str(folder)), config=lambda: CONFIG, on_done=lambda path, res: (results.append(res), done.set()))
+    try:
+        assert warmer.submit(str(folder / 'os2.json'))
+        assert not warmer.submit(str(folder / 'os2.json'))
+        assert done.wait(120)
+    finally:
+        warmer.close()
+    assert results[0]['generated'] and warmer.pending() == 0
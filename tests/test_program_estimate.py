@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# Testa os totais em forma fechada contra os do programa gerado, em todos os modos de soldagem
+
+import sys, os, math
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+from toolpath import parse_moves
+from toolpath_stats import toolpath_statistics
+from program_estimate import estimate_program
+from TFM_GCODE import GCodeGenerator
+from generator_cases import make_params
+
+MODES = ('espiral', 'linear', 'quadrada', 'quadrada_continua')
+TOTALS = ('feed_length', 'rapid_length', 'feed_time_min', 'deposition_length', 'deposition_time_min',
+          'deposition_area_mm2', 'rotations', 'helix_rotations', 'rpm', 'axial_pitch')
+
+
+def _assert_matches_generation(params, label):
+    lines = GCodeGenerator().generate(dict(params))
+    stats = toolpath_statistics(parse_moves(lines), params['afastamento_tocha'])
+    estimate = estimate_program(dict(params))
+    assert estimate['lines'] == len(lines), label
+    assert estimate['layers'] == stats['layers'] and estimate['axial_passes'] == stats['axial_passes'], label
+    # Diferenças só do arredondamento das coordenadas e do avanço no programa
+    for key in TOTALS:
+        assert math.isclose(estimate[key], stats[key], rel_tol=2e-3, abs_tol=1e-3), (label, key)
+    for travel in ('feed_travel', 'rapid_travel'):
+        for axis in ('X', 'Z', 'A'):
+            assert math.isclose(estimate[travel][axis], stats[travel][axis], rel_tol=2e-3, abs_tol=2e-2), (label, travel, axis)
+    for layer, turns in stats['rotations_per_layer'].items():
+        assert math.isclose(estimate['rotations_per_layer'][layer], turns, rel_tol=2e-3, abs_tol=1e-3), (label, layer)
+
+
+def test_estimate_matches_generated_program():
+    for mode in MODES:
+        for compact in (True, False):
+            for size in ('pequena', 'media'):
+                _assert_matches_generation(make_params(mode, compact, size, 3), (mode, compact, size))
+
+
+def test_estimate_matches_generation_variants():
+    # Direção, leads nulos, S-curve curta e oscilação que não cabe no comprimento
+    variants = ({'direcao_soldagem': 'direita_esquerda'}, {'lead_in': 0.0, 'lead_out': 0.0},
+                {'sentido_rotacao': 'anti_horaria', 'n_scurve_steps': 3}, {'comprimento_revestir': 5.0},
+                {'oscilacao_comprimento': 30.0, 'sobreposicao': 30.0})
+    for mode in MODES:
+        for extra in variants:
+            params = make_params(mode, False, 'pequena', 2)
+            params.update(extra)
+            _assert_matches_generation(params, (mode, extra))
+
+
+def test_estimate_of_large_program_without_generation():
+    params = make_params('quadrada_continua', False, 'media', 200)
+    estimate = estimate_program(params)
+    assert estimate['lines'] > 10_000_000 and estimate['layers'] == 200
+    # O diâmetro cresce a cada camada: camadas de cima têm mais linhas que as de baixo
+    assert estimate['lines'] > 2 * estimate_program(dict(params, num_camadas=100))['lines']
+    assert estimate_program(dict(params, welding_mode='outro')) is None
+
+
+if __name__ == "__main__":
+    test_estimate_matches_generated_program()
+    test_estimate_matches_generation_variants()
+    test_estimate_of_large_program_without_generation()
+    print("OK")
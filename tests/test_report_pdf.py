@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# Testa o relatório PDF em memória: vista 3D fora da tela, jobs da biblioteca e geração em lote sem arquivos temporários
+
+import sys, os, json, threading
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+
+import pytest
+from generator_cases import make_params
+from toolpath_view import render_toolpath_png
+import program_estimate
+from report_pdf import procedure_report_job, report_sections, generate_reports, report_digest
+from process_estimates import estimate_process
+
+CONFIG = {'costs': {'powder_brl_kg': 100.0, 'gas_argon_brl_m3': 20.0, 'labor_brl_hour': 50.0, 'machine_brl_hour': 30.0}}
+PNG_MAGIC = b'\x89PNG\r\n\x1a\n'
+
+
+def test_render_toolpath_png_offscreen():
+    for mode in ('espiral', 'linear'):
+        png = render_toolpath_png(make_params(mode, True, 'pequena', 2), dpi=60, view=(20, -60))
+        assert png.startswith(PNG_MAGIC) and len(png) > 1000
+
+
+def test_procedure_report_job_reads_text_numbers(tmp_path):
+    params = make_params('espiral', True, 'pequena', 2)
+    # Procedimentos antigos gravavam alguns números como texto
+    params.update({'diametro': '50.0', 'num_camadas': '2', 'notes': 'Pré-aquecer a peça.'})
+    src = tmp_path / 'eixo.json'
+    src.write_text(json.dumps(params), encoding='utf-8')
+    job = procedure_report_job(str(src), CONFIG, str(tmp_path / 'out'))
+    assert job['dest'] == str(tmp_path / 'out' / 'eixo.pdf')
+    assert job['params']['diametro'] == 50.0 and job['params']['num_camadas'] == 2
+    assert job['notes'] == 'Pré-aquecer a peça.' and job['results']['rotation_rpm']
+    left, right = report_sections(job['params'], job['results'], job['costs'])
+    assert dict(left)['Parâmetros Gerais']['Diâmetro'] == '50.00 mm'
+    assert dict(left)['Estimativa de Custo']['Custo Total'].startswith('$ ') and job['costs']['po'].endswith(' kg')
+    assert dict(right)['Resultados Calculados']['Tempo de Ciclo (sim.)'] == '-'
+
+
+def test_report_uses_program_totals_and_digest_follows_estimator(tmp_path, monkeypatch):
+    params = make_params('linear', True, 'pequena', 2)
+    src = tmp_path / 'rolo.json'
+    src.write_text(json.dumps(params), encoding='utf-8')
+    job = procedure_report_job(str(src), CONFIG, str(tmp_path / 'out'))
+    expected = estimate_process(params, CONFIG, stats=program_estimate.estimate_program(params))
+    assert job['results'] == expected['results'] and job['costs']['po'] == f"{expected['powder_kg']:.3f} kg"
+    # Outra versão do estimador muda os números: o relatório já gerado não vale mais
+    digest = report_digest(str(src), CONFIG)
+    assert report_digest(str(src), CONFIG) == digest
+    monkeypatch.setattr(program_estimate, 'ESTIMATOR_VERSION', program_estimate.ESTIMATOR_VERSION + 1)
+    assert report_digest(str(src), CONFIG) != digest
+
+
+def test_generate_reports_in_memory(tmp_path, monkeypatch):
+    pytest.importorskip('reportlab')
+    from reportlab.lib.utils import ImageReader
+    import report_pdf
+    monkeypatch.chdir(tmp_path)
+    out = tmp_path / 'out'; out.mkdir()
+    logo = tmp_path / 'logo.png'
+    logo.write_bytes(render_toolpath_png(make_params('espiral', True, 'pequena', 1), dpi=30))
+    jobs = [{'dest': str(out / f'{mode}.pdf'), 'params': make_params(mode, True, 'pequena', 2), 'results': {}, 'notes': 'Nota ' * 200}
+            for mode in ('espiral', 'quadrada')]
+    seen = []
+    outcome = generate_reports(jobs, logo_path=str(logo), progress=lambda done, total, job: seen.append(done))
+    assert [r['ok'] for r in outcome] == [True, True] and seen == [0, 1, 2]
+    assert all((out / f'{mode}.pdf').read_bytes().startswith(b'%PDF') for mode in ('espiral', 'quadrada'))
+    # Nada gravado na pasta de trabalho e nenhum temporário na saída
+    assert sorted(os.listdir(tmp_path)) == ['logo.png', 'out'] and sorted(os.listdir(out)) == ['espiral.pdf', 'quadrada.pdf']
+    # O logo é lido uma vez e reaproveitado
+    assert report_pdf.logo_reader(str(logo)) is report_pdf.logo_reader(str(logo))
+    assert isinstance(report_pdf.logo_reader(str(logo)), ImageReader)
+
+    cancel = threading.Event(); cancel.set()
+    outcome = generate_reports(jobs, cancel=cancel)
+    assert [r['error'] for r in outcome] == ['cancelado', 'cancelado']
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_render_toolpath_png_offscreen()
+    with tempfile.TemporaryDirectory() as d:
+        test_procedure_report_job_reads_text_numbers(pathlib.Path(d))
+    with tempfile.TemporaryDirectory() as d:
+        test_report_uses_program_totals_and_digest_follows_estimator(pathlib.Path(d), pytest.MonkeyPatch())
+    print("OK")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# Testa a gravação atômica do .tap (conteúdo, sidecar SHA-256, falha sem arquivo parcial) e a geração em fluxo
+
+import sys, os, json, hashlib
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+import tap_writer
+from tap_writer import write_tap, write_text_atomic, verify_tap, sidecar_path
+from TFM_GCODE import GCodeGenerator
+from generator_cases import make_params
+
+
+def _without_date(lines):
+    return [l for l in lines if not l.startswith("(Data:")]
+
+
+def test_write_tap_matches_join_and_sidecar(tmp_path):
+    lines = [f"G01 X{i:.3f} A{i * 0.5:.3f}" for i in range(20000)] + ["(ÂNGULO)", "%"]
+    path = str(tmp_path / 'prog.tap')
+    info = write_tap(path, iter(lines))
+    expected = "\n".join(lines).encode('utf-8')
+    with open(path, 'rb') as f:
+        assert f.read() == expected
+    assert info['lines'] == len(lines) and info['bytes'] == len(expected)
+    meta = json.load(open(sidecar_path(path), encoding='utf-8'))
+    assert meta['sha256'] == hashlib.sha256(expected).hexdigest() == info['sha256']
+    assert verify_tap(path) is True
+    with open(path, 'ab') as f:
+        f.write(b"\nM30")
+    assert verify_tap(path) is False
+    # Sem sidecar e arquivos vazios
+    assert write_tap(str(tmp_path / 'vazio.tap'), [], sidecar=False)['bytes'] == 0
+    assert verify_tap(str(tmp_path / 'vazio.tap')) is None
+    write_text_atomic(str(tmp_path / 'autoload.txt'), path)
+    assert open(tmp_path / 'autoload.txt', encoding='utf-8').read() == path
+    assert sorted(os.listdir(tmp_path)) == ['autoload.txt', 'prog.tap', 'prog.tap.json', 'vazio.tap']
+
+
+def test_failure_keeps_previous_file(tmp_path):
+    path = str(tmp_path / 'prog.tap')
+    write_tap(path, ["G00 X0"], sidecar=False)
+
+    def broken():
+        yield "G01 X1"
+        raise RuntimeError("falha na geração")
+    try:
+        write_tap(path, broken())
+        assert False, "erro não propagado"
+    except RuntimeError:
+        pass
+    assert open(path, encoding='utf-8').read() == "G00 X0"
+    assert os.listdir(tmp_path) == ['prog.tap']
+
+
+def test_generate_iter_streams_same_program(tmp_path):
+    gen = GCodeGenerator()
+    for mode in ('linear', 'quadrada', 'quadrada_continua'):
+        params = make_params(mode, False, 'pequena', 2)
+        stream = gen.generate_iter(make_params(mode, False, 'pequena', 2))
+        assert not isinstance(stream, list)
+        assert _without_date(list(stream)) == _without_date(gen.generate(params))
+    # Com pós-processamento o programa inteiro passa por generate
+    params = make_params('linear', False, 'pequena', 1, modal_compaction=True)
+    assert _without_date(list(gen.generate_iter(dict(params)))) == _without_date(gen.generate(dict(params)))
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
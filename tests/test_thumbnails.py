@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# Testa as miniaturas 3D: chave pelos parâmetros de geometria, cache em disco e renderização em processo separado
+
+import sys, os, threading
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+from generator_cases import make_params
+from thumbnails import thumbnail_key, ensure_thumbnail, ThumbnailRenderer
+
+PNG_MAGIC = b'\x89PNG\r\n\x1a\n'
+
+
+def test_key_depends_only_on_geometry():
+    params = make_params('espiral', True, 'pequena', 2)
+    key = thumbnail_key(params)
+    # Processo, nome e números gravados como texto não mudam o desenho
+    assert thumbnail_key(dict(params, corrente_arco=180.0, nome_procedimento='Outro', notes='x')) == key
+    assert thumbnail_key(dict(params, diametro=str(params['diametro']), num_camadas='2')) == key
+    assert thumbnail_key(dict(params, num_camadas=3)) != key
+    assert thumbnail_key(make_params('linear', True, 'pequena', 2)) != key
+
+
+def test_ensure_thumbnail_renders_once(tmp_path):
+    params = make_params('linear', True, 'pequena', 1)
+    path = ensure_thumbnail(params, str(tmp_path))
+    with open(path, 'rb') as f:
+        assert f.read(8) == PNG_MAGIC
+    mtime = os.stat(path).st_mtime_ns
+    os.utime(path, ns=(0, 0))
+    # Em cache: não renderiza de novo (só marca como usada)
+    assert ensure_thumbnail(dict(params, corrente_arco=99.0), str(tmp_path)) == path
+    assert os.listdir(tmp_path) == [os.path.basename(path)] and os.stat(path).st_mtime_ns >= mtime
+
+
+def test_renderer_runs_in_background_process(tmp_path):
+    renderer = ThumbnailRenderer(str(tmp_path))
+    params = make_params('espiral', True, 'pequena', 1)
+    done = threading.Event(); got = []
+    try:
+        assert renderer.cached(params) is None
+        assert renderer.request(params, callback=got.append) is None
+        # Pedido repetido enquanto renderiza: espera o mesmo resultado (callbacks na ordem dos pedidos)
+        assert renderer.request(params, callback=lambda p: (got.append(p), done.set())) is None
+        assert done.wait(120)
+        assert len(got) == 2 and got[0] == got[1] and os.path.exists(got[0])
+        assert renderer.pending() == 0
+        assert renderer.request(params) == got[0] == renderer.cached(params)
+    finally:
+        renderer.close()
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_key_depends_only_on_geometry()
+    for test in (test_ensure_thumbnail_renders_once, test_renderer_runs_in_background_process):
+        with tempfile.TemporaryDirectory() as d:
+            test(pathlib.Path(d))
+    print("OK")
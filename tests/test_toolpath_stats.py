@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# Testa as estatísticas do percurso sobre a tabela de movimentos e a estimativa do painel alimentada por elas
+
+import sys, os, math
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+from toolpath import parse_moves
+from toolpath_stats import toolpath_statistics
+from process_estimates import estimate_process
+from TFM_GCODE import GCodeGenerator
+from generator_cases import make_params
+
+CONFIG = {'costs': {'powder_brl_kg': 100.0, 'gas_argon_brl_m3': 20.0, 'labor_brl_hour': 50.0, 'machine_brl_hour': 30.0}}
+
+
+def test_statistics_of_small_program():
+    lines = ["(--- CAMADA 1 ---)", "G00 Z67", "G00 X0 A0", "G01 F100 Z37", "G01 F360 A360",
+             "G01 F100 X10 A720", "G00 Z67", "M30"]
+    stats = toolpath_statistics(parse_moves(lines), standoff=12.0)
+    helix = math.hypot(10.0, 360.0)
+    assert stats['layers'] == 1 and stats['moves'] == 5
+    assert stats['feed_travel'] == {'X': 10.0, 'Z': 30.0, 'A': 720.0}
+    assert stats['rapid_travel']['Z'] == 97.0
+    assert math.isclose(stats['feed_time_min'], 0.3 + 1.0 + helix / 100.0)
+    # Na superfície: raio da camada = Z − afastamento = 25 mm
+    circ = 2.0 * math.pi * 25.0
+    assert math.isclose(stats['deposition_length'], circ + math.hypot(10.0, circ))
+    assert math.isclose(stats['deposition_area_mm2'], circ * 10.0)
+    assert stats['rotations'] == 2.0 and stats['helix_rotations'] == 1.0 and stats['rotations_per_layer'] == {0: 2.0}
+    assert math.isclose(stats['rpm'], 2.0 / (1.0 + helix / 100.0))
+    assert stats['axial_passes'] == 1 and stats['axial_pitch'] == 10.0
+
+
+def test_statistics_follow_generated_program():
+    # Espiral: hélice com o passo do cordão sobre comprimento + leads, mais as voltas inicial e final
+    params = make_params('espiral', False, 'pequena', 2)
+    stats = toolpath_statistics(parse_moves(GCodeGenerator().generate(dict(params))), params['afastamento_tocha'])
+    passo = params['largura_cordao'] * (1.0 - params['sobreposicao'] / 100.0)
+    turns = (params['comprimento_revestir'] + params['lead_in'] + params['lead_out']) / passo
+    assert math.isclose(stats['axial_pitch'], passo) and math.isclose(stats['helix_rotations'], 2 * turns)
+    assert all(math.isclose(v, turns + 2.0) for v in stats['rotations_per_layer'].values())
+    # Oscilação: um passe por passo axial, espaçados de comprimento × sobreposição
+    for mode in ('linear', 'quadrada', 'quadrada_continua'):
+        params = make_params(mode, True, 'pequena', 2)
+        stats = toolpath_statistics(parse_moves(GCodeGenerator().generate(dict(params))), params['afastamento_tocha'])
+        assert stats['axial_passes'] == 2 * 6 and math.isclose(stats['axial_pitch'], 10.0), mode
+        assert stats['deposition_length'] > 0 and stats['feed_time_min'] > stats['deposition_time_min'] > 0
+
+
+def test_estimate_uses_program_statistics():
+    params = make_params('quadrada', True, 'pequena', 2)
+    params.update({'powder_factor': 0.16, 'vazao_gas': 10.0})
+    stats = toolpath_statistics(parse_moves(GCodeGenerator().generate(dict(params))), params['afastamento_tocha'])
+    estimate = estimate_process(params, CONFIG, formulas={}, stats=stats)
+    assert math.isclose(estimate['time_min'], stats['feed_time_min'])
+    assert math.isclose(estimate['powder_kg'], stats['deposition_area_mm2'] * 0.16 / 1000.0)
+    assert estimate['results']['total_rotations'] == '6.00 (passos axiais)'
+    assert estimate['results']['helix_pitch'] == '10.000 (axial)'
+    # Sem programa: conta analítica
+    assert estimate_process(params, CONFIG, formulas={})['time_min'] != estimate['time_min']
+    assert estimate_process(dict(params, welding_mode='outro'), CONFIG, stats=stats) is None
+
+
+if __name__ == "__main__":
+    test_statistics_of_small_program()
+    test_statistics_follow_generated_program()
+    test_estimate_uses_program_statistics()
+    print("OK")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# Testa a atualização contra um servidor HTTP local: download em blocos com retomada (Range/If-Range) e SHA-256,
+# e o feed latest.json com cache e requisições condicionais
+
+import sys, os, json, hashlib, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+import pytest
+from updater import download, partial_path, DownloadError, DownloadCancelled, FeedClient
+
+PAYLOAD = bytes(range(256)) * 4096  # 1 MiB
+SHA = hashlib.sha256(PAYLOAD).hexdigest()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        srv = self.server
+        srv.requests.append(dict(self.headers))
+        body, etag = srv.payload, srv.etag
+        start = 0
+        rng = self.headers.get('Range')
+        if rng and srv.honor_range and self.headers.get('If-Range', etag) == etag:
+            start = int(rng.split('=')[1].split('-')[0])
+            if start >= len(body):
+                self.send_response(416); self.send_header('Content-Range', f"bytes */{len(body)}"); self.end_headers(); return
+            self.send_response(206); self.send_header('Content-Range', f"bytes {start}-{len(body) - 1}/{len(body)}")
+        else:
+            self.send_response(200)
+        data = body[start:]
+        self.send_header('Content-Length', str(len(data))); self.send_header('ETag', etag); self.end_headers()
+        if srv.cut_after is not None:
+            # Simula queda da conexão no meio da transferência
+            self.wfile.write(data[:srv.cut_after]); self.wfile.flush()
+            srv.cut_after = None
+            self.close_connection = True
+            return
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    srv.payload, srv.etag, srv.honor_range, srv.cut_after, srv.requests = PAYLOAD, '"v1"', True, None, []
+    thread = threading.Thread(target=srv.serve_forever, daemon=True); thread.start()
+    srv.url = f"http://127.0.0.1:{srv.server_address[1]}/setup.exe"
+    yield srv
+    srv.shutdown(); srv.server_close()
+
+
+def test_download_streams_in_chunks_with_progress(server, tmp_path):
+    dest = str(tmp_path / 'setup.exe')
+    seen = []
+    res = download(server.url, dest, sha256=SHA, progress=lambda done, total: seen.append((done, total)), chunk_size=64 * 1024)
+    assert res == {'path': dest, 'bytes': len(PAYLOAD), 'sha256': SHA, 'resumed': False}
+    assert open(dest, 'rb').read() == PAYLOAD and not os.path.exists(partial_path(dest))
+    assert seen[0] == (0, len(PAYLOAD)) and seen[-1] == (len(PAYLOAD), len(PAYLOAD)) and len(seen) == 17
+
+
+def test_interrupted_download_resumes_with_range(server, tmp_path):
+    dest = str(tmp_path / 'setup.exe')
+    server.cut_after = 300_000
+    with pytest.raises(DownloadError):
+        download(server.url, dest, sha256=SHA)
+    assert os.path.getsize(partial_path(dest)) == 300_000 and not os.path.exists(dest)
+    res = download(server.url, dest, sha256=SHA)
+    assert res['resumed'] and res['sha256'] == SHA and open(dest, 'rb').read() == PAYLOAD
+    assert server.requests[-1]['Range'] == 'bytes=300000-' and server.requests[-1]['If-Range'] == '"v1"'
+
+
+def test_changed_file_or_ignored_range_restarts(server, tmp_path):
+    dest = str(tmp_path / 'setup.exe')
+    cancel = threading.Event()
+    with pytest.raises(DownloadCancelled):
+        download(server.url, dest, progress=lambda done, total: done > 0 and cancel.set(), cancel=cancel, chunk_size=100_000)
+    assert os.path.getsize(partial_path(dest)) == 100_000
+    # Novo instalador no servidor: If-Range não confere e a resposta vem inteira
+    server.payload, server.etag = PAYLOAD[::-1], '"v2"'
+    res = download(server.url, dest, sha256=hashlib.sha256(PAYLOAD[::-1]).hexdigest())
+    assert not res['resumed'] and open(dest, 'rb').read() == PAYLOAD[::-1]
+
+    os.remove(dest); server.honor_range = False; server.cut_after = 1000
+    with pytest.raises(DownloadError):
+        download(server.url, dest)
+    assert download(server.url, dest)['bytes'] == len(PAYLOAD)
+
+
+def test_hash_mismatch_discards_download(server, tmp_path):
+    dest = str(tmp_path / 'setup.exe')
+    with pytest.raises(DownloadError, match='integridade'):
+        download(server.url, dest, sha256='0' * 64)
+    assert not os.path.exists(dest) and not os.path.exists(partial_path(dest))
+
+
+class _FeedHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        srv = self.server
+        srv.requests.append(dict(self.headers))
+        if self.headers.get('If-None-Match') == srv.etag:
+            self.send_response(304); self.end_headers(); return
+        body = json.dumps(srv.feed).encode('utf-8')
+        self.send_response(200); self.send_header('ETag', srv.etag)
+        self.send_header('Last-Modified', 'Mon, 05 Oct 2026 10:00:00 GMT')
+        self.send_header('Content-Length', str(len(body))); self.end_headers()
+        self.wfile.write(body)
+
+
+def test_feed_client_caches_and_sends_conditional_requests(tmp_path):
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), _FeedHandler)
+    srv.feed, srv.etag, srv.requests = {'version': '1.1', 'url': 'http://x/setup.exe'}, '"f1"', []
+    thread = threading.Thread(target=srv.serve_forever, daemon=True); thread.start()
+    url = f"http://127.0.0.1:{srv.server_address[1]}/latest.json"
+    cache = str(tmp_path / 'cache' / 'update_feed.json')
+    try:
+        client = FeedClient(url, cache, min_interval_s=3600)
+        first = client.fetch(now=1000.0)
+        assert first['status'] == 'updated' and first['data']['version'] == '1.1'
+        # Dentro do intervalo mínimo: nenhuma requisição
+        assert client.fetch(now=2000.0)['status'] == 'cached' and len(srv.requests) == 1
+        # Depois do intervalo (ou forçado): requisição condicional, 304 mantém o feed em cache
+        res = FeedClient(url, cache, min_interval_s=3600).fetch(now=5000.0)
+        assert res == {'data': first['data'], 'status': 'not_modified', 'checked_at': 5000.0}
+        assert srv.requests[-1]['If-None-Match'] == '"f1"' and srv.requests[-1]['If-Modified-Since'].startswith('Mon, 05 Oct 2026')
+        srv.feed, srv.etag = {'version': '1.2', 'url': 'http://x/setup.exe'}, '"f2"'
+        assert client.fetch(force=True, now=5001.0)['data']['version'] == '1.2'
+    finally:
+        srv.shutdown(); srv.server_close()
+    # Sem rede: último feed em cache, sem esperar além do timeout
+    offline = FeedClient(url, cache, min_interval_s=0, timeout=1).fetch(now=9000.0)
+    assert offline['status'] == 'offline' and offline['data']['version'] == '1.2'
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# Testa a renderização sob demanda das abas do visualizador e o cache de G-code
+
+import sys, os, threading
+# Ajuste do sys.path para funcionar dentro da pasta tests
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src', 'app'))
+
+from TFM_GCODE import TFM_GCODE, GCodeGenerator
+
+
+class _CountingApp(TFM_GCODE):
+    """Substitui os desenhos reais por contadores."""
+    def __init__(self):
+        self.calls = []
+        self._param_version = 0
+        self._tab_rendered_version = {}
+        self._gcode_cache_lock = threading.Lock()
+        self._gcode_cache_key = None
+        self._gcode_cache_lines = None
+        self.gcode_generator = GCodeGenerator()
+
+    def _update_temporal_plot(self): self.calls.append(1)
+    def _update_statistics_plot(self): self.calls.append(3)
+
+
+def test_tab_renders_once_per_param_version():
+    app = _CountingApp()
+    assert app._render_visualizer_tab(1) is True
+    # Mesma versão: volta à aba sem recalcular
+    assert app._render_visualizer_tab(1) is False
+    app._param_version += 1
+    # Outra aba só é calculada quando solicitada
+    assert app._render_visualizer_tab(3) is True
+    assert app._render_visualizer_tab(1) is True
+    assert app._render_visualizer_tab(1, force=True) is True
+    assert app.calls == [1, 3, 1, 1]
+    assert app._render_visualizer_tab(99) is False
+
+
+def test_gcode_cache_reuses_output():
+    app = _CountingApp()
+    params = {
+        'welding_mode': 'espiral', 'diametro': 50.0, 'comprimento_revestir': 30.0,
+        'velocidade_soldagem': 120.0, 'largura_cordao': 8.0, 'sobreposicao': 40.0,
+        'num_camadas': 1, 'espessura_camada': 2.0, 'afastamento_tocha': 12.0, 'lead_in': 5.0, 'lead_out': 5.0,
+    }
+    first = app._generate_gcode_cached(dict(params))
+    assert first
+    assert app._generate_gcode_cached(dict(params)) is first
+    changed = dict(params, comprimento_revestir=40.0)
+    assert app._generate_gcode_cached(changed) is not first
+
+
+if __name__ == "__main__":
+    test_tab_renders_once_per_param_version()
+    test_gcode_cache_reuses_output()
+    print("OK")